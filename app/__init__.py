@@ -14,6 +14,7 @@ from logging.handlers import RotatingFileHandler
 from flask_caching import Cache
 import logging.config
 import re
+import threading
 from markupsafe import Markup
 
 # Отключаем логирование SQLAlchemy на уровне модуля
@@ -22,8 +23,18 @@ logging.getLogger('sqlalchemy.pool').setLevel(logging.WARNING)
 logging.getLogger('sqlalchemy.dialects').setLevel(logging.WARNING)
 logging.getLogger('sqlalchemy.orm').setLevel(logging.WARNING)
 
+class PooledSQLAlchemy(SQLAlchemy):
+    """SQLAlchemy, который берет engine из общего для процесса PoolManager"""
+
+    def _make_engine(self, bind_key, options, app):
+        from sqlalchemy.engine import make_url
+        from app.utils.db_pool import pool_manager
+        options = dict(options)
+        url = make_url(options.pop('url'))
+        return pool_manager.get_engine(url, options, app)
+
 # Инициализация расширений
-db = SQLAlchemy()
+db = PooledSQLAlchemy()
 migrate = Migrate()
 login_manager = LoginManager()
 jwt = JWTManager()
@@ -70,12 +81,46 @@ def create_app(config_name='default'):
     
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models.user import User
-        return User.query.get(int(user_id))
+        # Снимок пользователя кэшируется в процессе на USER_CACHE_TTL секунд
+        from app.utils.user_cache import load_cached_user
+        return load_cached_user(user_id)
     
     # Добавим настройку логирования
     setup_logging(app)
     
+    # Модели spaCy до fork worker-процессов (gunicorn --preload): память моделей общая
+    if app.config.get('NLP_PRELOAD'):
+        from app.utils.resume_nlp import preload_models
+        app.logger.info(f"Загружены модели spaCy: {', '.join(preload_models(app.config))}")
+    
+    # Модель векторов резюме для семантического поиска кандидатов - так же до fork
+    if app.config.get('EMBEDDING_PRELOAD'):
+        from app.utils.candidate_search import preload
+        app.logger.info(f"Загружена модель векторов резюме: {preload(app.config)}")
+    
+    # Периодические задачи (только если SCHEDULER_ENABLED)
+    from app.utils.scheduler import init_scheduler
+    init_scheduler(app)
+    
+    return app
+
+# Экземпляры приложения для фоновых обработчиков (по одному на конфигурацию в процессе)
+_worker_apps = {}
+_worker_apps_lock = threading.Lock()
+
+def get_worker_app(config_name=None):
+    """
+    Возвращает экземпляр приложения для фоновых задач вне контекста запроса.
+    
+    create_app регистрирует blueprints и настраивает логирование, поэтому
+    приложение создается один раз на процесс и затем переиспользуется.
+    """
+    config_name = config_name or os.getenv('FLASK_ENV', 'default')
+    with _worker_apps_lock:
+        app = _worker_apps.get(config_name)
+        if app is None:
+            app = create_app(config_name)
+            _worker_apps[config_name] = app
     return app
 
 # Настройка логирования
@@ -130,7 +175,8 @@ def setup_logging(app):
     psycopg2_pool_logger.propagate = False  # Отключаем распространение логов
     
     # Настройка логгеров для наших модулей
-    for logger_name in ['app.utils.image_processor', 'app.utils.handwriting_recognizer', 'app.utils.form_analyzer']:
+    for logger_name in ['app.utils.image_processor', 'app.utils.handwriting_recognizer', 'app.utils.form_analyzer',
+                        'app.utils.local_ocr']:
         module_logger = logging.getLogger(logger_name)
         module_logger.handlers.clear()
         module_logger.setLevel(logging.INFO)
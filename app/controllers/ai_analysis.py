@@ -1,20 +1,44 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from flask import Blueprint, jsonify, request, current_app, render_template
+from flask import Blueprint, jsonify, request, current_app, render_template, url_for, Response, stream_with_context
 from flask_login import login_required, current_user
 from app import db
-from app.models import Candidate, Vacancy, SystemLog
-from app.utils.ai_service import request_ai_analysis, get_analysis_status
+from app.models import AnalysisJob, Candidate, Vacancy, SystemLog
+from app.utils.ai_service import get_analysis_status
+from app.utils.analysis_jobs import enqueue_analysis, wait_for_update, stream_job_events
 import json
 from app.utils.decorators import profile_time
 ai_analysis_bp = Blueprint('ai_analysis', __name__, url_prefix='/ai_analysis')
 
+
+def _job_visible(job_id):
+    """
+    Доступна ли задача текущему пользователю
+
+    HR видит задачи по кандидатам и подбору своих вакансий, администратор - все.
+    """
+    job = db.session.get(AnalysisJob, job_id)
+    if job is None:
+        return False
+    if current_user.role == 'admin':
+        return True
+    vacancy = job.vacancy if job.kind == AnalysisJob.KIND_REMATCH else (job.candidate.vacancy if job.candidate else None)
+    return vacancy is not None and vacancy.created_by == current_user.id
+
+
+def _job_not_found():
+    # Чужая задача неотличима от несуществующей
+    return jsonify({
+        'status': 'error',
+        'message': 'Задача анализа не найдена'
+    }), 404
+
 @ai_analysis_bp.route('/start/<int:candidate_id>', methods=['POST'])
 @profile_time
 @login_required
 def start_analysis(candidate_id):
-    """Запуск AI-анализа для кандидата"""
+    """Постановка AI-анализа кандидата в очередь (анализ выполняется в фоне)"""
     candidate = Candidate.query.get_or_404(candidate_id)
     
     # Проверяем, есть ли текст резюме
@@ -33,14 +57,16 @@ def start_analysis(candidate_id):
             ip_address=request.remote_addr
         )
         
-        # Запрос к API OpenAI
-        job_id = request_ai_analysis(candidate)
+        job = enqueue_analysis(candidate.id, current_user.id)
         
         return jsonify({
             'status': 'success',
-            'message': 'Анализ кандидата запущен',
-            'job_id': job_id
-        })
+            'message': 'Анализ кандидата поставлен в очередь',
+            'job_id': job.id,
+            'job_status': job.to_dict(),
+            'status_url': url_for('ai_analysis.check_status', job_id=job.id),
+            'events_url': url_for('ai_analysis.status_events', job_id=job.id)
+        }), 202
     
     except Exception as e:
         current_app.logger.error(f"Ошибка при запуске AI-анализа: {str(e)}")
@@ -62,9 +88,26 @@ def start_analysis(candidate_id):
 @profile_time
 @login_required
 def check_status(job_id):
-    """Проверка статуса AI-анализа по ID задачи"""
+    """
+    Проверка статуса AI-анализа по ID задачи
+    
+    Long-poll: с параметрами wait=<секунды> и progress=<известный прогресс>
+    ответ возвращается, когда прогресс изменится, задача завершится или
+    истечет время ожидания.
+    """
+    if not _job_visible(job_id):
+        return _job_not_found()
+    
     try:
-        status = get_analysis_status(job_id)
+        wait = min(request.args.get('wait', 0, type=float), current_app.config.get('ANALYSIS_LONG_POLL_MAX', 30))
+        if wait > 0:
+            job = wait_for_update(job_id, request.args.get('progress', type=int), timeout=wait)
+            status = job.to_dict() if job else None
+        else:
+            status = get_analysis_status(job_id)
+        
+        if status is None:
+            return _job_not_found()
         
         return jsonify({
             'status': 'success',
@@ -79,6 +122,22 @@ def check_status(job_id):
             'message': f'Ошибка при проверке статуса анализа: {str(e)}'
         }), 500
 
+@ai_analysis_bp.route('/status/<job_id>/events')
+@login_required
+def status_events(job_id):
+    """Подписка на изменения статуса AI-анализа (server-sent events)"""
+    if not _job_visible(job_id):
+        return _job_not_found()
+    
+    return Response(
+        stream_with_context(stream_job_events(job_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @ai_analysis_bp.route('/result/<int:candidate_id>')
 @profile_time
 @login_required
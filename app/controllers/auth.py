@@ -12,6 +12,7 @@ from functools import wraps
 from sqlalchemy import func, cast
 import sqlalchemy as sa
 from app.utils.decorators import profile_time
+from app.utils.user_cache import invalidate_user
 
 auth_bp = Blueprint('auth_bp', __name__, url_prefix='/auth')
 
@@ -208,6 +209,7 @@ def logout():
         ip_address=request.remote_addr
     )
     
+    invalidate_user(current_user.id)
     logout_user()
     return redirect(url_for('auth_bp.login'))
 
@@ -267,6 +269,7 @@ def reset_password(token):
     if form.validate_on_submit():
         user.set_password(form.password.data)
         db.session.commit()
+        invalidate_user(user.id)
         
         # Логирование успешного сброса пароля
         SystemLog.log(
@@ -1,29 +1,33 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, send_from_directory, abort, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort, current_app
 from flask_login import login_required, current_user
 from app import db
 from app.models import Candidate, Vacancy, SystemLog, Notification, C_Selection_Stage
 from app.forms.candidate import CandidateCommentForm
-from app.utils.ai_service import request_ai_analysis
+from app.utils.llm_dispatcher import chat_completion
+from app.utils.llm_providers import TASK_OCR, get_llm_client, llm_model
 from app.utils.email_service import send_status_change_notification
 from app.utils.decorators import profile_time
+from app.utils.file_serving import is_repeated_access
+from app.utils.storage import local_copy, reference_exists, resolve_reference
+from app.utils.previews import is_previewable, preview_pages, thumbnail_ready
+from app.utils.image_preprocessing import prepare_image_file, render_pdf_page, vision_options
 import os
+from contextlib import ExitStack
 from werkzeug.utils import secure_filename
 from datetime import datetime, timezone
 import json
 import logging
 from sqlalchemy import desc, func, cast
 import sqlalchemy as sa
-import fitz  # PyMuPDF для работы с PDF
-import numpy as np
-from openai import OpenAI
-import base64
-import docx
 from app.models.c_rejection_reason import C_Rejection_Reason
 from app.models.user_selection_stages import User_Selection_Stage
 from app.controllers.auth import hr_required
+from app.utils.skill_extractor import save_candidate_skills
+from app.utils.resume_structure import apply_structure_filters
+from app.utils.candidate_lists import list_query
 
 # Получаем логгер
 logger = logging.getLogger(__name__)
@@ -45,37 +49,8 @@ def index():
     # Получаем все вакансии HR-менеджера для фильтра
     vacancies = Vacancy.query.filter_by(created_by=current_user.id).all()
     
-    # Базовый запрос с дешифровкой полей email и phone
-    query = db.session.query(
-        Candidate.id,
-        Candidate.vacancy_id,
-        Candidate.full_name,
-        func.pgp_sym_decrypt(
-            cast(Candidate._email, sa.LargeBinary),
-            current_app.config['ENCRYPTION_KEY'],
-            current_app.config.get('ENCRYPTION_OPTIONS', '')
-        ).label('email'),
-        func.pgp_sym_decrypt(
-            cast(Candidate._phone, sa.LargeBinary),
-            current_app.config['ENCRYPTION_KEY'],
-            current_app.config.get('ENCRYPTION_OPTIONS', '')
-        ).label('phone'),
-        Candidate.created_at,
-        Candidate.ai_match_percent,
-        Candidate.stage_id,
-        Vacancy.title.label('vacancy_title'),
-        Vacancy.id.label('vacancy_id'),
-        C_Selection_Stage.name.label('stage_name'),
-        C_Selection_Stage.color.label('stage_color'),
-    ).join(
-        Vacancy, Candidate.vacancy_id == Vacancy.id
-    ).join(
-        Candidate.user_selection_stage
-    ).join(
-        C_Selection_Stage, Candidate.user_selection_stage.has(stage_id=C_Selection_Stage.id)
-    ).filter(
-        Vacancy.created_by == current_user.id
-    )
+    # Колонки списка без резюме, контактов и JSON AI-анализа
+    query = list_query().filter(Vacancy.created_by == current_user.id)
     
     # Применяем фильтр по вакансии
     if vacancy_id:
@@ -100,10 +75,19 @@ def index():
         if candidate.stage_id in kanban_board:
             kanban_board[candidate.stage_id].append(candidate)
     
+    # Миниатюры резюме для карточек (JPEG в несколько КБ вместо исходного файла);
+    # для старых резюме без превью построение идет в фоне
+    resume_thumbnails = {
+        candidate.id: url_for('files.preview_file', filename=os.path.basename(candidate.resume_path))
+        for candidate in candidates
+        if thumbnail_ready(candidate)
+    }
+    
     return render_template(
         'candidates/index.html',
         candidates=candidates,
         kanban_board=kanban_board,
+        resume_thumbnails=resume_thumbnails,
         selection_stages=selection_stages,
         vacancies=vacancies,
         vacancy_id=vacancy_id,
@@ -125,6 +109,7 @@ def view(id):
         Candidate.vacancy_answers,
         Candidate.soft_answers,
         Candidate.resume_path,
+        Candidate.resume_preview_pages,
         Candidate.resume_text,
         Candidate.cover_letter,
         Candidate.ai_match_percent,
@@ -265,8 +250,12 @@ def view(id):
     
     # Определяем путь к файлу резюме (если есть)
     resume_file_url = None
+    resume_filename = None
+    resume_preview_pages = []
     if candidate_data.resume_path:
-        resume_file_url = url_for('files.download_file', filename=os.path.basename(candidate_data.resume_path))
+        resume_filename = os.path.basename(candidate_data.resume_path)
+        resume_file_url = url_for('files.download_file', filename=resume_filename)
+        resume_preview_pages = preview_pages(candidate_data)
     
     return render_template(
         'candidates/view.html',
@@ -274,6 +263,9 @@ def view(id):
         stages=stages,
         rejection_reasons=rejection_reasons,
         resume_file_url=resume_file_url,
+        resume_filename=resume_filename,
+        resume_previewable=is_previewable(candidate_data.resume_path),
+        resume_preview_pages=resume_preview_pages,
         title=f'Кандидат: {candidate_data.full_name}'
     )
 
@@ -393,53 +385,35 @@ def download_resume(id):
         flash('Резюме не найдено', 'danger')
         return redirect(url_for('candidates.view', id=candidate.id))
     
-    # Определяем директорию для загрузки файлов из конфигурации
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    filename = os.path.basename(candidate.resume_path)
-    
-    # Логирование
-    SystemLog.log(
-        event_type="resume_download",
-        description=f"Скачивание резюме кандидата ID={candidate.id}",
-        user_id=current_user.id,
-        ip_address=request.remote_addr
-    )
+    # Определяем хранилище и ключ файла по ссылке из БД (путь или s3://...)
+    storage, key = resolve_reference(candidate.resume_path)
+    if storage is None or not storage.exists(key):
+        flash('Файл резюме не найден', 'danger')
+        return redirect(url_for('candidates.view', id=candidate.id))
+    filename = os.path.basename(key)
     
-    return send_from_directory(
-        upload_folder, 
-        filename, 
+    response = storage.send(
+        key, 
         as_attachment=True, 
         download_name=f"resume_{candidate.full_name}_{datetime.now().strftime('%Y%m%d')}{os.path.splitext(filename)[1]}"
     )
+    
+    # Логирование (кроме 304 и докачки частей файла)
+    if not is_repeated_access(response):
+        SystemLog.log(
+            event_type="resume_download",
+            description=f"Скачивание резюме кандидата ID={candidate.id}",
+            user_id=current_user.id,
+            ip_address=request.remote_addr
+        )
+    
+    return response
 
 @candidates_bp.route('/<int:id>/start_analysis', methods=['POST'])
 @profile_time
 @login_required
 def start_analysis(id):
-    """Запуск AI-анализа кандидата"""
-    # Получаем данные кандидата с дешифровкой
-    candidate_data = db.session.query(
-        Candidate.id,
-        Candidate.vacancy_id,
-        Candidate.full_name,
-        Candidate.resume_text,
-        Candidate.base_answers,
-        Candidate.vacancy_answers,
-        Candidate.soft_answers,
-        Candidate.cover_letter,
-        func.pgp_sym_decrypt(
-            cast(Candidate._email, sa.LargeBinary),
-            current_app.config['ENCRYPTION_KEY'],
-            current_app.config.get('ENCRYPTION_OPTIONS', '')
-        ).label('email'),
-        func.pgp_sym_decrypt(
-            cast(Candidate._phone, sa.LargeBinary),
-            current_app.config['ENCRYPTION_KEY'],
-            current_app.config.get('ENCRYPTION_OPTIONS', '')
-        ).label('phone')
-    ).filter(Candidate.id == id).first_or_404()
-    
-    # Получаем обычную модель для обновления и связей
+    """Постановка AI-анализа кандидата в очередь (анализ выполняется в фоне)"""
     candidate = Candidate.query.get_or_404(id)
     vacancy = Vacancy.query.get(candidate.vacancy_id)
     
@@ -457,7 +431,6 @@ def start_analysis(id):
         flash('Нет текста резюме для анализа. Загрузите резюме и попробуйте снова.', 'warning')
         return redirect(url_for('candidates.view', id=candidate.id))
     
-    # Запускаем анализ с использованием OpenAI API
     try:
         # Логирование начала анализа
         SystemLog.log(
@@ -467,49 +440,22 @@ def start_analysis(id):
             ip_address=request.remote_addr
         )
         
-        # Добавляем расшифрованные данные в объект кандидата для передачи в AI API
-        candidate.email = candidate_data.email
-        candidate.phone = candidate_data.phone
-        # Добавляем остальные данные из запроса
-        candidate.base_answers = candidate_data.base_answers
-        candidate.vacancy_answers = candidate_data.vacancy_answers
-        candidate.soft_answers = candidate_data.soft_answers
-        candidate.cover_letter = candidate_data.cover_letter
-        
-        # Логируем данные для диагностики
-        current_app.logger.info(f"Данные кандидата для анализа: ID={candidate.id}, Email={candidate.email}, Vacancy ID={candidate.vacancy_id}")
-        current_app.logger.info(f"Размер текста резюме: {len(candidate.resume_text) if candidate.resume_text else 0} символов")
-        
-        # Запрос к OpenAI API
-        job_id = request_ai_analysis(candidate)
-        
-        if job_id:
-            # # Создаем уведомление о завершении анализа
-            # notification = Notification(
-            #     candidate_id=candidate.id,
-            #     type="ai_analysis_completed",
-            #     message=f"AI-анализ для кандидата {candidate.full_name} завершен",
-            #     created_at=datetime.datetime.now()
-            # )
-            # db.session.add(notification)
-            db.session.commit()
-            
-            # Возвращаем JSON ответ для AJAX или перенаправляем
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return jsonify({
-                    'status': 'success',
-                    'message': 'Анализ кандидата успешно завершен',
-                    'job_id': job_id,
-                    'redirect_url': url_for('candidates.view', id=candidate.id)
-                }), 200
-            
-            flash('Анализ кандидата успешно завершен', 'success')
-        else:
-            # Ошибка при запуске анализа
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-                return jsonify({'status': 'error', 'message': 'Произошла ошибка при анализе кандидата. Проверьте настройки API ключа.'}), 500
-            
-            flash('Произошла ошибка при анализе кандидата. Проверьте настройки API ключа.', 'danger')
+        # Анализ выполняется в пуле потоков; страница следит за задачей
+        # через long-poll GET /ai_analysis/status/<job_id>
+        from app.utils.analysis_jobs import enqueue_analysis
+        job = enqueue_analysis(candidate.id, current_user.id)
+        
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return jsonify({
+                'status': 'success',
+                'message': 'Анализ кандидата поставлен в очередь',
+                'job_id': job.id,
+                'job_status': job.to_dict(),
+                'status_url': url_for('ai_analysis.check_status', job_id=job.id),
+                'redirect_url': url_for('candidates.view', id=candidate.id)
+            }), 202
+        
+        flash('Анализ кандидата поставлен в очередь. Результаты появятся на странице после завершения.', 'info')
             
     except Exception as e:
         # Логирование ошибки
@@ -606,34 +552,8 @@ def api_candidates():
     vacancy_id = request.args.get('vacancy_id', type=int)
     status_id = request.args.get('status_id', type=int)
     
-    # Базовый запрос с дешифровкой полей email и phone
-    query = db.session.query(
-        Candidate.id,
-        Candidate.vacancy_id,
-        Candidate.full_name,
-        func.pgp_sym_decrypt(
-            cast(Candidate._email, sa.LargeBinary),
-            current_app.config['ENCRYPTION_KEY'],
-            current_app.config.get('ENCRYPTION_OPTIONS', '')
-        ).label('email'),
-        func.pgp_sym_decrypt(
-            cast(Candidate._phone, sa.LargeBinary),
-            current_app.config['ENCRYPTION_KEY'],
-            current_app.config.get('ENCRYPTION_OPTIONS', '')
-        ).label('phone'),
-        Candidate.created_at,
-        Candidate.ai_match_percent,
-        Candidate.stage_id,
-        Vacancy.title.label('vacancy_title'),
-        C_Selection_Stage.name.label('status_name'),
-        C_Selection_Stage.color.label('status_color')
-    ).join(
-        Vacancy, Candidate.vacancy_id == Vacancy.id
-    ).join(
-        C_Selection_Stage, Candidate.stage_id == C_Selection_Stage.id
-    ).filter(
-        Vacancy.created_by == current_user.id
-    )
+    # Колонки списка без резюме, контактов и JSON AI-анализа
+    query = list_query().filter(Vacancy.created_by == current_user.id)
     
     # Применяем фильтры
     if vacancy_id:
@@ -642,6 +562,16 @@ def api_candidates():
     if status_id:
         query = query.filter(Candidate.stage_id == status_id)
     
+    # Фильтры по опыту, образованию и языкам (таблицы проекции резюме)
+    query = apply_structure_filters(
+        query,
+        min_experience=request.args.get('min_experience', type=float),
+        education_level=request.args.get('education_level', type=int),
+        language=request.args.get('language'),
+        min_language_level=request.args.get('language_level'),
+        min_trust_score=request.args.get('min_trust_score', type=int)
+    )
+    
     # Выполняем запрос
     candidates = query.order_by(Candidate.created_at.desc()).all()
     
@@ -652,14 +582,90 @@ def api_candidates():
             'id': candidate.id,
             'full_name': candidate.full_name,
             'vacancy': candidate.vacancy_title,
-            'status': candidate.status_name if candidate.status_name else 'Заявка подана',
-            'status_color': candidate.status_color,
+            'status': candidate.stage_name if candidate.stage_name else 'Заявка подана',
+            'status_color': candidate.stage_color,
             'created_at': candidate.created_at.strftime('%d.%m.%Y'),
-            'ai_match_percent': candidate.ai_match_percent or 0
+            'ai_match_percent': candidate.ai_match_percent or 0,
+            'total_experience_years': candidate.total_experience_years,
+            'resume_thumbnail_url': (
+                url_for('files.preview_file', filename=os.path.basename(candidate.resume_path))
+                if thumbnail_ready(candidate) else None
+            )
         })
     
     return jsonify(result)
 
+@candidates_bp.route('/api/search')
+@profile_time
+@login_required
+def api_search():
+    """
+    Семантический поиск по всей базе кандидатов (по всем вакансиям)
+    
+    Параметры: q - текст запроса («опыт с Kubernetes»), limit - количество
+    результатов (до 100). HR-менеджер ищет среди кандидатов своих вакансий.
+    """
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    if not query:
+        return jsonify({'error': 'Не указан текст запроса'}), 400
+    
+    # Кандидаты, доступные пользователю
+    candidate_ids = None
+    if current_user.role == 'hr':
+        candidate_ids = db.session.scalars(
+            sa.select(Candidate.id).join(Vacancy, Candidate.vacancy_id == Vacancy.id)
+            .where(Vacancy.created_by == current_user.id)
+        ).all()
+    
+    # numpy и модель векторов нужны только поиску: модуль не загружается при старте worker
+    from app.utils.candidate_search import search_candidates
+    try:
+        found = search_candidates(query, limit=limit, candidate_ids=candidate_ids)
+    except Exception as e:
+        current_app.logger.error(f"Ошибка семантического поиска кандидатов: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Поиск кандидатов недоступен'}), 503
+    if found.get('warming'):
+        return jsonify({'error': 'Индекс поиска загружается, повторите запрос через несколько секунд'}), 503
+    
+    similarity = dict(found['results'])
+    rows = db.session.query(
+        Candidate.id,
+        Candidate.full_name,
+        Candidate.created_at,
+        Candidate.ai_match_percent,
+        Vacancy.title.label('vacancy_title'),
+        C_Selection_Stage.name.label('status_name'),
+        C_Selection_Stage.color.label('status_color')
+    ).join(
+        Vacancy, Candidate.vacancy_id == Vacancy.id
+    ).outerjoin(
+        C_Selection_Stage, Candidate.stage_id == C_Selection_Stage.id
+    ).filter(
+        Candidate.id.in_(list(similarity))
+    ).all()
+    
+    # Порядок по близости к запросу
+    result = [{
+        'id': row.id,
+        'full_name': row.full_name,
+        'vacancy': row.vacancy_title,
+        'status': row.status_name if row.status_name else 'Заявка подана',
+        'status_color': row.status_color,
+        'created_at': row.created_at.strftime('%d.%m.%Y'),
+        'ai_match_percent': row.ai_match_percent or 0,
+        'similarity': round(similarity[row.id], 4),
+        'url': url_for('candidates.view', id=row.id)
+    } for row in sorted(rows, key=lambda row: similarity[row.id], reverse=True)]
+    
+    return jsonify({
+        'query': query,
+        'results': result,
+        'took_ms': found['took_ms'],
+        'indexed': found['indexed'],
+        'approximate': found['approximate']
+    })
+
 @candidates_bp.route('/<int:id>/reprocess_resume', methods=['POST'])
 @profile_time
 @login_required
@@ -677,24 +683,21 @@ def reprocess_resume(id):
         return redirect(url_for('candidates.list'))
     
     # Проверяем наличие резюме
-    if not candidate.resume_path or not os.path.exists(candidate.resume_path):
+    if not candidate.resume_path or not reference_exists(candidate.resume_path):
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return jsonify({'status': 'error', 'message': 'Резюме не найдено'}), 404
         flash('Резюме не найдено', 'danger')
         return redirect(url_for('candidates.view', id=id))
     
+    # Локальная копия файла (для S3 файл скачивается на время обработки)
+    resume_copy = ExitStack()
     try:
-        # Получаем API ключ из конфигурации или переменных окружения
-        api_key = current_app.config.get('OPENAI_API_KEY')
-        if not api_key:
-            api_key = os.environ.get('OPENAI_API_KEY')
-        
-        if not api_key or len(api_key.strip()) < 20:
+        # Клиент провайдера распознавания
+        client = get_llm_client(TASK_OCR)
+        if client is None:
             raise ValueError("OpenAI API ключ не найден или некорректен")
         
-        # Инициализируем клиент OpenAI
-        client = OpenAI(api_key=api_key)
-        
+        resume_file = resume_copy.enter_context(local_copy(candidate.resume_path))
         # Определяем расширение файла
         file_extension = os.path.splitext(candidate.resume_path)[1].lower()
         
@@ -703,7 +706,8 @@ def reprocess_resume(id):
             current_app.logger.info(f"Обрабатываем PDF-файл: {candidate.resume_path}")
             
             # Открываем PDF с помощью PyMuPDF
-            pdf_document = fitz.open(candidate.resume_path)
+            import fitz
+            pdf_document = fitz.open(resume_file)
             
             # Подготовка списка для хранения текста со всех страниц
             all_pages_text = []
@@ -713,18 +717,13 @@ def reprocess_resume(id):
                 # Получаем страницу
                 page = pdf_document[page_num]
                 
-                # Преобразуем страницу в изображение
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # Увеличиваем разрешение для лучшего распознавания
-                
-                # Конвертируем pixmap в формат, который можно отправить в OpenAI API
-                img_data = pix.tobytes("png")
-                
-                # Кодируем изображение в base64
-                img_base64 = base64.b64encode(img_data).decode('utf-8')
+                # Рендерим страницу сразу в разрешении, которое использует модель (оттенки серого, JPEG)
+                page_image = render_pdf_page(page, **vision_options())
                 
                 # Отправляем запрос к OpenAI API для извлечения текста из изображения
-                response = client.chat.completions.create(
-                    model="gpt-4o",
+                response = chat_completion(
+                    client,
+                    model=llm_model(TASK_OCR),
                     messages=[
                         {
                             "role": "system",
@@ -740,7 +739,7 @@ def reprocess_resume(id):
                                 {
                                     "type": "image_url",
                                     "image_url": {
-                                        "url": f"data:image/png;base64,{img_base64}"
+                                        "url": page_image.data_url
                                     }
                                 }
                             ]
@@ -762,45 +761,45 @@ def reprocess_resume(id):
         elif file_extension in ['.jpg', '.jpeg', '.png']:
             current_app.logger.info(f"Обрабатываем изображение: {candidate.resume_path}")
             
-            # Для изображений используем прямую отправку в API
-            with open(candidate.resume_path, "rb") as file:
-                image_data = file.read()
-                img_base64 = base64.b64encode(image_data).decode('utf-8')
-                
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "Ты специалист по распознаванию текста из резюме. Извлеки весь текст из предоставленного изображения."
-                        },
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": "Извлеки весь текст из этого резюме. Сохрани структуру и форматирование."
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/{file_extension[1:]};base64,{img_base64}"
-                                    }
+            # Поворот по EXIF, оттенки серого, выравнивание, уменьшение и сжатие
+            prepared_image = prepare_image_file(resume_file, **vision_options())
+            
+            response = chat_completion(
+                client,
+                model=llm_model(TASK_OCR),
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "Ты специалист по распознаванию текста из резюме. Извлеки весь текст из предоставленного изображения."
+                    },
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": "Извлеки весь текст из этого резюме. Сохрани структуру и форматирование."
+                            },
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": prepared_image.data_url
                                 }
-                            ]
-                        }
-                    ],
-                    max_tokens=4096
-                )
-                
-                resume_text = response.choices[0].message.content
+                            }
+                        ]
+                    }
+                ],
+                max_tokens=4096
+            )
+            
+            resume_text = response.choices[0].message.content
                 
         elif file_extension == '.docx':
             current_app.logger.info(f"Обрабатываем DOCX-файл: {candidate.resume_path}")
             
             # Для DOCX используем python-docx для извлечения текста
             try:
-                doc = docx.Document(candidate.resume_path)
+                import docx
+                doc = docx.Document(resume_file)
                 paragraphs = [p.text for p in doc.paragraphs]
                 resume_text = "\n".join(paragraphs)
                 
@@ -814,11 +813,28 @@ def reprocess_resume(id):
         else:
             raise ValueError(f"Неподдерживаемый формат файла: {file_extension}")
         
+        # Временная копия файла больше не нужна
+        resume_copy.close()
+        
         # Обновляем текст резюме в базе данных
         candidate.resume_text = resume_text
         candidate.updated_at = datetime.now(timezone.utc)
         db.session.commit()
         
+        # Обновляем навыки кандидата и оценку соответствия вакансии по новому тексту резюме
+        save_candidate_skills(candidate)
+        if candidate.vacancy_id:
+            from app.utils.skill_matching import update_vacancy_scores
+            update_vacancy_scores(candidate.vacancy_id, [candidate.id])
+        
+        # Вектор резюме для семантического поиска
+        try:
+            from app.utils.candidate_search import index_candidate
+            index_candidate(candidate)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Ошибка построения вектора резюме кандидата {id}: {str(e)}", exc_info=True)
+        
         current_app.logger.info(f"Текст резюме успешно обновлен с использованием OpenAI API")
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -832,6 +848,7 @@ def reprocess_resume(id):
         return redirect(url_for('candidates.view', id=id))
             
     except Exception as e:
+        resume_copy.close()
         current_app.logger.error(f"Ошибка при обработке резюме через OpenAI API: {str(e)}", exc_info=True)
         db.session.rollback()
         
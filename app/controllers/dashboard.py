@@ -10,11 +10,12 @@ from sqlalchemy import func, desc, and_, cast, case
 from datetime import datetime, timezone, timedelta
 import sqlalchemy as sa
 from flask import current_app
-import pandas as pd
 import re
 from collections import Counter
 from app.utils.decorators import profile_time
 from app.forms.admin import SelectionStageForm, SelectionStatusForm
+from app.utils.user_cache import invalidate_user, invalidate_all_users
+from app.utils.candidate_lists import list_query, decrypted
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
@@ -41,8 +42,8 @@ def index():
             'color': status.color
         }
     
-    # Последние кандидаты
-    recent_candidates = Candidate.query.order_by(Candidate.created_at.desc()).limit(5).all()
+    # Последние кандидаты (колонки списка, без резюме и JSON AI-анализа)
+    recent_candidates = list_query().order_by(Candidate.created_at.desc()).limit(5).all()
     
     # Вакансии с наибольшим количеством кандидатов
     top_vacancies = db.session.query(
@@ -56,12 +57,12 @@ def index():
     recent_logs = SystemLog.query.order_by(SystemLog.created_at.desc()).limit(10).all()
     
     # Пользователи с высоким рейтингом AI
-    top_candidates = Candidate.query.filter(Candidate.ai_match_percent != None)\
+    top_candidates = list_query().filter(Candidate.ai_match_percent != None)\
         .order_by(Candidate.ai_match_percent.desc())\
         .limit(5).all()
     
     # Ближайшие интервью
-    upcoming_interviews = Candidate.query.filter(
+    upcoming_interviews = list_query().filter(
         and_(
             Candidate.interview_date != None,
             Candidate.interview_date >= datetime.now(),
@@ -185,6 +186,22 @@ def api_chart_data():
         }
     })
 
+@dashboard_bp.route('/api/pool_metrics')
+@profile_time
+@login_required
+@admin_required
+def api_pool_metrics():
+    """API для получения метрик пула соединений с БД текущего процесса"""
+    from app.utils.db_pool import pool_manager
+    return jsonify({
+        'config': {
+            key: value for key, value in current_app.config['SQLALCHEMY_ENGINE_OPTIONS'].items()
+            if key.startswith('pool_') or key == 'max_overflow'
+        },
+        'pgbouncer_mode': current_app.config.get('DB_PGBOUNCER_MODE', False),
+        'pools': pool_manager.metrics()
+    })
+
 @dashboard_bp.route('/users')
 @profile_time
 @login_required
@@ -307,6 +324,7 @@ def approve_user(user_id):
     
     db.session.add(log)
     db.session.commit()
+    invalidate_user(user.id)
     
     flash('Пользователь успешно подтвержден', 'success')
     return redirect(url_for('dashboard.users'))
@@ -337,6 +355,7 @@ def reject_user(user_id):
     
     db.session.add(log)
     db.session.commit()
+    invalidate_user(user.id)
     
     flash('Регистрация пользователя отклонена', 'success')
     return redirect(url_for('dashboard.users'))
@@ -361,7 +380,7 @@ def hr_dashboard():
         .scalar() if my_vacancy_ids else 0
     
     # Последние кандидаты с оптимизированным запросом
-    recent_candidates = db.session.query(Candidate)\
+    recent_candidates = list_query()\
         .filter(Candidate.vacancy_id.in_(my_vacancy_ids))\
         .order_by(Candidate.created_at.desc())\
         .limit(5).all() if my_vacancy_ids else []
@@ -446,6 +465,8 @@ def recruitment_funnel():
 @hr_required
 def time_to_fill():
     """Страница с анализом времени закрытия вакансий"""
+    import pandas as pd
+
     # Получаем данные о времени закрытия вакансий
     time_data = db.session.query(
         Vacancy.id,
@@ -642,6 +663,8 @@ def skills_analysis():
 @hr_required
 def source_analysis():
     """Страница с анализом источников кандидатов"""
+    import pandas as pd
+
     try:
         # Получаем данные о кандидатах и их источниках
         candidates = db.session.query(
@@ -948,6 +971,8 @@ def qualification_analysis():
 @hr_required
 def rejection_analysis():
     """Страница с анализом отказов"""
+    import pandas as pd
+
     try:
         # Получаем данные об отказах кандидатам
         rejections = db.session.query(
@@ -1018,6 +1043,9 @@ def rejection_analysis():
 @hr_required
 def predictive_analytics():
     """Страница с прогнозной аналитикой"""
+    import pandas as pd
+    from app.utils.time_to_fill import predict_open_vacancies
+
     try:
         # Получаем данные о вакансиях и времени их закрытия
         vacancies = db.session.query(
@@ -1041,44 +1069,10 @@ def predictive_analytics():
         # Рассчитываем время закрытия в днях
         df['time_to_fill'] = (df['closed_at'] - df['created_at']).dt.days
         
-        # Создаем модель прогнозирования времени закрытия вакансии
-        # В реальном приложении здесь был бы код для обучения модели машинного обучения
-        # Для демонстрации используем простую формулу
-        
-        # Прогнозируем вероятность принятия предложения
-        # В реальном приложении здесь был бы код для обучения модели машинного обучения
-        # Для демонстрации используем случайные данные
-        
-        # Получаем открытые вакансии для прогноза
-        open_vacancies = Vacancy.query.filter(Vacancy.status == 'active').all()
-        
-        predictions = []
-        for vacancy in open_vacancies:
-            # Простая формула для прогноза времени закрытия
-            # В реальном приложении здесь был бы прогноз от модели машинного обучения
-            difficulty_factor = {'easy': 0.8, 'medium': 1.0, 'hard': 1.5}.get(vacancy.difficulty_level, 1.0)
-            candidate_count = Candidate.query.filter(Candidate.vacancy_id == vacancy.id).count()
-            
-            if candidate_count > 0:
-                predicted_days = int(30 * difficulty_factor * (10 / (candidate_count + 5)))
-            else:
-                predicted_days = int(45 * difficulty_factor)
-            
-            # Прогноз вероятности закрытия вакансии
-            if candidate_count > 10:
-                probability = min(90, 30 + candidate_count * 3)
-            else:
-                probability = max(10, candidate_count * 5)
-            
-            predictions.append({
-                'id': vacancy.id,
-                'title': vacancy.title,
-                'predicted_days': predicted_days,
-                'probability': probability,
-                'candidate_count': candidate_count,
-                'created_at': vacancy.created_at,
-                'days_open': (datetime.datetime.now() - vacancy.created_at).days
-            })
+        # Прогнозы для открытых вакансий: обученная модель, пакетный расчет, кэш
+        # (модель обучается командой flask train-time-to-fill и по расписанию)
+        forecast = predict_open_vacancies()
+        predictions = forecast['predictions']
         
         # Рекомендации по оптимальным условиям
         recommendations = [
@@ -1093,6 +1087,7 @@ def predictive_analytics():
             'dashboard/statistics/predictive_analytics.html',
             historical_data=df.to_dict('records'),
             predictions=predictions,
+            model_info=forecast['model'],
             recommendations=recommendations
         )
     except Exception as e:
@@ -1106,69 +1101,50 @@ def predictive_analytics():
 @hr_required
 def seasonal_trends():
     """Страница с анализом сезонных трендов"""
+    from app.utils.seasonal_forecast import get_seasonal_data
+
     try:
-        # Получаем данные о кандидатах по месяцам
-        current_year = datetime.datetime.now().year
-        start_date = datetime.datetime(current_year - 1, 1, 1)
-        
-        candidates = db.session.query(
-            func.date_trunc('month', Candidate.created_at).label('month'),
-            func.count(Candidate.id).label('count'),
-            func.avg(Candidate.ai_match_percent).label('avg_quality')
-        ).filter(
-            Candidate.created_at >= start_date
-        ).group_by(
-            func.date_trunc('month', Candidate.created_at)
-        ).order_by(
-            func.date_trunc('month', Candidate.created_at)
-        ).all()
-        
-        # Преобразуем в DataFrame для удобства анализа
-        df = pd.DataFrame([(c.month, c.count, c.avg_quality) for c in candidates], 
-                          columns=['month', 'count', 'avg_quality'])
-        
-        # Форматируем даты для отображения
-        df['month_name'] = df['month'].dt.strftime('%b %Y')
-        
-        # Округляем качество кандидатов
-        df['avg_quality'] = df['avg_quality'].fillna(0).round(1)
-        
-        # Прогноз на будущие месяцы
-        # В реальном приложении здесь был бы код для временного ряда и прогнозирования
-        # Для демонстрации используем простую модель
-        
-        last_months = df.tail(3)
-        if len(last_months) > 0:
-            avg_growth = last_months['count'].pct_change().mean()
-            last_count = df['count'].iloc[-1]
-            
-            # Прогноз на следующие 3 месяца
-            forecast = []
-            for i in range(1, 4):
-                month = df['month'].iloc[-1] + pd.DateOffset(months=i)
-                predicted_count = int(last_count * (1 + avg_growth * i))
-                forecast.append({
-                    'month': month,
-                    'month_name': month.strftime('%b %Y'),
-                    'predicted_count': predicted_count
-                })
-        else:
-            forecast = []
+        # Готовые месячные ряды и прогноз (обновляются при закрытии месяца)
+        industry_id = request.args.get('industry_id', type=int)
+        history, forecast_rows = get_seasonal_data(industry_id)
+        if not history and industry_id is None:
+            flash('Месячные ряды откликов еще не построены: выполните flask refresh-seasonal-forecasts '
+                  'или включите планировщик (SCHEDULER_ENABLED)', 'info')
+        
+        monthly_data = [{
+            'month': stat.month,
+            'month_name': stat.month.strftime('%b %Y'),
+            'count': stat.applications,
+            'avg_quality': stat.avg_quality or 0
+        } for stat in history]
+        
+        forecast = [{
+            'month': item.month,
+            'month_name': item.month.strftime('%b %Y'),
+            'predicted_count': int(round(item.predicted)),
+            'lower': int(round(item.lower)),
+            'upper': int(round(item.upper)),
+            'method': item.method
+        } for item in forecast_rows]
         
         # Данные для графиков
         chart_data = {
-            'labels': df['month_name'].tolist(),
-            'counts': df['count'].tolist(),
-            'quality': df['avg_quality'].tolist(),
-            'forecast_labels': [f['month_name'] for f in forecast],
-            'forecast_counts': [f['predicted_count'] for f in forecast]
+            'labels': [item['month_name'] for item in monthly_data],
+            'counts': [item['count'] for item in monthly_data],
+            'quality': [item['avg_quality'] for item in monthly_data],
+            'forecast_labels': [item['month_name'] for item in forecast],
+            'forecast_counts': [item['predicted_count'] for item in forecast],
+            'forecast_lower': [item['lower'] for item in forecast],
+            'forecast_upper': [item['upper'] for item in forecast]
         }
         
         return render_template(
             'dashboard/statistics/seasonal_trends.html',
-            monthly_data=df.to_dict('records'),
+            monthly_data=monthly_data,
             forecast=forecast,
-            chart_data=chart_data
+            chart_data=chart_data,
+            industries=Industry.query.filter_by(is_active=True).order_by(Industry.name).all(),
+            industry_id=industry_id
         )
     except Exception as e:
         current_app.logger.error(f"Ошибка при анализе сезонных трендов: {str(e)}")
@@ -1296,6 +1272,7 @@ def create_selection_stage():
         try:
             db.session.add(stage)
             db.session.commit()
+            invalidate_all_users()
             flash('Этап отбора успешно создан', 'success')
         except Exception as e:
             db.session.rollback()
@@ -1351,6 +1328,7 @@ def edit_selection_stage(id):
         
         try:
             db.session.commit()
+            invalidate_all_users()
             flash('Этап отбора успешно обновлен', 'success')
         except Exception as e:
             db.session.rollback()
@@ -1398,6 +1376,7 @@ def delete_selection_stage(id):
     try:
         db.session.delete(stage)
         db.session.commit()
+        invalidate_all_users()
         flash('Этап отбора успешно удален', 'success')
     except Exception as e:
         db.session.rollback()
@@ -1547,23 +1526,7 @@ def all_candidates():
     vacancy_id = request.args.get('vacancy', type=int)
     sort_by = request.args.get('sort', 'date')
     
-    candidate_query = db.session.query(
-        Candidate.id,
-        Candidate.full_name,
-        Candidate._email,
-        Candidate._phone,
-        Candidate.ai_match_percent,
-        Candidate.user_id,
-        Candidate.vacancy_id,
-        Candidate.stage_id,
-        Candidate.created_at,
-        Candidate.tracking_code,
-        Vacancy.title.label('vacancy_title')
-    ).join(
-        C_Selection_Stage, Candidate.stage_id == C_Selection_Stage.id
-    ).join(
-        Vacancy, Candidate.vacancy_id == Vacancy.id
-    )
+    candidate_query = list_query()
     
     # Применяем фильтры
     if stage_id:
@@ -1581,31 +1544,11 @@ def all_candidates():
     total_items = candidate_query.count()
     total_pages = (total_items + per_page - 1) // per_page  # округление вверх
     
-    # Применяем пагинацию
-    candidate_subquery = candidate_query.limit(per_page).offset((page - 1) * per_page).subquery()
-    
-    # Получаем результаты с дешифровкой
-    db_candidates = db.session.query(
-        candidate_subquery.c.id,
-        candidate_subquery.c.full_name,
-        func.pgp_sym_decrypt(
-            cast(candidate_subquery.c._email, sa.LargeBinary),
-            current_app.config['ENCRYPTION_KEY'],
-            current_app.config.get('ENCRYPTION_OPTIONS', '')
-        ).label('email'),
-        func.pgp_sym_decrypt(
-            cast(candidate_subquery.c._phone, sa.LargeBinary),
-            current_app.config['ENCRYPTION_KEY'],
-            current_app.config.get('ENCRYPTION_OPTIONS', '')
-        ).label('phone'),
-        candidate_subquery.c.ai_match_percent,
-        candidate_subquery.c.user_id,
-        candidate_subquery.c.vacancy_id,
-        candidate_subquery.c.vacancy_title,
-        candidate_subquery.c.stage_id,
-        candidate_subquery.c.created_at,
-        candidate_subquery.c.tracking_code
-    ).all()
+    # Контакты расшифровываются только для строк текущей страницы
+    db_candidates = candidate_query.add_columns(
+        decrypted(Candidate._email).label('email'),
+        decrypted(Candidate._phone).label('phone')
+    ).limit(per_page).offset((page - 1) * per_page).all()
     
      # Преобразуем результаты в список словарей для шаблона
     candidates = [{
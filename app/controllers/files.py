@@ -1,16 +1,56 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from flask import Blueprint, request, jsonify, send_from_directory, current_app, abort
+from flask import Blueprint, request, jsonify, current_app, abort
 from flask_login import login_required, current_user
-from app.models import SystemLog
+from app import db
+from app.models import Candidate, SystemLog, StoredFileRef, Vacancy
 from werkzeug.utils import secure_filename
+import sqlalchemy as sa
 import os
-import uuid
 from app.utils.decorators import profile_time
+from app.utils.file_serving import is_repeated_access
+from app.utils.storage import save_file, resolve_filename, add_reference, delete_if_unreferenced
+from app.utils.previews import ensure_preview, page_name, THUMBNAIL
 
 files_bp = Blueprint('files', __name__, url_prefix='/files')
 
+
+def _file_accessible(filename, reference):
+    """
+    Доступен ли файл текущему пользователю
+
+    Имя файла - хэш содержимого и не является секретом: файл отдается
+    администратору, загрузившему его пользователю и HR-менеджеру вакансии
+    кандидата с этим резюме.
+    """
+    if current_user.role == 'admin':
+        return True
+    
+    uploaded = db.session.scalar(
+        sa.select(StoredFileRef.id).where(
+            StoredFileRef.reference == reference,
+            StoredFileRef.user_id == current_user.id
+        ).limit(1)
+    )
+    if uploaded is not None:
+        return True
+    
+    # Старые резюме хранят имя файла или путь в другом формате
+    candidate = db.session.scalar(
+        sa.select(Candidate.id)
+        .join(Vacancy, Candidate.vacancy_id == Vacancy.id)
+        .where(
+            Vacancy.created_by == current_user.id,
+            sa.or_(
+                Candidate.resume_path == reference,
+                Candidate.resume_path == filename,
+                Candidate.resume_path.endswith('/' + filename, autoescape=True)
+            )
+        ).limit(1)
+    )
+    return candidate is not None
+
 @files_bp.route('/upload', methods=['POST'])
 @profile_time
 def upload_file():
@@ -35,24 +75,18 @@ def upload_file():
     if request.content_length > max_size:
         return jsonify({'status': 'error', 'message': f'Размер файла превышает максимально допустимый ({max_size // (1024 * 1024)} МБ)'}), 400
     
-    # Генерируем уникальное имя файла
+    # Сохраняем файл под именем по хэшу содержимого (одинаковые файлы хранятся один раз)
     filename = secure_filename(file.filename)
-    unique_id = str(uuid.uuid4())
     extension = filename.rsplit('.', 1)[1].lower()
-    new_filename = f"{unique_id}.{extension}"
+    stored = save_file(file.stream, extension)
+    new_filename = stored.filename
     
-    # Определяем путь для сохранения
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    file_path = os.path.join(upload_folder, new_filename)
-    
-    # Создаем директорию, если она не существует
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    # Сохраняем файл
-    file.save(file_path)
+    # Загрузка - владелец файла: файл удаляется вместе с последней ссылкой
+    user_id = current_user.id if current_user.is_authenticated else None
+    add_reference(stored.reference, user_id=user_id)
+    db.session.commit()
     
     # Логируем загрузку файла
-    user_id = current_user.id if current_user.is_authenticated else None
     SystemLog.log(
         event_type="file_upload",
         description=f"Загружен файл: {filename} (сохранен как {new_filename})",
@@ -69,53 +103,78 @@ def upload_file():
 
 @files_bp.route('/<filename>')
 @profile_time
+@login_required
 def download_file(filename):
     """Загрузка файла"""
     # Для безопасности проверяем, что filename не содержит путей
     if '/' in filename or '\\' in filename:
         abort(404)
     
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    
-    # Проверяем, существует ли файл
-    if not os.path.exists(os.path.join(upload_folder, filename)):
+    # Ищем файл в хранилище (старые файлы лежат в UPLOAD_FOLDER без подкаталогов)
+    storage, key = resolve_filename(filename)
+    if storage is None or not _file_accessible(filename, storage.reference(key)):
         abort(404)
     
-    # Логируем загрузку файла
-    user_id = current_user.id if current_user.is_authenticated else None
-    SystemLog.log(
-        event_type="file_download",
-        description=f"Скачан файл: {filename}",
-        user_id=user_id,
-        ip_address=request.remote_addr
-    )
+    response = storage.send(key, as_attachment=True, download_name=filename)
     
-    return send_from_directory(upload_folder, filename, as_attachment=True)
+    # Логируем загрузку файла (кроме 304 и докачки частей файла)
+    if not is_repeated_access(response):
+        SystemLog.log(
+            event_type="file_download",
+            description=f"Скачан файл: {filename}",
+            user_id=current_user.id,
+            ip_address=request.remote_addr
+        )
+    
+    return response
 
 @files_bp.route('/view/<filename>')
 @profile_time
+@login_required
 def view_file(filename):
     """Просмотр файла (без скачивания)"""
     # Для безопасности проверяем, что filename не содержит путей
     if '/' in filename or '\\' in filename:
         abort(404)
     
-    upload_folder = current_app.config['UPLOAD_FOLDER']
+    # Ищем файл в хранилище (старые файлы лежат в UPLOAD_FOLDER без подкаталогов)
+    storage, key = resolve_filename(filename)
+    if storage is None or not _file_accessible(filename, storage.reference(key)):
+        abort(404)
     
-    # Проверяем, существует ли файл
-    if not os.path.exists(os.path.join(upload_folder, filename)):
+    response = storage.send(key, as_attachment=False, download_name=filename)
+    
+    # Логируем просмотр файла (кроме 304 и запросов частей файла просмотрщиком PDF)
+    if not is_repeated_access(response):
+        SystemLog.log(
+            event_type="file_view",
+            description=f"Просмотрен файл: {filename}",
+            user_id=current_user.id,
+            ip_address=request.remote_addr
+        )
+    
+    return response
+
+@files_bp.route('/preview/<filename>', defaults={'page': None})
+@files_bp.route('/preview/<filename>/<int:page>')
+@profile_time
+@login_required
+def preview_file(filename, page):
+    """Миниатюра файла или превью страницы page (JPEG)"""
+    # Для безопасности проверяем, что filename не содержит путей
+    if '/' in filename or '\\' in filename:
         abort(404)
     
-    # Логируем просмотр файла
-    user_id = current_user.id if current_user.is_authenticated else None
-    SystemLog.log(
-        event_type="file_view",
-        description=f"Просмотрен файл: {filename}",
-        user_id=user_id,
-        ip_address=request.remote_addr
-    )
+    storage, key = resolve_filename(filename)
+    if storage is None or not _file_accessible(filename, storage.reference(key)):
+        abort(404)
     
-    return send_from_directory(upload_folder, filename, as_attachment=False)
+    # Превью строятся в фоне после сохранения резюме; для старых файлов запрос ставит их в очередь
+    preview = ensure_preview(storage, key, THUMBNAIL if page is None else page_name(page))
+    if preview is None:
+        abort(404)
+    
+    return storage.send(preview, as_attachment=False, download_name=os.path.basename(preview))
 
 @files_bp.route('/delete/<filename>', methods=['POST'])
 @profile_time
@@ -126,15 +185,38 @@ def delete_file(filename):
     if '/' in filename or '\\' in filename:
         abort(404)
     
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    file_path = os.path.join(upload_folder, filename)
-    
     # Проверяем, существует ли файл
-    if not os.path.exists(file_path):
+    storage, key = resolve_filename(filename)
+    if storage is None:
         return jsonify({'status': 'error', 'message': 'Файл не найден'}), 404
     
-    # Удаляем файл
-    os.remove(file_path)
+    # Одинаковые файлы хранятся один раз: снимаем только загрузки текущего пользователя
+    uploads = db.session.scalars(
+        sa.select(StoredFileRef).where(
+            StoredFileRef.reference == storage.reference(key),
+            StoredFileRef.user_id == current_user.id,
+            StoredFileRef.candidate_id.is_(None)
+        )
+    ).all()
+    if not uploads and current_user.role != 'admin':
+        return jsonify({'status': 'error', 'message': 'Нет доступа к файлу'}), 403
+    
+    for upload in uploads:
+        db.session.delete(upload)
+    db.session.commit()
+    
+    # Файл и превью удаляются, только если других загрузок и резюме с ним нет
+    if not delete_if_unreferenced(storage, key):
+        if not uploads:
+            return jsonify({'status': 'error', 'message': 'Файл используется в других загрузках или резюме кандидатов'}), 409
+        
+        SystemLog.log(
+            event_type="file_delete",
+            description=f"Откреплен файл: {filename} (используется в других загрузках или резюме)",
+            user_id=current_user.id,
+            ip_address=request.remote_addr
+        )
+        return jsonify({'status': 'success', 'message': 'Файл успешно удален'}), 200
     
     # Логируем удаление файла
     SystemLog.log(
@@ -148,6 +230,7 @@ def delete_file(filename):
 
 @files_bp.route('/download_resume/<filename>')
 @profile_time
+@login_required
 def download_resume(filename):
     """Скачивание файла резюме (для обратной совместимости)"""
     return download_file(filename) 
\ No newline at end of file
@@ -7,6 +7,7 @@ from app import db
 from app.models import Vacancy, Candidate, Notification, SystemLog, User_Selection_Stage
 from app.forms.application import ApplicationForm
 from app.utils.file_processing import save_resume, extract_text_from_resume
+from app.utils.storage import add_reference
 from app.utils.ai_service import request_ai_analysis, process_resume_and_analyze
 from app.utils.decorators import profile_time
 import uuid
@@ -18,7 +19,7 @@ from sqlalchemy import and_, func, cast
 import sqlalchemy as sa
 import json
 from threading import Thread
-from app import create_app
+from app import get_worker_app
 
 public_bp = Blueprint('public_bp', __name__, url_prefix='')
 
@@ -95,25 +96,35 @@ def vacancy_detail(id):
         title=vacancy.title
     )
 
-def process_resume_async(candidate_id, resume_path):
+def process_resume_async(candidate_id, resume_path, app=None):
     """
     Асинхронная обработка резюме
+    
+    Args:
+        candidate_id: ID кандидата
+        resume_path: Путь к файлу резюме
+        app: Экземпляр приложения; если не передан, используется
+             общий экземпляр фоновых обработчиков процесса
     """
-    try:
-        # Создаем новый контекст приложения для асинхронной обработки
-        app = create_app()
-        
-        with app.app_context():
+    app = app or get_worker_app()
+    
+    with app.app_context():
+        try:
+            # Превью строятся первыми: они нужны карточке кандидата сразу,
+            # а ошибка рендеринга не должна останавливать анализ
+            from app.utils.previews import render_previews
+            try:
+                render_previews(resume_path)
+            except Exception as e:
+                app.logger.error(f"Ошибка при построении превью резюме: {str(e)}", exc_info=True)
+            
             # Импортируем функцию внутри контекста приложения
             from app.utils.ai_service import process_resume_and_analyze
             
             # Используем функцию для обработки резюме и запуска анализа
             process_resume_and_analyze(candidate_id, resume_path)
         
-    except Exception as e:
-        # Создаем контекст приложения для логирования ошибки
-        app = create_app()
-        with app.app_context():
+        except Exception as e:
             app.logger.error(f"Ошибка при асинхронной обработке резюме: {str(e)}", exc_info=True)
 
 @public_bp.route('/apply/<int:vacancy_id>', methods=['GET', 'POST'])
@@ -212,6 +223,9 @@ def apply(vacancy_id):
             
             # Сохраняем кандидата
             db.session.add(candidate)
+            if resume_path:
+                # Кандидат - владелец файла резюме (одинаковые файлы хранятся один раз)
+                add_reference(resume_path, candidate=candidate)
             db.session.commit()
             
             # Создаем уведомление
@@ -232,7 +246,10 @@ def apply(vacancy_id):
             
             # Запускаем асинхронную обработку резюме и последующий AI-анализ
             if resume_path:
-                thread = Thread(target=process_resume_async, args=(candidate.id, resume_path))
+                thread = Thread(
+                    target=process_resume_async,
+                    args=(candidate.id, resume_path, current_app._get_current_object())
+                )
                 thread.daemon = True
                 thread.start()
             
@@ -9,6 +9,7 @@ from app.models.c_selection_stage import C_Selection_Stage
 from app.models.user_selection_stages import User_Selection_Stage
 from app.models.c_selection_status import C_Selection_Status
 from app.forms.selection_stage import SelectionStageForm
+from app.utils.user_cache import invalidate_user
 from functools import wraps
 import json
 import sqlalchemy as sa
@@ -52,6 +53,7 @@ def profile():
                 current_user.set_password(new_password)
             
             db.session.commit()
+            invalidate_user(current_user.id)
             flash('Профиль успешно обновлен!', 'success')
             
             # После успешного сохранения получаем обновленные данные через запрос
@@ -164,6 +166,7 @@ def selection_stages():
             
             db.session.add(user_stage)
             db.session.commit()
+            invalidate_user(current_user.id)
             
             flash('Этап отбора успешно добавлен!', 'success')
             return redirect(url_for('settings_bp.selection_stages'))
@@ -220,6 +223,7 @@ def api_reset_selection_stages():
             db.session.add(user_stage)
         
         db.session.commit()
+        invalidate_user(current_user.id)
         return jsonify({'status': 'success', 'message': 'Этапы отбора сброшены на стандартные'})
     except Exception as e:
         db.session.rollback()
@@ -241,6 +245,7 @@ def api_delete_selection_stage(stage_id):
         # Удаляем связь
         db.session.delete(user_stage)
         db.session.commit()
+        invalidate_user(current_user.id)
         
         return jsonify({'status': 'success'})
     except Exception as e:
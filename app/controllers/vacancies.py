@@ -1,18 +1,20 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response
 from flask_login import login_required, current_user
 from app import db
-from app.models import Vacancy, C_Employment_Type, SystemLog, Candidate, User_Selection_Stage
+from app.models import Vacancy, C_Employment_Type, SystemLog, Candidate, User_Selection_Stage, CandidateVacancyScore, SuggestedCandidate
 from app.forms.vacancy import VacancyForm, VacancyAIGeneratorForm
 from app.utils.ai_service import generate_vacancy_with_ai
+from app.utils.candidate_lists import list_query
 import json
+import sqlalchemy as sa
+import sqlalchemy.orm as so
 import logging
 import traceback
 from app.utils.decorators import profile_time
 from datetime import datetime, timezone
-import openai
 from flask import current_app
 
 # Получаем логгер
@@ -20,6 +22,24 @@ logger = logging.getLogger(__name__)
 
 vacancies_bp = Blueprint('vacancies', __name__, url_prefix='/vacancies')
 
+def _tag_industries(vacancy):
+    """Добавляет отрасли вакансии по ключевым словам описания (ошибка не мешает сохранению)"""
+    try:
+        from app.utils.keyword_matcher import tag_vacancy
+        industries = tag_vacancy(vacancy)
+        logger.info(f"Отрасли вакансии {vacancy.id} по ключевым словам: {[i['name'] for i in industries]}")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка определения отраслей вакансии {vacancy.id}: {e}")
+
+def _schedule_rematch(vacancy):
+    """Запускает подбор кандидатов из базы для вакансии (ошибка не мешает сохранению)"""
+    try:
+        from app.utils.talent_pool import schedule_rematch
+        schedule_rematch(vacancy, current_user.id)
+    except Exception as e:
+        logger.error(f"Ошибка запуска подбора из базы для вакансии {vacancy.id}: {e}")
+
 @vacancies_bp.route('/')
 @profile_time
 @login_required
@@ -174,6 +194,8 @@ def create():
             
             db.session.add(vacancy)
             db.session.commit()
+            _tag_industries(vacancy)
+            _schedule_rematch(vacancy)
             
             current_app.logger.info("=== Вакансия успешно создана ===")
             current_app.logger.info(f"ID вакансии: {vacancy.id}")
@@ -280,6 +302,8 @@ def edit(id):
             vacancy.is_active = form.is_active.data
             
             db.session.commit()
+            _tag_industries(vacancy)
+            _schedule_rematch(vacancy)
             
             logger.info(f"Вакансия успешно обновлена: ID={vacancy.id}")
             logger.info(f"Сохраненные вопросы: {vacancy.questions_json}")
@@ -395,30 +419,128 @@ def candidates(id):
     status_filter = request.args.get('status', 'all')
     sort_by = request.args.get('sort', 'date')
     
-    # Базовый запрос
-    query = Candidate.query.filter_by(vacancy_id=vacancy.id)
+    # Досчитываем оценки навыков для новых откликов (остальные уже сохранены)
+    try:
+        from app.utils.skill_matching import ensure_vacancy_scores
+        ensure_vacancy_scores(vacancy.id)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Ошибка при расчете оценок навыков для вакансии {vacancy.id}: {str(e)}")
+    
+    # Базовый запрос: только колонки списка, без резюме и JSON AI-анализа
+    query = list_query().filter(Candidate.vacancy_id == vacancy.id)
     
     # Фильтрация по статусу
     if status_filter != 'all':
-        query = query.filter_by(stage_id=status_filter)
+        query = query.filter(Candidate.stage_id == status_filter)
     
     # Сортировка
     if sort_by == 'date':
         query = query.order_by(Candidate.created_at.desc())
     elif sort_by == 'match':
         query = query.order_by(Candidate.ai_match_percent.desc())
+    elif sort_by == 'skills':
+        query = query.outerjoin(
+            CandidateVacancyScore,
+            sa.and_(
+                CandidateVacancyScore.candidate_id == Candidate.id,
+                CandidateVacancyScore.vacancy_id == vacancy.id
+            )
+        ).order_by(CandidateVacancyScore.score.desc().nullslast(), Candidate.created_at.desc())
     
     candidates = query.all()
     
+    # Оценки навыков кандидатов вакансии
+    skill_scores = {
+        score.candidate_id: score
+        for score in CandidateVacancyScore.query.filter_by(vacancy_id=vacancy.id)
+    }
+    
+    # Подходящие кандидаты из базы (откликались на другие вакансии)
+    suggestions = SuggestedCandidate.query.options(
+        so.joinedload(SuggestedCandidate.candidate).joinedload(Candidate.vacancy)
+    ).filter(
+        SuggestedCandidate.vacancy_id == vacancy.id,
+        SuggestedCandidate.status != SuggestedCandidate.STATUS_DISMISSED
+    ).order_by(
+        SuggestedCandidate.ai_match_percent.desc().nullslast(),
+        SuggestedCandidate.prefilter_score.desc()
+    ).all()
+    
     return render_template(
         'vacancies/candidates.html',
         vacancy=vacancy,
         candidates=candidates,
+        skill_scores=skill_scores,
+        suggestions=suggestions,
         status_filter=status_filter,
         sort_by=sort_by,
         title=f'Кандидаты на вакансию: {vacancy.title}'
     )
 
+@vacancies_bp.route('/<int:id>/suggestions')
+@profile_time
+@login_required
+def suggestions(id):
+    """API: подходящие кандидаты из базы для вакансии"""
+    vacancy = Vacancy.query.get_or_404(id)
+    if vacancy.created_by != current_user.id:
+        return jsonify({'error': 'Нет доступа к вакансии'}), 403
+    
+    rows = db.session.query(SuggestedCandidate, Candidate.full_name, Vacancy.title).join(
+        Candidate, SuggestedCandidate.candidate_id == Candidate.id
+    ).outerjoin(
+        Vacancy, Candidate.vacancy_id == Vacancy.id
+    ).filter(
+        SuggestedCandidate.vacancy_id == vacancy.id,
+        SuggestedCandidate.status != SuggestedCandidate.STATUS_DISMISSED
+    ).order_by(
+        SuggestedCandidate.ai_match_percent.desc().nullslast(),
+        SuggestedCandidate.prefilter_score.desc()
+    ).all()
+    
+    return jsonify([
+        dict(
+            suggestion.to_dict(),
+            full_name=full_name,
+            applied_vacancy=applied_vacancy,
+            url=url_for('candidates.view', id=suggestion.candidate_id)
+        )
+        for suggestion, full_name, applied_vacancy in rows
+    ])
+
+@vacancies_bp.route('/<int:id>/suggestions/rematch', methods=['POST'])
+@profile_time
+@login_required
+def rematch(id):
+    """Повторный подбор кандидатов из базы для вакансии"""
+    vacancy = Vacancy.query.get_or_404(id)
+    if vacancy.created_by != current_user.id:
+        flash('У вас нет доступа к этой вакансии', 'danger')
+        return redirect(url_for('vacancies.index'))
+    
+    _schedule_rematch(vacancy)
+    flash('Подбор кандидатов из базы запущен, результаты появятся через несколько минут', 'info')
+    return redirect(url_for('vacancies.candidates', id=vacancy.id))
+
+@vacancies_bp.route('/<int:id>/suggestions/<int:candidate_id>/dismiss', methods=['POST'])
+@profile_time
+@login_required
+def dismiss_suggestion(id, candidate_id):
+    """Отклонение предложенного кандидата: при следующих подборах он не предлагается"""
+    vacancy = Vacancy.query.get_or_404(id)
+    if vacancy.created_by != current_user.id:
+        flash('У вас нет доступа к этой вакансии', 'danger')
+        return redirect(url_for('vacancies.index'))
+    
+    suggestion = SuggestedCandidate.query.filter_by(vacancy_id=vacancy.id, candidate_id=candidate_id).first_or_404()
+    suggestion.status = SuggestedCandidate.STATUS_DISMISSED
+    db.session.commit()
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return jsonify({'status': 'success'})
+    return redirect(url_for('vacancies.candidates', id=vacancy.id))
+
 @vacancies_bp.route('/<int:id>/archive', methods=['POST'])
 @profile_time
 @login_required
@@ -471,7 +593,9 @@ def generate_with_ai():
             title=title,
             employment_type=employment_type,
             description_tasks=description_tasks,
-            description_conditions=description_conditions
+            description_conditions=description_conditions,
+            # Повторная генерация - новый вариант вместо ответа из кэша
+            use_cache=request.form.get('regenerate') != '1'
         )
         
         current_app.logger.info(f"Получен ответ от OpenAI API: {json.dumps(result, ensure_ascii=False)}")
@@ -495,6 +619,52 @@ def generate_with_ai():
             'message': str(e)
         }), 500
 
+@vacancies_bp.route('/generate_with_ai/stream', methods=['POST'])
+@login_required
+def generate_with_ai_stream():
+    """
+    Потоковая генерация вакансии (server-sent events)
+
+    Запрос к модели выполняется в фоновом потоке; ответ содержит события
+    job (id задачи для отмены), fields (части полей по мере генерации),
+    done (итоговые данные), error или cancelled.
+    """
+    from app.utils.vacancy_generation import start_generation, stream_events
+    
+    job = start_generation(
+        current_app._get_current_object(),
+        current_user.id,
+        title=request.form.get('title'),
+        employment_type=request.form.get('id_c_employment_type'),
+        description_tasks=request.form.get('description_tasks'),
+        description_conditions=request.form.get('description_conditions'),
+        use_cache=request.form.get('regenerate') != '1'
+    )
+    current_app.logger.info(f"Запущена потоковая генерация вакансии {job.id}: {request.form.get('title')}")
+    
+    return Response(
+        stream_events(job),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Отключает буферизацию ответа в nginx
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@vacancies_bp.route('/generate_with_ai/<job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_generation(job_id):
+    """Отмена потоковой генерации вакансии"""
+    from app.utils.vacancy_generation import get_job
+    
+    job = get_job(job_id, current_user.id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Задача генерации не найдена'}), 404
+    
+    job.cancel()
+    return jsonify({'status': 'success', 'job_status': job.status})
+
 @vacancies_bp.route('/update_selection_stages/<int:id>', methods=['POST'])
 @login_required
 def update_selection_stages(id):
@@ -12,10 +12,21 @@ from app.models.skill_category import SkillCategory
 from app.models.skill import Skill
 from app.models.vacancy_skill import VacancySkill
 from app.models.candidate_skill import CandidateSkill
+from app.models.candidate_vacancy_score import CandidateVacancyScore
 from app.models.industry import Industry
 from app.models.vacancy_industry import VacancyIndustry 
 from app.models.keyword import Keyword
 from app.models.keyword_category import KeywordCategory 
 from app.models.c_selection_stage import C_Selection_Stage 
 from app.models.user_selection_stages import User_Selection_Stage
-from app.models.c_selection_status import C_Selection_Status
\ No newline at end of file
+from app.models.c_selection_status import C_Selection_Status
+from app.models.application_monthly_stat import ApplicationMonthlyStat
+from app.models.application_forecast import ApplicationForecast
+from app.models.analysis_job import AnalysisJob
+from app.models.llm_response_cache import LLMResponseCache
+from app.models.candidate_embedding import CandidateEmbedding
+from app.models.suggested_candidate import SuggestedCandidate
+from app.models.candidate_experience import CandidateExperience
+from app.models.candidate_education import CandidateEducation
+from app.models.candidate_language import CandidateLanguage
+from app.models.stored_file_ref import StoredFileRef
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+import uuid
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class AnalysisJob(db.Model):
+    """
+    Фоновая задача: queued -> running -> done / failed
+
+    KIND_ANALYSIS - AI-анализ кандидата (candidate_id), KIND_REMATCH - подбор
+    кандидатов из базы для вакансии (vacancy_id, app/utils/talent_pool.py).
+    """
+    __tablename__ = 'analysis_jobs'
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+    FINAL_STATUSES = (STATUS_DONE, STATUS_FAILED)
+    
+    KIND_ANALYSIS = 'analysis'
+    KIND_REMATCH = 'rematch'
+    
+    id: so.Mapped[str] = so.mapped_column(sa.Text, primary_key=True, default=lambda: uuid.uuid4().hex)
+    kind: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False, default=KIND_ANALYSIS)
+    candidate_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('candidates.id', ondelete='CASCADE'), nullable=True)  # Для KIND_ANALYSIS
+    vacancy_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('vacancies.id', ondelete='CASCADE'), nullable=True)  # Для KIND_REMATCH
+    created_by: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('users.id'), nullable=True)  # NULL - запущена системой
+    source: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False, default='manual')  # manual, resume_upload, vacancy
+    status: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False, default=STATUS_QUEUED)
+    progress: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)  # 0-100
+    stage: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)  # Текущий шаг для отображения
+    error: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    started_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), nullable=True)
+    finished_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        sa.Index('ix_analysis_jobs_candidate_status', 'candidate_id', 'status'),
+        sa.Index('ix_analysis_jobs_vacancy_status', 'vacancy_id', 'status'),
+    )
+    
+    # Отношения
+    candidate = so.relationship('Candidate')
+    vacancy = so.relationship('Vacancy')
+    
+    @property
+    def is_final(self):
+        return self.status in self.FINAL_STATUSES
+    
+    def to_dict(self):
+        def seconds(start, end):
+            if not start or not end:
+                return None
+            return round((_aware(end) - _aware(start)).total_seconds(), 2)
+        
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'candidate_id': self.candidate_id,
+            'vacancy_id': self.vacancy_id,
+            'status': self.status,
+            'progress': self.progress,
+            'stage': self.stage,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'queue_seconds': seconds(self.created_at, self.started_at),
+            'run_seconds': seconds(self.started_at, self.finished_at)
+        }
+    
+    def __repr__(self):
+        return f'<AnalysisJob {self.id} {self.kind} candidate_id={self.candidate_id} vacancy_id={self.vacancy_id} status={self.status}>'
+
+
+def _aware(value):
+    # SQLite возвращает даты без часового пояса
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
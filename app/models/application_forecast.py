@@ -0,0 +1,36 @@
+from datetime import datetime, date, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class ApplicationForecast(db.Model):
+    """Прогноз количества откликов на месяц с доверительным интервалом"""
+    __tablename__ = 'application_forecasts'
+    
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    industry_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('industries.id', ondelete='CASCADE'), nullable=True)  # NULL - все вакансии
+    month: so.Mapped[date] = so.mapped_column(sa.Date, nullable=False)  # Прогнозируемый месяц
+    predicted: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False)
+    lower: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False)  # Нижняя граница интервала
+    upper: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False)  # Верхняя граница интервала
+    method: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)  # holt_winters, holt, mean
+    based_on_month: so.Mapped[date] = so.mapped_column(sa.Date, nullable=False)  # Последний закрытый месяц ряда
+    computed_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        # Один прогноз на отрасль и месяц (см. ApplicationMonthlyStat)
+        sa.Index(
+            'uq_application_forecasts_industry_month', 'industry_id', 'month', unique=True,
+            postgresql_where=sa.text('industry_id IS NOT NULL'), sqlite_where=sa.text('industry_id IS NOT NULL')
+        ),
+        sa.Index(
+            'uq_application_forecasts_total_month', 'month', unique=True,
+            postgresql_where=sa.text('industry_id IS NULL'), sqlite_where=sa.text('industry_id IS NULL')
+        ),
+    )
+    
+    # Отношения
+    industry = so.relationship('Industry')
+    
+    def __repr__(self):
+        return f'<ApplicationForecast industry_id={self.industry_id} month={self.month} predicted={self.predicted}>'
@@ -0,0 +1,34 @@
+from datetime import datetime, date, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class ApplicationMonthlyStat(db.Model):
+    """Количество откликов за закрытый месяц (всего или по отрасли вакансии)"""
+    __tablename__ = 'application_monthly_stats'
+    
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    industry_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('industries.id', ondelete='CASCADE'), nullable=True)  # NULL - все вакансии
+    month: so.Mapped[date] = so.mapped_column(sa.Date, nullable=False)  # Первое число месяца
+    applications: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    avg_quality: so.Mapped[float] = so.mapped_column(sa.Float, nullable=True)  # Средний ai_match_percent
+    updated_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        # Одна строка на отрасль и месяц; NULL в уникальном индексе не совпадает
+        # с NULL, поэтому для ряда «все вакансии» отдельный частичный индекс
+        sa.Index(
+            'uq_application_monthly_stats_industry_month', 'industry_id', 'month', unique=True,
+            postgresql_where=sa.text('industry_id IS NOT NULL'), sqlite_where=sa.text('industry_id IS NOT NULL')
+        ),
+        sa.Index(
+            'uq_application_monthly_stats_total_month', 'month', unique=True,
+            postgresql_where=sa.text('industry_id IS NULL'), sqlite_where=sa.text('industry_id IS NULL')
+        ),
+    )
+    
+    # Отношения
+    industry = so.relationship('Industry')
+    
+    def __repr__(self):
+        return f'<ApplicationMonthlyStat industry_id={self.industry_id} month={self.month} applications={self.applications}>'
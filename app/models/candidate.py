@@ -8,6 +8,12 @@ from app.utils.encryption import encrypted_property
 class Candidate(db.Model):
     __tablename__ = 'candidates'
     
+    # Объемные поля отложены по группам и загружаются при первом обращении
+    # (одним запросом на группу) или через so.undefer_group(...):
+    # resume - текст и разобранные данные резюме, answers - ответы анкеты,
+    # ai_details - тексты и JSON AI-анализа. Для списков - app/utils/candidate_lists.py
+    DEFERRED_GROUPS = ('resume', 'answers', 'ai_details')
+    
     id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
     vacancy_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('vacancies.id'))
     user_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('users.id'))
@@ -15,30 +21,36 @@ class Candidate(db.Model):
     full_name: so.Mapped[str] = so.mapped_column(sa.Text)
     _email: so.Mapped[str] = so.mapped_column(sa.Text, index=True, unique=True, nullable=True)
     _phone: so.Mapped[str] = so.mapped_column(sa.Text, index=True, unique=True, nullable=True)
-    base_answers: so.Mapped[dict] = so.mapped_column(sa.JSON)
-    vacancy_answers: so.Mapped[dict] = so.mapped_column(sa.JSON)
-    soft_answers: so.Mapped[dict] = so.mapped_column(sa.JSON)
+    base_answers: so.Mapped[dict] = so.mapped_column(sa.JSON, deferred=True, deferred_group='answers')
+    vacancy_answers: so.Mapped[dict] = so.mapped_column(sa.JSON, deferred=True, deferred_group='answers')
+    soft_answers: so.Mapped[dict] = so.mapped_column(sa.JSON, deferred=True, deferred_group='answers')
     resume_path: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
-    resume_text: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
-    structured_resume_data: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True)
-    cover_letter: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    resume_preview_pages: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)  # Превью страниц резюме (app/utils/previews.py), NULL - еще не построены
+    resume_text: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='resume')
+    structured_resume_data: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True, deferred=True, deferred_group='resume')
+    cover_letter: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='resume')
     ai_match_percent: so.Mapped[float] = so.mapped_column(sa.Float, nullable=True)
-    ai_pros: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
-    ai_cons: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
-    ai_recommendation: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    ai_pros: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_cons: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_recommendation: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='ai_details')
     ai_score_location: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
     ai_score_experience: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
     ai_score_tech: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
     ai_score_education: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
-    ai_score_comments_location: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
-    ai_score_comments_experience: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
-    ai_score_comments_tech: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
-    ai_score_comments_education: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
-    ai_mismatch_notes: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
-    ai_data_consistency: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True)
-    ai_answer_quality: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True)
-    ai_data_completeness: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True)
-    ai_analysis_data: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True)
+    ai_score_comments_location: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_score_comments_experience: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_score_comments_tech: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_score_comments_education: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_mismatch_notes: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_data_consistency: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_answer_quality: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_data_completeness: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True, deferred=True, deferred_group='ai_details')
+    ai_analysis_data: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True, deferred=True, deferred_group='ai_details')
+    # Типизированная проекция JSON-полей для фильтров в SQL (app/utils/resume_structure.py)
+    total_experience_years: so.Mapped[float] = so.mapped_column(sa.Float, nullable=True, index=True)
+    education_level: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('c_education.id'), nullable=True, index=True)  # id справочника c_education
+    ai_trust_score: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True, index=True)
+    ai_generation_probability: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
     id_c_rejection_reason: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('c_rejection_reason.id'), nullable=True)
     interview_date: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), nullable=True)
     hr_comment: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
@@ -65,6 +77,10 @@ class Candidate(db.Model):
     notifications = so.relationship('Notification', back_populates='candidate', cascade='all, delete-orphan')
     c_rejection_reason = so.relationship('C_Rejection_Reason', back_populates='candidates')
     skills = so.relationship('CandidateSkill', back_populates='candidate', cascade='all, delete-orphan')
+    vacancy_scores = so.relationship('CandidateVacancyScore', back_populates='candidate', cascade='all, delete-orphan')
+    experience_entries = so.relationship('CandidateExperience', back_populates='candidate', cascade='all, delete-orphan', order_by='CandidateExperience.sort_order')
+    education_entries = so.relationship('CandidateEducation', back_populates='candidate', cascade='all, delete-orphan', order_by='CandidateEducation.sort_order')
+    languages = so.relationship('CandidateLanguage', back_populates='candidate', cascade='all, delete-orphan')
     user_selection_stage = so.relationship(
         'User_Selection_Stage',
         foreign_keys=[user_id, stage_id],
@@ -92,6 +108,7 @@ class Candidate(db.Model):
             'vacancy_answers': self.vacancy_answers,
             'soft_answers': self.soft_answers,
             'resume_path': self.resume_path,
+            'resume_preview_pages': self.resume_preview_pages,
             'resume_text': self.resume_text,
             'structured_resume_data': self.structured_resume_data,
             'cover_letter': self.cover_letter,
@@ -112,6 +129,10 @@ class Candidate(db.Model):
             'ai_answer_quality': self.ai_answer_quality,
             'ai_data_completeness': self.ai_data_completeness,
             'ai_analysis_data': self.ai_analysis_data,
+            'total_experience_years': self.total_experience_years,
+            'education_level': self.education_level,
+            'ai_trust_score': self.ai_trust_score,
+            'ai_generation_probability': self.ai_generation_probability,
             'id_c_rejection_reason': self.id_c_rejection_reason,
             'interview_date': self.interview_date.isoformat() if self.interview_date else None,
             'hr_comment': self.hr_comment,
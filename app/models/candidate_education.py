@@ -0,0 +1,39 @@
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class CandidateEducation(db.Model):
+    """Образование из structured_resume_data['education'] (app/utils/resume_structure.py)"""
+    __tablename__ = 'candidate_education'
+    
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    candidate_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('candidates.id', ondelete='CASCADE'), nullable=False)
+    sort_order: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False)  # Порядок в резюме
+    institution: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    degree: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    field: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    start_year: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
+    end_year: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
+    level: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('c_education.id'), nullable=True)  # Уровень образования (id справочника c_education)
+    
+    __table_args__ = (
+        sa.Index('ix_candidate_education_candidate_id', 'candidate_id'),
+        sa.Index('ix_candidate_education_level', 'level'),
+    )
+    
+    # Отношения
+    candidate = so.relationship('Candidate', back_populates='education_entries')
+    
+    def __repr__(self):
+        return f'<CandidateEducation candidate_id={self.candidate_id} institution={self.institution}>'
+    
+    def to_dict(self):
+        """Преобразует объект в словарь"""
+        return {
+            'institution': self.institution,
+            'degree': self.degree,
+            'field': self.field,
+            'start_year': self.start_year,
+            'end_year': self.end_year,
+            'level': self.level
+        }
@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class CandidateEmbedding(db.Model):
+    """Вектор резюме кандидата для семантического поиска (app/utils/candidate_search.py)"""
+    __tablename__ = 'candidate_embeddings'
+    
+    candidate_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('candidates.id', ondelete='CASCADE'), primary_key=True)
+    model: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)  # Модель, построившая вектор
+    dimensions: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False)
+    vector: so.Mapped[bytes] = so.mapped_column(sa.LargeBinary, nullable=False)  # float32, нормированный
+    text_hash: so.Mapped[str] = so.mapped_column(sa.String(64), nullable=False)  # sha256 текста: без изменений вектор не пересчитывается
+    updated_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    __table_args__ = (
+        # Индекс для догрузки новых векторов в индекс процесса
+        sa.Index('ix_candidate_embeddings_updated_at', 'updated_at'),
+    )
+    
+    def __repr__(self):
+        return f'<CandidateEmbedding candidate_id={self.candidate_id} model={self.model}>'
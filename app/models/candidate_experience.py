@@ -0,0 +1,42 @@
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class CandidateExperience(db.Model):
+    """Место работы из structured_resume_data['experience'] (app/utils/resume_structure.py)"""
+    __tablename__ = 'candidate_experience'
+    
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    candidate_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('candidates.id', ondelete='CASCADE'), nullable=False)
+    sort_order: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False)  # Порядок в резюме
+    company: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    position: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    description: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    start_year: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
+    end_year: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
+    is_current: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=False, nullable=False)  # «по настоящее время»
+    duration_months: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=True)
+    
+    __table_args__ = (
+        sa.Index('ix_candidate_experience_candidate_id', 'candidate_id'),
+        sa.Index('ix_candidate_experience_company', 'company'),
+        sa.Index('ix_candidate_experience_position', 'position'),
+    )
+    
+    # Отношения
+    candidate = so.relationship('Candidate', back_populates='experience_entries')
+    
+    def __repr__(self):
+        return f'<CandidateExperience candidate_id={self.candidate_id} company={self.company}>'
+    
+    def to_dict(self):
+        """Преобразует объект в словарь"""
+        return {
+            'company': self.company,
+            'position': self.position,
+            'description': self.description,
+            'start_year': self.start_year,
+            'end_year': self.end_year,
+            'is_current': self.is_current,
+            'duration_months': self.duration_months
+        }
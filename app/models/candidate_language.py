@@ -0,0 +1,33 @@
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class CandidateLanguage(db.Model):
+    """Язык из structured_resume_data['languages'] (app/utils/resume_structure.py)"""
+    __tablename__ = 'candidate_languages'
+    
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    candidate_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('candidates.id', ondelete='CASCADE'), nullable=False)
+    language: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)  # Нормализованное название: «английский»
+    level: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)  # A1-C2 или native
+    raw: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)  # Строка из резюме
+    
+    __table_args__ = (
+        sa.UniqueConstraint('candidate_id', 'language', name='uq_candidate_language'),
+        # Поиск «английский не ниже B2»: A1 < ... < C2 < native при сравнении строк
+        sa.Index('ix_candidate_languages_language_level', 'language', 'level'),
+    )
+    
+    # Отношения
+    candidate = so.relationship('Candidate', back_populates='languages')
+    
+    def __repr__(self):
+        return f'<CandidateLanguage candidate_id={self.candidate_id} language={self.language} level={self.level}>'
+    
+    def to_dict(self):
+        """Преобразует объект в словарь"""
+        return {
+            'language': self.language,
+            'level': self.level,
+            'raw': self.raw
+        }
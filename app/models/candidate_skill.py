@@ -13,6 +13,11 @@ class CandidateSkill(db.Model):
     level: so.Mapped[int] = so.mapped_column(sa.Integer, default=1)  # Уровень навыка от 1 до 5
     extracted_from: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)  # Источник (resume_text, vacancy_answers, etc.)
     
+    __table_args__ = (
+        # Обратный индекс «навык -> кандидаты» для подбора кандидатов из базы
+        sa.Index('ix_candidate_skills_skill_candidate', 'skill_id', 'candidate_id'),
+    )
+    
     # Отношения
     candidate = so.relationship('Candidate', back_populates='skills')
     skill = so.relationship('Skill', back_populates='candidate_skills')
@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class CandidateVacancyScore(db.Model):
+    """Предрассчитанная оценка соответствия навыков кандидата требованиям вакансии"""
+    __tablename__ = 'candidate_vacancy_scores'
+    
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    candidate_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('candidates.id', ondelete='CASCADE'), nullable=False)
+    vacancy_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('vacancies.id', ondelete='CASCADE'), nullable=False)
+    score: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False)  # Взвешенное покрытие навыков вакансии, 0-100
+    required_coverage: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False)  # Доля закрытых обязательных навыков, 0-1
+    matched_skills: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    weights_hash: so.Mapped[str] = so.mapped_column(sa.String(64), nullable=True)  # sha256 навыков и весов вакансии на момент расчета
+    computed_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        sa.UniqueConstraint('candidate_id', 'vacancy_id', name='uq_candidate_vacancy_score'),
+        # Индекс для сортировки кандидатов вакансии по оценке
+        sa.Index('ix_candidate_vacancy_scores_vacancy_score', 'vacancy_id', 'score'),
+    )
+    
+    # Отношения
+    candidate = so.relationship('Candidate', back_populates='vacancy_scores')
+    vacancy = so.relationship('Vacancy', back_populates='candidate_scores')
+    
+    def __repr__(self):
+        return f'<CandidateVacancyScore candidate_id={self.candidate_id} vacancy_id={self.vacancy_id} score={self.score}>'
@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class LLMResponseCache(db.Model):
+    """Сохраненный ответ модели (app/utils/llm_cache.py)"""
+    __tablename__ = 'llm_response_cache'
+    
+    key: so.Mapped[str] = so.mapped_column(sa.String(64), primary_key=True)  # sha256 нормализованного запроса
+    scope: so.Mapped[str] = so.mapped_column(sa.String(64), nullable=False)  # sha256 части запроса, которая должна совпадать точно
+    kind: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)  # vacancy_generation, vacancy_requirements
+    model: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)
+    prompt_version: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False)
+    response: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)  # Текст ответа модели
+    vector: so.Mapped[list] = so.mapped_column(sa.JSON, nullable=True)  # Вектор текста для поиска похожих запросов
+    hits: so.Mapped[int] = so.mapped_column(sa.Integer, nullable=False, default=0)
+    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    last_used_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    expires_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        sa.Index('ix_llm_response_cache_scope', 'scope', 'expires_at'),
+        sa.Index('ix_llm_response_cache_last_used_at', 'last_used_at'),
+    )
+    
+    def __repr__(self):
+        return f'<LLMResponseCache {self.kind} {self.key[:12]} hits={self.hits}>'
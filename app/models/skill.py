@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 import sqlalchemy as sa
 import sqlalchemy.orm as so
 from app import db
@@ -14,6 +15,7 @@ class Skill(db.Model):
     synonyms: so.Mapped[list] = so.mapped_column(sa.JSON, default=lambda: [])
     is_active: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=True)
     frequency: so.Mapped[int] = so.mapped_column(sa.Integer, default=0)  # Частота встречаемости в резюме
+    updated_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), nullable=True, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))  # Для подписи автомата навыков
     
     # Отношения
     category = so.relationship('SkillCategory', back_populates='skills')
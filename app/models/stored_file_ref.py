@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class StoredFileRef(db.Model):
+    """
+    Владелец файла в хранилище (app/utils/storage.py)
+
+    Одинаковые файлы хранятся один раз, поэтому на один ключ может ссылаться
+    несколько загрузок и кандидатов. Файл удаляется вместе с последней ссылкой.
+    """
+    __tablename__ = 'stored_file_refs'
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    reference: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)  # Путь или s3://..., как в Candidate.resume_path
+    user_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=True)  # Загрузка через /files/upload
+    candidate_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('candidates.id', ondelete='CASCADE'), nullable=True)  # Резюме кандидата
+    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        sa.Index('ix_stored_file_refs_reference', 'reference'),
+    )
+
+    # Отношения
+    candidate = so.relationship('Candidate')
+
+    def __repr__(self):
+        return f'<StoredFileRef {self.reference} user_id={self.user_id} candidate_id={self.candidate_id}>'
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app import db
+
+class SuggestedCandidate(db.Model):
+    """Кандидат из базы, подобранный для другой вакансии (app/utils/talent_pool.py)"""
+    __tablename__ = 'suggested_candidates'
+    
+    STATUS_ANALYZED = 'analyzed'  # оценен моделью
+    STATUS_FAILED = 'failed'  # оценка моделью не удалась, есть только предварительная оценка
+    STATUS_DISMISSED = 'dismissed'  # отклонен HR-менеджером, повторно не предлагается
+    
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    vacancy_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('vacancies.id', ondelete='CASCADE'), nullable=False)
+    candidate_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey('candidates.id', ondelete='CASCADE'), nullable=False)
+    status: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False, default=STATUS_ANALYZED)
+    similarity: so.Mapped[float] = so.mapped_column(sa.Float, nullable=True)  # Близость векторов резюме и вакансии, -1..1
+    skill_score: so.Mapped[float] = so.mapped_column(sa.Float, nullable=True)  # Взвешенное покрытие навыков вакансии, 0-100
+    prefilter_score: so.Mapped[float] = so.mapped_column(sa.Float, nullable=False)  # Локальная оценка для отбора, 0-100
+    ai_match_percent: so.Mapped[float] = so.mapped_column(sa.Float, nullable=True)
+    ai_pros: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    ai_cons: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    ai_recommendation: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    ai_analysis_data: so.Mapped[dict] = so.mapped_column(sa.JSON, default=lambda: {}, nullable=True)
+    vacancy_hash: so.Mapped[str] = so.mapped_column(sa.String(64), nullable=False)  # sha256 текста вакансии на момент оценки
+    error: so.Mapped[str] = so.mapped_column(sa.Text, nullable=True)
+    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    analyzed_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        sa.UniqueConstraint('vacancy_id', 'candidate_id', name='uq_suggested_candidate'),
+        # Индекс для списка предложенных кандидатов вакансии по оценке
+        sa.Index('ix_suggested_candidates_vacancy_match', 'vacancy_id', 'ai_match_percent'),
+    )
+    
+    # Отношения
+    candidate = so.relationship('Candidate')
+    vacancy = so.relationship('Vacancy')
+    
+    def to_dict(self):
+        return {
+            'candidate_id': self.candidate_id,
+            'status': self.status,
+            'similarity': self.similarity,
+            'skill_score': self.skill_score,
+            'prefilter_score': self.prefilter_score,
+            'ai_match_percent': self.ai_match_percent,
+            'ai_pros': self.ai_pros,
+            'ai_cons': self.ai_cons,
+            'ai_recommendation': self.ai_recommendation,
+            'error': self.error,
+            'analyzed_at': self.analyzed_at.isoformat() if self.analyzed_at else None
+        }
+    
+    def __repr__(self):
+        return f'<SuggestedCandidate vacancy_id={self.vacancy_id} candidate_id={self.candidate_id} status={self.status}>'
@@ -39,6 +39,7 @@ class Vacancy(db.Model):
     candidates = so.relationship('Candidate', back_populates='vacancy', cascade='all, delete-orphan')
     c_employment_type = so.relationship('C_Employment_Type', back_populates='vacancies')
     skills = so.relationship('VacancySkill', back_populates='vacancy', cascade='all, delete-orphan')
+    candidate_scores = so.relationship('CandidateVacancyScore', back_populates='vacancy', cascade='all, delete-orphan')
     industries = so.relationship('VacancyIndustry', back_populates='vacancy', cascade='all, delete-orphan')
     
     def __repr__(self):
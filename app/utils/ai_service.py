@@ -1,26 +1,29 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import requests
 import json
 import os
 from flask import current_app
 import re
 import random
-from openai import OpenAI
-import uuid
 import time
 from dotenv import load_dotenv  # Добавляем импорт для перезагрузки переменных окружения
 import base64
-import docx
-import fitz
-from PIL import Image
 import io
 from datetime import datetime, timezone, timedelta
 from threading import Thread
 import logging
 from app import db
 from app.models.candidate import Candidate
+from app.utils.storage import local_copy, reference_exists
+from app.utils.image_preprocessing import prepare_image_file, render_pdf_page, vision_options
+from app.utils.local_ocr import extract_pages, ocr_options
+from app.utils import llm_cache
+from app.utils.llm_dispatcher import chat_completion
+from app.utils.llm_providers import (
+    PROVIDER_OPENAI, TASK_OCR, TASK_SCORING, TASK_STRUCTURING, TASK_VACANCY,
+    get_llm_client, llm_model, llm_provider, openai_client
+)
 import traceback
 
 # Настройка логгера для использования вне контекста приложения
@@ -31,6 +34,16 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+def get_openai_client(api_key):
+    """
+    Возвращает клиента OpenAI для указанного ключа.
+    
+    Клиенты задач (OCR, структурирование, оценка, вакансии) выбираются через
+    app.utils.llm_providers.get_llm_client; эта функция нужна для проверки
+    ключа OpenAI.
+    """
+    return openai_client(api_key)
+
 def test_openai_api_key():
     """
     Тестирует текущий API-ключ OpenAI, чтобы проверить его работоспособность.
@@ -55,11 +68,12 @@ def test_openai_api_key():
             return False, f"Некорректный API-ключ: {api_key[:10]}... (длина: {len(api_key) if api_key else 0})"
         
         # Создаем клиента OpenAI с этим ключом
-        client = OpenAI(api_key=api_key)
+        client = get_openai_client(api_key)
         
         # Выполняем простой запрос для проверки ключа
-        response = client.chat.completions.create(
-            model="gpt-4o",
+        response = chat_completion(
+            client,
+            model=llm_model(TASK_SCORING),
             messages=[
                 {"role": "system", "content": "Ты - помощник."},
                 {"role": "user", "content": "Скажи 'Ключ работает!' одной строкой"}
@@ -75,13 +89,15 @@ def test_openai_api_key():
     except Exception as e:
         return False, f"Ошибка при проверке API-ключа: {str(e)}"
 
-def extract_resume_text(file_path):
+def extract_resume_text(file_path, structure=True):
     """
     Извлекает текст из файла резюме с использованием OpenAI API или других методов,
     в зависимости от формата файла.
     
     Args:
         file_path (str): Путь к файлу резюме
+        structure (bool): Разбирать текст на структурированные данные отдельным
+            запросом (False - разбор выполняется совмещенным анализом)
         
     Returns:
         dict: Словарь с извлеченным текстом и структурированными данными
@@ -96,18 +112,35 @@ def extract_resume_text(file_path):
         # Определяем формат файла по расширению
         file_extension = os.path.splitext(file_path)[1].lower()
         
-        # Получаем API ключ
-        api_key = current_app.config.get('OPENAI_API_KEY')
-        if not api_key or "your-" in api_key or len(api_key.strip()) < 20:
-            api_key = os.environ.get('OPENAI_API_KEY')
+        ocr_model = llm_model(TASK_OCR)
         
-        # Проверяем валидность ключа
-        if not api_key or "your-" in api_key or len(api_key.strip()) < 20:
-            current_app.logger.error("OpenAI API ключ невалидный или отсутствует")
-            return None
+        # Первый уровень - локальное распознавание (текстовый слой PDF, Tesseract).
+        # В модель отправляются только страницы с низкой уверенностью OCR
+        ocr_settings = ocr_options()
+        try:
+            local_pages = extract_pages(file_path, ocr_settings) if file_extension in ['.pdf', '.jpg', '.jpeg', '.png'] else []
+        except Exception as e:
+            current_app.logger.warning(f"Локальное распознавание недоступно, используем OpenAI: {str(e)}")
+            local_pages = []
+        reliable_pages = {
+            index: page.text for index, page in enumerate(local_pages)
+            if page.is_reliable(ocr_settings['min_confidence'], ocr_settings['min_length'])
+        }
         
-        # Создаем клиента OpenAI
-        client = OpenAI(api_key=api_key)
+        def local_text(index):
+            # Локальный текст страницы, даже с низкой уверенностью OCR
+            if index < len(local_pages) and local_pages[index].text.strip():
+                return local_pages[index].text
+            return ''
+        
+        # Клиент провайдера распознавания создается, только если остались страницы
+        # для vision-модели (None, если ключ OpenAI не настроен)
+        vision = {}
+        
+        def vision_client():
+            if 'client' not in vision:
+                vision['client'] = get_llm_client(TASK_OCR)
+            return vision['client']
         
         # Обработка в зависимости от формата файла
         if file_extension in ['.pdf']:
@@ -115,6 +148,7 @@ def extract_resume_text(file_path):
             current_app.logger.info(f"Обрабатываем PDF-файл через конвертацию в изображения: {file_path}")
             
             # Открываем PDF с помощью PyMuPDF
+            import fitz
             pdf_document = fitz.open(file_path)
             
             # Подготовка списка для хранения текста со всех страниц
@@ -122,21 +156,30 @@ def extract_resume_text(file_path):
             
             # Для каждой страницы PDF
             for page_num in range(len(pdf_document)):
-                # Получаем страницу
-                page = pdf_document[page_num]
+                # Страница уже надежно распознана локально
+                if page_num in reliable_pages:
+                    all_pages_text.append(reliable_pages[page_num])
+                    continue
                 
-                # Преобразуем страницу в изображение
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # Увеличиваем разрешение для лучшего распознавания
+                client = vision_client()
+                if client is None:
+                    # Vision-модель не настроена: берем локальный текст с низкой уверенностью
+                    if local_text(page_num):
+                        all_pages_text.append(local_text(page_num))
+                    else:
+                        current_app.logger.warning(f"Страница {page_num + 1} не распознана: vision-модель не настроена")
+                    continue
                 
-                # Конвертируем pixmap в формат, который можно отправить в OpenAI API
-                img_data = pix.tobytes("png")
+                # Получаем страницу
+                page = pdf_document[page_num]
                 
-                # Кодируем изображение в base64
-                img_base64 = base64.b64encode(img_data).decode('utf-8')
+                # Рендерим страницу сразу в разрешении, которое использует модель (оттенки серого, JPEG)
+                page_image = render_pdf_page(page, **vision_options())
                 
                 # Отправляем запрос к OpenAI API для извлечения текста из изображения
-                response = client.chat.completions.create(
-                    model="gpt-4o",
+                response = chat_completion(
+                    client,
+                    model=ocr_model,
                     messages=[
                         {
                             "role": "system",
@@ -152,7 +195,7 @@ def extract_resume_text(file_path):
                                 {
                                     "type": "image_url",
                                     "image_url": {
-                                        "url": f"data:image/png;base64,{img_base64}"
+                                        "url": page_image.data_url
                                     }
                                 }
                             ]
@@ -177,6 +220,7 @@ def extract_resume_text(file_path):
         elif file_extension in ['.docx']:
             # Для DOCX используем python-docx для извлечения текста
             try:
+                import docx
                 doc = docx.Document(file_path)
                 paragraphs = [p.text for p in doc.paragraphs]
                 raw_text = "\n".join(paragraphs)
@@ -191,8 +235,12 @@ def extract_resume_text(file_path):
                     
                     # Пробуем отправить напрямую как бинарные данные
                     try:
-                        response = client.chat.completions.create(
-                            model="gpt-4o",
+                        client = vision_client()
+                        if client is None:
+                            raise RuntimeError("vision-модель не настроена")
+                        response = chat_completion(
+                            client,
+                            model=ocr_model,
                             messages=[
                                 {
                                     "role": "system",
@@ -236,11 +284,15 @@ def extract_resume_text(file_path):
                 
                 # Если не удалось извлечь текст через python-docx, используем OpenAI
                 try:
+                    client = vision_client()
+                    if client is None:
+                        raise RuntimeError("vision-модель не настроена")
                     with open(file_path, "rb") as file:
                         file_data = file.read()
                         
-                    response = client.chat.completions.create(
-                        model="gpt-4o",
+                    response = chat_completion(
+                        client,
+                        model=ocr_model,
                         messages=[
                             {
                                 "role": "system",
@@ -270,14 +322,27 @@ def extract_resume_text(file_path):
                     current_app.logger.error(f"Ошибка при обработке DOCX через API: {str(api_error)}")
                     raw_text = "Не удалось извлечь текст из документа"
                 
+        elif file_extension in ['.jpg', '.jpeg', '.png'] and 0 in reliable_pages:
+            # Изображение надежно распознано локально
+            raw_text = reliable_pages[0]
+            
+        elif file_extension in ['.jpg', '.jpeg', '.png'] and vision_client() is None:
+            # Vision-модель не настроена: берем локальный текст с низкой уверенностью
+            raw_text = local_text(0) or "Не удалось извлечь текст из изображения"
+            
         elif file_extension in ['.jpg', '.jpeg', '.png']:
             # Для изображений используем OpenAI Vision API
             try:
-                with open(file_path, "rb") as file:
-                    image_data = file.read()
+                # Поворот по EXIF, оттенки серого, выравнивание, уменьшение и сжатие
+                prepared_image = prepare_image_file(file_path, **vision_options())
+                current_app.logger.info(
+                    f"Изображение подготовлено для распознавания: {os.path.getsize(file_path)} -> "
+                    f"{len(prepared_image.data)} байт, {prepared_image.width}x{prepared_image.height}"
+                )
                     
-                response = client.chat.completions.create(
-                    model="gpt-4o",
+                response = chat_completion(
+                    vision_client(),
+                    model=ocr_model,
                     messages=[
                         {
                             "role": "system",
@@ -293,7 +358,7 @@ def extract_resume_text(file_path):
                                 {
                                     "type": "image_url",
                                     "image_url": {
-                                        "url": f"data:image/{file_extension[1:]};base64,{base64.b64encode(image_data).decode('utf-8')}"
+                                        "url": prepared_image.data_url
                                     }
                                 }
                             ]
@@ -310,13 +375,11 @@ def extract_resume_text(file_path):
             current_app.logger.error(f"Неподдерживаемый формат файла: {file_extension}")
             return None
         
-        # Анализируем извлеченный текст для получения структурированных данных
-        structured_data = extract_structured_data_from_text(raw_text, client)
+        result = {"text": raw_text}
         
-        result = {
-            "text": raw_text,
-            "structured_data": structured_data
-        }
+        # Анализируем извлеченный текст для получения структурированных данных
+        if structure:
+            result["structured_data"] = extract_structured_data_from_text(raw_text)
         
         current_app.logger.info(f"Успешно извлечен текст из файла: {file_path}")
         return result
@@ -325,13 +388,90 @@ def extract_resume_text(file_path):
         current_app.logger.error(f"Ошибка при извлечении текста из файла: {str(e)}", exc_info=True)
         return None
 
-def extract_structured_data_from_text(text, client):
+# Схема структурированных данных резюме (structured_resume_data)
+STRUCTURED_RESUME_SCHEMA = """{
+    "personal_info": {
+        "name": "полное имя",
+        "phone": "номер телефона",
+        "email": "email адрес",
+        "location": "город проживания"
+    },
+    "education": [
+        {
+            "institution": "название учебного заведения",
+            "degree": "степень/квалификация",
+            "field": "специальность",
+            "year_start": "год начала",
+            "year_end": "год окончания"
+        }
+    ],
+    "experience": [
+        {
+            "company": "название компании",
+            "position": "должность",
+            "description": "описание обязанностей",
+            "year_start": "год начала",
+            "year_end": "год окончания или 'по настоящее время'"
+        }
+    ],
+    "skills": ["навык1", "навык2", ...],
+    "languages": ["язык1", "язык2", ...],
+    "summary": "краткое описание кандидата",
+    "total_experience_years": "примерное количество лет опыта"
+}
+"""
+STRUCTURED_RESUME_KEYS = ('personal_info', 'education', 'experience', 'skills', 'languages', 'summary')
+
+# Поля оценки кандидата, которые сохраняет request_ai_analysis
+ANALYSIS_RESULT_SCHEMA = """{
+    "match_percent": "процент соответствия вакансии (0-100)",
+    "pros": "сильные стороны, каждая с новой строки",
+    "cons": "слабые стороны, каждая с новой строки",
+    "recommendation": "рекомендация по кандидату",
+    "scores": {"location": 0-100, "experience": 0-100, "tech_skills": 0-100, "education": 0-100},
+    "score_comments": {"location": "...", "experience": "...", "tech_skills": "...", "education": "..."},
+    "mismatch_notes": "несоответствия требованиям вакансии",
+    "data_consistency": {"inconsistencies": ["..."], "severity": "низкая/средняя/высокая", "trust_score": 0-100},
+    "answer_quality": {"ai_generation_probability": 0-100, "ai_generation_signs": false, "overall_quality": "низкое/среднее/высокое"},
+    "data_completeness": {"answer_quality_issues": ["..."], "low_quality_answers": false},
+    "skills_breakdown": {}, "career_dynamics": {}, "special_cases": {}, "hidden_potential": {},
+    "long_term_outlook": {}, "stop_factors": ["..."], "interview_questions": ["..."], "inconsistencies": ["..."]
+}
+"""
+
+# Дополнение запроса оценки: разбор резюме и оценка в одном ответе
+COMBINED_ANALYSIS_INSTRUCTIONS = f"""
+
+        Структурированных данных из резюме еще нет: извлеки их из текста резюме
+        и одновременно оцени кандидата. Верни один JSON с двумя разделами:
+        {{
+            "structured_resume_data": {STRUCTURED_RESUME_SCHEMA},
+            "analysis": {ANALYSIS_RESULT_SCHEMA}
+        }}
+        Если какие-то данные резюме отсутствуют, используй null или пустой массив.
+"""
+
+# Оценка кандидата из базы для другой вакансии: только поля, которые сохраняет подбор
+VACANCY_MATCH_INSTRUCTIONS = """
+
+        Кандидат откликался на другую вакансию; оцени, подходит ли он для вакансии
+        выше, по резюме и структурированным данным. Верни JSON:
+        {
+            "match_percent": "процент соответствия вакансии (0-100)",
+            "pros": "сильные стороны, каждая с новой строки",
+            "cons": "слабые стороны, каждая с новой строки",
+            "recommendation": "рекомендация: стоит ли предложить кандидату эту вакансию",
+            "scores": {"location": 0-100, "experience": 0-100, "tech_skills": 0-100, "education": 0-100}
+        }
+"""
+
+def extract_structured_data_from_text(text, client=None):
     """
     Извлекает структурированные данные из текста резюме с использованием OpenAI API
     
     Args:
         text (str): Текст резюме
-        client (OpenAI): Клиент OpenAI API
+        client: Клиент LLM (по умолчанию - клиент задачи структурирования)
         
     Returns:
         dict: Структурированные данные из резюме
@@ -344,42 +484,18 @@ def extract_structured_data_from_text(text, client):
         {text[:6000]}  # Ограничиваем размер текста для API
         
         Верни результат в формате JSON со следующими полями:
-        {{
-            "personal_info": {{
-                "name": "полное имя",
-                "phone": "номер телефона",
-                "email": "email адрес",
-                "location": "город проживания"
-            }},
-            "education": [
-                {{
-                    "institution": "название учебного заведения",
-                    "degree": "степень/квалификация",
-                    "field": "специальность",
-                    "year_start": "год начала",
-                    "year_end": "год окончания"
-                }}
-            ],
-            "experience": [
-                {{
-                    "company": "название компании",
-                    "position": "должность",
-                    "description": "описание обязанностей",
-                    "year_start": "год начала",
-                    "year_end": "год окончания или 'по настоящее время'"
-                }}
-            ],
-            "skills": ["навык1", "навык2", ...],
-            "languages": ["язык1", "язык2", ...],
-            "summary": "краткое описание кандидата",
-            "total_experience_years": "примерное количество лет опыта"
-        }}
+        {STRUCTURED_RESUME_SCHEMA}
         
         Если какие-то данные отсутствуют, используй null или пустой массив.
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4o",
+        client = client or get_llm_client(TASK_STRUCTURING)
+        if client is None:
+            return {}
+        
+        response = chat_completion(
+            client,
+            model=llm_model(TASK_STRUCTURING),
             messages=[
                 {"role": "system", "content": "Ты - специалист по анализу резюме и извлечению структурированных данных."},
                 {"role": "user", "content": prompt}
@@ -410,12 +526,17 @@ def process_resume_and_analyze(candidate_id, resume_path):
             return
         
         # Проверяем наличие файла резюме
-        if not resume_path or not os.path.exists(resume_path):
+        if not resume_path or not reference_exists(resume_path):
             current_app.logger.error(f"Файл резюме не найден: {resume_path}")
             return
         
-        # Извлекаем текст из резюме
-        result = extract_resume_text(resume_path)
+        # При совмещенном анализе резюме разбирается на структурированные данные
+        # тем же запросом, что и оценивает кандидата
+        combined = current_app.config.get('AI_COMBINED_ANALYSIS', True)
+        
+        # Извлекаем текст из резюме (для S3 - из временной локальной копии)
+        with local_copy(resume_path) as local_path:
+            result = extract_resume_text(local_path, structure=not combined)
         if not result:
             current_app.logger.error(f"Не удалось извлечь текст из резюме: {resume_path}")
             return
@@ -427,16 +548,71 @@ def process_resume_and_analyze(candidate_id, resume_path):
         candidate.resume_text = cleaned_text
         if 'structured_data' in result:
             candidate.structured_resume_data = result['structured_data']
+            # Опыт, образование и языки в таблицах для фильтров в SQL
+            _sync_resume_structure(candidate)
+        # При совмещенном анализе данные прежнего резюме остаются до применения
+        # его результата: при ошибке анализа кандидат не теряет разобранное резюме
         
         # Сохраняем изменения
         db.session.commit()
         
-        # Запускаем AI-анализ
-        job_id = request_ai_analysis(candidate)
-        if job_id:
-            current_app.logger.info(f"Запущен AI-анализ для кандидата {candidate_id}, job_id: {job_id}")
+        # Язык резюме и именованные сущности (организации, даты, места) через spaCy
+        try:
+            from app.utils.resume_nlp import annotate_candidate
+            annotate_candidate(candidate)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Ошибка NLP-обработки резюме кандидата {candidate_id}: {str(e)}", exc_info=True)
+        
+        # Ключевые слова справочника и отрасли резюме (предварительная классификация без AI)
+        try:
+            from app.utils.keyword_matcher import tag_candidate
+            tag_candidate(candidate)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Ошибка поиска ключевых слов в резюме кандидата {candidate_id}: {str(e)}", exc_info=True)
+        
+        def extract_skills():
+            # Извлекаем навыки локально по справочнику (без обращения к AI)
+            try:
+                from app.utils.skill_extractor import save_candidate_skills
+                skills_count = save_candidate_skills(candidate)
+                current_app.logger.info(f"Извлечено навыков для кандидата {candidate_id}: {skills_count}")
+                
+                # Пересчитываем оценку соответствия навыков требованиям вакансии
+                if candidate.vacancy_id:
+                    from app.utils.skill_matching import update_vacancy_scores
+                    update_vacancy_scores(candidate.vacancy_id, [candidate.id])
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Ошибка при извлечении и оценке навыков кандидата {candidate_id}: {str(e)}", exc_info=True)
+        
+        def embed_resume():
+            # Вектор резюме для семантического поиска по базе кандидатов (локальная модель)
+            try:
+                from app.utils.candidate_search import index_candidate
+                index_candidate(candidate)
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Ошибка построения вектора резюме кандидата {candidate_id}: {str(e)}", exc_info=True)
+        
+        # Список навыков из structured_resume_data при совмещенном анализе
+        # появляется только после него
+        if not combined:
+            extract_skills()
+            embed_resume()
+        
+        # Запускаем AI-анализ как отслеживаемую задачу (уже в фоновом потоке)
+        from app.utils.analysis_jobs import create_job, run_job
+        job = create_job(candidate.id, source='resume_upload')
+        if run_job(job.id, candidate, restructure=combined):
+            current_app.logger.info(f"Выполнен AI-анализ для кандидата {candidate_id}, job_id: {job.id}")
         else:
-            current_app.logger.error(f"Не удалось запустить AI-анализ для кандидата {candidate_id}")
+            current_app.logger.error(f"Не удалось выполнить AI-анализ для кандидата {candidate_id}, job_id: {job.id}")
+        
+        if combined:
+            extract_skills()
+            embed_resume()
         
     except Exception as e:
         current_app.logger.error(f"Ошибка при обработке резюме: {str(e)}")
@@ -584,144 +760,165 @@ def clean_resume_text(text):
     
     return text.strip()
 
-def request_ai_analysis(candidate):
+def _analysis_prompt(candidate, instructions='', vacancy=None):
+    """Текст запроса на оценку кандидата в пределах бюджета AI_ANALYSIS_PROMPT_TOKENS"""
+    from app.utils.prompt_builder import build_analysis_prompt
+
+    built = build_analysis_prompt(
+        candidate,
+        budget=current_app.config.get('AI_ANALYSIS_PROMPT_TOKENS', 6000),
+        model=llm_model(TASK_SCORING),
+        instructions=instructions,
+        vacancy=vacancy
+    )
+    if built.truncated:
+        current_app.logger.info(
+            f"Запрос анализа кандидата ID={candidate.id} сокращен до {built.tokens} токенов, "
+            f"сокращенные разделы: {', '.join(built.truncated)}"
+        )
+    return built.text
+
+
+def _request_analysis(client, prompt):
+    """Запрос оценки кандидата; возвращает разобранный JSON ответа"""
+    response = chat_completion(
+        client,
+        model=llm_model(TASK_SCORING),
+        messages=[
+            {"role": "system", "content": "Ты - HR-аналитик, специализирующийся на оценке соответствия кандидатов требованиям вакансий."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.2,
+        response_format={"type": "json_object"}
+    )
+    return json.loads(response.choices[0].message.content.strip())
+
+
+def request_vacancy_match(candidate, vacancy, client=None):
+    """
+    Оценка кандидата из базы для другой вакансии (подбор из базы кандидатов)
+
+    Данные кандидата не изменяются: результат сохраняет вызывающий код.
+
+    Returns:
+        dict: match_percent, pros, cons, recommendation, scores
+
+    Raises:
+        RuntimeError: Клиент модели не настроен
+        ValueError: В ответе нет match_percent
+    """
+    client = client or get_llm_client(TASK_SCORING)
+    if client is None:
+        raise RuntimeError("OpenAI API ключ невалидный или отсутствует")
+    result = _request_analysis(client, _analysis_prompt(candidate, VACANCY_MATCH_INSTRUCTIONS, vacancy=vacancy))
+    if result.get('match_percent') is None:
+        raise ValueError("в ответе нет match_percent")
+    return result
+
+
+def _use_combined_analysis(candidate):
+    """Совмещенный анализ нужен, если резюме еще не разобрано на структурированные данные"""
+    if not current_app.config.get('AI_COMBINED_ANALYSIS', True):
+        return False
+    data = candidate.structured_resume_data or {}
+    return not any(data.get(key) for key in STRUCTURED_RESUME_KEYS)
+
+
+def _store_structured_data(candidate, structured_data):
+    """Заменяет разобранные данные резюме, сохраняя результаты локальной обработки (nlp, keywords)"""
+    if not structured_data:
+        return
+    data = {key: value for key, value in (candidate.structured_resume_data or {}).items()
+            if key not in STRUCTURED_RESUME_KEYS}
+    data.update(structured_data)
+    candidate.structured_resume_data = data
+
+
+def _sync_resume_structure(candidate):
+    """Обновляет нормализованную проекцию данных резюме (без фиксации транзакции)"""
+    try:
+        from app.utils.resume_structure import sync_candidate_structure
+        sync_candidate_structure(candidate, commit=False)
+    except Exception as e:
+        current_app.logger.error(f"Ошибка обновления проекции резюме кандидата {candidate.id}: {str(e)}", exc_info=True)
+
+
+def _apply_combined_result(candidate, response):
+    """
+    Разделяет ответ совмещенного анализа
+
+    Returns:
+        dict: Часть ответа с оценкой кандидата
+
+    Raises:
+        ValueError: Если в ответе нет одной из частей
+    """
+    structured_data = response.get('structured_resume_data')
+    analysis = response.get('analysis')
+    if not isinstance(structured_data, dict) or not isinstance(analysis, dict):
+        raise ValueError("в ответе нет structured_resume_data или analysis")
+    if analysis.get('match_percent') is None:
+        raise ValueError("в ответе нет match_percent")
+    _store_structured_data(candidate, structured_data)
+    return analysis
+
+
+def request_ai_analysis(candidate, progress=None, raise_errors=False, restructure=False):
     """
     Отправляет данные кандидата на анализ с использованием OpenAI API
     и возвращает результаты анализа.
     
     Args:
         candidate: Объект кандидата с данными для анализа
+        progress: Функция (процент, шаг) для отчета о ходе анализа
+        raise_errors: Пробрасывать исключения вместо возврата None
+        restructure: Разобрать резюме заново, даже если данные прежнего резюме уже есть
         
     Returns:
-        dict: Результаты анализа, включая процент соответствия и рекомендации
+        dict: Результаты анализа, включая процент соответствия и рекомендации;
+              None, если API-ключ не настроен или анализ не удался
     """
+    progress = progress or (lambda percent, stage: None)
     try:
         # Принудительно перезагружаем переменные окружения
         load_dotenv(override=True)
         
-        # Получаем API ключ напрямую из переменных окружения
-        api_key_env = os.environ.get('OPENAI_API_KEY')
-        
-        # Маскируем ключ для логов
-        masked_key = f"{api_key_env[:5]}...{'*' * 5}" if api_key_env else "None"
-        current_app.logger.info(f"OPENAI_API_KEY напрямую из os.environ: {masked_key} (длина: {len(api_key_env) if api_key_env else 0})")
-        
-        # Проверяем, что ключ из переменной окружения валидный
-        if api_key_env and "your-" not in api_key_env and len(api_key_env.strip()) >= 20:
-            api_key = api_key_env
-        else:
-            # Если ключ из окружения невалидный, пробуем получить из конфигурации
-            api_key = current_app.config.get('OPENAI_API_KEY')
-            masked_key = f"{api_key[:5]}...{'*' * 5}" if api_key else "None"
-            current_app.logger.info(f"OPENAI_API_KEY из конфигурации: {masked_key} (длина: {len(api_key) if api_key else 0})")
-        
-        # Проверяем валидность ключа
-        if not api_key or "your-" in api_key or len(api_key.strip()) < 20:
-            current_app.logger.error("OpenAI API ключ невалидный или отсутствует")
+        # Клиент провайдера оценки (None, если ключ OpenAI не настроен)
+        client = get_llm_client(TASK_SCORING)
+        if client is None:
             return None
         
-        # Проверяем работоспособность ключа
-        key_valid, message = test_openai_api_key()
-        if not key_valid:
-            current_app.logger.error(f"Проверка API-ключа не прошла: {message}")
-            return None
-            
-        current_app.logger.info(f"API-ключ OpenAI прошел проверку: {message}")
+        # Проверяем работоспособность ключа OpenAI
+        if llm_provider(TASK_SCORING) == PROVIDER_OPENAI:
+            key_valid, message = test_openai_api_key()
+            if not key_valid:
+                current_app.logger.error(f"Проверка API-ключа не прошла: {message}")
+                return None
+            current_app.logger.info(f"API-ключ OpenAI прошел проверку: {message}")
             
-        # Инициализация клиента OpenAI
-        client = OpenAI(api_key=api_key)
-        
-        # Получаем данные вакансии
-        vacancy = candidate.vacancy
-        
-        # Подготовка данных кандидата
-        # Получаем базовую информацию
-        location = candidate.base_answers.get('location', 'Не указано') if candidate.base_answers else 'Не указано'
-        experience_years = candidate.base_answers.get('experience_years', 'Не указано') if candidate.base_answers else 'Не указано'
-        education = candidate.base_answers.get('education', 'Не указано') if candidate.base_answers else 'Не указано'
-        
-        # Преобразуем образование из кода в текстовое описание
-        education_translations = {
-            'secondary': 'Среднее',
-            'vocational': 'Среднее специальное',
-            'higher': 'Высшее',
-            'phd': 'Ученая степень'
-        }
-        education_text = education_translations.get(education, education)
-        
-        # Формируем информацию о местоположении для AI
-        location_info = location
-        if location and location != 'Не указано':
-            # Добавляем дополнительную информацию для AI о местоположении
-            location_info = f"{location} (указан город проживания кандидата)"
-        
-        # Подготовка ответов на профессиональные вопросы
-        professional_answers = ""
-        if candidate.vacancy_answers and vacancy.questions_json:
-            question_texts = {str(q['id']): q['text'] for q in vacancy.questions_json}
-            for question_id, answer in candidate.vacancy_answers.items():
-                question_text = question_texts.get(question_id, f"Вопрос {question_id}")
-                professional_answers += f"Вопрос: {question_text}\nОтвет: {answer}\n\n"
-        
-        # Подготовка ответов на вопросы о soft skills
-        soft_skills_answers = ""
-        if candidate.soft_answers and vacancy.soft_questions_json:
-            soft_question_texts = {str(q['id']): q['text'] for q in vacancy.soft_questions_json}
-            for question_id, answer in candidate.soft_answers.items():
-                question_text = soft_question_texts.get(question_id, f"Вопрос {question_id}")
-                soft_skills_answers += f"Вопрос: {question_text}\nОтвет: {answer}\n\n"
+        progress(10, 'Подготовка данных кандидата')
         
-        prompt = f"""
-            ВАКАНСИЯ:
-            Название: {vacancy.title}
-            Тип занятости: {vacancy.c_employment_type.name if vacancy.c_employment_type else 'Не указано'}
-            Описание задач: {vacancy.description_tasks or 'Не указано'}
-            Условия работы: {vacancy.description_conditions or 'Не указано'}
-            Требования к кандидату: {vacancy.ideal_profile or 'Не указано'}
-            Корпоративные ценности: {vacancy.company_values or 'Не указано'}
-
-            КАНДИДАТ:
-            ФИО: {candidate.full_name}
-            Город: {location_info}
-            Опыт работы: {experience_years}
-            Образование: {education_text}
-            Зарплатные ожидания: {candidate.base_answers.get('desired_salary', 'Не указано') if candidate.base_answers else 'Не указано'}
-            Пол: {candidate.base_answers.get('gender', 'Не указано') if candidate.base_answers else 'Не указано'}
-            {f"Кандидат ранее подавался на позиции: {candidate.previous_applications}" if hasattr(candidate, 'previous_applications') and candidate.previous_applications else ""}
-
-            Профессиональные вопросы и ответы (Очень важно учитывать эти ответы при оценке):
-            {professional_answers}
-
-            Вопросы о soft skills и ответы (Очень важно учитывать эти ответы при оценке):
-            {soft_skills_answers}
-
-            РЕЗЮМЕ КАНДИДАТА:
-            {candidate.resume_text[:10000] if candidate.resume_text else 'Не предоставлено'}
-
-            {f"СОПРОВОДИТЕЛЬНОЕ ПИСЬМО:\n{candidate.cover_letter[:3000]}" if candidate.cover_letter else ""}
-
-            СТРУКТУРИРОВАННЫЕ ДАННЫЕ ИЗ РЕЗЮМЕ:
-            {json.dumps(candidate.structured_resume_data, ensure_ascii=False, indent=2) if hasattr(candidate, 'structured_resume_data') and candidate.structured_resume_data else "Нет структурированных данных"}
-        """   
+        combined = restructure or _use_combined_analysis(candidate)
+        prompt = _analysis_prompt(candidate, COMBINED_ANALYSIS_INSTRUCTIONS if combined else '')
         
         # Отправляем запрос к OpenAI API
-        client = OpenAI(api_key=api_key)
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "Ты - HR-аналитик, специализирующийся на оценке соответствия кандидатов требованиям вакансий."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            response_format={"type": "json_object"}
-        )
-        
-        # Получаем ответ
-        result_text = response.choices[0].message.content.strip()
-        
-        # Парсим JSON
-        result = json.loads(result_text)
+        progress(30, 'Разбор резюме и анализ моделью' if combined else 'Анализ моделью')
+        if not combined:
+            result = _request_analysis(client, prompt)
+        else:
+            try:
+                # JSONDecodeError тоже является ValueError
+                result = _apply_combined_result(candidate, _request_analysis(client, prompt))
+            except ValueError as e:
+                # Запасной путь: отдельные запросы структурирования и оценки
+                current_app.logger.warning(
+                    f"Совмещенный анализ кандидата ID={candidate.id} не удался ({str(e)}), выполняется раздельный анализ"
+                )
+                progress(50, 'Разбор резюме')
+                _store_structured_data(candidate, extract_structured_data_from_text(candidate.resume_text))
+                progress(60, 'Анализ моделью')
+                result = _request_analysis(client, _analysis_prompt(candidate))
+        progress(90, 'Сохранение результатов')
         
         # Логируем полученный результат для отладки
         current_app.logger.info(f"Результат AI-анализа для кандидата ID={candidate.id}: {json.dumps(result, ensure_ascii=False)[:500]}...")
@@ -826,58 +1023,48 @@ def request_ai_analysis(candidate):
                 'score_comments': score_comments
             }
         
+        # Проекция разобранного резюме и оценки на таблицы и типизированные колонки
+        _sync_resume_structure(candidate)
+        
         # Сохраняем изменения в БД
         db.session.commit()
         
-        # Генерируем уникальный ID для задачи
-        job_id = str(uuid.uuid4())
-        
-        return job_id
+        return result
         
     except Exception as e:
         current_app.logger.error(f"Ошибка при запросе AI-анализа: {str(e)}")
+        if raise_errors:
+            raise
         return None
 
 def get_analysis_status(analysis_id):
     """
     Проверяет статус анализа по его идентификатору.
     
-    В текущей реализации анализ выполняется синхронно,
-    поэтому всегда возвращаем завершенный статус.
+    Состояние читается из таблицы analysis_jobs (см. app/utils/analysis_jobs.py).
     
     Args:
         analysis_id (str): Идентификатор задачи анализа
         
     Returns:
-        dict: Информация о статусе анализа
+        dict: Информация о статусе анализа; None, если задача не найдена
     """
-    try:
-        # Для текущей реализации всегда возвращаем, что анализ завершен
-        status_info = {
-            'status': 'completed',
-            'progress': 100,
-            'analysis_id': analysis_id,
-            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
-            'completed_at': time.strftime('%Y-%m-%dT%H:%M:%S')
-        }
-        
-        return status_info
-        
-    except Exception as e:
-        current_app.logger.error(f"Ошибка при проверке статуса анализа: {str(e)}")
-        return {
-            'status': 'error',
-            'error': str(e),
-            'analysis_id': analysis_id
-        }
+    from app.utils.analysis_jobs import get_job
+    
+    job = get_job(analysis_id)
+    return job.to_dict() if job else None
+
+VACANCY_REQUIREMENTS_PROMPT_VERSION = 1
+
 
-def analyze_vacancy_requirements(vacancy_description):
+def analyze_vacancy_requirements(vacancy_description, use_cache=True):
     """
     Анализирует требования вакансии с помощью OpenAI API
     для извлечения ключевых навыков и требований.
     
     Args:
         vacancy_description (str): Описание вакансии
+        use_cache (bool): Использовать сохраненный ответ для такого же описания
         
     Returns:
         dict: Извлеченные требования и навыки
@@ -886,25 +1073,9 @@ def analyze_vacancy_requirements(vacancy_description):
         # Принудительно перезагружаем переменные окружения
         load_dotenv(override=True)
         
-        # Получаем API ключ напрямую из переменных окружения
-        api_key_env = os.environ.get('OPENAI_API_KEY')
-        
-        # Маскируем ключ для логов
-        masked_key = f"{api_key_env[:5]}...{'*' * 5}" if api_key_env else "None"
-        current_app.logger.info(f"OPENAI_API_KEY напрямую из os.environ: {masked_key} (длина: {len(api_key_env) if api_key_env else 0})")
-        
-        # Проверяем, что ключ из переменной окружения валидный
-        if api_key_env and "your-" not in api_key_env and len(api_key_env.strip()) >= 20:
-            api_key = api_key_env
-        else:
-            # Если ключ из окружения невалидный, пробуем получить из конфигурации
-            api_key = current_app.config.get('OPENAI_API_KEY')
-            masked_key = f"{api_key[:5]}...{'*' * 5}" if api_key else "None"
-            current_app.logger.info(f"OPENAI_API_KEY из конфигурации: {masked_key} (длина: {len(api_key) if api_key else 0})")
-        
-        # Проверяем валидность ключа
-        if not api_key or "your-" in api_key or len(api_key.strip()) < 20:
-            current_app.logger.error("OpenAI API ключ невалидный или отсутствует")
+        # Клиент провайдера задач по вакансиям (None, если ключ OpenAI не настроен)
+        client = get_llm_client(TASK_VACANCY)
+        if client is None:
             return None
         
         # Формируем запрос для анализа
@@ -923,11 +1094,18 @@ def analyze_vacancy_requirements(vacancy_description):
         }}
         """
         
-        # Отправляем запрос к OpenAI API
-        client = OpenAI(api_key=api_key)
+        cache_key = llm_cache.CacheKey(
+            'vacancy_requirements', llm_model(TASK_VACANCY), VACANCY_REQUIREMENTS_PROMPT_VERSION,
+            text=vacancy_description
+        )
+        cached = llm_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            return json.loads(cached)
         
-        response = client.chat.completions.create(
-            model="gpt-4o",
+        # Отправляем запрос к OpenAI API
+        response = chat_completion(
+            client,
+            model=llm_model(TASK_VACANCY),
             messages=[
                 {"role": "system", "content": "Ты - HR-аналитик, специализирующийся на анализе вакансий."},
                 {"role": "user", "content": prompt}
@@ -941,6 +1119,7 @@ def analyze_vacancy_requirements(vacancy_description):
         
         # Парсим JSON
         result = json.loads(result_text)
+        llm_cache.put(cache_key, result_text)
         
         return result
         
@@ -948,26 +1127,30 @@ def analyze_vacancy_requirements(vacancy_description):
         current_app.logger.error(f"Ошибка при анализе требований вакансии: {str(e)}")
         return None 
 
-def generate_vacancy_with_ai(title, employment_type, description_tasks, description_conditions):
-    """
-    Генерирует полные данные вакансии с помощью OpenAI API на основе базовой информации
-    """
-    try:
-        # Получаем API ключ из конфигурации или переменных окружения
-        api_key = current_app.config.get('OPENAI_API_KEY')
-        if not api_key:
-            api_key = os.environ.get('OPENAI_API_KEY')
-            
-        # Проверяем валидность ключа
-        if not api_key or "your-" in api_key or len(api_key.strip()) < 20:
-            current_app.logger.error("OpenAI API ключ невалидный или отсутствует")
-            return None
-        
-        # Создаем клиента OpenAI
-        client = OpenAI(api_key=api_key)
-        
-        # Формируем запрос к API
-        prompt = f"""
+VACANCY_TEMPERATURE = 0.7
+VACANCY_MAX_TOKENS = 4000
+VACANCY_SYSTEM_PROMPT = "Ты - опытный HR-специалист, который создает профессиональные вакансии. Твой ответ должен быть в формате JSON."
+VACANCY_TEXT_FIELDS = ('title', 'description_tasks', 'description_conditions', 'ideal_profile')
+# Увеличивается при изменении _vacancy_prompt: ответы на прежний промпт не используются
+VACANCY_PROMPT_VERSION = 1
+
+
+def _vacancy_client():
+    """Клиент LLM для генерации вакансий или None, если ключ OpenAI не настроен"""
+    return get_llm_client(TASK_VACANCY)
+
+
+def _vacancy_cache_key(title, employment_type, description_tasks, description_conditions):
+    """Ключ кэша генерации: название и тип занятости точно, описание - с поиском похожих"""
+    return llm_cache.CacheKey(
+        'vacancy_generation', llm_model(TASK_VACANCY), VACANCY_PROMPT_VERSION,
+        exact={'title': title, 'employment_type': employment_type},
+        text=f"{description_tasks or ''}\n{description_conditions or ''}"
+    )
+
+
+def _vacancy_prompt(title, employment_type, description_tasks, description_conditions):
+    return f"""
         Ты - опытный HR-специалист, который помогает создать профессиональную вакансию. 
         Используй предоставленную информацию для создания полной и привлекательной вакансии.
         
@@ -1009,90 +1192,143 @@ def generate_vacancy_with_ai(title, employment_type, description_tasks, descript
         - Все поля должны быть на русском языке
         - Ответ должен быть только в формате JSON без дополнительного текста
         """
+
+
+def _vacancy_request(prompt, **kwargs):
+    """Параметры запроса chat.completions для генерации вакансии"""
+    return dict(
+        model=llm_model(TASK_VACANCY),
+        messages=[
+            {"role": "system", "content": VACANCY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=VACANCY_TEMPERATURE,
+        max_tokens=VACANCY_MAX_TOKENS,
+        response_format={"type": "json_object"},
+        **kwargs
+    )
+
+
+def _parse_vacancy_data(result, prompt):
+    """
+    Разбирает ответ модели и приводит данные вакансии к формату формы
+
+    Returns:
+        dict: Данные вакансии или None, если ответ не является JSON
+    """
+    # Парсим JSON
+    try:
+        vacancy_data = json.loads(result)
+    except json.JSONDecodeError as e:
+        current_app.logger.error(f"Не удалось распарсить JSON из ответа API: {result[:500]}")
+        current_app.logger.error(f"Ошибка: {str(e)}")
+        return None
+    
+    current_app.logger.info(f"Успешно распарсен JSON. Вопросы: {json.dumps(vacancy_data.get('questions', []), ensure_ascii=False)}")
+    current_app.logger.info(f"Soft вопросы: {json.dumps(vacancy_data.get('soft_questions', []), ensure_ascii=False)}")
+    
+    # Проверяем наличие всех необходимых полей
+    required_fields = ['title', 'description_tasks', 'description_conditions', 'ideal_profile', 'questions', 'soft_questions']
+    for field in required_fields:
+        if field not in vacancy_data:
+            current_app.logger.warning(f"В ответе API отсутствует поле {field}")
+            # Если поле отсутствует, добавляем пустое значение
+            if field in ['questions', 'soft_questions']:
+                vacancy_data[field] = []
+            else:
+                vacancy_data[field] = ""
+    
+    # Проверяем и корректируем формат вопросов
+    for question_type in ['questions', 'soft_questions']:
+        if not isinstance(vacancy_data[question_type], list):
+            current_app.logger.warning(f"Поле {question_type} не является списком: {type(vacancy_data[question_type])}")
+            vacancy_data[question_type] = []
+        else:
+            # Проверяем каждый вопрос и добавляем id и type, если их нет
+            for i, q in enumerate(vacancy_data[question_type]):
+                if isinstance(q, str):
+                    # Если вопрос - это просто строка, преобразуем его в словарь
+                    vacancy_data[question_type][i] = {"id": i+1, "text": q, "type": "text", "required": True}
+                elif isinstance(q, dict):
+                    # Если вопрос - словарь, проверяем наличие необходимых полей
+                    if 'id' not in q:
+                        q['id'] = i+1
+                    if 'text' not in q:
+                        q['text'] = f"Вопрос {i+1}"
+                    if 'type' not in q:
+                        q['type'] = "text"
+                    if 'required' not in q:
+                        q['required'] = True
+    
+    # Ограничиваем количество вопросов до 7
+    if len(vacancy_data['questions']) > 7:
+        vacancy_data['questions'] = vacancy_data['questions'][:7]
+    if len(vacancy_data['soft_questions']) > 7:
+        vacancy_data['soft_questions'] = vacancy_data['soft_questions'][:7]
+        
+    # Добавляем метаданные о генерации
+    vacancy_data.update({
+        'is_ai_generated': True,
+        'ai_generation_date': datetime.now().isoformat(),
+        'ai_generation_prompt': prompt,
+        'ai_generation_metadata': {
+            'model': llm_model(TASK_VACANCY),
+            'temperature': VACANCY_TEMPERATURE,
+            'max_tokens': VACANCY_MAX_TOKENS,
+            'generation_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    })
+    
+    current_app.logger.info(f"Финальные данные вакансии: {json.dumps(vacancy_data, ensure_ascii=False)[:1000]}...")
+    return vacancy_data
+
+
+def _cached_vacancy(cache_key, prompt):
+    """Данные вакансии из кэша или None"""
+    cached = llm_cache.get(cache_key)
+    if cached is None:
+        return None
+    vacancy_data = _parse_vacancy_data(cached, prompt)
+    if vacancy_data is not None:
+        vacancy_data['ai_generation_metadata']['cached'] = True
+        current_app.logger.info(f"Вакансия взята из кэша ответов модели: {vacancy_data['title']}")
+    return vacancy_data
+
+
+def generate_vacancy_with_ai(title, employment_type, description_tasks, description_conditions, use_cache=True):
+    """
+    Генерирует полные данные вакансии с помощью OpenAI API на основе базовой информации
+    
+    При use_cache=False ответ из кэша не используется (новый вариант), но
+    сохраняется в кэш.
+    """
+    try:
+        # Создаем клиента OpenAI
+        client = _vacancy_client()
+        if client is None:
+            return None
+        
+        # Формируем запрос к API
+        prompt = _vacancy_prompt(title, employment_type, description_tasks, description_conditions)
+        cache_key = _vacancy_cache_key(title, employment_type, description_tasks, description_conditions)
+        if use_cache:
+            vacancy_data = _cached_vacancy(cache_key, prompt)
+            if vacancy_data is not None:
+                return vacancy_data
         
         current_app.logger.info(f"Отправляем запрос к OpenAI API для генерации вакансии: {title}")
         
         # Отправляем запрос к OpenAI API
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "Ты - опытный HR-специалист, который создает профессиональные вакансии. Твой ответ должен быть в формате JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=4000,
-            response_format={"type": "json_object"}
-        )
+        response = chat_completion(client, **_vacancy_request(prompt))
         
         # Получаем ответ
         result = response.choices[0].message.content
         current_app.logger.info(f"Получен ответ от OpenAI API: {result[:500]}...")
         
-        # Парсим JSON
-        try:
-            vacancy_data = json.loads(result)
-            current_app.logger.info(f"Успешно распарсен JSON. Вопросы: {json.dumps(vacancy_data.get('questions', []), ensure_ascii=False)}")
-            current_app.logger.info(f"Soft вопросы: {json.dumps(vacancy_data.get('soft_questions', []), ensure_ascii=False)}")
-            
-            # Проверяем наличие всех необходимых полей
-            required_fields = ['title', 'description_tasks', 'description_conditions', 'ideal_profile', 'questions', 'soft_questions']
-            for field in required_fields:
-                if field not in vacancy_data:
-                    current_app.logger.warning(f"В ответе API отсутствует поле {field}")
-                    # Если поле отсутствует, добавляем пустое значение
-                    if field in ['questions', 'soft_questions']:
-                        vacancy_data[field] = []
-                    else:
-                        vacancy_data[field] = ""
-            
-            # Проверяем и корректируем формат вопросов
-            for question_type in ['questions', 'soft_questions']:
-                if not isinstance(vacancy_data[question_type], list):
-                    current_app.logger.warning(f"Поле {question_type} не является списком: {type(vacancy_data[question_type])}")
-                    vacancy_data[question_type] = []
-                else:
-                    # Проверяем каждый вопрос и добавляем id и type, если их нет
-                    for i, q in enumerate(vacancy_data[question_type]):
-                        if isinstance(q, str):
-                            # Если вопрос - это просто строка, преобразуем его в словарь
-                            vacancy_data[question_type][i] = {"id": i+1, "text": q, "type": "text", "required": True}
-                        elif isinstance(q, dict):
-                            # Если вопрос - словарь, проверяем наличие необходимых полей
-                            if 'id' not in q:
-                                q['id'] = i+1
-                            if 'text' not in q:
-                                q['text'] = f"Вопрос {i+1}"
-                            if 'type' not in q:
-                                q['type'] = "text"
-                            if 'required' not in q:
-                                q['required'] = True
-            
-            # Ограничиваем количество вопросов до 7
-            if len(vacancy_data['questions']) > 7:
-                vacancy_data['questions'] = vacancy_data['questions'][:7]
-            if len(vacancy_data['soft_questions']) > 7:
-                vacancy_data['soft_questions'] = vacancy_data['soft_questions'][:7]
-                
-            # Добавляем метаданные о генерации
-            from datetime import datetime
-            vacancy_data.update({
-                'is_ai_generated': True,
-                'ai_generation_date': datetime.now().isoformat(),
-                'ai_generation_prompt': prompt,
-                'ai_generation_metadata': {
-                    'model': 'gpt-4o',
-                    'temperature': 0.7,
-                    'max_tokens': 4000,
-                    'generation_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-            })
-            
-            current_app.logger.info(f"Финальные данные вакансии: {json.dumps(vacancy_data, ensure_ascii=False)[:1000]}...")
-                
-        except json.JSONDecodeError as e:
-            current_app.logger.error(f"Не удалось распарсить JSON из ответа API: {result[:500]}")
-            current_app.logger.error(f"Ошибка: {str(e)}")
+        vacancy_data = _parse_vacancy_data(result, prompt)
+        if vacancy_data is None:
             return None
+        llm_cache.put(cache_key, result)
         
         # Логируем успешную генерацию
         current_app.logger.info(f"Успешно сгенерирована вакансия с помощью AI: {vacancy_data['title']}")
@@ -1102,4 +1338,66 @@ def generate_vacancy_with_ai(title, employment_type, description_tasks, descript
     except Exception as e:
         current_app.logger.error(f"Ошибка при генерации вакансии с помощью AI: {str(e)}")
         current_app.logger.error(traceback.format_exc())
-        return None 
\ No newline at end of file
+        return None
+
+
+def stream_vacancy_with_ai(title, employment_type, description_tasks, description_conditions,
+                           on_delta=None, cancel_event=None, use_cache=True):
+    """
+    Генерирует вакансию потоковым запросом (stream=True)
+
+    Фрагменты ответа передаются в on_delta по мере генерации. Если
+    cancel_event установлен, поток ответа закрывается и генерация
+    прекращается.
+
+    Args:
+        on_delta: Функция (фрагмент, весь текст на текущий момент)
+        cancel_event: threading.Event для отмены
+        use_cache: Использовать сохраненный ответ (он передается в on_delta целиком)
+
+    Returns:
+        dict: Данные вакансии; None, если генерация отменена
+
+    Raises:
+        RuntimeError: Если ключ API не настроен или ответ не является JSON
+    """
+    client = _vacancy_client()
+    if client is None:
+        raise RuntimeError("OpenAI API ключ невалидный или отсутствует")
+    
+    prompt = _vacancy_prompt(title, employment_type, description_tasks, description_conditions)
+    cache_key = _vacancy_cache_key(title, employment_type, description_tasks, description_conditions)
+    if use_cache:
+        vacancy_data = _cached_vacancy(cache_key, prompt)
+        if vacancy_data is not None:
+            if on_delta:
+                text = json.dumps({field: vacancy_data[field] for field in VACANCY_TEXT_FIELDS}, ensure_ascii=False)
+                on_delta(text, text)
+            return vacancy_data
+    
+    current_app.logger.info(f"Потоковая генерация вакансии: {title}")
+    
+    parts = []
+    stream = chat_completion(client, **_vacancy_request(prompt, stream=True))
+    try:
+        for chunk in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                current_app.logger.info(f"Генерация вакансии отменена: {title}")
+                return None
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                if on_delta:
+                    on_delta(delta, ''.join(parts))
+    finally:
+        # Закрываем HTTP-соединение, в том числе при отмене
+        stream.close()
+    
+    vacancy_data = _parse_vacancy_data(''.join(parts), prompt)
+    if vacancy_data is None:
+        raise RuntimeError("Модель вернула некорректный JSON")
+    llm_cache.put(cache_key, ''.join(parts))
+    current_app.logger.info(f"Успешно сгенерирована вакансия с помощью AI: {vacancy_data['title']}")
+    return vacancy_data
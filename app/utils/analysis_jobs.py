@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Фоновые задачи AI-анализа кандидатов.
+
+Состояние задачи хранится в таблице analysis_jobs (AnalysisJob):
+queued -> running -> done / failed, с процентом выполнения, текущим шагом и
+временем постановки, начала и завершения. HTTP-запрос только создает задачу,
+а запрос к модели выполняется в пуле потоков процесса (ANALYSIS_WORKERS).
+
+Статус читается из базы, поэтому его можно запрашивать у любого процесса
+веб-сервера: обычным опросом, long-poll (wait_for_update) или подпиской на
+server-sent events.
+
+Задачи, которые остаются в queued/running дольше ANALYSIS_JOB_TIMEOUT
+(например, процесс был перезапущен), при чтении статуса помечаются failed.
+
+В той же таблице хранятся задачи подбора кандидатов из базы для вакансии
+(kind=rematch, app/utils/talent_pool.py). Подборы одной вакансии выполняются
+по очереди: пока идет подбор, новые изменения вакансии дают одну задачу в
+queued, которую заберет освободившийся исполнитель. Задачи, оставшиеся в
+очереди после перезапуска процесса, выполняет планировщик
+(run_queued_rematches).
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db
+from app.models import AnalysisJob, Candidate
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('ANALYSIS_WORKERS', 4),
+                thread_name_prefix='ai-analysis'
+            )
+        return _executor
+
+
+def find_active_job(candidate_id):
+    """Незавершенная задача анализа кандидата или None"""
+    return db.session.scalars(
+        sa.select(AnalysisJob)
+        .where(AnalysisJob.kind == AnalysisJob.KIND_ANALYSIS)
+        .where(AnalysisJob.candidate_id == candidate_id)
+        .where(AnalysisJob.status.in_(AnalysisJob.ACTIVE_STATUSES))
+        .order_by(AnalysisJob.created_at.desc())
+        .limit(1)
+    ).first()
+
+
+def create_job(candidate_id, user_id=None, source='manual'):
+    """Создает задачу в состоянии queued"""
+    job = AnalysisJob(
+        candidate_id=candidate_id,
+        created_by=user_id,
+        source=source,
+        status=AnalysisJob.STATUS_QUEUED,
+        progress=0,
+        stage='В очереди'
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _update(job_id, **values):
+    """Обновляет задачу отдельным UPDATE с немедленной фиксацией"""
+    db.session.execute(
+        sa.update(AnalysisJob)
+        .where(AnalysisJob.id == job_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def run_job(job_id, candidate=None, restructure=False):
+    """
+    Выполняет задачу анализа в текущем потоке
+
+    Args:
+        job_id: Идентификатор задачи
+        candidate: Объект кандидата (если уже загружен вызывающим кодом)
+        restructure: Разобрать резюме заново совмещенным анализом
+
+    Returns:
+        bool: True, если анализ выполнен
+    """
+    from app.utils.ai_service import request_ai_analysis
+
+    _update(job_id, status=AnalysisJob.STATUS_RUNNING, started_at=_now(), progress=5, stage='Запуск анализа')
+
+    def progress(percent, stage):
+        _update(job_id, progress=percent, stage=stage)
+
+    try:
+        candidate = candidate or db.session.get(Candidate, db.session.get(AnalysisJob, job_id).candidate_id)
+        result = request_ai_analysis(candidate, progress=progress, raise_errors=True, restructure=restructure)
+        if result is None:
+            raise RuntimeError("OpenAI API ключ невалидный или не прошел проверку")
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Задача AI-анализа {job_id} завершилась с ошибкой: {str(e)}")
+        _update(job_id, status=AnalysisJob.STATUS_FAILED, finished_at=_now(), stage='Ошибка', error=str(e)[:2000])
+        return False
+
+    _update(job_id, status=AnalysisJob.STATUS_DONE, finished_at=_now(), progress=100, stage='Анализ завершен')
+    return True
+
+
+def _run_in_worker(app, job_id):
+    with app.app_context():
+        try:
+            run_job(job_id)
+        except Exception as e:
+            app.logger.error(f"Ошибка выполнения задачи AI-анализа {job_id}: {str(e)}", exc_info=True)
+
+
+def enqueue_analysis(candidate_id, user_id=None, source='manual'):
+    """
+    Ставит анализ кандидата в очередь
+
+    Если у кандидата уже есть незавершенная задача, новая не создается.
+
+    Returns:
+        AnalysisJob: Новая или уже выполняющаяся задача
+    """
+    job = find_active_job(candidate_id)
+    if job is not None and not _is_stale(job):
+        return job
+
+    job = create_job(candidate_id, user_id, source)
+    _get_executor().submit(_run_in_worker, current_app._get_current_object(), job.id)
+    current_app.logger.info(f"Задача AI-анализа {job.id} поставлена в очередь для кандидата {candidate_id}")
+    return job
+
+
+def _aware(value):
+    return value if value is None or value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _is_stale(job):
+    timeout = timedelta(seconds=current_app.config.get('ANALYSIS_JOB_TIMEOUT', 600))
+    started = _aware(job.started_at or job.created_at)
+    return job.status in AnalysisJob.ACTIVE_STATUSES and started is not None and _now() - started > timeout
+
+
+def get_job(job_id):
+    """
+    Задача по идентификатору с актуальным состоянием из базы
+
+    Зависшая задача (процесс-исполнитель завершился) помечается failed.
+    """
+    job = db.session.get(AnalysisJob, job_id, populate_existing=True)
+    if job is not None and _is_stale(job):
+        _update(
+            job.id,
+            status=AnalysisJob.STATUS_FAILED,
+            finished_at=_now(),
+            stage='Ошибка',
+            error='Превышено время выполнения задачи'
+        )
+        job = db.session.get(AnalysisJob, job_id, populate_existing=True)
+    return job
+
+
+def _claim_rematch(vacancy_id):
+    """
+    Переводит самую раннюю задачу подбора вакансии из queued в running
+
+    Задача не берется, пока по вакансии выполняется другой (не зависший)
+    подбор. UPDATE с условием на статус атомарен, поэтому задачу забирает
+    только один процесс.
+
+    Returns:
+        str: Идентификатор задачи или None
+    """
+    job_id = db.session.scalar(
+        sa.select(AnalysisJob.id)
+        .where(AnalysisJob.kind == AnalysisJob.KIND_REMATCH)
+        .where(AnalysisJob.vacancy_id == vacancy_id)
+        .where(AnalysisJob.status == AnalysisJob.STATUS_QUEUED)
+        .order_by(AnalysisJob.created_at)
+        .limit(1)
+    )
+    if job_id is None:
+        return None
+
+    running = so.aliased(AnalysisJob)
+    timeout = timedelta(seconds=current_app.config.get('ANALYSIS_JOB_TIMEOUT', 600))
+    busy = sa.exists().where(
+        running.kind == AnalysisJob.KIND_REMATCH,
+        running.vacancy_id == vacancy_id,
+        running.status == AnalysisJob.STATUS_RUNNING,
+        running.started_at > _now() - timeout
+    )
+    result = db.session.execute(
+        sa.update(AnalysisJob)
+        .where(AnalysisJob.id == job_id, AnalysisJob.status == AnalysisJob.STATUS_QUEUED, ~busy)
+        .values(status=AnalysisJob.STATUS_RUNNING, started_at=_now(), progress=5, stage='Подбор кандидатов')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return job_id if result.rowcount else None
+
+
+def run_rematch_queue(vacancy_id):
+    """
+    Выполняет задачи подбора вакансии, пока они есть в очереди
+
+    Returns:
+        int: Количество выполненных задач
+    """
+    from app.utils.talent_pool import rematch_vacancy
+
+    processed = 0
+    while True:
+        job_id = _claim_rematch(vacancy_id)
+        if job_id is None:
+            return processed
+        processed += 1
+        try:
+            rematch_vacancy(vacancy_id)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Ошибка подбора из базы для вакансии {vacancy_id}: {str(e)}", exc_info=True)
+            _update(job_id, status=AnalysisJob.STATUS_FAILED, finished_at=_now(), stage='Ошибка', error=str(e)[:2000])
+            continue
+        _update(job_id, status=AnalysisJob.STATUS_DONE, finished_at=_now(), progress=100, stage='Подбор завершен')
+
+
+def _run_rematch_in_worker(app, vacancy_id):
+    with app.app_context():
+        try:
+            run_rematch_queue(vacancy_id)
+        except Exception as e:
+            app.logger.error(f"Ошибка очереди подбора для вакансии {vacancy_id}: {str(e)}", exc_info=True)
+        finally:
+            db.session.remove()
+
+
+def enqueue_rematch(vacancy_id, user_id=None, source='vacancy'):
+    """
+    Ставит подбор кандидатов из базы для вакансии в очередь
+
+    Если задача подбора вакансии уже ждет в очереди, новая не создается:
+    она выполнится после текущего подбора и учтет все изменения.
+
+    Returns:
+        AnalysisJob: Новая или уже ожидающая задача
+    """
+    job = db.session.scalars(
+        sa.select(AnalysisJob)
+        .where(AnalysisJob.kind == AnalysisJob.KIND_REMATCH)
+        .where(AnalysisJob.vacancy_id == vacancy_id)
+        .where(AnalysisJob.status == AnalysisJob.STATUS_QUEUED)
+        .order_by(AnalysisJob.created_at.desc())
+        .limit(1)
+    ).first()
+    # get_job помечает зависшую задачу failed
+    if job is not None and get_job(job.id).status == AnalysisJob.STATUS_QUEUED:
+        return job
+
+    job = AnalysisJob(
+        kind=AnalysisJob.KIND_REMATCH,
+        vacancy_id=vacancy_id,
+        created_by=user_id,
+        source=source,
+        status=AnalysisJob.STATUS_QUEUED,
+        progress=0,
+        stage='В очереди'
+    )
+    db.session.add(job)
+    db.session.commit()
+    _get_executor().submit(_run_rematch_in_worker, current_app._get_current_object(), vacancy_id)
+    current_app.logger.info(f"Задача подбора из базы {job.id} поставлена в очередь для вакансии {vacancy_id}")
+    return job
+
+
+def run_queued_rematches():
+    """
+    Выполняет задачи подбора, оставшиеся в очереди (например, после перезапуска процесса)
+
+    Returns:
+        int: Количество выполненных задач
+    """
+    vacancy_ids = db.session.scalars(
+        sa.select(AnalysisJob.vacancy_id)
+        .where(AnalysisJob.kind == AnalysisJob.KIND_REMATCH)
+        .where(AnalysisJob.status == AnalysisJob.STATUS_QUEUED)
+        .distinct()
+    ).all()
+    return sum(run_rematch_queue(vacancy_id) for vacancy_id in vacancy_ids)
+
+
+def wait_for_update(job_id, progress=None, timeout=25):
+    """
+    Long-poll: ждет, пока задача завершится или ее прогресс изменится
+
+    Args:
+        job_id: Идентификатор задачи
+        progress: Прогресс, уже известный клиенту
+        timeout: Максимальное время ожидания в секундах
+
+    Returns:
+        AnalysisJob: Задача (None, если не найдена)
+    """
+    interval = current_app.config.get('ANALYSIS_POLL_INTERVAL', 1.0)
+    deadline = time.monotonic() + timeout
+    while True:
+        job = get_job(job_id)
+        # Завершаем транзакцию, чтобы следующее чтение видело новые данные
+        db.session.commit()
+        if job is None or job.is_final or progress is None or job.progress != progress:
+            return job
+        if time.monotonic() >= deadline:
+            return job
+        time.sleep(interval)
+
+
+def stream_job_events(job_id, timeout=300):
+    """
+    Server-sent events с состоянием задачи при каждом изменении
+
+    Поток завершается событием done или failed либо по истечении timeout.
+    """
+    progress = None
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = wait_for_update(job_id, progress, timeout=min(15, max(1, deadline - time.monotonic())))
+        if job is None:
+            yield 'event: error\ndata: {"message": "Задача не найдена"}\n\n'
+            return
+        if job.progress == progress and not job.is_final:
+            yield ': keepalive\n\n'
+            continue
+        progress = job.progress
+        yield f'event: {job.status}\ndata: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n'
+        if job.is_final:
+            return
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Облегченная выборка кандидатов для списков, дашбордов и API.
+
+Спискам нужны имя, вакансия, этап и оценки, а полная сущность Candidate
+тянет текст резюме, сопроводительное письмо, ответы анкеты и JSON
+AI-анализа - десятки килобайт на строку. list_query выбирает только
+колонки списка (строки Row с доступом по атрибутам, как у сущности) вместе
+с названием вакансии и этапа одним запросом, без ленивой догрузки связей.
+Email и телефон расшифровываются в базе (decrypted) только там, где
+показываются, и только для строк текущей страницы.
+
+Объемные поля сущности Candidate отложены по группам (Candidate.DEFERRED_GROUPS);
+full_options() загружает их сразу для кода, которому нужна вся анкета.
+"""
+
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db
+from app.models import Candidate, Vacancy, C_Selection_Stage
+
+# Колонки кандидата, которые показывают списки
+LIST_COLUMNS = (
+    Candidate.id,
+    Candidate.vacancy_id,
+    Candidate.user_id,
+    Candidate.stage_id,
+    Candidate.full_name,
+    Candidate.ai_match_percent,
+    Candidate.total_experience_years,
+    Candidate.interview_date,
+    Candidate.resume_path,
+    Candidate.resume_preview_pages,
+    Candidate.tracking_code,
+    Candidate.created_at,
+)
+
+
+def decrypted(column):
+    """Расшифровка колонки pgcrypto на стороне базы"""
+    return sa.func.pgp_sym_decrypt(
+        sa.cast(column, sa.LargeBinary),
+        current_app.config['ENCRYPTION_KEY'],
+        current_app.config.get('ENCRYPTION_OPTIONS', '')
+    )
+
+
+def list_query():
+    """
+    Запрос строк списка кандидатов
+
+    Returns:
+        Query: Строки с колонками LIST_COLUMNS, vacancy_title, stage_name и
+               stage_color; фильтры и сортировка добавляются вызывающим кодом
+    """
+    columns = list(LIST_COLUMNS) + [
+        Vacancy.title.label('vacancy_title'),
+        C_Selection_Stage.name.label('stage_name'),
+        C_Selection_Stage.color.label('stage_color'),
+    ]
+    return db.session.query(*columns).outerjoin(
+        Vacancy, Candidate.vacancy_id == Vacancy.id
+    ).outerjoin(
+        C_Selection_Stage, Candidate.stage_id == C_Selection_Stage.id
+    )
+
+
+def full_options():
+    """Опции загрузки всех отложенных групп полей Candidate"""
+    return [so.undefer_group(group) for group in Candidate.DEFERRED_GROUPS]
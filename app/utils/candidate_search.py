@@ -0,0 +1,666 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Семантический поиск по всей базе кандидатов (по всем вакансиям).
+
+Текст кандидата - должности, навыки, summary и опыт из structured_resume_data,
+затем resume_text - разбивается на фрагменты, каждый фрагмент кодируется
+локальной моделью sentence-transformers (EMBEDDING_MODEL, по умолчанию
+многоязычная paraphrase-multilingual-MiniLM-L12-v2). Вектор кандидата -
+нормированное среднее векторов фрагментов. Векторы хранятся в таблице
+candidate_embeddings (CandidateEmbedding) и строятся в фоновой обработке
+резюме, когда структурированные данные уже получены.
+
+Поиск идет по ANN-индексу HNSW (hnswlib) в памяти процесса. Индекс строится
+из таблицы или загружается из EMBEDDING_INDEX_PATH; файл сохраняет задача
+планировщика sync_candidate_index (и команда flask embed-resumes). Перед
+каждым запросом индекс догружает векторы, измененные после последней
+синхронизации (выборка по индексу updated_at): кандидаты, обработанные в
+другом процессе, находятся без перестроения индекса. Без hnswlib
+используется точный поиск по матрице numpy.
+
+Модель и индекс загружаются один раз на процесс и не в потоке запроса: пока
+они не готовы, поиск запускает фоновую загрузку (warm_up) и возвращает
+warming=True (EMBEDDING_PRELOAD - модель загружается в create_app до fork,
+как модели spaCy).
+
+Удаленные кандидаты остаются в индексах других процессов, поэтому поиск
+запрашивает у индекса больше результатов (EMBEDDING_SEARCH_OVERFETCH),
+отбрасывает кандидатов без вектора в базе и помечает их удаленными в индексе.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+import numpy as np
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db
+from app.models import Candidate, CandidateEmbedding
+
+DEFAULT_MODEL = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+
+_models = {}
+_models_lock = threading.Lock()
+
+_index = None
+_index_lock = threading.Lock()
+
+_warm_thread = None
+_warm_lock = threading.Lock()
+
+
+def embeddings_enabled(config=None):
+    return (config or current_app.config).get('EMBEDDINGS_ENABLED', True)
+
+
+def _model_name(config=None):
+    return (config or current_app.config).get('EMBEDDING_MODEL') or DEFAULT_MODEL
+
+
+def get_model(config=None):
+    """Модель sentence-transformers (загружается один раз на процесс)"""
+    config = config or current_app.config
+    model_name = _model_name(config)
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(model_name, device=config.get('EMBEDDING_DEVICE') or None)
+                _models[model_name] = model
+    return model
+
+
+def encode(texts, config=None):
+    """
+    Нормированные векторы текстов
+
+    Returns:
+        numpy.ndarray: float32, форма (len(texts), размерность модели)
+    """
+    config = config or current_app.config
+    vectors = get_model(config).encode(
+        list(texts),
+        batch_size=config.get('EMBEDDING_BATCH_SIZE', 32),
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# Текст кандидата
+
+def _join(values):
+    return ', '.join(str(value).strip() for value in values if value and str(value).strip())
+
+
+def _split(text, size):
+    """Фрагменты по абзацам, не длиннее size символов"""
+    chunks, current = [], ''
+    for paragraph in text.split('\n'):
+        paragraph = ' '.join(paragraph.split())
+        while len(paragraph) > size:
+            cut = paragraph.rfind(' ', 0, size)
+            cut = cut if cut > size // 2 else size
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(paragraph[:cut])
+            paragraph = paragraph[cut:].strip()
+        if current and len(current) + len(paragraph) + 1 > size:
+            chunks.append(current)
+            current = ''
+        if paragraph:
+            current = f'{current} {paragraph}'.strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def candidate_chunks(candidate, config=None):
+    """
+    Фрагменты текста кандидата для построения вектора
+
+    Первый фрагмент - сводка из structured_resume_data (должности, навыки,
+    summary, образование): при усреднении она не теряется в длинном резюме.
+    Далее - описания опыта и текст резюме, всего не больше EMBEDDING_MAX_CHUNKS.
+    """
+    config = config or current_app.config
+    size = config.get('EMBEDDING_CHUNK_CHARS', 600)
+    data = candidate.structured_resume_data or {}
+    experience = [item for item in data.get('experience') or [] if isinstance(item, dict)]
+    education = [item for item in data.get('education') or [] if isinstance(item, dict)]
+    skills = [item.get('name') if isinstance(item, dict) else item for item in data.get('skills') or []]
+
+    summary = '\n'.join(line for line in (
+        f"Должности: {_join(item.get('position') for item in experience)}" if experience else '',
+        f"Навыки: {_join(skills)}" if skills else '',
+        data.get('summary') or '',
+        f"Образование: {_join(_join((item.get('degree'), item.get('field'))) for item in education)}" if education else '',
+    ) if line)
+
+    texts = [summary]
+    texts.extend(_join((item.get('position'), item.get('company'), item.get('description'))) for item in experience)
+    texts.append(candidate.resume_text or '')
+
+    chunks = []
+    for text in texts:
+        chunks.extend(_split(text, size) if text else [])
+    return chunks[:config.get('EMBEDDING_MAX_CHUNKS', 8)]
+
+
+def _text_hash(model_name, chunks):
+    return hashlib.sha256(json.dumps([model_name, chunks], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def embed_chunks(chunk_lists, config=None):
+    """
+    Векторы кандидатов по спискам фрагментов (одним вызовом модели)
+
+    Returns:
+        list: numpy.ndarray для каждого списка
+    """
+    flat = [chunk for chunks in chunk_lists for chunk in chunks]
+    vectors = encode(flat, config) if flat else None
+    result, position = [], 0
+    for chunks in chunk_lists:
+        result.append(_normalize(vectors[position:position + len(chunks)].mean(axis=0)))
+        position += len(chunks)
+    return result
+
+
+def embed_text(text, config=None):
+    """
+    Вектор произвольного текста (например, вакансии), построенный так же, как
+    вектор кандидата; None для пустого текста
+    """
+    config = config or current_app.config
+    chunks = _split(text or '', config.get('EMBEDDING_CHUNK_CHARS', 600))[:config.get('EMBEDDING_MAX_CHUNKS', 8)]
+    return embed_chunks([chunks], config)[0] if chunks else None
+
+
+def stored_vectors(candidate_ids):
+    """
+    Сохраненные векторы кандидатов текущей модели
+
+    Returns:
+        dict: {candidate_id: numpy.ndarray}
+    """
+    table = CandidateEmbedding.__table__
+    rows = db.session.execute(
+        sa.select(table.c.candidate_id, table.c.vector)
+        .where(table.c.candidate_id.in_(list(candidate_ids)), table.c.model == _model_name())
+    ).all()
+    return {row.candidate_id: np.frombuffer(row.vector, dtype=np.float32) for row in rows}
+
+
+# Индекс
+
+class VectorIndex:
+    """
+    Индекс векторов кандидатов в памяти процесса
+
+    HNSW (hnswlib, косинусная близость) с добавлением элементов по одному;
+    повторное добавление id заменяет вектор. Без hnswlib - точный поиск по
+    матрице numpy. versions хранит updated_at загруженных векторов для
+    догрузки измененных.
+    """
+
+    def __init__(self, model, dimensions, m=16, ef_construction=200, ef_search=64, use_hnsw=True):
+        self.model = model
+        self.dimensions = dimensions
+        self.versions = {}
+        self.synced_at = None
+        self.lock = threading.RLock()
+        self._hnsw = None
+        self._params = (m, ef_construction, ef_search)
+        if use_hnsw:
+            try:
+                import hnswlib
+            except ImportError:
+                hnswlib = None
+            if hnswlib is not None:
+                self._hnsw = hnswlib.Index(space='cosine', dim=dimensions)
+                self._hnsw.init_index(max_elements=1024, M=m, ef_construction=ef_construction)
+                self._hnsw.set_ef(ef_search)
+        # Матрица для перебора: заполнены первые _count строк, емкость удваивается
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, dimensions), dtype=np.float32)
+        self._count = 0
+        self._positions = {}
+
+    @property
+    def approximate(self):
+        return self._hnsw is not None
+
+    def __len__(self):
+        return len(self.versions)
+
+    def add(self, ids, vectors, versions=None):
+        """Добавляет или заменяет векторы"""
+        if not len(ids):
+            return
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimensions)
+        with self.lock:
+            if self._hnsw is not None:
+                needed = self._hnsw.get_current_count() + len(ids)
+                if needed > self._hnsw.get_max_elements():
+                    self._hnsw.resize_index(max(needed, self._hnsw.get_max_elements() * 2))
+                self._hnsw.add_items(vectors, ids)
+            else:
+                needed = self._count + len(ids)
+                if needed > len(self._ids):
+                    capacity = max(needed, len(self._ids) * 2, 1024)
+                    self._ids = np.resize(self._ids, capacity)
+                    vectors_buffer = np.empty((capacity, self.dimensions), dtype=np.float32)
+                    vectors_buffer[:self._count] = self._vectors[:self._count]
+                    self._vectors = vectors_buffer
+                for candidate_id, vector in zip(ids.tolist(), vectors):
+                    position = self._positions.get(candidate_id)
+                    if position is None:
+                        position = self._positions[candidate_id] = self._count
+                        self._ids[position] = candidate_id
+                        self._count += 1
+                    self._vectors[position] = vector
+            for position, candidate_id in enumerate(ids.tolist()):
+                self.versions[candidate_id] = versions[position] if versions else None
+
+    def remove(self, ids):
+        """Исключает векторы удаленных кандидатов из поиска"""
+        with self.lock:
+            for candidate_id in ids:
+                if candidate_id not in self.versions:
+                    continue
+                del self.versions[candidate_id]
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(candidate_id)
+                else:
+                    self._ids[self._positions.pop(candidate_id)] = -1
+
+    def search(self, vector, k, candidate_ids=None):
+        """
+        Ближайшие кандидаты
+
+        Args:
+            vector: Нормированный вектор запроса
+            k: Количество результатов
+            candidate_ids: Множество допустимых id (None - все)
+
+        Returns:
+            list: [(candidate_id, близость)] по убыванию близости
+        """
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, self.dimensions)
+        with self.lock:
+            if candidate_ids is not None:
+                candidate_ids = candidate_ids & self.versions.keys()
+            k = min(k, len(self.versions) if candidate_ids is None else len(candidate_ids))
+            if k <= 0:
+                return []
+            if self._hnsw is not None:
+                # Несколько допустимых id быстрее и точнее проверить перебором
+                if candidate_ids is None or len(candidate_ids) > self._params[2]:
+                    self._hnsw.set_ef(max(self._params[2], k))
+                    try:
+                        labels, distances = self._hnsw.knn_query(
+                            vector, k=k,
+                            filter=None if candidate_ids is None else candidate_ids.__contains__
+                        )
+                        return [(int(label), float(1 - distance)) for label, distance in zip(labels[0], distances[0])]
+                    except RuntimeError:
+                        # Обход графа с фильтром нашел меньше k элементов
+                        if candidate_ids is None:
+                            candidate_ids = set(self.versions)
+                ids = np.fromiter(candidate_ids, dtype=np.int64)
+                scores = np.asarray(self._hnsw.get_items(ids, return_type='numpy'), dtype=np.float32) @ vector[0]
+                top = np.argsort(-scores)[:k]
+                return [(int(ids[i]), float(scores[i])) for i in top]
+
+            ids = self._ids[:self._count]
+            scores = self._vectors[:self._count] @ vector[0]
+            if candidate_ids is not None:
+                scores = np.where(np.isin(ids, np.fromiter(candidate_ids, dtype=np.int64)), scores, -np.inf)
+            else:
+                # Удаленные позиции (remove) помечены id -1
+                scores = np.where(ids >= 0, scores, -np.inf)
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            top = top[np.argsort(-scores[top])]
+            return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def save(self, path):
+        """Сохраняет индекс HNSW и метаданные (только для hnswlib)"""
+        if self._hnsw is None:
+            return False
+        with self.lock:
+            self._hnsw.save_index(path)
+            with open(f'{path}.json', 'w', encoding='utf-8') as f:
+                json.dump({
+                    'model': self.model,
+                    'dimensions': self.dimensions,
+                    'synced_at': self.synced_at.isoformat() if self.synced_at else None,
+                    'versions': {str(key): value.isoformat() if value else None for key, value in self.versions.items()}
+                }, f)
+        return True
+
+    @classmethod
+    def load(cls, path, model, m=16, ef_construction=200, ef_search=64):
+        """Индекс из файла или None, если файла нет или он построен другой моделью"""
+        meta_path = f'{path}.json'
+        if not (os.path.exists(path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('model') != model:
+            return None
+        index = cls(model, meta['dimensions'], m, ef_construction, ef_search)
+        if index._hnsw is None:
+            return None
+        index._hnsw = type(index._hnsw)(space='cosine', dim=index.dimensions)
+        index._hnsw.load_index(path, max_elements=max(1024, len(meta['versions'])))
+        index._hnsw.set_ef(ef_search)
+        index.versions = {
+            int(key): datetime.fromisoformat(value) if value else None for key, value in meta['versions'].items()
+        }
+        index.synced_at = datetime.fromisoformat(meta['synced_at']) if meta.get('synced_at') else None
+        return index
+
+
+def _aware(value):
+    # SQLite возвращает даты без часового пояса
+    return value if value is None or value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _index_params(config):
+    return (
+        config.get('EMBEDDING_HNSW_M', 16),
+        config.get('EMBEDDING_HNSW_EF_CONSTRUCTION', 200),
+        config.get('EMBEDDING_HNSW_EF_SEARCH', 64)
+    )
+
+
+def _dimensions(config):
+    return get_model(config).get_sentence_embedding_dimension()
+
+
+def sync_index(index, chunk_size=5000):
+    """
+    Догружает векторы, измененные после последней синхронизации
+
+    Выборка начинается с запасом EMBEDDING_SYNC_OVERLAP секунд: вектор,
+    записанный транзакцией, которая завершилась позже следующей, не
+    пропускается. Уже загруженные версии не добавляются повторно.
+
+    Returns:
+        int: Количество добавленных или замененных векторов
+    """
+    table = CandidateEmbedding.__table__
+    overlap = timedelta(seconds=current_app.config.get('EMBEDDING_SYNC_OVERLAP', 60))
+    started_at = datetime.now(timezone.utc)
+    since = index.synced_at - overlap if index.synced_at else None
+
+    added = 0
+    last = None
+    while True:
+        query = sa.select(table.c.candidate_id, table.c.vector, table.c.updated_at).where(
+            table.c.model == index.model, table.c.dimensions == index.dimensions
+        )
+        if since is not None:
+            query = query.where(table.c.updated_at >= since)
+        if last is not None:
+            query = query.where(table.c.candidate_id > last)
+        rows = db.session.execute(query.order_by(table.c.candidate_id).limit(chunk_size)).all()
+        if not rows:
+            break
+        last = rows[-1].candidate_id
+
+        changed = [row for row in rows if index.versions.get(row.candidate_id, 0) != _aware(row.updated_at)]
+        if changed:
+            index.add(
+                [row.candidate_id for row in changed],
+                np.vstack([np.frombuffer(row.vector, dtype=np.float32) for row in changed]),
+                [_aware(row.updated_at) for row in changed]
+            )
+            added += len(changed)
+
+    index.synced_at = started_at
+    return added
+
+
+def get_index():
+    """
+    Индекс процесса, синхронизированный с таблицей candidate_embeddings
+
+    Returns:
+        VectorIndex
+    """
+    global _index
+    config = current_app.config
+    model_name = _model_name(config)
+    with _index_lock:
+        if _index is None or _index.model != model_name:
+            path = config.get('EMBEDDING_INDEX_PATH')
+            index = VectorIndex.load(path, model_name, *_index_params(config)) if path else None
+            if index is None:
+                index = VectorIndex(
+                    model_name, _dimensions(config), *_index_params(config),
+                    use_hnsw=config.get('EMBEDDING_USE_HNSW', True)
+                )
+                if config.get('EMBEDDING_USE_HNSW', True) and not index.approximate:
+                    current_app.logger.warning("hnswlib не установлен: поиск кандидатов выполняется перебором")
+            _index = index
+    with _index.lock:
+        added = sync_index(_index)
+    if added:
+        current_app.logger.info(f"Индекс поиска кандидатов: догружено векторов {added}, всего {len(_index)}")
+    return _index
+
+
+def index_ready():
+    """Загружены ли в процессе модель и индекс текущей модели"""
+    model_name = _model_name()
+    return model_name in _models and _index is not None and _index.model == model_name
+
+
+def warm_up(app=None):
+    """
+    Загружает модель и индекс процесса в фоновом потоке
+
+    Returns:
+        bool: True, если загрузка запущена этим вызовом
+    """
+    global _warm_thread
+    app = app or current_app._get_current_object()
+    with _warm_lock:
+        if _warm_thread is not None and _warm_thread.is_alive():
+            return False
+
+        def run():
+            with app.app_context():
+                try:
+                    get_index()
+                except Exception as e:
+                    app.logger.error(f"Ошибка загрузки индекса поиска кандидатов: {str(e)}", exc_info=True)
+                finally:
+                    db.session.remove()
+
+        _warm_thread = threading.Thread(target=run, name='candidate-search-warmup', daemon=True)
+        _warm_thread.start()
+        return True
+
+
+def save_index():
+    """Сохраняет индекс в EMBEDDING_INDEX_PATH; False, если путь не задан"""
+    path = current_app.config.get('EMBEDDING_INDEX_PATH')
+    if not path:
+        return False
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return get_index().save(path)
+
+
+# Построение векторов
+
+def _store(candidate_id, model_name, vector, text_hash, row=None):
+    row = row or CandidateEmbedding(candidate_id=candidate_id)
+    row.model = model_name
+    row.dimensions = len(vector)
+    row.vector = np.asarray(vector, dtype=np.float32).tobytes()
+    row.text_hash = text_hash
+    row.updated_at = datetime.now(timezone.utc)
+    db.session.add(row)
+    return row
+
+
+def index_candidate(candidate, commit=True):
+    """
+    Строит и сохраняет вектор кандидата
+
+    Вектор не пересчитывается, если текст кандидата не изменился. Если
+    индекс процесса уже загружен, вектор добавляется в него сразу.
+
+    Returns:
+        bool: True, если вектор построен заново
+    """
+    if not embeddings_enabled():
+        return False
+
+    model_name = _model_name()
+    chunks = candidate_chunks(candidate)
+    if not chunks:
+        return False
+
+    text_hash = _text_hash(model_name, chunks)
+    row = db.session.get(CandidateEmbedding, candidate.id)
+    if row is not None and row.text_hash == text_hash:
+        return False
+
+    vector = embed_chunks([chunks])[0]
+    updated_at = _store(candidate.id, model_name, vector, text_hash, row).updated_at
+    if commit:
+        db.session.commit()
+
+    index = _index
+    if index is not None and index.model == model_name:
+        index.add([candidate.id], vector.reshape(1, -1), [updated_at])
+    return True
+
+
+def backfill_embeddings(only_missing=True, chunk_size=256):
+    """
+    Векторы для всех кандидатов с резюме
+
+    Фрагменты пакета кандидатов кодируются одним вызовом модели.
+
+    Args:
+        only_missing: Пропускать кандидатов, текст которых не изменился
+        chunk_size: Кандидатов за одну транзакцию
+
+    Returns:
+        int: Количество построенных векторов
+    """
+    model_name = _model_name()
+    last_id = 0
+    processed = 0
+    while True:
+        candidates = Candidate.query.filter(
+            Candidate.id > last_id,
+            sa.or_(Candidate.resume_text.is_not(None), Candidate.structured_resume_data.is_not(None))
+        ).options(so.undefer_group('resume')).order_by(Candidate.id).limit(chunk_size).all()
+        if not candidates:
+            break
+        last_id = candidates[-1].id
+
+        existing = {
+            row.candidate_id: row for row in
+            CandidateEmbedding.query.filter(CandidateEmbedding.candidate_id.in_([c.id for c in candidates]))
+        }
+        pending = []
+        for candidate in candidates:
+            chunks = candidate_chunks(candidate)
+            if not chunks:
+                continue
+            text_hash = _text_hash(model_name, chunks)
+            row = existing.get(candidate.id)
+            if only_missing and row is not None and row.text_hash == text_hash:
+                continue
+            pending.append((candidate.id, chunks, text_hash, row))
+
+        if pending:
+            vectors = embed_chunks([chunks for _, chunks, _, _ in pending])
+            for (candidate_id, _, text_hash, row), vector in zip(pending, vectors):
+                _store(candidate_id, model_name, vector, text_hash, row)
+        db.session.commit()
+        db.session.expunge_all()
+        processed += len(pending)
+        current_app.logger.info(f"Векторы резюме: построено {processed}")
+
+    return processed
+
+
+# Поиск
+
+def search_candidates(query, limit=20, candidate_ids=None):
+    """
+    Кандидаты, резюме которых ближе всего к запросу по смыслу
+
+    Args:
+        query: Текст запроса («опыт с Kubernetes», «бухгалтер со знанием 1С»)
+        limit: Количество результатов
+        candidate_ids: Допустимые id кандидатов (права доступа), None - все
+
+    Returns:
+        dict: {'results': [(candidate_id, близость)], 'took_ms': ..., 'indexed': ..., 'approximate': ...}
+    """
+    started = time.perf_counter()
+    query = ' '.join((query or '').split())
+    if not query or not embeddings_enabled():
+        return {'results': [], 'took_ms': 0.0, 'indexed': 0, 'approximate': False}
+
+    if not index_ready():
+        # Модель и индекс грузятся в фоне, а не в потоке запроса
+        warm_up()
+        return {'results': [], 'took_ms': 0.0, 'indexed': 0, 'approximate': False, 'warming': True}
+
+    index = get_index()
+    vector = encode([query])[0]
+    allowed = None if candidate_ids is None else set(candidate_ids)
+    overfetch = max(1, current_app.config.get('EMBEDDING_SEARCH_OVERFETCH', 2))
+    results = _drop_deleted(index, index.search(vector, limit * overfetch, allowed))[:limit]
+    return {
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 1),
+        'indexed': len(index),
+        'approximate': index.approximate
+    }
+
+
+def _drop_deleted(index, results):
+    """Результаты без кандидатов, вектора которых уже нет в базе"""
+    if not results:
+        return results
+    table = CandidateEmbedding.__table__
+    existing = set(db.session.scalars(
+        sa.select(table.c.candidate_id).where(table.c.candidate_id.in_([candidate_id for candidate_id, _ in results]))
+    ))
+    deleted = [candidate_id for candidate_id, _ in results if candidate_id not in existing]
+    if deleted:
+        index.remove(deleted)
+    return [item for item in results if item[0] in existing]
+
+
+def preload(config):
+    """Загружает модель заранее (до fork worker-процессов)"""
+    get_model(config)
+    return _model_name(config)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Менеджер пула соединений с БД.
+
+Flask-SQLAlchemy создает отдельный engine (и пул) для каждого экземпляра
+приложения. Фоновые обработчики резюме создают свое приложение, поэтому без
+менеджера каждый процесс держал бы несколько независимых пулов. PoolManager
+выдает один engine на процесс для одинаковых URL и настроек (используется
+PooledSQLAlchemy из app/__init__.py), а InstrumentedQueuePool собирает метрики
+ожидания соединения и загрузки пула.
+"""
+
+import os
+import threading
+import time
+import sqlalchemy as sa
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """Счетчики пула: время ожидания checkout и насыщенность"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_checked_out = 0
+
+    def record_checkout(self, wait_time, checked_out):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait_time
+            self.wait_max = max(self.wait_max, wait_time)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'peak_checked_out': self.peak_checked_out
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool, который измеряет время ожидания свободного соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa.exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class PoolManager:
+    """Хранит по одному engine на процесс для каждого набора настроек"""
+
+    def __init__(self):
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url, options):
+        return (
+            os.getpid(),
+            url.render_as_string(hide_password=False),
+            repr(sorted((k, repr(v)) for k, v in options.items()))
+        )
+
+    @staticmethod
+    def _prepare_options(url, options, app):
+        options = dict(options)
+
+        if url.get_backend_name() != 'sqlite' and 'poolclass' not in options:
+            options['poolclass'] = InstrumentedQueuePool
+
+        # Совместимость с PgBouncer в режиме transaction pooling:
+        # отключаем серверные prepared statements у драйверов, которые их используют
+        if app.config.get('DB_PGBOUNCER_MODE'):
+            connect_args = dict(options.get('connect_args', {}))
+            if url.get_driver_name() == 'psycopg':
+                connect_args.setdefault('prepare_threshold', None)
+            elif url.get_driver_name() == 'asyncpg':
+                connect_args.setdefault('statement_cache_size', 0)
+                # Параметр диалекта SQLAlchemy, а не asyncpg.connect: передается в URL
+                if 'prepared_statement_cache_size' not in url.query:
+                    url = url.update_query_dict({'prepared_statement_cache_size': '0'})
+            options['connect_args'] = connect_args
+
+        return url, options
+
+    def get_engine(self, url, options, app):
+        url, options = self._prepare_options(url, options, app)
+        key = self._key(url, options)
+
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = sa.create_engine(url, **options)
+                self._engines[key] = engine
+                app.logger.info(f"Создан пул соединений для процесса {os.getpid()}: {engine.pool.status()}")
+        return engine
+
+    def metrics(self):
+        """Метрики всех пулов текущего процесса"""
+        result = []
+        pid = os.getpid()
+        with self._lock:
+            engines = [(key, engine) for key, engine in self._engines.items() if key[0] == pid]
+
+        for key, engine in engines:
+            pool = engine.pool
+            item = {
+                'pid': pid,
+                'url': engine.url.render_as_string(hide_password=True),
+                'pool_class': type(pool).__name__
+            }
+            if isinstance(pool, QueuePool):
+                capacity = pool.size() + max(pool._max_overflow, 0)
+                checked_out = pool.checkedout()
+                item.update({
+                    'size': pool.size(),
+                    'max_overflow': pool._max_overflow,
+                    'checked_in': pool.checkedin(),
+                    'checked_out': checked_out,
+                    'overflow': pool.overflow(),
+                    'saturation': round(checked_out / capacity, 3) if capacity > 0 else 0
+                })
+            if isinstance(pool, InstrumentedQueuePool):
+                item.update(pool.stats.snapshot())
+            result.append(item)
+        return result
+
+    def dispose_all(self):
+        """Закрывает все пулы текущего процесса"""
+        pid = os.getpid()
+        with self._lock:
+            for key in [key for key in self._engines if key[0] == pid]:
+                self._engines.pop(key).dispose()
+
+
+pool_manager = PoolManager()
+
@@ -5,6 +5,7 @@ import os
 from werkzeug.utils import secure_filename
 from flask import current_app
 import uuid
+from app.utils.storage import save_file
 
 # Поддерживаемые расширения файлов
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'jpg', 'jpeg', 'png'}
@@ -30,22 +31,15 @@ def save_resume(file, tracking_code):
     else:
         extension = parts[1].lower()
     
-    # Создаем имя файла на основе кода отслеживания
-    new_filename = f"resume_{tracking_code}.{extension}"
+    # Сохраняем файл под ключом по хэшу содержимого (ab/cd/<sha256>.<ext>).
+    # Возвращается ссылка для Candidate.resume_path: путь или s3://...
+    stored = save_file(file.stream, extension)
+    current_app.logger.info(
+        f"Резюме {tracking_code} сохранено как {stored.key}"
+        + (" (файл уже был в хранилище)" if stored.deduplicated else "")
+    )
     
-    # Определяем путь для сохранения
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    
-    # Создаем директорию, если она не существует
-    os.makedirs(upload_folder, exist_ok=True)
-    
-    # Путь к файлу
-    file_path = os.path.join(upload_folder, new_filename)
-    
-    # Сохраняем файл
-    file.save(file_path)
-    
-    return file_path
+    return stored.reference
 
 def extract_text_from_resume(file_path):
     """Извлечение данных из файла резюме с использованием AI-сервиса"""
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Отдача загруженных файлов с поддержкой условных запросов и Range.
+
+ETag вычисляется по содержимому файла (SHA-256) и кэшируется по (путь, mtime,
+размер), поэтому файл хэшируется один раз. Браузер, открывающий тот же PDF
+повторно, получает 304, а просмотрщик PDF может запрашивать файл частями (206).
+
+Режим FILE_SERVING_MODE:
+    direct            - файл отдает Flask/Werkzeug
+    x-sendfile        - заголовок X-Sendfile (Apache mod_xsendfile, lighttpd)
+    x-accel-redirect  - заголовок X-Accel-Redirect, байты отдает nginx из
+                        internal-location FILE_ACCEL_REDIRECT_PREFIX
+"""
+
+import hashlib
+import mimetypes
+import os
+import threading
+from cachetools import LRUCache
+from flask import current_app, request, send_file, abort
+from werkzeug.security import safe_join
+
+_etag_cache = LRUCache(maxsize=4096)
+_etag_lock = threading.Lock()
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_etag(path):
+    """
+    ETag файла по SHA-256 содержимого
+
+    Args:
+        path: Абсолютный путь к файлу
+
+    Returns:
+        str: Хэш содержимого (без кавычек)
+    """
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+
+    with _etag_lock:
+        etag = _etag_cache.get(key)
+    if etag is not None:
+        return etag
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()
+
+    with _etag_lock:
+        _etag_cache[key] = etag
+    return etag
+
+
+def send_stored_file(directory, filename, as_attachment=False, download_name=None):
+    """
+    Отдает файл из directory с ETag, условными запросами и Range
+
+    Args:
+        directory: Каталог с файлами (например, UPLOAD_FOLDER)
+        filename: Имя файла внутри каталога
+        as_attachment: Отдавать как вложение (Content-Disposition: attachment)
+        download_name: Имя файла для сохранения
+
+    Returns:
+        Response: 200, 206 или 304
+    """
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    etag = file_etag(path)
+    mode = current_app.config.get('FILE_SERVING_MODE', 'direct')
+
+    if mode == 'x-accel-redirect':
+        # Тело и Range обрабатывает nginx, здесь только заголовки и проверка ETag
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = current_app.response_class(mimetype=mimetype)
+        prefix = current_app.config.get('FILE_ACCEL_REDIRECT_PREFIX', '/protected-uploads/').rstrip('/')
+        response.headers['X-Accel-Redirect'] = f"{prefix}/{filename}"
+        response.headers.set(
+            'Content-Disposition',
+            'attachment' if as_attachment else 'inline',
+            filename=download_name or filename
+        )
+        response.set_etag(etag)
+        response.make_conditional(request)
+    else:
+        # X-Sendfile включается стандартной настройкой Flask USE_X_SENDFILE
+        response = send_file(
+            path,
+            as_attachment=as_attachment,
+            download_name=download_name or filename,
+            conditional=True,
+            etag=etag
+        )
+
+    # Резюме - персональные данные: кэшировать только в браузере и всегда сверять ETag
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def is_repeated_access(response):
+    """
+    Повторное обращение к уже полученному файлу: 304 или докачка части файла
+
+    Такие обращения не нужно записывать в журнал действий.
+    """
+    if response.status_code == 304:
+        return True
+    if response.status_code == 206:
+        content_range = response.content_range
+        return content_range is not None and content_range.start not in (None, 0)
+    return False
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Анализ структурированных документов: анкеты с полями и таблицы (OpenCV + Tesseract).
+"""
+
+import logging
+import re
+import cv2
+import numpy as np
+import pytesseract
+from app.utils.image_processor import ImageProcessor
+from app.utils.handwriting_recognizer import HandwritingRecognizer, DEFAULT_LANGUAGES, PSM_BLOCK
+
+logger = logging.getLogger(__name__)
+
+# Подписи полей анкеты (ru, en, tm) -> имя поля
+FIELD_LABELS = {
+    'resume': {
+        'full_name': ('фио', 'ф.и.о', 'имя', 'full name', 'name', 'ady', 'familiýasy'),
+        'birth_date': ('дата рождения', 'date of birth', 'birth date', 'doglan senesi'),
+        'phone': ('телефон', 'тел', 'phone', 'telefon'),
+        'email': ('email', 'e-mail', 'эл. почта', 'электронная почта', 'poçta'),
+        'address': ('адрес', 'address', 'salgy'),
+        'position': ('должность', 'желаемая должность', 'position', 'wezipe'),
+        'education': ('образование', 'education', 'bilim'),
+        'experience': ('опыт работы', 'опыт', 'experience', 'iş tejribesi'),
+        'skills': ('навыки', 'skills', 'başarnyklar'),
+        'languages': ('языки', 'знание языков', 'languages', 'diller'),
+    }
+}
+
+_LABEL_SEPARATOR_RE = re.compile(r'^\s*([^:]{2,40}?)\s*[:\-–]\s*(.+)$')
+
+
+class FormAnalyzer:
+    """Поиск полей анкеты и таблиц, извлечение их содержимого"""
+
+    def __init__(self, languages=DEFAULT_LANGUAGES, processor=None, recognizer=None):
+        self.processor = processor or ImageProcessor()
+        self.recognizer = recognizer or HandwritingRecognizer(languages, processor=self.processor)
+
+    @staticmethod
+    def _match_label(text, form_type):
+        text = text.strip().lower().rstrip(':').strip()
+        for field, labels in FIELD_LABELS.get(form_type, {}).items():
+            if any(text == label or text.startswith(label + ' ') for label in labels):
+                return field
+        return None
+
+    def _ocr_line(self, image):
+        if image.size == 0:
+            return ''
+        return pytesseract.image_to_string(
+            image, lang=self.recognizer.languages, config='--oem 1 --psm 7'
+        ).strip()
+
+    def _line_masks(self, gray):
+        """Маски горизонтальных и вертикальных линий (рамки полей, сетка таблиц)"""
+        binary = cv2.adaptiveThreshold(
+            ~gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, 15, -2
+        )
+        height, width = gray.shape
+        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(20, width // 30), 1))
+        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(20, height // 40)))
+        horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel)
+        vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel)
+        return horizontal, vertical
+
+    def detect_form_fields(self, image, form_type='resume'):
+        """
+        Находит поля анкеты: прямоугольные рамки и линии для заполнения
+
+        Имя поля определяется по подписи слева от рамки; поля без
+        распознанной подписи называются field_<N>.
+
+        Returns:
+            dict: {имя поля: (x, y, w, h)}
+        """
+        gray = self.processor.to_gray(image)
+        horizontal, vertical = self._line_masks(gray)
+        height, width = gray.shape
+
+        candidates = []
+        # Рамки: замкнутые контуры из горизонтальных и вертикальных линий
+        contours = cv2.findContours(horizontal | vertical, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)[0]
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w > width * 0.9 or h > height * 0.5:
+                continue
+            if w >= 60 and 15 <= h <= 120 and w > 2 * h:
+                candidates.append((x, y, w, h))
+
+        # Линии для заполнения: область над горизонтальной линией
+        lines = cv2.findContours(horizontal, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+        for contour in lines:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w >= 80 and h <= 5:
+                field_height = min(40, y)
+                candidates.append((x, y - field_height, w, field_height))
+
+        # Убираем дубликаты (линия - нижняя граница рамки)
+        fields = {}
+        used = []
+        for x, y, w, h in sorted(candidates, key=lambda c: (c[1], c[0])):
+            if any(abs(x - ux) < 10 and abs((y + h) - (uy + uh)) < 10 for ux, uy, uw, uh in used):
+                continue
+            used.append((x, y, w, h))
+
+            label_region = gray[max(0, y - 5):y + h + 5, max(0, x - min(x, 400)):max(0, x - 5)]
+            name = self._match_label(self._ocr_line(label_region), form_type) if label_region.size else None
+            if not name or name in fields:
+                name = f"field_{len(fields) + 1}"
+            fields[name] = (int(x), int(y), int(w), int(h))
+
+        logger.info(f"Найдено полей формы: {len(fields)}")
+        return fields
+
+    def extract_form_data(self, image, form_type='resume'):
+        """
+        Извлекает значения полей анкеты
+
+        Значения берутся из строк вида "Подпись: значение" в тексте страницы
+        и из найденных рамок полей.
+
+        Returns:
+            dict: {имя поля: значение}
+        """
+        gray = self.processor.to_gray(image)
+        data = {}
+
+        text = self.recognizer.recognize(gray, method='adaptive')
+        for line in text.splitlines():
+            match = _LABEL_SEPARATOR_RE.match(line)
+            if not match:
+                continue
+            field = self._match_label(match.group(1), form_type)
+            if field and field not in data:
+                data[field] = match.group(2).strip()
+
+        for name, (x, y, w, h) in self.detect_form_fields(gray, form_type).items():
+            if name in data or name.startswith('field_'):
+                continue
+            value = self._ocr_line(gray[y:y + h, x:x + w])
+            if value:
+                data[name] = value
+
+        return data
+
+    def _table_regions(self, gray):
+        """Области таблиц: компоненты сетки из пересекающихся линий"""
+        horizontal, vertical = self._line_masks(gray)
+        grid = cv2.dilate(horizontal | vertical, np.ones((3, 3), np.uint8))
+        intersections = cv2.bitwise_and(horizontal, vertical)
+
+        regions = []
+        for contour in cv2.findContours(grid, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]:
+            x, y, w, h = cv2.boundingRect(contour)
+            # Таблица: не меньше 2x2 ячеек, т.е. хотя бы 9 пересечений линий
+            crossings = cv2.findContours(
+                cv2.dilate(intersections[y:y + h, x:x + w], np.ones((5, 5), np.uint8)),
+                cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+            )[0]
+            if w > 100 and h > 40 and len(crossings) >= 9:
+                regions.append((x, y, w, h))
+        return sorted(regions, key=lambda r: (r[1], r[0]))
+
+    @staticmethod
+    def _grid_positions(mask, axis, min_gap=10):
+        """Координаты линий сетки по проекции маски"""
+        projection = mask.sum(axis=axis)
+        threshold = projection.max() * 0.5 if projection.max() else 0
+        positions = []
+        for index in np.where(projection > threshold)[0]:
+            if not positions or index - positions[-1][-1] > min_gap:
+                positions.append([index])
+            else:
+                positions[-1].append(index)
+        return [int(np.mean(group)) for group in positions]
+
+    def extract_table(self, image, region=None):
+        """
+        Распознает таблицу с линиями сетки
+
+        Args:
+            image: Изображение OpenCV
+            region: (x, y, w, h) области таблицы; по умолчанию первая найденная таблица
+
+        Returns:
+            list: Строки таблицы - списки текстов ячеек
+
+        Raises:
+            ValueError: Если таблица не найдена
+        """
+        gray = self.processor.to_gray(image)
+        if region is None:
+            regions = self._table_regions(gray)
+            if not regions:
+                raise ValueError("Таблица не найдена")
+            region = regions[0]
+
+        x, y, w, h = region
+        table = gray[y:y + h, x:x + w]
+        horizontal, vertical = self._line_masks(table)
+        rows = self._grid_positions(horizontal, axis=1)
+        columns = self._grid_positions(vertical, axis=0)
+        if len(rows) < 2 or len(columns) < 2:
+            raise ValueError("Не удалось определить сетку таблицы")
+
+        result = []
+        for top, bottom in zip(rows, rows[1:]):
+            cells = []
+            for left, right in zip(columns, columns[1:]):
+                cell = table[top + 3:bottom - 2, left + 3:right - 2]
+                text = pytesseract.image_to_string(
+                    cell, lang=self.recognizer.languages, config=f'--oem 1 --psm {PSM_BLOCK}'
+                ) if cell.size else ''
+                cells.append(' '.join(text.split()))
+            result.append(cells)
+        return result
+
+    def process_structured_document(self, image, form_type='resume'):
+        """
+        Обрабатывает страницу как структурированный документ
+
+        Returns:
+            dict: {'forms': [данные анкеты], 'tables': [таблицы], 'text': текст страницы}
+        """
+        gray = self.processor.to_gray(image)
+
+        tables = []
+        for region in self._table_regions(gray):
+            try:
+                tables.append(self.extract_table(gray, region))
+            except ValueError as e:
+                logger.debug(f"Область {region} пропущена: {str(e)}")
+
+        form_data = self.extract_form_data(gray, form_type)
+        text, confidence = self.recognizer.recognize_with_confidence(gray, method='segmentation')
+
+        return {
+            'forms': [form_data] if form_data else [],
+            'tables': tables,
+            'text': text,
+            'confidence': confidence
+        }
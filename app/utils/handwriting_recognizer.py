@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Распознавание рукописного и сканированного текста локально (Tesseract).
+"""
+
+import logging
+import pytesseract
+from pytesseract import Output
+from app.utils.image_processor import ImageProcessor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGES = 'rus+eng+tuk'
+
+# Режимы сегментации страницы Tesseract
+PSM_AUTO = 3
+PSM_BLOCK = 6
+
+
+def available_languages(requested):
+    """
+    Языки из requested, для которых установлены модели Tesseract
+
+    Без модели (например, tuk) Tesseract завершается с ошибкой, поэтому
+    отсутствующие языки пропускаются с предупреждением.
+    """
+    try:
+        installed = set(pytesseract.get_languages(config=''))
+    except Exception as e:
+        logger.warning(f"Не удалось получить список языков Tesseract: {str(e)}")
+        return requested
+
+    languages = [lang for lang in requested.split('+') if lang in installed]
+    missing = [lang for lang in requested.split('+') if lang not in installed]
+    if missing:
+        logger.warning(f"Не установлены языковые модели Tesseract: {', '.join(missing)}")
+    return '+'.join(languages) or 'eng'
+
+
+class HandwritingRecognizer:
+    """
+    Распознавание текста с оценкой уверенности
+
+    Методы:
+        adaptive     - предобработка ImageProcessor и распознавание всей страницы
+        segmentation - распознавание по текстовым блокам (колонки, разнородная верстка)
+        multi_scale  - несколько масштабов, выбирается результат с наибольшей уверенностью
+    """
+
+    METHODS = ('adaptive', 'segmentation', 'multi_scale')
+    SCALES = (1.0, 1.5, 2.0)
+
+    def __init__(self, languages=DEFAULT_LANGUAGES, processor=None, check_languages=True):
+        self.languages = available_languages(languages) if check_languages else languages
+        self.processor = processor or ImageProcessor()
+
+    def _ocr(self, image, psm=PSM_AUTO):
+        """
+        Распознает изображение и считает уверенность
+
+        Returns:
+            tuple: (текст, уверенность 0-100, взвешенная по длине слов)
+        """
+        data = pytesseract.image_to_data(
+            image,
+            lang=self.languages,
+            config=f'--oem 1 --psm {psm}',
+            output_type=Output.DICT
+        )
+
+        lines = {}
+        weighted_confidence = 0.0
+        total_chars = 0
+        for i, word in enumerate(data['text']):
+            word = word.strip()
+            confidence = float(data['conf'][i])
+            if not word or confidence < 0:
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(word)
+            weighted_confidence += confidence * len(word)
+            total_chars += len(word)
+
+        # Пустая строка между абзацами сохраняет структуру резюме
+        text_lines = []
+        previous_paragraph = None
+        for (block, paragraph, _), words in sorted(lines.items()):
+            if previous_paragraph is not None and (block, paragraph) != previous_paragraph:
+                text_lines.append('')
+            text_lines.append(' '.join(words))
+            previous_paragraph = (block, paragraph)
+
+        confidence = weighted_confidence / total_chars if total_chars else 0.0
+        return '\n'.join(text_lines), confidence
+
+    def recognize_with_confidence(self, image, method='adaptive'):
+        """
+        Распознает текст выбранным методом
+
+        Returns:
+            tuple: (текст, уверенность 0-100)
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Неизвестный метод распознавания: {method}")
+
+        # Бинаризация не используется: LSTM-модели Tesseract лучше работают с серым изображением
+        processed = self.processor.process_image(image, methods=['contrast', 'deskew'])
+
+        if method == 'adaptive':
+            return self._ocr(processed)
+
+        if method == 'segmentation':
+            texts = []
+            weighted_confidence = 0.0
+            total_chars = 0
+            for block in self.processor.segment_text_blocks(processed):
+                text, confidence = self._ocr(block, psm=PSM_BLOCK)
+                if text:
+                    texts.append(text)
+                    weighted_confidence += confidence * len(text)
+                    total_chars += len(text)
+            return '\n\n'.join(texts), (weighted_confidence / total_chars if total_chars else 0.0)
+
+        best = ('', 0.0)
+        for scale in self.SCALES:
+            text, confidence = self._ocr(self.processor.rescale(processed, scale))
+            logger.debug(f"Масштаб {scale}: уверенность {confidence:.1f}, символов {len(text)}")
+            if confidence > best[1]:
+                best = (text, confidence)
+        return best
+
+    def recognize(self, image, method='adaptive'):
+        """Распознает текст выбранным методом (без оценки уверенности)"""
+        return self.recognize_with_confidence(image, method)[0]
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Подготовка изображений резюме перед распознаванием через vision-модель.
+
+Фотографии резюме с телефона бывают 4000px и несколько мегабайт, а модель
+все равно уменьшает изображение: в режиме detail=high оно вписывается в
+2048x2048, затем короткая сторона уменьшается до 768px, и стоимость считается
+по плиткам 512x512. Поэтому изображение заранее:
+
+    1. поворачивается по EXIF,
+    2. переводится в оттенки серого,
+    3. выравнивается (deskew) по профилю строк текста,
+    4. уменьшается до разрешения, которое реально использует модель,
+    5. пережимается в JPEG или WebP.
+
+Страницы PDF рендерятся сразу в нужном разрешении в оттенках серого вместо
+PNG с фиксированным увеличением 2x.
+"""
+
+import base64
+import io
+import math
+from dataclasses import dataclass
+
+# Ограничения vision-модели для detail=high
+MAX_LONG_SIDE = 2048
+MAX_SHORT_SIDE = 768
+TILE_SIZE = 512
+BASE_TOKENS = 85
+TILE_TOKENS = 170
+
+# Поиск угла наклона: грубо с шагом 1°, затем уточнение с шагом 0.2°
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_MIN_ANGLE = 0.3
+DESKEW_SAMPLE_SIDE = 800
+
+MIME_TYPES = {'JPEG': 'image/jpeg', 'WEBP': 'image/webp', 'PNG': 'image/png'}
+
+
+@dataclass
+class PreparedImage:
+    """Изображение, подготовленное для отправки в vision-модель"""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    skew_angle: float = 0.0
+
+    @property
+    def data_url(self):
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+    @property
+    def tokens(self):
+        return estimate_vision_tokens(self.width, self.height)
+
+
+def estimate_vision_tokens(width, height, detail='high'):
+    """Оценка стоимости изображения в токенах (по правилам detail=high/low)"""
+    if detail == 'low':
+        return BASE_TOKENS
+    width, height = _fit_size(width, height, MAX_LONG_SIDE, MAX_SHORT_SIDE)
+    tiles = math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+    return BASE_TOKENS + TILE_TOKENS * tiles
+
+
+def _fit_size(width, height, max_long_side, max_short_side):
+    """Размер после уменьшения до ограничений модели (без увеличения)"""
+    scale = min(
+        1.0,
+        max_long_side / max(width, height),
+        max_short_side / min(width, height)
+    )
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def vision_options():
+    """Параметры подготовки из конфигурации приложения"""
+    from flask import current_app
+
+    config = current_app.config
+    return {
+        'max_long_side': config.get('VISION_MAX_LONG_SIDE', MAX_LONG_SIDE),
+        'max_short_side': config.get('VISION_MAX_SHORT_SIDE', MAX_SHORT_SIDE),
+        'image_format': config.get('VISION_IMAGE_FORMAT', 'JPEG'),
+        'quality': config.get('VISION_IMAGE_QUALITY', 80),
+        'deskew': config.get('VISION_DESKEW', True)
+    }
+
+
+def _otsu_threshold(pixels):
+    """Порог бинаризации по методу Оцу"""
+    import numpy as np
+
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = pixels.size
+    levels = np.arange(256)
+    weight_background = np.cumsum(histogram)
+    weight_foreground = total - weight_background
+    sum_background = np.cumsum(histogram * levels)
+    mean_background = sum_background / np.maximum(weight_background, 1)
+    mean_foreground = (sum_background[-1] - sum_background) / np.maximum(weight_foreground, 1)
+    variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+    return int(np.argmax(variance))
+
+
+def detect_skew(image):
+    """
+    Угол поворота (в градусах, для Image.rotate), выравнивающий строки текста
+
+    Маска текста поворачивается на пробные углы; при правильном угле строки
+    горизонтальны, и построчный профиль суммы пикселей самый "резкий".
+    """
+    import numpy as np
+    from PIL import Image
+
+    sample = image.copy()
+    sample.thumbnail((DESKEW_SAMPLE_SIDE, DESKEW_SAMPLE_SIDE))
+    pixels = np.asarray(sample, dtype=np.uint8)
+    mask = Image.fromarray(((pixels < _otsu_threshold(pixels)) * 255).astype(np.uint8))
+
+    def score(angle):
+        rotated = np.asarray(mask.rotate(angle, resample=Image.NEAREST, fillcolor=0), dtype=np.float64)
+        profile = rotated.sum(axis=1)
+        return float(np.sum(np.diff(profile) ** 2))
+
+    coarse = max(np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + 0.5, 1.0), key=score)
+    fine = max(np.arange(coarse - 0.8, coarse + 0.9, 0.2), key=score)
+    return round(float(fine), 1)
+
+
+def prepare_image(image, max_long_side=MAX_LONG_SIDE, max_short_side=MAX_SHORT_SIDE,
+                  image_format='JPEG', quality=80, deskew=True):
+    """
+    Подготавливает изображение Pillow для vision-модели
+
+    Returns:
+        PreparedImage: Сжатое изображение в оттенках серого
+    """
+    from PIL import Image, ImageOps
+
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('L')
+
+    # Уменьшаем до ограничений модели до выравнивания, чтобы не поворачивать 4000px
+    target = _fit_size(image.width, image.height, max_long_side, max_short_side)
+    if target != image.size:
+        image = image.resize(target, Image.LANCZOS)
+
+    angle = 0.0
+    if deskew:
+        angle = detect_skew(image)
+        if abs(angle) >= DESKEW_MIN_ANGLE:
+            image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+            # После поворота с expand размер немного растет - вписываем снова
+            target = _fit_size(image.width, image.height, max_long_side, max_short_side)
+            if target != image.size:
+                image = image.resize(target, Image.LANCZOS)
+        else:
+            angle = 0.0
+
+    image_format = image_format.upper()
+    buffer = io.BytesIO()
+    if image_format == 'PNG':
+        image.save(buffer, format='PNG', optimize=True)
+    else:
+        image.save(buffer, format=image_format, quality=quality, optimize=image_format == 'JPEG')
+
+    return PreparedImage(
+        data=buffer.getvalue(),
+        mime_type=MIME_TYPES[image_format],
+        width=image.width,
+        height=image.height,
+        skew_angle=angle
+    )
+
+
+def prepare_image_file(path, **options):
+    """Подготавливает файл изображения (JPEG/PNG) для vision-модели"""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        # Для JPEG декодируем сразу в уменьшенном масштабе (DCT scaling)
+        max_short_side = options.get('max_short_side', MAX_SHORT_SIDE)
+        image.draft('L', (max_short_side, max_short_side))
+        return prepare_image(image, **options)
+
+
+def render_pdf_page(page, **options):
+    """
+    Рендерит страницу PDF (fitz.Page) сразу в разрешении модели и подготавливает ее
+    """
+    import fitz
+    from PIL import Image
+
+    max_long_side = options.get('max_long_side', MAX_LONG_SIDE)
+    max_short_side = options.get('max_short_side', MAX_SHORT_SIDE)
+    rect = page.rect
+    zoom = min(
+        max_long_side / max(rect.width, rect.height),
+        max_short_side / min(rect.width, rect.height)
+    )
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    image = Image.frombytes('L', (pix.width, pix.height), pix.samples)
+    return prepare_image(image, **options)
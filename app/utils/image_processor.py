@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Предобработка сканов и фотографий документов для локального OCR (OpenCV).
+"""
+
+import logging
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ImageProcessor:
+    """
+    Улучшение изображения документа перед распознаванием Tesseract
+
+    Все методы принимают и возвращают изображения OpenCV (numpy.ndarray).
+    Цветные изображения переводятся в оттенки серого.
+    """
+
+    # Порядок шагов для methods=['all']
+    ALL_METHODS = ('contrast', 'noise', 'deskew', 'threshold')
+
+    def __init__(self, clahe_clip_limit=2.0, clahe_tile_size=8, max_skew_angle=15.0):
+        self.clahe = cv2.createCLAHE(clipLimit=clahe_clip_limit, tileGridSize=(clahe_tile_size, clahe_tile_size))
+        self.max_skew_angle = max_skew_angle
+
+    @staticmethod
+    def to_gray(image):
+        """Переводит изображение в оттенки серого"""
+        if image.ndim == 2:
+            return image
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    def enhance_contrast(self, image):
+        """Локальное выравнивание контраста (CLAHE): блеклые и неравномерно освещенные сканы"""
+        return self.clahe.apply(self.to_gray(image))
+
+    def remove_noise(self, image):
+        """Удаление шума матрицы камеры и артефактов JPEG с сохранением границ символов"""
+        return cv2.fastNlMeansDenoising(self.to_gray(image), None, h=10, templateWindowSize=7, searchWindowSize=21)
+
+    def detect_skew_angle(self, image):
+        """
+        Угол наклона текста в градусах (по минимальному прямоугольнику вокруг текста)
+
+        Returns:
+            float: Угол для поворота против часовой стрелки; 0, если текст не найден
+        """
+        gray = self.to_gray(image)
+        binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+        # Слитные строки дают более устойчивую оценку, чем отдельные символы
+        binary = cv2.dilate(binary, cv2.getStructuringElement(cv2.MORPH_RECT, (25, 3)))
+        coords = cv2.findNonZero(binary)
+        if coords is None or len(coords) < 100:
+            return 0.0
+
+        angle = cv2.minAreaRect(coords)[-1]
+        # Диапазон угла minAreaRect зависит от версии OpenCV: приводим к (-45, 45]
+        while angle <= -45:
+            angle += 90
+        while angle > 45:
+            angle -= 90
+        if abs(angle) > self.max_skew_angle:
+            return 0.0
+        return float(angle)
+
+    def deskew(self, image):
+        """Поворачивает изображение так, чтобы строки текста стали горизонтальными"""
+        gray = self.to_gray(image)
+        angle = self.detect_skew_angle(gray)
+        if abs(angle) < 0.1:
+            return gray
+
+        height, width = gray.shape
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+        return cv2.warpAffine(
+            gray, matrix, (width, height),
+            flags=cv2.INTER_CUBIC,
+            borderMode=cv2.BORDER_CONSTANT,
+            borderValue=255
+        )
+
+    def adaptive_threshold(self, image, block_size=31, c=15):
+        """Бинаризация с локальным порогом: устойчива к теням и неравномерному освещению"""
+        gray = self.to_gray(image)
+        return cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, c
+        )
+
+    def rescale(self, image, scale):
+        """Масштабирование (Tesseract лучше всего работает при высоте строчных букв ~20-30px)"""
+        if scale == 1.0:
+            return image
+        interpolation = cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA
+        return cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+
+    def process_image(self, image, methods=('all',)):
+        """
+        Последовательно применяет шаги предобработки
+
+        Args:
+            image: Изображение OpenCV
+            methods: Список шагов: 'contrast', 'noise', 'deskew', 'threshold' или 'all'
+
+        Returns:
+            numpy.ndarray: Обработанное изображение в оттенках серого
+        """
+        steps = self.ALL_METHODS if 'all' in methods else [m for m in self.ALL_METHODS if m in methods]
+        handlers = {
+            'contrast': self.enhance_contrast,
+            'noise': self.remove_noise,
+            'deskew': self.deskew,
+            'threshold': self.adaptive_threshold
+        }
+
+        result = self.to_gray(image)
+        for step in steps:
+            result = handlers[step](result)
+        return result
+
+    def segment_text_blocks(self, image, min_area=1500, padding=8):
+        """
+        Разбивает страницу на текстовые блоки (абзацы, колонки)
+
+        Returns:
+            list: Вырезанные блоки (numpy.ndarray) сверху вниз, слева направо
+        """
+        return [image[y:y + h, x:x + w] for x, y, w, h in self.find_text_blocks(image, min_area, padding)]
+
+    def find_text_blocks(self, image, min_area=1500, padding=8):
+        """
+        Координаты текстовых блоков
+
+        Returns:
+            list: [(x, y, w, h)] сверху вниз, слева направо
+        """
+        gray = self.to_gray(image)
+        binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+
+        # Расширение сливает символы в строки, а строки - в блоки
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(15, gray.shape[1] // 60), max(7, gray.shape[0] // 150)))
+        merged = cv2.dilate(binary, kernel, iterations=2)
+        contours = cv2.findContours(merged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+
+        height, width = gray.shape
+        blocks = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h < min_area:
+                continue
+            x0, y0 = max(0, x - padding), max(0, y - padding)
+            x1, y1 = min(width, x + w + padding), min(height, y + h + padding)
+            blocks.append((x0, y0, x1 - x0, y1 - y0))
+
+        # Сортировка по строкам блоков (с допуском по высоте), затем слева направо
+        row_height = max(20, height // 50)
+        blocks.sort(key=lambda b: (b[1] // row_height, b[0]))
+        logger.debug(f"Найдено текстовых блоков: {len(blocks)}")
+        return blocks
+
+    @staticmethod
+    def decode(data):
+        """Декодирует байты изображения (PNG, JPEG) в массив OpenCV"""
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise ValueError("Не удалось декодировать изображение")
+        return image
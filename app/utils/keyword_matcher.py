@@ -0,0 +1,506 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Многоязычный поиск ключевых слов справочника (ru/en/tm) и определение отрасли.
+
+Из Keyword.word_ru, word_en, word_tm и синонимов один раз на процесс строится
+индекс: словарь последовательностей основ слов -> id ключевых слов. Текст
+резюме или вакансии разбивается на слова, каждое слово приводится к основе
+(snowball для русского и английского, отсечение окончаний для туркменского),
+после чего поиск идет за один проход по тексту. Поэтому «разработчиком»
+находит ключевое слово «разработчик», а «hasaplaýjylar» - «hasaplaýjy».
+
+По найденным ключевым словам определяются отрасли (Keyword.industry_id):
+дешевая предварительная классификация до обращения к LLM.
+
+Частота Keyword.frequency увеличивается не по одной строке на резюме, а
+пакетами: приращения копятся в памяти процесса и записываются одним
+UPDATE (executemany) по KEYWORDS_FREQUENCY_BATCH штук или не позже чем через
+KEYWORDS_FREQUENCY_FLUSH_SECONDS секунд после первого неучтенного: запись
+по времени выполняет таймер процесса, даже если новых резюме больше нет.
+Остаток записывается и при завершении процесса (atexit).
+"""
+
+import atexit
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db
+from app.models import Keyword, Industry, VacancyIndustry
+
+_TOKEN_RE = re.compile(r"[^\W_]+(?:['’-][^\W_]+)*[+#]*")
+_CYRILLIC_RE = re.compile(r'[а-яё]')
+
+# Слова короче не приводятся к основе (аббревиатуры: sql, hr, 1с)
+MIN_STEM_LENGTH = 4
+
+# Туркменские окончания: множественное число, падежи, принадлежность.
+# Отсекаются от длинных к коротким, не более двух раз, основа - не короче 3 букв.
+_TM_SUFFIXES = sorted((
+    'lar', 'ler',
+    'dan', 'den', 'ndan', 'nden', 'nyň', 'niň', 'nuň', 'nüň',
+    'da', 'de', 'nda', 'nde', 'ny', 'ni', 'nu', 'nü', 'na', 'ne',
+    'ymyz', 'imiz', 'umyz', 'ümiz', 'yňyz', 'iňiz', 'uňyz', 'üňiz',
+    'sy', 'si', 'ym', 'im', 'um', 'üm', 'yň', 'iň', 'uň', 'üň',
+    'a', 'e', 'y', 'i',
+), key=len, reverse=True)
+
+_stemmers = {}
+
+_index = None
+_index_signature = None
+_index_lock = threading.Lock()
+
+_pending = Counter()
+_pending_since = None
+_pending_lock = threading.Lock()
+_flush_timer = None
+_flush_app = None
+
+
+def _snowball(language):
+    stemmer = _stemmers.get(language)
+    if stemmer is None:
+        import snowballstemmer
+        stemmer = snowballstemmer.stemmer(language)
+        _stemmers[language] = stemmer
+    return stemmer
+
+
+def _stem_turkmen(word):
+    for _ in range(2):
+        for suffix in _TM_SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        else:
+            break
+    return word
+
+
+def stem_word(word, language='en'):
+    """
+    Основа слова
+
+    Кириллические слова всегда обрабатываются русским стеммером; для слов
+    на латинице язык задается параметром ('en' или 'tm').
+    """
+    if len(word) < MIN_STEM_LENGTH or not word.isalpha():
+        return word
+    if _CYRILLIC_RE.search(word):
+        return _snowball('russian').stemWord(word)
+    if language == 'tm':
+        return _stem_turkmen(word)
+    return _snowball('english').stemWord(word)
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре (ё -> е)"""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(str(text).lower().replace('ё', 'е'))
+
+
+def stem_text(text, language='en'):
+    """Последовательность основ слов текста"""
+    return tuple(stem_word(token, language) for token in tokenize(text))
+
+
+def _text_language(text):
+    from app.utils.resume_nlp import detect_language
+    return 'tm' if detect_language(text) == 'tk' else 'en'
+
+
+class KeywordIndex:
+    """
+    Индекс ключевых слов: последовательность основ -> id ключевых слов
+
+    Фразы на латинице добавляются в двух вариантах (английские и туркменские
+    основы), так как язык латинского текста определяется только по документу.
+    """
+
+    def __init__(self, keywords, industries=None):
+        """
+        Args:
+            keywords: Список (keyword_id, industry_id, [варианты написания])
+            industries: Словарь {industry_id: название}
+        """
+        self.industries = industries or {}
+        self.keyword_industry = {}
+        self._phrases = {}
+        self.max_length = 0
+
+        for keyword_id, industry_id, variants in keywords:
+            self.keyword_industry[keyword_id] = industry_id
+            for variant in variants:
+                for language in ('en', 'tm'):
+                    phrase = stem_text(variant, language)
+                    if phrase:
+                        self._phrases.setdefault(phrase, set()).add(keyword_id)
+                        self.max_length = max(self.max_length, len(phrase))
+
+    @property
+    def phrases_count(self):
+        return len(self._phrases)
+
+    def find(self, text, language=None):
+        """
+        Ищет ключевые слова в тексте
+
+        На каждой позиции выбирается самая длинная совпавшая фраза, чтобы
+        «машинное обучение» не засчитывалось заодно как «обучение».
+
+        Args:
+            text: Исходный текст
+            language: 'en' или 'tm' для слов на латинице (по умолчанию по тексту)
+
+        Returns:
+            dict: {keyword_id: количество упоминаний}
+        """
+        if not text or not self._phrases:
+            return {}
+        stems = stem_text(text, language or _text_language(text))
+
+        found = Counter()
+        position = 0
+        while position < len(stems):
+            for length in range(min(self.max_length, len(stems) - position), 0, -1):
+                keyword_ids = self._phrases.get(stems[position:position + length])
+                if keyword_ids:
+                    for keyword_id in keyword_ids:
+                        found[keyword_id] += 1
+                    position += length
+                    break
+            else:
+                position += 1
+        return dict(found)
+
+    def classify(self, found, min_keywords=1, limit=None):
+        """
+        Отрасли по найденным ключевым словам
+
+        Args:
+            found: Результат find
+            min_keywords: Минимум разных ключевых слов отрасли
+            limit: Максимум отраслей
+
+        Returns:
+            list: [{'id', 'name', 'keywords', 'mentions', 'score'}] по убыванию score,
+                  где score - доля упоминаний отрасли среди всех упоминаний
+        """
+        stats = {}
+        for keyword_id, mentions in found.items():
+            industry_id = self.keyword_industry.get(keyword_id)
+            if industry_id is None:
+                continue
+            item = stats.setdefault(industry_id, {'keywords': 0, 'mentions': 0})
+            item['keywords'] += 1
+            item['mentions'] += mentions
+
+        total = sum(item['mentions'] for item in stats.values())
+        result = [
+            {
+                'id': industry_id,
+                'name': self.industries.get(industry_id),
+                'keywords': item['keywords'],
+                'mentions': item['mentions'],
+                'score': round(item['mentions'] / total, 3)
+            }
+            for industry_id, item in stats.items()
+            if item['keywords'] >= min_keywords
+        ]
+        result.sort(key=lambda item: (item['mentions'], item['keywords']), reverse=True)
+        return result[:limit] if limit else result
+
+
+def _load_index():
+    """Строит индекс из активных ключевых слов справочника"""
+    rows = db.session.execute(
+        sa.select(Keyword.id, Keyword.industry_id, Keyword.word_ru, Keyword.word_en, Keyword.word_tm, Keyword.synonyms)
+        .where(Keyword.is_active.is_not(False))
+    ).all()
+
+    keywords = []
+    for keyword_id, industry_id, word_ru, word_en, word_tm, synonyms in rows:
+        variants = [word_ru, word_en, word_tm]
+        if isinstance(synonyms, list):
+            variants.extend(synonyms)
+        keywords.append((keyword_id, industry_id, [v for v in variants if v and isinstance(v, str)]))
+
+    industries = dict(db.session.execute(sa.select(Industry.id, Industry.name)).all())
+    return KeywordIndex(keywords, industries)
+
+
+def _keywords_signature():
+    """
+    Дешевая проверка изменений справочника: количество, максимальный id,
+    суммарная длина написаний и синонимов и сумма id отраслей (меняются при
+    правке слов в другом процессе)
+    """
+    length = sa.func.coalesce(sa.func.length(Keyword.word_ru), 0) \
+        + sa.func.coalesce(sa.func.length(Keyword.word_en), 0) \
+        + sa.func.coalesce(sa.func.length(Keyword.word_tm), 0) \
+        + sa.func.coalesce(sa.func.length(sa.cast(Keyword.synonyms, sa.Text)), 0)
+    return tuple(db.session.execute(
+        sa.select(
+            sa.func.count(Keyword.id), sa.func.max(Keyword.id), sa.func.sum(length),
+            sa.func.sum(sa.func.coalesce(Keyword.industry_id, 0))
+        )
+        .where(Keyword.is_active.is_not(False))
+    ).one())
+
+
+def get_keyword_index():
+    """Возвращает индекс ключевых слов процесса, перестраивая его при изменении справочника"""
+    global _index, _index_signature
+
+    signature = _keywords_signature()
+    if _index is not None and signature == _index_signature:
+        return _index
+
+    with _index_lock:
+        if _index is None or signature != _index_signature:
+            _index = _load_index()
+            _index_signature = signature
+            current_app.logger.info(
+                f"Построен индекс ключевых слов: {signature[0]} слов, {_index.phrases_count} фраз"
+            )
+    return _index
+
+
+def invalidate_keyword_index(*args):
+    """Сбрасывает индекс ключевых слов (вызывается и при изменении Keyword через ORM)"""
+    global _index, _index_signature
+    with _index_lock:
+        _index = None
+        _index_signature = None
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    sa.event.listen(Keyword, _event, invalidate_keyword_index)
+
+
+def _mark_pending():
+    """
+    Отмечает начало накопления приращений и запускает таймер записи
+
+    Вызывается под _pending_lock.
+    """
+    global _pending_since, _flush_timer
+    if _pending_since is not None:
+        return
+    _pending_since = time.monotonic()
+    if _flush_timer is None and _flush_app is not None:
+        _flush_timer = threading.Timer(
+            _flush_app.config.get('KEYWORDS_FREQUENCY_FLUSH_SECONDS', 60), _flush_in_background
+        )
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+
+def _flush_in_background():
+    """Записывает накопленные приращения по таймеру и при завершении процесса"""
+    global _flush_timer
+    with _pending_lock:
+        _flush_timer = None
+        app = _flush_app
+        if app is None or not _pending:
+            return
+    with app.app_context():
+        try:
+            flush_frequencies()
+        except Exception as e:
+            app.logger.error(f"Ошибка записи частот ключевых слов: {str(e)}")
+
+
+atexit.register(_flush_in_background)
+
+
+def record_frequencies(keyword_ids):
+    """
+    Учитывает появление ключевых слов в резюме
+
+    Приращения записываются в базу пакетом (flush_frequencies), когда
+    накопилось KEYWORDS_FREQUENCY_BATCH слов, или таймером процесса через
+    KEYWORDS_FREQUENCY_FLUSH_SECONDS после первого неучтенного.
+    """
+    global _flush_app
+    if not keyword_ids:
+        return
+
+    config = current_app.config
+    with _pending_lock:
+        _flush_app = current_app._get_current_object()
+        _pending.update(keyword_ids)
+        _mark_pending()
+        due = (
+            sum(_pending.values()) >= config.get('KEYWORDS_FREQUENCY_BATCH', 200)
+            or time.monotonic() - _pending_since >= config.get('KEYWORDS_FREQUENCY_FLUSH_SECONDS', 60)
+        )
+    if due:
+        flush_frequencies()
+
+
+def flush_frequencies():
+    """
+    Записывает накопленные приращения Keyword.frequency одним UPDATE
+
+    Выполняется в отдельной транзакции, независимо от сессии запроса.
+
+    Returns:
+        int: Количество обновленных ключевых слов
+    """
+    global _pending_since
+    with _pending_lock:
+        increments = dict(_pending)
+        _pending.clear()
+        _pending_since = None
+    if not increments:
+        return 0
+
+    table = Keyword.__table__
+    statement = (
+        sa.update(table)
+        .where(table.c.id == sa.bindparam('keyword_id'))
+        .values(frequency=sa.func.coalesce(table.c.frequency, 0) + sa.bindparam('increment'))
+    )
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(statement, [
+                {'keyword_id': keyword_id, 'increment': increment}
+                for keyword_id, increment in increments.items()
+            ])
+    except Exception:
+        # Возвращаем приращения в очередь, чтобы не потерять их при сбое
+        with _pending_lock:
+            _pending.update(increments)
+            _mark_pending()
+        raise
+    return len(increments)
+
+
+def match_text(text, language=None, index=None):
+    """
+    Ключевые слова и отрасли текста
+
+    Returns:
+        dict: {'matches': {keyword_id: упоминания}, 'industries': [...]}
+    """
+    index = index or get_keyword_index()
+    config = current_app.config
+    found = index.find(text, language)
+    return {
+        'matches': found,
+        'industries': index.classify(
+            found,
+            min_keywords=config.get('KEYWORDS_MIN_MATCHES', 2),
+            limit=config.get('KEYWORDS_MAX_INDUSTRIES', 3)
+        )
+    }
+
+
+def tag_candidate(candidate, commit=True, index=None):
+    """
+    Находит ключевые слова и отрасли в резюме кандидата
+
+    Результат сохраняется в structured_resume_data['keywords']. Частота
+    увеличивается только для ключевых слов, которых раньше в резюме не было.
+
+    Returns:
+        dict: Сохраненный результат или None, если текста резюме нет
+    """
+    if not candidate.resume_text:
+        return None
+
+    result = match_text(candidate.resume_text, index=index)
+    data = dict(candidate.structured_resume_data or {})
+    previous = {int(keyword_id) for keyword_id in (data.get('keywords') or {}).get('matches', {})}
+
+    stored = {
+        # Ключи JSON - строки
+        'matches': {str(keyword_id): count for keyword_id, count in result['matches'].items()},
+        'industries': result['industries'],
+        'processed_at': datetime.now(timezone.utc).isoformat()
+    }
+    data['keywords'] = stored
+    candidate.structured_resume_data = data
+
+    if commit:
+        db.session.commit()
+    # Запись частот отложена (record_frequencies) и идет после фиксации разметки
+    record_frequencies(set(result['matches']) - previous)
+    return stored
+
+
+def _vacancy_text(vacancy):
+    return '\n'.join(filter(None, (
+        vacancy.title, vacancy.description_tasks, vacancy.description_conditions, vacancy.ideal_profile
+    )))
+
+
+def tag_vacancy(vacancy, commit=True, index=None):
+    """
+    Добавляет вакансии отрасли, найденные по ключевым словам описания
+
+    Отрасли, указанные вручную, не удаляются.
+
+    Returns:
+        list: Найденные отрасли
+    """
+    result = match_text(_vacancy_text(vacancy), index=index)
+    existing = set(db.session.scalars(
+        sa.select(VacancyIndustry.industry_id).where(VacancyIndustry.vacancy_id == vacancy.id)
+    ))
+    for industry in result['industries']:
+        if industry['id'] not in existing:
+            db.session.add(VacancyIndustry(vacancy_id=vacancy.id, industry_id=industry['id']))
+    if commit:
+        db.session.commit()
+    return result['industries']
+
+
+def backfill_keywords(batch_size=200):
+    """
+    Размечает ключевыми словами и отраслями всех кандидатов и вакансии
+
+    Returns:
+        tuple: (количество кандидатов, количество вакансий)
+    """
+    from app.models import Candidate, Vacancy
+
+    index = get_keyword_index()
+    candidates_count = 0
+    last_id = 0
+    while True:
+        candidates = db.session.scalars(
+            sa.select(Candidate)
+            .where(Candidate.id > last_id)
+            .where(Candidate.resume_text.is_not(None))
+            .options(so.undefer_group('resume'))
+            .order_by(Candidate.id)
+            .limit(batch_size)
+        ).all()
+        if not candidates:
+            break
+        last_id = candidates[-1].id
+
+        for candidate in candidates:
+            if tag_candidate(candidate, commit=False, index=index):
+                candidates_count += 1
+        db.session.commit()
+        db.session.expunge_all()
+        current_app.logger.info(f"Ключевые слова размечены для {candidates_count} кандидатов")
+
+    vacancies = db.session.scalars(sa.select(Vacancy)).all()
+    for vacancy in vacancies:
+        tag_vacancy(vacancy, commit=False, index=index)
+    db.session.commit()
+
+    flush_frequencies()
+    return candidates_count, len(vacancies)
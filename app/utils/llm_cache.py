@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Кэш ответов модели для запросов по вакансиям.
+
+Ключ - sha256 от вида запроса, модели, версии промпта и нормализованных
+входных данных (Unicode NFC, пробелы схлопнуты). Ответ хранится в двух
+уровнях:
+- LRU в памяти процесса (LLM_CACHE_MEMORY_ENTRIES записей). Запись в памяти
+  живет не дольше LLM_CACHE_MEMORY_TTL секунд, поэтому очистка или замена
+  записи в базе (clear-llm-cache) доходит до остальных процессов за это время;
+- таблица llm_response_cache (LLMResponseCache): общая для процессов и
+  переживает перезапуск. Запись живет LLM_CACHE_TTL секунд; сверх
+  LLM_CACHE_MAX_ENTRIES удаляются давно не использованные записи.
+
+Поиск похожих запросов (LLM_CACHE_SIMILARITY > 0) переиспользует ответ для
+почти совпадающего текста, например для скопированной вакансии с
+исправленной опечаткой. Текст представляется хэшированным вектором
+символьных триграмм; сравниваются только записи с тем же видом, моделью,
+версией промпта и точными полями (название, тип занятости).
+
+Запросы к базе выполняются в отдельных транзакциях, независимо от сессии
+запроса; ошибки кэша не мешают обращению к модели.
+"""
+
+import hashlib
+import json
+import math
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+import sqlalchemy as sa
+from flask import current_app
+from app import db
+from app.models import LLMResponseCache
+
+VECTOR_DIMS = 512
+NGRAM = 3
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+_whitespace_re = re.compile(r'\s+')
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def normalize_text(value):
+    """Текст для ключа: NFC, без лишних пробелов"""
+    if value is None:
+        return ''
+    return _whitespace_re.sub(' ', unicodedata.normalize('NFC', str(value))).strip()
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def text_vector(text):
+    """
+    Нормированный вектор символьных триграмм (feature hashing)
+
+    crc32 вместо hash(): значения одинаковы во всех процессах.
+    """
+    text = normalize_text(text).lower()
+    vector = [0.0] * VECTOR_DIMS
+    for position in range(max(1, len(text) - NGRAM + 1)):
+        vector[zlib.crc32(text[position:position + NGRAM].encode('utf-8')) % VECTOR_DIMS] += 1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [round(value / norm, 5) for value in vector]
+
+
+def cosine(a, b):
+    """Косинусная близость нормированных векторов"""
+    return sum(x * y for x, y in zip(a, b))
+
+
+class CacheKey:
+    """Ключ запроса: точные поля и текст, для которого допустим поиск похожих"""
+
+    def __init__(self, kind, model, prompt_version, exact=None, text=''):
+        self.kind = kind
+        self.model = model
+        self.prompt_version = prompt_version
+        exact = {name: normalize_text(value) for name, value in (exact or {}).items()}
+        self.text = normalize_text(text)
+        self.scope = _digest(kind, model, prompt_version, exact)
+        self.key = _digest(self.scope, self.text)
+
+
+def _memory_get(key):
+    with _memory_lock:
+        item = _memory.get(key)
+        if item is None:
+            return None
+        response, expires_at = item
+        if expires_at <= _now():
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return response
+
+
+def _memory_put(key, response, expires_at):
+    limit = current_app.config.get('LLM_CACHE_MEMORY_ENTRIES', 256)
+    # Память процесса - короткий уровень поверх базы: иначе очистка кэша в
+    # другом процессе не действует до конца LLM_CACHE_TTL
+    expires_at = min(expires_at, _now() + timedelta(seconds=current_app.config.get('LLM_CACHE_MEMORY_TTL', 60)))
+    with _memory_lock:
+        _memory[key] = (response, expires_at)
+        _memory.move_to_end(key)
+        while len(_memory) > limit:
+            _memory.popitem(last=False)
+
+
+def _aware(value):
+    # SQLite возвращает даты без часового пояса
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _touch(connection, key):
+    table = LLMResponseCache.__table__
+    connection.execute(
+        sa.update(table).where(table.c.key == key).values(hits=table.c.hits + 1, last_used_at=_now())
+    )
+
+
+def get(cache_key):
+    """
+    Ответ из кэша или None
+
+    Порядок поиска: память процесса, точный ключ в базе, похожий текст в той
+    же области (если LLM_CACHE_SIMILARITY > 0).
+    """
+    if not current_app.config.get('LLM_CACHE_ENABLED', True):
+        return None
+
+    response = _memory_get(cache_key.key)
+    if response is not None:
+        return response
+
+    table = LLMResponseCache.__table__
+    now = _now()
+    threshold = current_app.config.get('LLM_CACHE_SIMILARITY', 0.0)
+    try:
+        with db.engine.begin() as connection:
+            row = connection.execute(
+                sa.select(table.c.key, table.c.response, table.c.expires_at)
+                .where(table.c.key == cache_key.key, table.c.expires_at > now)
+            ).first()
+
+            if row is None and threshold and cache_key.text:
+                vector = text_vector(cache_key.text)
+                rows = connection.execute(
+                    sa.select(table.c.key, table.c.response, table.c.expires_at, table.c.vector)
+                    .where(table.c.scope == cache_key.scope, table.c.expires_at > now, table.c.vector.isnot(None))
+                    .order_by(table.c.last_used_at.desc())
+                    .limit(current_app.config.get('LLM_CACHE_SIMILARITY_CANDIDATES', 200))
+                ).all()
+                best = max(rows, key=lambda item: cosine(vector, item.vector), default=None)
+                if best is not None and cosine(vector, best.vector) >= threshold:
+                    current_app.logger.info(
+                        f"Кэш {cache_key.kind}: похожий запрос (близость {cosine(vector, best.vector):.3f})"
+                    )
+                    row = best
+
+            if row is None:
+                return None
+            _touch(connection, row.key)
+    except Exception as e:
+        current_app.logger.warning(f"Кэш ответов модели недоступен: {str(e)}")
+        return None
+
+    _memory_put(cache_key.key, row.response, _aware(row.expires_at))
+    return row.response
+
+
+def put(cache_key, response):
+    """Сохраняет ответ и удаляет устаревшие записи"""
+    if not current_app.config.get('LLM_CACHE_ENABLED', True) or not response:
+        return
+
+    now = _now()
+    expires_at = now + timedelta(seconds=current_app.config.get('LLM_CACHE_TTL', 7 * 24 * 3600))
+    _memory_put(cache_key.key, response, expires_at)
+
+    table = LLMResponseCache.__table__
+    values = {
+        'scope': cache_key.scope,
+        'kind': cache_key.kind,
+        'model': cache_key.model,
+        'prompt_version': cache_key.prompt_version,
+        'response': response,
+        'vector': text_vector(cache_key.text) if cache_key.text else None,
+        'hits': 0,
+        'created_at': now,
+        'last_used_at': now,
+        'expires_at': expires_at
+    }
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(sa.delete(table).where(table.c.key == cache_key.key))
+            connection.execute(sa.insert(table).values(key=cache_key.key, **values))
+            _prune(connection, now)
+    except Exception as e:
+        current_app.logger.warning(f"Не удалось сохранить ответ модели в кэш: {str(e)}")
+
+
+def _prune(connection, now):
+    """Удаляет просроченные записи и давно не использованные сверх LLM_CACHE_MAX_ENTRIES"""
+    table = LLMResponseCache.__table__
+    connection.execute(sa.delete(table).where(table.c.expires_at <= now))
+
+    limit = current_app.config.get('LLM_CACHE_MAX_ENTRIES', 5000)
+    excess = connection.execute(sa.select(sa.func.count()).select_from(table)).scalar() - limit
+    if excess > 0:
+        oldest = sa.select(table.c.key).order_by(table.c.last_used_at.asc()).limit(excess).scalar_subquery()
+        connection.execute(sa.delete(table).where(table.c.key.in_(oldest)))
+
+
+def clear(kind=None):
+    """
+    Очищает кэш (весь или одного вида запросов)
+
+    Память очищается только в текущем процессе; другие процессы перестают
+    отдавать удаленные ответы через LLM_CACHE_MEMORY_TTL секунд.
+    """
+    table = LLMResponseCache.__table__
+    with _memory_lock:
+        _memory.clear()
+    with db.engine.begin() as connection:
+        statement = sa.delete(table)
+        if kind:
+            statement = statement.where(table.c.kind == kind)
+        return connection.execute(statement).rowcount
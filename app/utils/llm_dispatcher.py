@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Диспетчер запросов к LLM: ограничение параллельности и частоты, повторы.
+
+Все запросы к модели выполняются через chat_completion(). Диспетчер один на
+процесс и ограничивает:
+- число одновременных запросов (семафор, LLM_MAX_CONCURRENCY);
+- запросы и токены в минуту (token bucket, LLM_RPM и LLM_TPM). Токены
+  запроса оцениваются заранее (текст сообщений, изображения, max_tokens) и
+  уточняются по usage из ответа.
+
+Лимиты в конфигурации заданы на весь аккаунт. Счетчики живут в памяти
+процесса, поэтому каждый из LLM_PROCESSES процессов (воркеры gunicorn,
+планировщик) получает равную долю лимитов (process_limits).
+
+Ответы 429, 408, 409, 5xx и ошибки соединения повторяются с экспоненциальной
+задержкой со случайным разбросом (full jitter), но не больше LLM_MAX_RETRIES
+раз. Если сервер прислал Retry-After, выдерживается эта пауза, и на это время
+приостанавливаются все запросы процесса, а не только повторяемый.
+
+Повторы выполняет только диспетчер: клиент OpenAI создается с max_retries=0.
+
+Для нагрузочной проверки есть локальный сервер с ограничением частоты
+(benchmarks/fake_openai_server.py) и benchmarks/llm_dispatcher_load.py.
+"""
+
+import logging
+import random
+import threading
+import time
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+# Оценка изображения, если размер неизвестен: 1024x768, detail=high
+IMAGE_TOKENS_ESTIMATE = 765
+# Оценка ответа, если max_tokens не указан
+DEFAULT_COMPLETION_TOKENS = 1000
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+class LLMQueueTimeout(RuntimeError):
+    """Запрос не дождался своей очереди за LLM_QUEUE_TIMEOUT секунд"""
+
+
+class TokenBucket:
+    """
+    Token bucket: rate единиц в минуту, запас на burst_seconds секунд
+
+    Запрос больше запаса допускается, когда запас полон: баланс уходит в минус,
+    и следующие запросы ждут, пока он восстановится.
+    """
+
+    def __init__(self, rate_per_minute, burst_seconds=5):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Секунд до момента, когда можно списать amount"""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= amount
+
+    def adjust(self, amount):
+        """Поправка после ответа (фактический расход минус оценка)"""
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """Ограничение запросов и токенов в минуту с общей паузой после Retry-After"""
+
+    def __init__(self, rpm, tpm, burst_seconds=5):
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm else None
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens, timeout=None):
+        """
+        Ждет, пока запрос можно отправить, и списывает его из лимитов
+
+        Returns:
+            float: Время ожидания в секундах
+
+        Raises:
+            LLMQueueTimeout: Если лимит не освободился за timeout секунд
+        """
+        started = time.monotonic()
+        deadline = started + timeout if timeout else None
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(
+                    self.paused_until - now,
+                    self.requests.wait_time(1, now) if self.requests else 0.0,
+                    self.tokens.wait_time(tokens, now) if self.tokens else 0.0
+                )
+                if wait <= 0:
+                    if self.requests:
+                        self.requests.take(1)
+                    if self.tokens:
+                        self.tokens.take(tokens)
+                    return now - started
+            if deadline is not None and now + wait > deadline:
+                raise LLMQueueTimeout(f"Лимит запросов к модели не освободился за {timeout} с")
+            time.sleep(min(wait, 1.0))
+
+    def adjust_tokens(self, amount):
+        if self.tokens and amount:
+            with self._lock:
+                self.tokens.adjust(amount)
+
+    def pause(self, seconds):
+        """Приостанавливает все запросы на seconds секунд"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def _status_code(error):
+    return getattr(error, 'status_code', None)
+
+
+def retry_after(error):
+    """Пауза из заголовков Retry-After / retry-after-ms ответа или None"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        # Retry-After в формате HTTP-даты не используется API OpenAI
+        return None
+    return None
+
+
+def is_retryable(error):
+    """Можно ли повторить запрос после этой ошибки"""
+    if _status_code(error) in RETRY_STATUS_CODES:
+        return True
+    try:
+        import openai
+    except ImportError:
+        return False
+    # APITimeoutError - подкласс APIConnectionError
+    return isinstance(error, openai.APIConnectionError)
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """Оценка токенов запроса для лимита TPM: сообщения, изображения и ответ"""
+    from app.utils.prompt_builder import count_tokens
+
+    total = 0
+    for message in messages or []:
+        content = message.get('content')
+        total += 4  # служебные токены сообщения
+        if isinstance(content, str):
+            total += count_tokens(content)
+            continue
+        for part in content or []:
+            if part.get('type') == 'text':
+                total += count_tokens(part.get('text', ''))
+            elif part.get('type') == 'image_url':
+                total += IMAGE_TOKENS_ESTIMATE
+    return total + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+class Dispatcher:
+    """Очередь запросов к модели с ограничениями и повторами"""
+
+    def __init__(self, max_concurrency=8, rpm=500, tpm=30000, max_retries=5, backoff_base=1.0,
+                 backoff_max=60.0, queue_timeout=300, burst_seconds=5):
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.limiter = RateLimiter(rpm, tpm, burst_seconds)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue_timeout = queue_timeout
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'failed': 0, 'wait_seconds': 0.0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key, value=1):
+        with self._stats_lock:
+            self.stats[key] += value
+
+    def backoff(self, attempt, error=None):
+        """Задержка перед повтором: Retry-After сервера или full jitter"""
+        delay = retry_after(error) if error is not None else None
+        if delay is not None:
+            # Небольшой разброс, чтобы потоки не повторили запрос одновременно
+            return min(self.backoff_max, delay) + random.uniform(0, 0.1 * self.backoff_base)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def call(self, func, tokens=0, description='запрос к модели'):
+        """
+        Выполняет func() с учетом лимитов и повторяет его при временных ошибках
+
+        Args:
+            func: Функция, выполняющая запрос
+            tokens: Оценка токенов запроса
+            description: Описание для журнала
+
+        Returns:
+            Результат func(); если у него есть usage, расход токенов уточняется
+        """
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            if not self.semaphore.acquire(timeout=self.queue_timeout):
+                raise LLMQueueTimeout(f"Нет свободного слота для запроса к модели за {self.queue_timeout} с")
+            try:
+                self._count('wait_seconds', time.monotonic() - started + self.limiter.acquire(tokens, self.queue_timeout))
+                self._count('requests')
+                result = func()
+            except Exception as e:
+                error = e
+            else:
+                usage = getattr(result, 'usage', None)
+                if tokens and getattr(usage, 'total_tokens', None):
+                    self.limiter.adjust_tokens(usage.total_tokens - tokens)
+                return result
+            finally:
+                self.semaphore.release()
+
+            if not is_retryable(error) or attempt >= self.max_retries:
+                self._count('failed')
+                raise error
+
+            delay = self.backoff(attempt, error)
+            if _status_code(error) == 429:
+                self._count('throttled')
+                self.limiter.pause(delay)
+            self._count('retries')
+            logger.warning(
+                f"{description}: {type(error).__name__} ({_status_code(error) or 'нет ответа'}), "
+                f"повтор {attempt + 1}/{self.max_retries} через {delay:.1f} с"
+            )
+            time.sleep(delay)
+            attempt += 1
+
+
+def process_limits(config):
+    """
+    Доля лимитов аккаунта на один процесс
+
+    Returns:
+        tuple: (max_concurrency, rpm, tpm); 0 у rpm/tpm - без ограничения
+    """
+    processes = max(1, int(config.get('LLM_PROCESSES', 1)))
+
+    def share(limit):
+        return max(1, limit // processes) if limit else 0
+
+    return (
+        share(config.get('LLM_MAX_CONCURRENCY', 8)) or 1,
+        share(config.get('LLM_RPM', 500)),
+        share(config.get('LLM_TPM', 30000))
+    )
+
+
+def get_dispatcher():
+    """Диспетчер процесса; параметры читаются из конфигурации при первом обращении"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            config = current_app.config if has_app_context() else {}
+            max_concurrency, rpm, tpm = process_limits(config)
+            _dispatcher = Dispatcher(
+                max_concurrency=max_concurrency,
+                rpm=rpm,
+                tpm=tpm,
+                max_retries=config.get('LLM_MAX_RETRIES', 5),
+                backoff_base=config.get('LLM_BACKOFF_BASE', 1.0),
+                backoff_max=config.get('LLM_BACKOFF_MAX', 60.0),
+                queue_timeout=config.get('LLM_QUEUE_TIMEOUT', 300),
+                burst_seconds=config.get('LLM_BURST_SECONDS', 5)
+            )
+        return _dispatcher
+
+
+def chat_completion(client, **kwargs):
+    """
+    client.chat.completions.create(**kwargs) через диспетчер процесса
+
+    Для stream=True диспетчер учитывает только установку соединения: слот
+    освобождается, когда сервер начал отдавать ответ. Клиенты с dispatch=False
+    (mock-провайдер) вызываются напрямую.
+    """
+    if not getattr(client, 'dispatch', True):
+        return client.chat.completions.create(**kwargs)
+    tokens = estimate_tokens(kwargs.get('messages'), kwargs.get('max_tokens'))
+    return get_dispatcher().call(
+        lambda: client.chat.completions.create(**kwargs),
+        tokens=tokens,
+        description=f"Запрос к {kwargs.get('model', 'модели')}"
+    )
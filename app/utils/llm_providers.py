@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Провайдеры LLM и выбор модели по типу задачи.
+
+Провайдер определяет, куда отправляются запросы chat.completions:
+- openai - API OpenAI (ключ OPENAI_API_KEY);
+- local - OpenAI-совместимый сервер собственной модели (vLLM, llama.cpp
+  server, Ollama, LM Studio) по адресу LLM_LOCAL_BASE_URL;
+- mock - детерминированные ответы без сети и затрат, для нагрузочных
+  проверок и бенчмарков (LLM_MOCK_LATENCY - имитация задержки).
+
+Модель выбирается по типу задачи: LLM_MODEL_OCR, LLM_MODEL_STRUCTURING,
+LLM_MODEL_SCORING, LLM_MODEL_VACANCY (остальное - LLM_MODEL_DEFAULT).
+Провайдер по умолчанию задает LLM_PROVIDER; для отдельной задачи его можно
+переопределить префиксом: LLM_MODEL_STRUCTURING=local:qwen2.5-7b-instruct.
+
+Клиенты всех провайдеров имеют интерфейс client.chat.completions.create(),
+поэтому запросы по-прежнему идут через llm_dispatcher.chat_completion().
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+from flask import current_app
+
+PROVIDER_OPENAI = 'openai'
+PROVIDER_LOCAL = 'local'
+PROVIDER_MOCK = 'mock'
+PROVIDERS = (PROVIDER_OPENAI, PROVIDER_LOCAL, PROVIDER_MOCK)
+
+TASK_OCR = 'ocr'
+TASK_STRUCTURING = 'structuring'
+TASK_SCORING = 'scoring'
+TASK_VACANCY = 'vacancy'
+TASK_DEFAULT = 'default'
+
+DEFAULT_MODEL = 'gpt-4o'
+
+_mock_clients = {}
+_mock_clients_lock = threading.Lock()
+
+
+def resolve(task):
+    """
+    Провайдер и модель для задачи
+
+    Returns:
+        tuple: (провайдер, модель)
+    """
+    config = current_app.config
+    value = config.get(f'LLM_MODEL_{task.upper()}') or config.get('LLM_MODEL_DEFAULT') or DEFAULT_MODEL
+    provider = config.get('LLM_PROVIDER', PROVIDER_OPENAI)
+    # Префикс провайдера; двоеточие в имени модели (llama3:8b) сохраняется
+    prefix, separator, model = value.partition(':')
+    if separator and prefix in PROVIDERS:
+        return prefix, model
+    return provider, value
+
+
+def llm_model(task):
+    """Модель для задачи"""
+    return resolve(task)[1]
+
+
+def llm_provider(task):
+    """Провайдер для задачи"""
+    return resolve(task)[0]
+
+
+def openai_api_key():
+    """
+    API-ключ OpenAI или None, если ключ не настроен
+
+    Окружение проверяется раньше конфигурации: после load_dotenv(override=True)
+    в нем новый ключ, а конфигурация прочитана при запуске.
+    """
+    for api_key in (os.environ.get('OPENAI_API_KEY'), current_app.config.get('OPENAI_API_KEY')):
+        if api_key and "your-" not in api_key and len(api_key.strip()) >= 20:
+            return api_key
+    return None
+
+
+@lru_cache(maxsize=8)
+def openai_client(api_key, base_url=None):
+    """
+    Клиент OpenAI (или OpenAI-совместимого сервера)
+
+    Пакет openai импортируется при первом обращении. Клиент переиспользуется
+    вместе с пулом HTTP-соединений. Повторы выполняет llm_dispatcher, поэтому
+    собственные повторы клиента отключены.
+    """
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+
+def get_llm_client(task=TASK_DEFAULT):
+    """
+    Клиент провайдера для задачи
+
+    Returns:
+        Клиент с интерфейсом chat.completions.create() или None, если
+        провайдер openai и ключ не настроен
+    """
+    provider = llm_provider(task)
+    if provider == PROVIDER_MOCK:
+        return mock_client(task)
+    if provider == PROVIDER_LOCAL:
+        return openai_client(
+            current_app.config.get('LLM_LOCAL_API_KEY') or 'local',
+            current_app.config.get('LLM_LOCAL_BASE_URL')
+        )
+
+    api_key = openai_api_key()
+    if api_key is None:
+        current_app.logger.error("OpenAI API ключ невалидный или отсутствует")
+        return None
+    return openai_client(api_key)
+
+
+def mock_client(task):
+    """Mock-клиент задачи (один на процесс)"""
+    with _mock_clients_lock:
+        client = _mock_clients.get(task)
+        if client is None:
+            client = _mock_clients[task] = MockClient(task, current_app.config.get('LLM_MOCK_LATENCY', 0.0))
+        return client
+
+
+# Ответы mock-провайдера
+
+MOCK_RESUME_TEXT = """Иванов Иван Иванович
+Python-разработчик
+Ашхабад, +993 65 123456, ivanov@example.com
+
+Опыт работы
+2019-2024 ООО "Ромашка", backend-разработчик: Flask, PostgreSQL, Docker, REST API
+2017-2019 ООО "Лютик", младший разработчик: Python, Django, Linux
+
+Образование
+2012-2017 Туркменский государственный университет, прикладная математика
+
+Навыки: Python, Flask, Django, PostgreSQL, Docker, Git, Linux
+Языки: русский (родной), английский (B2), туркменский (B1)"""
+
+MOCK_STRUCTURED_DATA = {
+    'personal_info': {'name': 'Иванов Иван Иванович', 'phone': '+993 65 123456', 'email': 'ivanov@example.com',
+                      'location': 'Ашхабад'},
+    'education': [{'institution': 'Туркменский государственный университет', 'degree': 'Бакалавр',
+                   'field': 'Прикладная математика', 'year_start': '2012', 'year_end': '2017'}],
+    'experience': [
+        {'company': 'ООО "Ромашка"', 'position': 'Backend-разработчик',
+         'description': 'Flask, PostgreSQL, Docker, REST API', 'year_start': '2019', 'year_end': '2024'},
+        {'company': 'ООО "Лютик"', 'position': 'Младший разработчик',
+         'description': 'Python, Django, Linux', 'year_start': '2017', 'year_end': '2019'}
+    ],
+    'skills': ['Python', 'Flask', 'Django', 'PostgreSQL', 'Docker', 'Git', 'Linux'],
+    'languages': ['Русский (родной)', 'Английский (B2)', 'Туркменский (B1)'],
+    'summary': 'Python-разработчик с опытом 7 лет',
+    'total_experience_years': '7'
+}
+
+_MOCK_TITLE_RE = re.compile(r'Название вакансии:\s*(.+)')
+
+
+def _mock_analysis(seed):
+    percent = seed % 101
+    return {
+        'match_percent': percent,
+        'pros': 'Релевантный опыт\nЗнание стека вакансии',
+        'cons': 'Нет опыта руководства командой',
+        'recommendation': 'Пригласить на собеседование' if percent >= 50 else 'Рассмотреть других кандидатов',
+        'scores': {'location': (seed >> 3) % 101, 'experience': (seed >> 5) % 101,
+                   'tech_skills': (seed >> 7) % 101, 'education': (seed >> 9) % 101},
+        'score_comments': {'location': 'mock', 'experience': 'mock', 'tech_skills': 'mock', 'education': 'mock'},
+        'mismatch_notes': '',
+        'data_consistency': {'inconsistencies': [], 'severity': 'низкая', 'trust_score': 90},
+        'answer_quality': {'ai_generation_probability': 10, 'ai_generation_signs': False, 'overall_quality': 'среднее'},
+        'data_completeness': {'answer_quality_issues': [], 'low_quality_answers': False},
+        'stop_factors': [],
+        'interview_questions': ['Расскажите о последнем проекте'],
+        'inconsistencies': []
+    }
+
+
+def _mock_vacancy(prompt):
+    match = _MOCK_TITLE_RE.search(prompt)
+    title = match.group(1).strip() if match else 'Специалист'
+    return {
+        'title': title,
+        'description_tasks': f'- Выполнение задач по направлению «{title}»\n- Взаимодействие с командой',
+        'description_conditions': '- Официальное трудоустройство\n- Гибкий график',
+        'ideal_profile': '- Опыт работы от 2 лет\n- Ответственность и внимательность',
+        'questions': [{'id': i, 'text': f'Профессиональный вопрос {i}', 'type': 'text', 'required': True} for i in range(1, 6)],
+        'soft_questions': [{'id': i, 'text': f'Вопрос о soft skills {i}', 'type': 'text', 'required': True} for i in range(1, 6)],
+        # Поля analyze_vacancy_requirements
+        'required_skills': ['Python', 'SQL'],
+        'required_experience': 'от 2 лет',
+        'required_education': 'высшее',
+        'job_responsibilities': ['Разработка', 'Поддержка'],
+        'keywords': [title]
+    }
+
+
+class MockClient:
+    """
+    Детерминированный клиент без сети: ответ зависит только от задачи и запроса
+
+    Ответ соответствует формату, который ожидает код задачи: текст резюме для
+    OCR, структурированные данные, оценка кандидата (или совмещенный ответ),
+    данные вакансии. Поддерживается stream=True.
+    """
+    # Запросы выполняются в процессе: ограничения частоты не нужны
+    dispatch = False
+
+    def __init__(self, task, latency=0.0):
+        self.task = task
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def content(self, messages, json_mode):
+        prompt = '\n'.join(
+            message['content'] if isinstance(message.get('content'), str) else json.dumps(message.get('content'), ensure_ascii=False)
+            for message in messages
+        )
+        seed = int(hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8], 16)
+
+        if self.task == TASK_OCR:
+            return MOCK_RESUME_TEXT
+        if not json_mode:
+            return 'OK'
+        if self.task == TASK_STRUCTURING:
+            return json.dumps(MOCK_STRUCTURED_DATA, ensure_ascii=False)
+        if self.task == TASK_SCORING:
+            if '"structured_resume_data"' in prompt:
+                return json.dumps({'structured_resume_data': MOCK_STRUCTURED_DATA, 'analysis': _mock_analysis(seed)}, ensure_ascii=False)
+            return json.dumps(_mock_analysis(seed), ensure_ascii=False)
+        if self.task == TASK_VACANCY:
+            return json.dumps(_mock_vacancy(prompt), ensure_ascii=False)
+        return '{}'
+
+    def create(self, model=None, messages=None, stream=False, response_format=None, **kwargs):
+        json_mode = (response_format or {}).get('type') == 'json_object'
+        content = self.content(messages or [], json_mode)
+        if self.latency:
+            time.sleep(self.latency)
+
+        prompt_tokens = sum(len(str(message.get('content', ''))) for message in messages or []) // 3
+        if stream:
+            return self._stream(content, model)
+        return SimpleNamespace(
+            id=f'mock-{hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]}',
+            model=model,
+            choices=[SimpleNamespace(index=0, message=SimpleNamespace(role='assistant', content=content), finish_reason='stop')],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=len(content) // 3,
+                total_tokens=prompt_tokens + len(content) // 3
+            )
+        )
+
+    def _stream(self, content, model):
+        for position in range(0, len(content), 40):
+            yield SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=content[position:position + 40]), finish_reason=None)]
+            )
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Локальное распознавание резюме - первый уровень перед vision-моделью.
+
+    1. PDF с текстовым слоем: текст берется напрямую из PDF.
+    2. Сканы и фотографии: Tesseract (rus+eng+tuk) в пуле процессов.
+    3. В vision-модель отправляются только страницы с низкой уверенностью OCR.
+
+Пул процессов создается один раз на процесс приложения. Tesseract в каждом
+рабочем процессе ограничен одним потоком (OMP_THREAD_LIMIT=1), чтобы
+параллелизм задавался только размером пула.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+METHOD_TEXT_LAYER = 'text_layer'
+METHOD_TESSERACT = 'tesseract'
+
+# Разрешение рендеринга сканированных страниц PDF для Tesseract
+OCR_DPI = 300
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Распознаватель рабочего процесса (создается в initializer)
+_worker_recognizer = None
+
+
+@dataclass
+class PageText:
+    """Текст страницы, полученный локально"""
+    text: str
+    confidence: float
+    method: str
+
+    def is_reliable(self, min_confidence, min_length):
+        if self.method == METHOD_TEXT_LAYER:
+            return len(self.text.strip()) >= min_length
+        return self.confidence >= min_confidence and len(self.text.strip()) >= min_length
+
+
+def _init_worker(languages):
+    global _worker_recognizer
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+    from app.utils.handwriting_recognizer import HandwritingRecognizer
+    _worker_recognizer = HandwritingRecognizer(languages)
+
+
+def _recognize_page(image_data, min_confidence):
+    """
+    Распознает страницу в рабочем процессе
+
+    Если уверенность низкая, пробует несколько масштабов.
+
+    Returns:
+        tuple: (текст, уверенность)
+    """
+    from app.utils.image_processor import ImageProcessor
+
+    image = ImageProcessor.decode(image_data)
+    text, confidence = _worker_recognizer.recognize_with_confidence(image, method='adaptive')
+    if confidence < min_confidence:
+        scaled_text, scaled_confidence = _worker_recognizer.recognize_with_confidence(image, method='multi_scale')
+        if scaled_confidence > confidence:
+            text, confidence = scaled_text, scaled_confidence
+    return text, confidence
+
+
+def get_ocr_pool(workers, languages):
+    """Пул процессов OCR (один на процесс приложения)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: запуск из потоков веб-сервера без копирования их состояния через fork
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(languages,)
+            )
+        return _pool
+
+
+def shutdown_ocr_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def ocr_options():
+    """Параметры локального OCR из конфигурации приложения"""
+    from flask import current_app
+
+    config = current_app.config
+    return {
+        'enabled': config.get('OCR_LOCAL_ENABLED', True),
+        'languages': config.get('OCR_LANGUAGES', 'rus+eng+tuk'),
+        'workers': config.get('OCR_WORKERS') or max(1, (os.cpu_count() or 2) - 1),
+        'min_confidence': config.get('OCR_MIN_CONFIDENCE', 75),
+        'min_length': config.get('OCR_MIN_TEXT_LENGTH', 50),
+        'timeout': config.get('OCR_TIMEOUT', 120)
+    }
+
+
+def _render_scan(page):
+    import fitz
+
+    zoom = OCR_DPI / 72
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False).tobytes('png')
+
+
+def extract_pages(file_path, options=None):
+    """
+    Извлекает текст страниц PDF или изображения локально
+
+    Args:
+        file_path: Путь к файлу (PDF, JPEG, PNG)
+        options: Параметры (по умолчанию из конфигурации приложения)
+
+    Returns:
+        list: PageText для каждой страницы (пустой, если локальное распознавание выключено)
+    """
+    options = options or ocr_options()
+    if not options['enabled']:
+        return []
+
+    extension = os.path.splitext(file_path)[1].lower()
+    pages = {}
+    scans = {}
+
+    if extension == '.pdf':
+        import fitz
+        with fitz.open(file_path) as document:
+            for index, page in enumerate(document):
+                text = page.get_text('text', sort=True).strip()
+                if len(text) >= options['min_length']:
+                    pages[index] = PageText(text, 100.0, METHOD_TEXT_LAYER)
+                else:
+                    scans[index] = _render_scan(page)
+    elif extension in ('.jpg', '.jpeg', '.png'):
+        with open(file_path, 'rb') as file:
+            scans[0] = file.read()
+    else:
+        return []
+
+    if scans:
+        pool = get_ocr_pool(options['workers'], options['languages'])
+        futures = {
+            index: pool.submit(_recognize_page, data, options['min_confidence'])
+            for index, data in scans.items()
+        }
+        for index, future in futures.items():
+            try:
+                text, confidence = future.result(timeout=options['timeout'])
+                pages[index] = PageText(text, confidence, METHOD_TESSERACT)
+            except Exception as e:
+                logger.error(f"Ошибка локального OCR страницы {index + 1} файла {file_path}: {str(e)}")
+                pages[index] = PageText('', 0.0, METHOD_TESSERACT)
+
+    result = [pages[index] for index in sorted(pages)]
+    logger.info(
+        f"Локальное распознавание {os.path.basename(file_path)}: "
+        + ", ".join(f"стр. {i + 1} {p.method} {p.confidence:.0f}%" for i, p in enumerate(result))
+    )
+    return result
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Миниатюры и превью страниц резюме.
+
+После сохранения резюме фоновый обработчик рендерит миниатюру первой страницы
+и превью первых страниц в низком разрешении (JPEG). Превью сохраняются в том же
+хранилище рядом с оригиналом:
+
+    ab/cd/<sha256>.pdf
+    ab/cd/<sha256>.thumb.jpg
+    ab/cd/<sha256>.page1.jpg, ab/cd/<sha256>.page2.jpg, ...
+
+Карточки кандидатов и страница кандидата показывают превью по несколько
+десятков килобайт вместо загрузки всего файла.
+
+Число построенных превью страниц сохраняется в Candidate.resume_preview_pages
+всех кандидатов с этим файлом, поэтому страницы не проверяют наличие превью в
+хранилище (на S3 - запрос на каждую страницу). Для старых файлов без превью
+(resume_preview_pages IS NULL) построение ставится в фоновую очередь
+(queue_previews), а запрос получает превью при следующем показе.
+"""
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import sqlalchemy as sa
+from flask import current_app
+from app.utils.storage import resolve_reference
+
+PDF_EXTENSIONS = {'.pdf'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+THUMBNAIL = 'thumb'
+
+_executor = None
+_queued = set()
+_queued_lock = threading.Lock()
+
+
+def is_previewable(path):
+    """Можно ли построить превью для файла (PDF или изображение)"""
+    if not path:
+        return False
+    return os.path.splitext(path)[1].lower() in PDF_EXTENSIONS | IMAGE_EXTENSIONS
+
+
+def preview_key(key, name):
+    """Ключ превью рядом с оригиналом: <ключ без расширения>.<name>.jpg"""
+    return f"{os.path.splitext(key)[0]}.{name}.jpg"
+
+
+def page_name(page_number):
+    return f"page{page_number}"
+
+
+def _to_jpeg(image, width):
+    """Уменьшает изображение Pillow до ширины width и кодирует в JPEG"""
+    from PIL import Image
+
+    image = image.convert('RGB')
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=current_app.config.get('PREVIEW_JPEG_QUALITY', 70), optimize=True)
+    return buffer.getvalue()
+
+
+def _render_pdf(path, thumb_width, page_width, max_pages):
+    import fitz
+    from PIL import Image
+
+    rendered = {}
+    with fitz.open(path) as document:
+        for page_index in range(min(len(document), max_pages)):
+            page = document[page_index]
+            # Рендерим сразу в нужном масштабе, а не в полном разрешении
+            zoom = page_width / page.rect.width if page.rect.width else 1.0
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            image = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+
+            rendered[page_name(page_index + 1)] = _to_jpeg(image, page_width)
+            if page_index == 0:
+                rendered[THUMBNAIL] = _to_jpeg(image, thumb_width)
+    return rendered
+
+
+def _render_image(path, thumb_width, page_width):
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        # Для JPEG декодируем сразу в уменьшенном масштабе
+        image.draft('RGB', (page_width, page_width))
+        image = ImageOps.exif_transpose(image)
+        return {
+            page_name(1): _to_jpeg(image, page_width),
+            THUMBNAIL: _to_jpeg(image, thumb_width)
+        }
+
+
+def render_previews(reference, force=False):
+    """
+    Рендерит миниатюру и превью страниц файла и сохраняет их рядом с оригиналом
+
+    Args:
+        reference: Ссылка на файл из БД (путь или s3://...)
+        force: Перерисовать, даже если миниатюра уже есть
+
+    Число страниц сохраняется в Candidate.resume_preview_pages, в том числе
+    для уже построенных превью.
+
+    Returns:
+        int: Количество сохраненных превью страниц (0, если превью не нужны)
+    """
+    if not is_previewable(reference):
+        return 0
+
+    storage, key = resolve_reference(reference)
+    if storage is None:
+        current_app.logger.warning(f"Файл для превью не найден: {reference}")
+        save_page_count(reference, 0)
+        return 0
+
+    if not force and storage.exists(preview_key(key, THUMBNAIL)):
+        save_page_count(reference, _count_pages(storage, key))
+        return 0
+
+    config = current_app.config
+    thumb_width = config.get('PREVIEW_THUMB_WIDTH', 240)
+    page_width = config.get('PREVIEW_PAGE_WIDTH', 800)
+
+    with storage.local_file(key) as path:
+        if os.path.splitext(key)[1].lower() in PDF_EXTENSIONS:
+            rendered = _render_pdf(path, thumb_width, page_width, config.get('PREVIEW_MAX_PAGES', 5))
+        else:
+            rendered = _render_image(path, thumb_width, page_width)
+
+    # Миниатюра пишется последней: по ней определяется, что превью готовы
+    thumbnail = rendered.pop(THUMBNAIL, None)
+    for name, data in rendered.items():
+        storage.put(preview_key(key, name), data)
+    if thumbnail is not None:
+        storage.put(preview_key(key, THUMBNAIL), thumbnail)
+
+    save_page_count(reference, len(rendered))
+    current_app.logger.info(f"Построены превью файла {key}: страниц {len(rendered)}")
+    return len(rendered)
+
+
+def _count_pages(storage, key):
+    """Число превью страниц в хранилище (только для фонового построения)"""
+    pages = 0
+    while pages < current_app.config.get('PREVIEW_MAX_PAGES', 5) and storage.exists(preview_key(key, page_name(pages + 1))):
+        pages += 1
+    return pages
+
+
+def save_page_count(reference, pages):
+    """Сохраняет число превью страниц у всех кандидатов с файлом reference"""
+    from app import db
+    from app.models import Candidate
+
+    db.session.execute(
+        sa.update(Candidate)
+        .where(Candidate.resume_path == reference)
+        # updated_at не меняется: данные кандидата те же
+        .values(resume_preview_pages=pages, updated_at=Candidate.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _render_in_worker(app, reference):
+    from app import db
+
+    with app.app_context():
+        try:
+            render_previews(reference)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Ошибка при построении превью {reference}: {str(e)}", exc_info=True)
+            # Без превью, чтобы каждый показ не ставил файл в очередь заново;
+            # перерисовать можно командой flask render-previews --force
+            try:
+                save_page_count(reference, 0)
+            except Exception:
+                db.session.rollback()
+        finally:
+            db.session.remove()
+            with _queued_lock:
+                _queued.discard(reference)
+
+
+def queue_previews(reference):
+    """
+    Ставит построение превью файла в фоновую очередь процесса
+
+    Повторные вызовы для файла, который уже в очереди, ничего не делают.
+
+    Returns:
+        bool: True, если построение поставлено в очередь
+    """
+    global _executor
+    if not is_previewable(reference):
+        return False
+
+    with _queued_lock:
+        if reference in _queued:
+            return False
+        _queued.add(reference)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('PREVIEW_WORKERS', 2),
+                thread_name_prefix='previews'
+            )
+    _executor.submit(_render_in_worker, current_app._get_current_object(), reference)
+    return True
+
+
+def ensure_preview(storage, key, name):
+    """
+    Ключ превью name для файла key; если превью еще не построены, ставит их в очередь
+
+    Returns:
+        str или None: Ключ превью или None, если превью пока нет
+    """
+    target = preview_key(key, name)
+    if storage.exists(target):
+        return target
+
+    if is_previewable(key) and not storage.exists(preview_key(key, THUMBNAIL)):
+        queue_previews(storage.reference(key))
+    return None
+
+
+def preview_pages(candidate):
+    """
+    Номера страниц с превью по Candidate.resume_preview_pages (без обращения к хранилищу)
+
+    Для резюме, превью которого еще не строились, построение ставится в очередь.
+    """
+    if not is_previewable(candidate.resume_path):
+        return []
+    if candidate.resume_preview_pages is None:
+        queue_previews(candidate.resume_path)
+        return []
+    return list(range(1, candidate.resume_preview_pages + 1))
+
+
+def thumbnail_ready(candidate):
+    """
+    Есть ли миниатюра резюме кандидата (строка списка или сущность)
+
+    Для резюме, превью которого еще не строились, построение ставится в очередь.
+    """
+    return bool(preview_pages(candidate))
+
+
+def delete_previews(storage, key):
+    """Удаляет миниатюру и превью страниц файла key"""
+    storage.delete(preview_key(key, THUMBNAIL))
+    for page_number in range(1, current_app.config.get('PREVIEW_MAX_PAGES', 5) + 1):
+        storage.delete(preview_key(key, page_name(page_number)))
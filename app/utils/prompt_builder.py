@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Сборка запросов к модели с учетом бюджета токенов.
+
+Запрос состоит из разделов с приоритетами. Токены считаются локально
+(tiktoken, кодировка модели). Если все разделы не помещаются в бюджет,
+обязательные разделы включаются целиком, остальные получают сначала
+гарантированный минимум (min_tokens) в порядке приоритета, затем остаток
+бюджета - тоже по приоритету. Не поместившаяся часть раздела обрезается по
+границе токена (с начала, с конца или из середины), раздел без бюджета
+пропускается.
+
+Структурированные данные передаются компактным JSON: без отступов и
+пустых значений.
+
+Если файл кодировки tiktoken недоступен (сервер без доступа в интернет и без
+TIKTOKEN_CACHE_DIR), используется приближенный подсчет по числу символов.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'gpt-4o'
+FALLBACK_ENCODING = 'o200k_base'
+
+# Способ обрезки раздела
+TRUNCATE_END = 'end'        # сохраняется начало
+TRUNCATE_START = 'start'    # сохраняется конец
+TRUNCATE_MIDDLE = 'middle'  # сохраняются начало и конец (2:1)
+
+TRUNCATION_MARK = '\n[...сокращено...]\n'
+
+# Разделы короче после обрезки не включаются
+MIN_SECTION_TOKENS = 16
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+
+class _ApproximateEncoding:
+    """Приближенная кодировка: ~3 символа на токен (кириллица и латиница в среднем)"""
+    name = 'approximate'
+    CHARS_PER_TOKEN = 3
+
+    def encode(self, text):
+        step = self.CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    def decode(self, tokens):
+        return ''.join(tokens)
+
+
+def get_encoding(model=DEFAULT_MODEL):
+    """Кодировка tiktoken для модели (одна на процесс)"""
+    encoding = _encodings.get(model)
+    if encoding is not None:
+        return encoding
+
+    with _encodings_lock:
+        encoding = _encodings.get(model)
+        if encoding is None:
+            try:
+                import tiktoken
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+            except Exception as e:
+                logger.warning(f"Кодировка tiktoken для {model} недоступна, токены считаются приближенно: {str(e)}")
+                encoding = _ApproximateEncoding()
+            _encodings[model] = encoding
+    return encoding
+
+
+def count_tokens(text, model=DEFAULT_MODEL):
+    """Количество токенов текста"""
+    if not text:
+        return 0
+    return len(get_encoding(model).encode(text))
+
+
+def _is_empty(value):
+    return value is None or value == '' or value == [] or value == {}
+
+
+def _compact(value):
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            item = _compact(item)
+            if not _is_empty(item):
+                result[key] = item
+        return result
+    if isinstance(value, list):
+        return [item for item in (_compact(item) for item in value) if not _is_empty(item)]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def compact_json(data, drop_keys=()):
+    """
+    JSON без отступов, пробелов-разделителей и пустых значений
+
+    Args:
+        data: Данные
+        drop_keys: Ключи верхнего уровня, которые не передаются
+    """
+    if isinstance(data, dict) and drop_keys:
+        data = {key: value for key, value in data.items() if key not in drop_keys}
+    return json.dumps(_compact(data), ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def truncate_tokens(text, max_tokens, model=DEFAULT_MODEL, mode=TRUNCATE_END):
+    """
+    Обрезает текст до max_tokens по границе токена
+
+    Returns:
+        str: Текст (с пометкой о сокращении, если он обрезан)
+    """
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+
+    keep = max(0, max_tokens - count_tokens(TRUNCATION_MARK, model))
+    if mode == TRUNCATE_START:
+        return TRUNCATION_MARK.lstrip() + encoding.decode(tokens[len(tokens) - keep:])
+    if mode == TRUNCATE_MIDDLE:
+        head = keep * 2 // 3
+        return encoding.decode(tokens[:head]) + TRUNCATION_MARK + encoding.decode(tokens[len(tokens) - (keep - head):])
+    return encoding.decode(tokens[:keep]) + TRUNCATION_MARK.rstrip()
+
+
+@dataclass
+class Section:
+    """Раздел запроса"""
+    name: str
+    text: str
+    priority: int = 1  # меньше - важнее
+    required: bool = False
+    min_tokens: int = 0  # гарантированный объем, если раздел не обязательный
+    truncate: str = TRUNCATE_END
+    title: str = None  # заголовок раздела в запросе
+    tokens: int = 0
+    used_tokens: int = 0
+
+
+@dataclass
+class BuiltPrompt:
+    """Собранный запрос и статистика по разделам"""
+    text: str
+    tokens: int
+    budget: int
+    sections: dict = field(default_factory=dict)  # {имя: (токенов исходно, токенов в запросе)}
+
+    @property
+    def truncated(self):
+        return [name for name, (total, used) in self.sections.items() if used < total]
+
+
+class PromptBuilder:
+    """
+    Сборщик запроса с бюджетом токенов
+
+    Пример:
+        builder = PromptBuilder(budget=6000)
+        builder.add('vacancy', vacancy_text, title='ВАКАНСИЯ', required=True)
+        builder.add('resume', resume_text, title='РЕЗЮМЕ', priority=1, min_tokens=1500)
+        prompt = builder.build()
+    """
+
+    def __init__(self, budget, model=DEFAULT_MODEL, separator='\n\n'):
+        self.budget = budget
+        self.model = model
+        self.separator = separator
+        self.sections = []
+
+    def add(self, name, text, priority=1, required=False, min_tokens=0, truncate=TRUNCATE_END, title=None):
+        """Добавляет раздел; пустые разделы пропускаются"""
+        if text is None or not str(text).strip():
+            return self
+        self.sections.append(Section(
+            name=name,
+            text=str(text).strip(),
+            priority=priority,
+            required=required,
+            min_tokens=min_tokens,
+            truncate=truncate,
+            title=title
+        ))
+        return self
+
+    def _render(self, section, text):
+        return f"{section.title}:\n{text}" if section.title else text
+
+    def _allocate(self):
+        """Распределяет бюджет между разделами (Section.used_tokens)"""
+        separator_tokens = count_tokens(self.separator, self.model)
+        for section in self.sections:
+            section.tokens = count_tokens(self._render(section, section.text), self.model) + separator_tokens
+
+        if sum(section.tokens for section in self.sections) <= self.budget:
+            for section in self.sections:
+                section.used_tokens = section.tokens
+            return
+
+        remaining = self.budget
+        for section in self.sections:
+            section.used_tokens = section.tokens if section.required else 0
+            remaining -= section.used_tokens
+
+        optional = sorted((s for s in self.sections if not s.required), key=lambda s: s.priority)
+        # Сначала гарантированный минимум, затем остаток бюджета - по приоритету
+        for section in optional:
+            grant = min(section.tokens, section.min_tokens, max(0, remaining))
+            section.used_tokens = grant
+            remaining -= grant
+        for section in optional:
+            grant = min(section.tokens - section.used_tokens, max(0, remaining))
+            section.used_tokens += grant
+            remaining -= grant
+
+    def build(self):
+        """
+        Собирает запрос
+
+        Returns:
+            BuiltPrompt: Текст запроса, его токены и статистика разделов
+        """
+        self._allocate()
+        parts = []
+        stats = {}
+        for section in self.sections:
+            if section.used_tokens >= section.tokens:
+                parts.append(self._render(section, section.text))
+                stats[section.name] = (section.tokens, section.tokens)
+                continue
+
+            title_tokens = count_tokens(self._render(section, ''), self.model) if section.title else 0
+            available = section.used_tokens - title_tokens - count_tokens(self.separator, self.model)
+            if available < MIN_SECTION_TOKENS:
+                stats[section.name] = (section.tokens, 0)
+                continue
+            parts.append(self._render(section, truncate_tokens(section.text, available, self.model, section.truncate)))
+            stats[section.name] = (section.tokens, section.used_tokens)
+
+        text = self.separator.join(parts)
+        tokens = count_tokens(text, self.model)
+        if tokens > self.budget:
+            logger.warning(f"Обязательные разделы запроса превышают бюджет: {tokens} > {self.budget} токенов")
+        return BuiltPrompt(text=text, tokens=tokens, budget=self.budget, sections=stats)
+
+
+# Результаты локальной обработки резюме (resume_nlp, keyword_matcher) модели не нужны
+LOCAL_STRUCTURED_KEYS = ('nlp', 'keywords')
+
+EDUCATION_TRANSLATIONS = {
+    'secondary': 'Среднее',
+    'vocational': 'Среднее специальное',
+    'higher': 'Высшее',
+    'phd': 'Ученая степень'
+}
+
+
+def _answers_text(answers, questions):
+    """Вопросы и ответы анкеты одним текстом"""
+    if not answers or not questions:
+        return ''
+    question_texts = {str(q['id']): q['text'] for q in questions}
+    return '\n\n'.join(
+        f"Вопрос: {question_texts.get(question_id, f'Вопрос {question_id}')}\nОтвет: {answer}"
+        for question_id, answer in answers.items()
+    )
+
+
+def build_analysis_prompt(candidate, budget, model=DEFAULT_MODEL, instructions='', vacancy=None):
+    """
+    Запрос на оценку кандидата: вакансия, анкета, резюме и структурированные данные
+
+    Заголовки вакансии, данные анкеты и инструкции включаются всегда. Остальное
+    при нехватке бюджета сокращается в порядке приоритета: описание вакансии,
+    профессиональные ответы и резюме важнее ответов о soft skills, а те -
+    структурированных данных и сопроводительного письма. У резюме сохраняются
+    начало и конец (последние места работы и контакты обычно в начале,
+    образование и навыки - в конце).
+
+    При оценке кандидата для другой вакансии (подбор из базы) ответы анкеты
+    не включаются: они относятся к вопросам вакансии, на которую он откликался.
+
+    Args:
+        candidate: Кандидат (с загруженной вакансией)
+        budget: Бюджет запроса в токенах
+        model: Модель, для которой считаются токены
+        instructions: Инструкции в конце запроса (включаются всегда)
+        vacancy: Вакансия для оценки (по умолчанию - вакансия отклика)
+
+    Returns:
+        BuiltPrompt: Запрос и статистика разделов
+    """
+    own_vacancy = vacancy is None or vacancy.id == candidate.vacancy_id
+    vacancy = candidate.vacancy if vacancy is None else vacancy
+    answers = candidate.base_answers or {}
+
+    location = answers.get('location', 'Не указано')
+    if location and location != 'Не указано':
+        location = f"{location} (указан город проживания кандидата)"
+    education = answers.get('education', 'Не указано')
+
+    vacancy_header = [
+        f"Название: {vacancy.title}",
+        f"Тип занятости: {vacancy.c_employment_type.name if vacancy.c_employment_type else 'Не указано'}"
+    ]
+    vacancy_details = [
+        f"Описание задач: {vacancy.description_tasks or 'Не указано'}",
+        f"Условия работы: {vacancy.description_conditions or 'Не указано'}",
+        f"Требования к кандидату: {vacancy.ideal_profile or 'Не указано'}",
+        f"Корпоративные ценности: {vacancy.company_values or 'Не указано'}"
+    ]
+    candidate_lines = [
+        f"ФИО: {candidate.full_name}",
+        f"Город: {location}",
+        f"Опыт работы: {answers.get('experience_years', 'Не указано')}",
+        f"Образование: {EDUCATION_TRANSLATIONS.get(education, education)}",
+        f"Зарплатные ожидания: {answers.get('desired_salary', 'Не указано')}",
+        f"Пол: {answers.get('gender', 'Не указано')}"
+    ]
+    previous_applications = getattr(candidate, 'previous_applications', None)
+    if previous_applications:
+        candidate_lines.append(f"Кандидат ранее подавался на позиции: {previous_applications}")
+    if not own_vacancy and candidate.vacancy is not None:
+        candidate_lines.append(f"Кандидат откликался на другую вакансию: {candidate.vacancy.title}")
+
+    structured_data = getattr(candidate, 'structured_resume_data', None) or {}
+    structured_json = compact_json(structured_data, drop_keys=LOCAL_STRUCTURED_KEYS)
+
+    builder = PromptBuilder(budget, model)
+    builder.add('vacancy', '\n'.join(vacancy_header), title='ВАКАНСИЯ', required=True)
+    builder.add('vacancy_details', '\n'.join(vacancy_details), priority=1, min_tokens=600)
+    builder.add('candidate', '\n'.join(candidate_lines), title='КАНДИДАТ', required=True)
+    if own_vacancy:
+        builder.add(
+            'professional_answers',
+            _answers_text(candidate.vacancy_answers, vacancy.questions_json),
+            title='Профессиональные вопросы и ответы (Очень важно учитывать эти ответы при оценке)',
+            priority=1,
+            min_tokens=600
+        )
+        builder.add(
+            'soft_answers',
+            _answers_text(candidate.soft_answers, vacancy.soft_questions_json),
+            title='Вопросы о soft skills и ответы (Очень важно учитывать эти ответы при оценке)',
+            priority=2,
+            min_tokens=300
+        )
+    builder.add(
+        'resume',
+        candidate.resume_text or 'Не предоставлено',
+        title='РЕЗЮМЕ КАНДИДАТА',
+        priority=1,
+        min_tokens=1500,
+        truncate=TRUNCATE_MIDDLE
+    )
+    builder.add('cover_letter', candidate.cover_letter, title='СОПРОВОДИТЕЛЬНОЕ ПИСЬМО', priority=3, min_tokens=200)
+    builder.add(
+        'structured_data',
+        structured_json if structured_json != '{}' else 'Нет структурированных данных',
+        title='СТРУКТУРИРОВАННЫЕ ДАННЫЕ ИЗ РЕЗЮМЕ',
+        priority=3
+    )
+    builder.add('instructions', instructions, required=True)
+    return builder.build()
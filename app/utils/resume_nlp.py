@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+NLP-обработка резюме (spaCy): язык документа и именованные сущности.
+
+Модели загружаются один раз на процесс и хранятся в _models. При NLP_PRELOAD
+модели загружаются в create_app до fork (gunicorn --preload), после чего
+объекты переводятся в постоянное поколение сборщика мусора (gc.freeze):
+worker-процессы используют страницы памяти моделей совместно, без копирования.
+
+Из резюме извлекаются организации, даты и места; результат сохраняется в
+structured_resume_data['nlp'].
+"""
+
+import gc
+import re
+import threading
+from datetime import datetime, timezone
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db
+from app.models import Candidate
+
+DEFAULT_MODELS = {
+    'ru': 'ru_core_news_lg',
+    'en': 'en_core_web_lg',
+}
+
+# Для NER нужны только токенизатор, tok2vec и ner
+EXCLUDED_PIPES = ['parser', 'lemmatizer', 'attribute_ruler', 'morphologizer', 'tagger', 'senter']
+
+# Метки сущностей: у русской модели нет DATE, даты дополняются регулярным выражением
+ENTITY_LABELS = {
+    'organizations': {'ORG'},
+    'locations': {'LOC', 'GPE', 'FAC'},
+    'dates': {'DATE'},
+}
+
+# Турецко-туркменские буквы латиницы, которых нет в английском
+_TURKMEN_CHARS = set('äçňöşüýžÄÇŇÖŞÜÝŽ')
+_CYRILLIC_RE = re.compile(r'[а-яёА-ЯЁ]')
+_LATIN_RE = re.compile(r'[a-zA-Z]')
+
+_MONTHS = (
+    r'январ[ья]|феврал[ья]|март[а]?|апрел[ья]|ма[йя]|июн[ья]|июл[ья]|август[а]?|'
+    r'сентябр[ья]|октябр[ья]|ноябр[ья]|декабр[ья]|'
+    r'jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|'
+    r'sep(?:tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?'
+)
+# Год не должен быть частью длинного числа (телефон, ИНН, номер договора)
+_YEAR = r'(?<!\d)(?:\d{1,2}[./])?(?:19|20)\d{2}(?!\d)'
+_DATE_RE = re.compile(
+    rf'(?:(?:{_MONTHS})\.?\s+)?{_YEAR}'
+    rf'(?:\s*[-–—]\s*(?:(?:{_MONTHS})\.?\s+)?(?:{_YEAR}|н\.\s?в\.|настоящее время|present|now))?',
+    re.IGNORECASE
+)
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def detect_language(text):
+    """
+    Язык резюме по алфавиту: ru (кириллица), tk (латиница с туркменскими буквами), en
+
+    Returns:
+        str: Код языка
+    """
+    sample = text[:5000]
+    cyrillic = len(_CYRILLIC_RE.findall(sample))
+    latin = len(_LATIN_RE.findall(sample))
+    if cyrillic >= latin:
+        return 'ru'
+    if sum(1 for char in sample if char in _TURKMEN_CHARS) >= 3:
+        return 'tk'
+    return 'en'
+
+
+def _model_settings(config):
+    models = dict(DEFAULT_MODELS)
+    models.update(config.get('NLP_MODELS') or {})
+    return models, config.get('NLP_FALLBACK_LANGUAGE', 'en')
+
+
+def _load(model_name):
+    import spacy
+    return spacy.load(model_name, exclude=EXCLUDED_PIPES)
+
+
+def get_nlp(language, config=None):
+    """
+    Модель spaCy для языка (загружается один раз на процесс)
+
+    Для языков без модели (например, туркменского) используется модель
+    NLP_FALLBACK_LANGUAGE.
+
+    Returns:
+        tuple: (spacy.Language, код языка модели)
+    """
+    models, fallback = _model_settings(config or current_app.config)
+    if language not in models:
+        language = fallback
+    model_name = models[language]
+
+    nlp = _models.get(model_name)
+    if nlp is None:
+        with _models_lock:
+            nlp = _models.get(model_name)
+            if nlp is None:
+                nlp = _load(model_name)
+                _models[model_name] = nlp
+    return nlp, language
+
+
+def preload_models(config):
+    """
+    Загружает все модели заранее (до fork worker-процессов)
+
+    gc.freeze() переносит загруженные объекты в постоянное поколение: сборщик
+    мусора в дочерних процессах не трогает их заголовки, и страницы памяти
+    остаются общими (copy-on-write).
+    """
+    models, _ = _model_settings(config)
+    for language in models:
+        get_nlp(language, config)
+    gc.freeze()
+    return list(_models)
+
+
+def extract_entities(doc):
+    """
+    Организации, места и даты из обработанного документа
+
+    Returns:
+        dict: {'organizations': [...], 'locations': [...], 'dates': [...]}
+    """
+    entities = {key: [] for key in ENTITY_LABELS}
+    seen = {key: set() for key in ENTITY_LABELS}
+
+    def add(key, value):
+        value = ' '.join(value.split()).strip(' ,.;:')
+        if len(value) < 2 or value.lower() in seen[key]:
+            return
+        seen[key].add(value.lower())
+        entities[key].append(value)
+
+    for ent in doc.ents:
+        for key, labels in ENTITY_LABELS.items():
+            if ent.label_ in labels:
+                add(key, ent.text)
+
+    for match in _DATE_RE.finditer(doc.text):
+        add('dates', match.group(0))
+
+    return entities
+
+
+def _result(doc, language, model_language):
+    return {
+        'language': language,
+        'model': model_language,
+        **extract_entities(doc),
+        'processed_at': datetime.now(timezone.utc).isoformat()
+    }
+
+
+def analyze_resumes(items, batch_size=None, n_process=None):
+    """
+    Пакетная обработка резюме
+
+    Тексты группируются по языку, каждая группа обрабатывается nlp.pipe.
+    При n_process > 1 spaCy запускает дочерние процессы; модель передается
+    им через fork без повторной загрузки.
+
+    Args:
+        items: Список (candidate_id, text)
+        batch_size: Размер пакета nlp.pipe (по умолчанию NLP_BATCH_SIZE)
+        n_process: Число процессов (по умолчанию NLP_PROCESSES)
+
+    Returns:
+        dict: {candidate_id: результат для structured_resume_data['nlp']}
+    """
+    config = current_app.config
+    batch_size = batch_size or config.get('NLP_BATCH_SIZE', 32)
+    n_process = n_process or config.get('NLP_PROCESSES', 1)
+    max_length = config.get('NLP_MAX_TEXT_LENGTH', 100000)
+
+    groups = {}
+    for candidate_id, text in items:
+        if text and text.strip():
+            groups.setdefault(detect_language(text), []).append((candidate_id, text[:max_length]))
+
+    results = {}
+    for language, group in groups.items():
+        nlp, model_language = get_nlp(language, config)
+        docs = nlp.pipe(
+            (text for _, text in group),
+            batch_size=batch_size,
+            n_process=n_process if len(group) > batch_size else 1
+        )
+        for (candidate_id, _), doc in zip(group, docs):
+            results[candidate_id] = _result(doc, language, model_language)
+    return results
+
+
+def _store(candidate, result):
+    # Новый словарь, чтобы SQLAlchemy увидел изменение JSON-поля
+    data = dict(candidate.structured_resume_data or {})
+    data['nlp'] = result
+    candidate.structured_resume_data = data
+
+
+def annotate_candidate(candidate, commit=True):
+    """Обрабатывает резюме одного кандидата и сохраняет сущности"""
+    if not candidate.resume_text:
+        return None
+
+    language = detect_language(candidate.resume_text)
+    nlp, model_language = get_nlp(language)
+    doc = nlp(candidate.resume_text[:current_app.config.get('NLP_MAX_TEXT_LENGTH', 100000)])
+    result = _result(doc, language, model_language)
+    _store(candidate, result)
+    if commit:
+        db.session.commit()
+    return result
+
+
+def backfill_candidates(only_missing=True, chunk_size=500, n_process=None):
+    """
+    Пакетная обработка резюме всех кандидатов
+
+    Args:
+        only_missing: Только кандидаты без structured_resume_data['nlp']
+        chunk_size: Кандидатов за одну транзакцию
+        n_process: Число процессов nlp.pipe
+
+    Returns:
+        int: Количество обработанных кандидатов
+    """
+    last_id = 0
+    processed = 0
+    while True:
+        candidates = Candidate.query.filter(
+            Candidate.id > last_id,
+            Candidate.resume_text.is_not(None)
+        ).options(so.undefer_group('resume')).order_by(Candidate.id).limit(chunk_size).all()
+        if not candidates:
+            break
+        last_id = candidates[-1].id
+
+        if only_missing:
+            candidates = [c for c in candidates if not (c.structured_resume_data or {}).get('nlp')]
+
+        results = analyze_resumes([(c.id, c.resume_text) for c in candidates], n_process=n_process)
+        for candidate in candidates:
+            if candidate.id in results:
+                _store(candidate, results[candidate.id])
+        db.session.commit()
+        processed += len(results)
+        current_app.logger.info(f"NLP-обработка резюме: обработано {processed}")
+
+    return processed
@@ -0,0 +1,449 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Нормализованная проекция структурированных данных резюме.
+
+structured_resume_data, ai_data_consistency и ai_answer_quality хранятся как
+JSON без схемы: фильтр «опыт от 3 лет, английский не ниже B2, высшее
+образование» приходится выполнять в Python после загрузки всех кандидатов.
+Модуль раскладывает эти данные в таблицы с индексами:
+- candidate_experience (CandidateExperience) - места работы с годами и
+  длительностью;
+- candidate_education (CandidateEducation) - образование с уровнем по
+  справочнику c_education;
+- candidate_languages (CandidateLanguage) - языки с уровнем A1-C2/native;
+- типизированные колонки Candidate: total_experience_years, education_level,
+  ai_trust_score, ai_generation_probability.
+
+Проекция пересчитывается целиком при сохранении разобранного резюме и
+результатов AI-анализа; JSON-поля остаются источником данных. Разбор
+(project_resume) не обращается к базе и используется также миграцией,
+заполняющей таблицы для существующих кандидатов.
+"""
+
+import re
+from datetime import date
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db
+from app.models import Candidate, CandidateExperience, CandidateEducation, CandidateLanguage
+
+# Уровни образования - id справочника c_education (seed_data.create_c_education)
+EDUCATION_SECONDARY = 1
+EDUCATION_VOCATIONAL = 2
+EDUCATION_HIGHER = 3
+EDUCATION_MASTER = 4
+EDUCATION_POSTGRADUATE = 5
+EDUCATION_DOCTORATE = 6
+
+# Признаки уровня образования, от высшего к низшему
+EDUCATION_MARKERS = (
+    (EDUCATION_DOCTORATE, ('кандидат наук', 'доктор наук', 'phd', 'ph.d', 'ученая степень')),
+    (EDUCATION_POSTGRADUATE, ('аспирант', 'postgraduate', 'докторантур')),
+    (EDUCATION_MASTER, ('магист', 'master', 'mba')),
+    (EDUCATION_HIGHER, ('бакалав', 'bachelor', 'специалист', 'высшее', 'университет', 'институт', 'академи',
+                        'university', 'institute', 'вуз')),
+    (EDUCATION_VOCATIONAL, ('среднее специальное', 'среднее профессиональное', 'колледж', 'техникум', 'училищ',
+                            'college')),
+    (EDUCATION_SECONDARY, ('школ', 'гимнази', 'лицей', 'среднее', 'school')),
+)
+
+# Уровни владения языком; описания проверяются по порядку
+LANGUAGE_LEVEL_MARKERS = (
+    ('native', ('native', 'родн', 'носитель', 'mother tongue')),
+    ('C2', ('proficien', 'в совершенстве')),
+    ('C1', ('fluent', 'свободн', 'advanced', 'продвинут')),
+    ('B2', ('upper', 'выше среднего')),
+    ('A2', ('pre-intermediate', 'pre intermediate', 'ниже среднего', 'elementary', 'базов', 'со словарем')),
+    ('B1', ('intermediate', 'средн', 'разговорн')),
+    ('A1', ('beginner', 'начальн', 'basic')),
+)
+
+# Названия языков: начало слова -> нормализованное название
+LANGUAGE_NAMES = (
+    (('англ', 'english'), 'английский'),
+    (('нем', 'german', 'deutsch'), 'немецкий'),
+    (('франц', 'french'), 'французский'),
+    (('испан', 'spanish'), 'испанский'),
+    (('итал', 'italian'), 'итальянский'),
+    (('кита', 'chinese', 'mandarin'), 'китайский'),
+    (('япон', 'japanese'), 'японский'),
+    (('корей', 'korean'), 'корейский'),
+    (('араб', 'arabic'), 'арабский'),
+    (('турец', 'turkish'), 'турецкий'),
+    (('португ', 'portuguese'), 'португальский'),
+    (('польск', 'polish'), 'польский'),
+    (('укр', 'ukrainian'), 'украинский'),
+    (('белорус', 'belarusian'), 'белорусский'),
+    (('казах', 'kazakh'), 'казахский'),
+    (('узбек', 'uzbek'), 'узбекский'),
+    (('рус', 'russian'), 'русский'),
+)
+
+_YEAR_RE = re.compile(r'\b(19\d{2}|20\d{2})\b')
+_MONTH_YEAR_RE = re.compile(r'\b(\d{1,2})[./-](19\d{2}|20\d{2})\b')
+_YEAR_MONTH_RE = re.compile(r'\b(19\d{2}|20\d{2})[./-](\d{1,2})\b')
+_CURRENT_RE = re.compile(r'настоящ|н\.\s*в\.|текущ|сейчас|present|current|\bnow\b', re.IGNORECASE)
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)?')
+_CEFR_RE = re.compile(r'\b([abc][12])\b')
+_LANGUAGE_SPLIT_RE = re.compile(r'\s*[-–—:(,/]\s*')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Кириллические А, В, С в уровнях вида «В2»
+_CEFR_LETTERS = str.maketrans('авс', 'abc')
+
+
+def _text(value):
+    """Непустая строка без лишних пробелов или None"""
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    value = _WHITESPACE_RE.sub(' ', str(value)).strip()
+    return value or None
+
+
+def _number(value):
+    """Первое число в значении: 5, "5.5", "около 5 лет" -> float"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.search(str(value or ''))
+    return float(match.group().replace(',', '.')) if match else None
+
+
+def _percent(value):
+    number = _number(value)
+    if number is None:
+        return None
+    return int(round(min(max(number, 0), 100)))
+
+
+def parse_date(value):
+    """
+    Год и месяц из даты резюме
+
+    Returns:
+        tuple: (год, месяц или None, признак «по настоящее время»)
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return (value, None, False) if 1900 <= value <= 2100 else (None, None, False)
+    text = _text(value)
+    if not text:
+        return None, None, False
+    if _CURRENT_RE.search(text):
+        return None, None, True
+    match = _MONTH_YEAR_RE.search(text)
+    if match and 1 <= int(match.group(1)) <= 12:
+        return int(match.group(2)), int(match.group(1)), False
+    match = _YEAR_MONTH_RE.search(text)
+    if match and 1 <= int(match.group(2)) <= 12:
+        return int(match.group(1)), int(match.group(2)), False
+    match = _YEAR_RE.search(text)
+    return (int(match.group(1)), None, False) if match else (None, None, False)
+
+
+def _period(item):
+    """Начало и конец периода элемента резюме: ((год, месяц), (год, месяц), текущий)"""
+    start = parse_date(item.get('year_start') or item.get('start_date'))
+    end = parse_date(item.get('year_end') or item.get('end_date'))
+
+    # Период одной строкой: "2018 - 2021", "03.2019 - по настоящее время"
+    period = _text(item.get('period') or item.get('dates'))
+    if start[0] is None and period:
+        parts = re.split(r'\s+[-–—]\s+|\s*[–—]\s*|\s+по\s+', period, maxsplit=1)
+        start = parse_date(parts[0])
+        if len(parts) > 1 and end[0] is None and not end[2]:
+            end = parse_date(parts[1])
+
+    return start[:2], end[:2], end[2]
+
+
+def _months(start, end):
+    if start[0] is None or end[0] is None:
+        return None
+    months = (end[0] * 12 + (end[1] or 1)) - (start[0] * 12 + (start[1] or 1))
+    return months if months >= 0 else None
+
+
+def _items(value):
+    if isinstance(value, dict):
+        return [value]
+    if not isinstance(value, list):
+        return []
+    return [item for item in value if isinstance(item, dict)]
+
+
+def experience_rows(items, today=None):
+    """Строки candidate_experience из structured_resume_data['experience']"""
+    today = today or date.today()
+    rows = []
+    for item in _items(items):
+        start, end, is_current = _period(item)
+        row = {
+            'company': _text(item.get('company')),
+            'position': _text(item.get('position')),
+            'description': _text(item.get('description')),
+            'start_year': start[0],
+            'end_year': end[0],
+            'is_current': is_current,
+            'duration_months': _months(start, (today.year, today.month) if is_current else end)
+        }
+        if row['company'] or row['position'] or row['start_year']:
+            rows.append(dict(row, sort_order=len(rows)))
+    return rows
+
+
+def _experience_years(rows):
+    """Суммарный опыт по местам работы без двойного учета пересекающихся периодов"""
+    intervals = []
+    for row in rows:
+        if row['duration_months'] is None:
+            continue
+        start = row['start_year'] * 12
+        intervals.append((start, start + row['duration_months']))
+    if not intervals:
+        return None
+
+    total = 0
+    current_start, current_end = None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            total += (current_end - current_start) if current_end is not None else 0
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    total += current_end - current_start
+    return round(total / 12, 1)
+
+
+def education_level(*texts):
+    """Уровень образования (id c_education) по описанию; None, если не распознан"""
+    text = ' '.join(str(value) for value in texts if value).lower().replace('ё', 'е')
+    if not text:
+        return None
+    for level, markers in EDUCATION_MARKERS:
+        if any(marker in text for marker in markers):
+            return level
+    return None
+
+
+def education_rows(items):
+    """Строки candidate_education из structured_resume_data['education']"""
+    rows = []
+    for item in _items(items):
+        start, end, _ = _period(item)
+        row = {
+            'institution': _text(item.get('institution')),
+            'degree': _text(item.get('degree')),
+            'field': _text(item.get('field')),
+            'start_year': start[0],
+            'end_year': end[0]
+        }
+        row['level'] = education_level(row['degree'], row['institution'])
+        if row['institution'] or row['degree'] or row['field']:
+            rows.append(dict(row, sort_order=len(rows)))
+    return rows
+
+
+def language_level(text):
+    """Уровень владения языком: A1-C2, native или None"""
+    text = (text or '').lower().replace('ё', 'е')
+    match = _CEFR_RE.search(text.translate(_CEFR_LETTERS))
+    if match:
+        return match.group(1).upper()
+    for level, markers in LANGUAGE_LEVEL_MARKERS:
+        if any(marker in text for marker in markers):
+            return level
+    return None
+
+
+def normalize_language(name):
+    """Нормализованное название языка: "English", "Английский язык" -> "английский" """
+    name = _text(name)
+    if not name:
+        return None
+    name = name.lower().replace('ё', 'е').strip(' .;')
+    for prefixes, normalized in LANGUAGE_NAMES:
+        if name.startswith(prefixes):
+            return normalized
+    name = re.sub(r'\s+язык$', '', name)
+    return name if 0 < len(name) <= 50 else None
+
+
+def language_rows(items):
+    """Строки candidate_languages из structured_resume_data['languages'], по одной на язык"""
+    if isinstance(items, str):
+        items = re.split(r'[;\n]|,(?![^(]*\))', items)
+    if not isinstance(items, list):
+        return []
+
+    result = {}
+    for item in items:
+        if isinstance(item, dict):
+            name = item.get('language') or item.get('name')
+            level_text = ' '.join(str(item.get(key) or '') for key in ('level', 'proficiency'))
+            raw = ', '.join(str(value) for value in (name, item.get('level')) if value)
+        else:
+            raw = _text(item)
+            if not raw:
+                continue
+            # "Английский - B2", "English (Upper-Intermediate)", "Русский: родной"
+            name = _LANGUAGE_SPLIT_RE.split(raw, maxsplit=1)[0]
+            level_text = raw
+
+        language = normalize_language(name)
+        if not language:
+            continue
+        level = language_level(level_text)
+        previous = result.get(language)
+        # Один язык упомянут дважды - остается более высокий уровень
+        if previous is None or (level or '') > (previous['level'] or ''):
+            result[language] = {'language': language, 'level': level, 'raw': _text(raw)}
+    return list(result.values())
+
+
+def project_resume(structured_data, data_consistency=None, answer_quality=None, today=None):
+    """
+    Проекция JSON-полей кандидата на таблицы и типизированные колонки
+
+    Args:
+        structured_data: Candidate.structured_resume_data
+        data_consistency: Candidate.ai_data_consistency
+        answer_quality: Candidate.ai_answer_quality
+        today: Дата для периодов «по настоящее время»
+
+    Returns:
+        dict: {'candidate': значения колонок Candidate,
+               'experience' / 'education' / 'languages': строки таблиц}
+    """
+    data = structured_data if isinstance(structured_data, dict) else {}
+    experience = experience_rows(data.get('experience'), today)
+    education = education_rows(data.get('education'))
+
+    total_years = _number(data.get('total_experience_years'))
+    if total_years is None or not 0 <= total_years <= 70:
+        total_years = _experience_years(experience)
+
+    levels = [row['level'] for row in education if row['level']]
+    return {
+        'candidate': {
+            'total_experience_years': total_years,
+            'education_level': max(levels) if levels else None,
+            'ai_trust_score': _percent((data_consistency or {}).get('trust_score')) if isinstance(data_consistency, dict) else None,
+            'ai_generation_probability': _percent((answer_quality or {}).get('ai_generation_probability')) if isinstance(answer_quality, dict) else None
+        },
+        'experience': experience,
+        'education': education,
+        'languages': language_rows(data.get('languages'))
+    }
+
+
+def apply_structure_filters(query, min_experience=None, education_level=None, language=None,
+                            min_language_level=None, min_trust_score=None):
+    """
+    Фильтры списка кандидатов по проекции резюме, выполняемые в SQL
+
+    Args:
+        query: Запрос, в котором участвует Candidate
+        min_experience: Опыт не меньше, лет
+        education_level: Уровень образования не ниже (id c_education)
+        language: Язык в любом написании ("English", "английский")
+        min_language_level: Уровень языка не ниже (A1-C2, native)
+        min_trust_score: Уровень доверия к данным не ниже
+
+    Returns:
+        Запрос с добавленными условиями
+    """
+    if min_experience is not None:
+        query = query.filter(Candidate.total_experience_years >= min_experience)
+    if education_level is not None:
+        query = query.filter(Candidate.education_level >= education_level)
+    if min_trust_score is not None:
+        query = query.filter(Candidate.ai_trust_score >= min_trust_score)
+
+    language = normalize_language(language)
+    if language:
+        condition = sa.and_(
+            CandidateLanguage.candidate_id == Candidate.id,
+            CandidateLanguage.language == language
+        )
+        level = language_level(min_language_level) if min_language_level else None
+        if level:
+            condition = sa.and_(condition, CandidateLanguage.level >= level)
+        query = query.filter(sa.exists().where(condition))
+
+    return query
+
+
+def sync_candidate_structure(candidate, commit=True):
+    """
+    Перезаписывает проекцию данных резюме кандидата
+
+    Args:
+        candidate: Объект Candidate
+        commit: Фиксировать ли транзакцию
+
+    Returns:
+        dict: Проекция (см. project_resume)
+    """
+    projection = project_resume(
+        candidate.structured_resume_data, candidate.ai_data_consistency, candidate.ai_answer_quality
+    )
+    for name, value in projection['candidate'].items():
+        setattr(candidate, name, value)
+
+    for model, key in (
+        (CandidateExperience, 'experience'),
+        (CandidateEducation, 'education'),
+        (CandidateLanguage, 'languages')
+    ):
+        db.session.execute(
+            sa.delete(model)
+            .where(model.candidate_id == candidate.id)
+            .execution_options(synchronize_session=False)
+        )
+        if projection[key]:
+            db.session.execute(sa.insert(model), [dict(row, candidate_id=candidate.id) for row in projection[key]])
+
+    # Отношения могли быть загружены до пакетной перезаписи
+    db.session.expire(candidate, ['experience_entries', 'education_entries', 'languages'])
+
+    if commit:
+        db.session.commit()
+
+    return projection
+
+
+def backfill_resume_structure(batch_size=200):
+    """
+    Пересчитывает проекцию данных резюме для всех кандидатов
+
+    Returns:
+        int: Количество обработанных кандидатов
+    """
+    processed = 0
+    last_id = 0
+
+    while True:
+        candidates = db.session.scalars(
+            sa.select(Candidate)
+            .where(Candidate.id > last_id)
+            .options(so.undefer_group('resume'), so.undefer_group('ai_details'))
+            .order_by(Candidate.id)
+            .limit(batch_size)
+        ).all()
+        if not candidates:
+            break
+
+        for candidate in candidates:
+            sync_candidate_structure(candidate, commit=False)
+            processed += 1
+        last_id = candidates[-1].id
+
+        db.session.commit()
+        db.session.expunge_all()
+        current_app.logger.info(f"Проекция резюме пересчитана для {processed} кандидатов")
+
+    return processed
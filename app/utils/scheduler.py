@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Периодические фоновые задачи (Flask-APScheduler).
+
+Планировщик запускается, только если SCHEDULER_ENABLED=True. Включать его
+следует в одном процессе (например, в отдельном worker-процессе), иначе каждый
+worker веб-сервера будет выполнять те же задачи.
+"""
+
+from datetime import datetime
+
+# Планировщик процесса: create_app может вызываться несколько раз
+# (веб-приложение и приложение фоновых обработчиков), задачи регистрируются один раз
+_scheduler = None
+
+
+def _run_in_app_context(app, func):
+    def job():
+        with app.app_context():
+            try:
+                func()
+            except Exception as e:
+                app.logger.error(f"Ошибка фоновой задачи {func.__name__}: {str(e)}", exc_info=True)
+    job.__name__ = func.__name__
+    return job
+
+
+def retrain_time_to_fill_model():
+    """Переобучает модель времени закрытия, если появились новые закрытые вакансии"""
+    from app.utils.time_to_fill import train_model
+    train_model()
+
+
+def refresh_seasonal_forecasts():
+    """Досчитывает закрытые месяцы рядов откликов и обновляет прогнозы"""
+    from app.utils.seasonal_forecast import refresh_seasonal_series
+    refresh_seasonal_series()
+
+
+def sync_candidate_index():
+    """Загружает модель и индекс поиска кандидатов, догружает новые векторы и сохраняет индекс"""
+    from app.utils.candidate_search import embeddings_enabled, get_index, save_index
+    if embeddings_enabled():
+        get_index()
+        save_index()
+
+
+def run_queued_rematches():
+    """Выполняет задачи подбора из базы, оставшиеся в очереди после перезапуска процессов"""
+    from app.utils.analysis_jobs import run_queued_rematches as run_queued
+    run_queued()
+
+
+def init_scheduler(app):
+    """Регистрирует задачи и запускает планировщик"""
+    global _scheduler
+    if not app.config.get('SCHEDULER_ENABLED') or _scheduler is not None:
+        return _scheduler
+
+    from flask_apscheduler import APScheduler
+
+    scheduler = APScheduler()
+    scheduler.init_app(app)
+
+    scheduler.add_job(
+        id='retrain_time_to_fill_model',
+        func=_run_in_app_context(app, retrain_time_to_fill_model),
+        trigger='interval',
+        hours=app.config.get('TIME_TO_FILL_RETRAIN_HOURS', 24),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        id='refresh_seasonal_forecasts',
+        func=_run_in_app_context(app, refresh_seasonal_forecasts),
+        trigger='cron',
+        hour=1,
+        # Страница сезонных трендов сама не пересчитывает данные: первый запуск сразу
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+    # Индекс строится здесь, а worker-процессы загружают его из EMBEDDING_INDEX_PATH
+    scheduler.add_job(
+        id='sync_candidate_index',
+        func=_run_in_app_context(app, sync_candidate_index),
+        trigger='interval',
+        minutes=app.config.get('EMBEDDING_INDEX_SYNC_MINUTES', 10),
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+    scheduler.add_job(
+        id='run_queued_rematches',
+        func=_run_in_app_context(app, run_queued_rematches),
+        trigger='interval',
+        minutes=app.config.get('REMATCH_QUEUE_MINUTES', 5),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+    scheduler.start()
+    _scheduler = scheduler
+    app.logger.info("Планировщик фоновых задач запущен")
+    return scheduler
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Прогноз сезонности откликов.
+
+Месячные ряды откликов (всего и по отраслям вакансий) хранятся в
+application_monthly_stats. Сохраняются только закрытые месяцы: после закрытия
+месяца досчитываются недостающие месяцы, а не вся история. По каждому ряду
+строится прогноз методом Холта-Винтерса (аддитивная сезонность, период 12
+месяцев). Прогноз с доверительным интервалом сохраняется в application_forecasts.
+
+Данные обновляет задача планировщика (и команда
+flask refresh-seasonal-forecasts), страница сезонных трендов только читает их.
+Если таблицы пусты (планировщик выключен, команда не запускалась), ряды
+строятся при первом открытии страницы.
+Строки обеих таблиц уникальны по (industry_id, month) и пишутся через
+INSERT ... ON CONFLICT DO UPDATE, поэтому одновременные обновления из разных
+процессов не создают дубликатов.
+"""
+
+import threading
+from datetime import date, datetime, timezone
+from itertools import product
+import numpy as np
+import sqlalchemy as sa
+from flask import current_app
+from app import db
+from app.models import Candidate, VacancyIndustry, ApplicationMonthlyStat, ApplicationForecast
+
+SEASON_LENGTH = 12
+
+# Квантиль нормального распределения для 95% доверительного интервала
+CONFIDENCE_Z = 1.96
+
+# Сетка параметров сглаживания для подбора по ошибке прогноза на шаг вперед
+SMOOTHING_GRID = (0.1, 0.3, 0.5, 0.7, 0.9)
+TREND_GRID = (0.05, 0.2, 0.5)
+SEASONAL_GRID = (0.1, 0.3, 0.6)
+
+_refresh_lock = threading.Lock()
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _months_between(start, end):
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def _last_closed_month():
+    return _add_months(_month_start(datetime.now(timezone.utc)), -1)
+
+
+def _holt_winters_errors(y, alpha, beta, gamma, season_length):
+    """
+    Аддитивный Холт-Винтерс: ошибки прогноза на шаг вперед и финальное состояние
+    """
+    seasonal = list(y[:season_length] - y[:season_length].mean())
+    level = y[:season_length].mean()
+    trend = (y[season_length:2 * season_length].mean() - y[:season_length].mean()) / season_length
+    errors = []
+
+    for t in range(season_length, len(y)):
+        season = seasonal[t - season_length]
+        forecast = level + trend + season
+        errors.append(y[t] - forecast)
+        previous_level = level
+        level = alpha * (y[t] - season) + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+        seasonal.append(gamma * (y[t] - level) + (1 - gamma) * season)
+
+    return np.asarray(errors), level, trend, seasonal[-season_length:]
+
+
+def _holt_errors(y, alpha, beta):
+    """Метод Холта (уровень и тренд без сезонности)"""
+    level = y[0]
+    trend = y[1] - y[0]
+    errors = []
+
+    for t in range(1, len(y)):
+        forecast = level + trend
+        errors.append(y[t] - forecast)
+        previous_level = level
+        level = alpha * y[t] + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+
+    return np.asarray(errors), level, trend
+
+
+def forecast_series(values, horizon):
+    """
+    Прогноз месячного ряда на horizon месяцев вперед
+
+    Метод выбирается по длине истории: Холт-Винтерс для двух и более полных
+    сезонов, метод Холта для коротких рядов и среднее для совсем коротких.
+    Параметры сглаживания подбираются по сетке по сумме квадратов ошибок.
+
+    Returns:
+        dict: {'method', 'predicted', 'lower', 'upper'} (списки длины horizon)
+    """
+    y = np.asarray(values, dtype=np.float64)
+    steps = np.arange(1, horizon + 1)
+
+    if len(y) >= 2 * SEASON_LENGTH:
+        best = None
+        for alpha, beta, gamma in product(SMOOTHING_GRID, TREND_GRID, SEASONAL_GRID):
+            errors, level, trend, seasonal = _holt_winters_errors(y, alpha, beta, gamma, SEASON_LENGTH)
+            sse = float(np.sum(errors ** 2))
+            if best is None or sse < best[0]:
+                best = (sse, errors, level, trend, seasonal)
+        _, errors, level, trend, seasonal = best
+        predicted = np.array([
+            level + step * trend + seasonal[(step - 1) % SEASON_LENGTH] for step in steps
+        ])
+        method = 'holt_winters'
+    elif len(y) >= 3:
+        best = None
+        for alpha, beta in product(SMOOTHING_GRID, TREND_GRID):
+            errors, level, trend = _holt_errors(y, alpha, beta)
+            sse = float(np.sum(errors ** 2))
+            if best is None or sse < best[0]:
+                best = (sse, errors, level, trend)
+        _, errors, level, trend = best
+        predicted = level + steps * trend
+        method = 'holt'
+    else:
+        mean = y.mean() if len(y) else 0.0
+        errors = y - mean
+        predicted = np.full(horizon, mean)
+        method = 'mean'
+
+    # Интервал расширяется с горизонтом прогноза (приближение случайного блуждания)
+    sigma = float(np.std(errors)) if len(errors) > 1 else float(np.sqrt(max(predicted.mean(), 1.0)))
+    margin = CONFIDENCE_Z * sigma * np.sqrt(steps)
+    predicted = np.maximum(predicted, 0)
+
+    return {
+        'method': method,
+        'predicted': predicted.round(1).tolist(),
+        'lower': np.maximum(predicted - margin, 0).round(1).tolist(),
+        'upper': (predicted + margin).round(1).tolist()
+    }
+
+
+def _aggregate_months(start_month, end_month):
+    """
+    Агрегаты откликов по месяцам в интервале [start_month, end_month)
+
+    Returns:
+        list: [(industry_id или None, month, applications, avg_quality)]
+    """
+    month = sa.func.date_trunc('month', Candidate.created_at).label('month')
+    period = [Candidate.created_at >= start_month, Candidate.created_at < end_month]
+
+    rows = [
+        (None, row.month, row.applications, row.avg_quality)
+        for row in db.session.execute(
+            sa.select(
+                month,
+                sa.func.count(Candidate.id).label('applications'),
+                sa.func.avg(Candidate.ai_match_percent).label('avg_quality')
+            ).where(*period).group_by(month)
+        )
+    ]
+    rows.extend(
+        (row.industry_id, row.month, row.applications, row.avg_quality)
+        for row in db.session.execute(
+            sa.select(
+                VacancyIndustry.industry_id,
+                month,
+                sa.func.count(Candidate.id).label('applications'),
+                sa.func.avg(Candidate.ai_match_percent).label('avg_quality')
+            )
+            .join(VacancyIndustry, VacancyIndustry.vacancy_id == Candidate.vacancy_id)
+            .where(*period)
+            .group_by(VacancyIndustry.industry_id, month)
+        )
+    )
+    return rows
+
+
+def _upsert(model, rows, columns):
+    """
+    Вставка строк ряда или прогноза с обновлением columns при совпадении (industry_id, month)
+
+    Ряд «все вакансии» (industry_id IS NULL) и ряды отраслей защищены разными
+    частичными уникальными индексами, поэтому вставляются отдельно.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    for total in (True, False):
+        group = [row for row in rows if (row['industry_id'] is None) == total]
+        if not group:
+            continue
+        statement = insert(model).values(group)
+        statement = statement.on_conflict_do_update(
+            index_elements=['month'] if total else ['industry_id', 'month'],
+            index_where=model.industry_id.is_(None) if total else model.industry_id.isnot(None),
+            set_={column: statement.excluded[column] for column in columns}
+        )
+        db.session.execute(statement)
+
+
+def _rebuild_forecasts(last_closed):
+    """Пересчитывает прогнозы по всем сохраненным рядам"""
+    horizon = current_app.config.get('SEASONAL_FORECAST_HORIZON', 3)
+    series = {}
+    for industry_id, month, applications in db.session.execute(
+        sa.select(ApplicationMonthlyStat.industry_id, ApplicationMonthlyStat.month, ApplicationMonthlyStat.applications)
+        .order_by(ApplicationMonthlyStat.month)
+    ):
+        series.setdefault(industry_id, {})[month] = applications
+
+    computed_at = datetime.now(timezone.utc)
+    forecasts = []
+    for industry_id, months in series.items():
+        first_month = min(months)
+        # Месяцы без откликов в ряду - нули, а не пропуски
+        values = [
+            months.get(_add_months(first_month, i), 0)
+            for i in range(_months_between(first_month, last_closed) + 1)
+        ]
+        result = forecast_series(values, horizon)
+        for step in range(horizon):
+            forecasts.append({
+                'industry_id': industry_id,
+                'month': _add_months(last_closed, step + 1),
+                'predicted': result['predicted'][step],
+                'lower': result['lower'][step],
+                'upper': result['upper'][step],
+                'method': result['method'],
+                'based_on_month': last_closed,
+                'computed_at': computed_at
+            })
+
+    if forecasts:
+        _upsert(ApplicationForecast, forecasts, ('predicted', 'lower', 'upper', 'method', 'based_on_month', 'computed_at'))
+    # Прогнозы на уже закрытые месяцы
+    db.session.execute(
+        sa.delete(ApplicationForecast)
+        .where(ApplicationForecast.computed_at < computed_at)
+        .execution_options(synchronize_session=False)
+    )
+    return len(series)
+
+
+def refresh_seasonal_series(force=False):
+    """
+    Досчитывает закрытые месяцы и обновляет прогнозы
+
+    Args:
+        force: Пересчитать всю историю и прогнозы заново
+
+    Returns:
+        bool: True, если данные были обновлены
+    """
+    with _refresh_lock:
+        last_closed = _last_closed_month()
+        last_stored = db.session.scalar(sa.select(sa.func.max(ApplicationMonthlyStat.month)))
+
+        if not force and last_stored is not None and last_stored >= last_closed:
+            return False
+
+        if force or last_stored is None:
+            first_created = db.session.scalar(sa.select(sa.func.min(Candidate.created_at)))
+            if first_created is None:
+                return False
+            start_month = _month_start(first_created)
+            db.session.execute(sa.delete(ApplicationMonthlyStat).execution_options(synchronize_session=False))
+        else:
+            start_month = _add_months(last_stored, 1)
+
+        end_month = _add_months(last_closed, 1)
+        updated_at = datetime.now(timezone.utc)
+        stats = [
+            {
+                'industry_id': industry_id,
+                'month': _month_start(month),
+                'applications': applications,
+                'avg_quality': round(float(avg_quality), 1) if avg_quality is not None else None,
+                'updated_at': updated_at
+            }
+            for industry_id, month, applications, avg_quality in _aggregate_months(start_month, end_month)
+        ]
+        # Закрытый месяц без откликов сохраняем с нулем, чтобы не пересчитывать его повторно
+        if not any(item['industry_id'] is None and item['month'] == last_closed for item in stats):
+            stats.append({
+                'industry_id': None,
+                'month': last_closed,
+                'applications': 0,
+                'avg_quality': None,
+                'updated_at': updated_at
+            })
+        _upsert(ApplicationMonthlyStat, stats, ('applications', 'avg_quality', 'updated_at'))
+
+        series_count = _rebuild_forecasts(last_closed)
+        db.session.commit()
+
+        current_app.logger.info(
+            f"Обновлены месячные ряды откликов с {start_month:%Y-%m} по {last_closed:%Y-%m}, прогнозов: {series_count}"
+        )
+        return True
+
+
+def get_seasonal_data(industry_id=None, months=24):
+    """
+    Готовые ряд и прогноз для страницы сезонных трендов
+
+    Данные не пересчитываются в запросе: после закрытия месяца их обновляет
+    задача планировщика refresh_seasonal_forecasts. Пустые таблицы заполняются
+    при первом обращении.
+
+    Args:
+        industry_id: ID отрасли (None - все вакансии)
+        months: Сколько последних месяцев истории вернуть
+
+    Returns:
+        tuple: (список ApplicationMonthlyStat, список ApplicationForecast)
+    """
+    if db.session.scalar(sa.select(ApplicationMonthlyStat.id).limit(1)) is None:
+        try:
+            refresh_seasonal_series()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Ошибка построения месячных рядов откликов: {str(e)}", exc_info=True)
+    
+    industry_filter = (
+        ApplicationMonthlyStat.industry_id.is_(None) if industry_id is None
+        else ApplicationMonthlyStat.industry_id == industry_id
+    )
+    history = db.session.scalars(
+        sa.select(ApplicationMonthlyStat)
+        .where(industry_filter)
+        .where(ApplicationMonthlyStat.month > _add_months(_last_closed_month(), -months))
+        .order_by(ApplicationMonthlyStat.month)
+    ).all()
+
+    forecast_filter = (
+        ApplicationForecast.industry_id.is_(None) if industry_id is None
+        else ApplicationForecast.industry_id == industry_id
+    )
+    forecast = db.session.scalars(
+        sa.select(ApplicationForecast)
+        .where(forecast_filter)
+        .order_by(ApplicationForecast.month)
+    ).all()
+
+    return history, forecast
@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Локальное извлечение навыков из резюме без обращения к LLM.
+
+Из названий навыков (Skill.name, Skill.normalized_name) и их синонимов один раз
+на процесс строится автомат Ахо-Корасик. Поиск по тексту резюме выполняется за
+один проход, независимо от количества навыков в справочнике. Найденные навыки
+записываются в candidate_skills пакетной вставкой.
+"""
+
+import re
+import threading
+from collections import deque
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db
+from app.models import Skill, CandidateSkill, CandidateVacancyScore
+
+# Источники, из которых извлекаются навыки (значение CandidateSkill.extracted_from)
+SOURCE_STRUCTURED = 'structured_resume_data'
+SOURCE_RESUME_TEXT = 'resume_text'
+EXTRACTOR_SOURCES = (SOURCE_STRUCTURED, SOURCE_RESUME_TEXT)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_automaton = None
+_automaton_signature = None
+_automaton_lock = threading.Lock()
+
+
+def normalize_skill_text(text):
+    """Приводит текст к виду для поиска: нижний регистр, ё -> е, одиночные пробелы"""
+    if not text:
+        return ''
+    text = str(text).lower().replace('ё', 'е')
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+class SkillAutomaton:
+    """
+    Автомат Ахо-Корасик по названиям и синонимам навыков.
+
+    Совпадение засчитывается только на границе слова, чтобы «java» не
+    находилась внутри «javascript», а «go» внутри «google». Для шаблонов,
+    которые начинаются или заканчиваются не буквой (например, «.net», «c++»),
+    граница с этой стороны не проверяется.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns: Словарь {нормализованный шаблон: множество skill_id}
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        self._patterns = []
+
+        for pattern, skill_ids in patterns.items():
+            if pattern:
+                self._add(pattern, tuple(skill_ids))
+        self._build_links()
+
+    @property
+    def patterns_count(self):
+        return len(self._patterns)
+
+    def _add(self, pattern, skill_ids):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+
+        self._patterns.append((
+            len(pattern),
+            skill_ids,
+            _is_word_char(pattern[0]),
+            _is_word_char(pattern[-1])
+        ))
+        self._output[node] = self._output[node] + (len(self._patterns) - 1,)
+
+    def _build_links(self):
+        # Обход в ширину: ссылка неудачи каждого узла указывает на самый длинный
+        # собственный суффикс, который тоже является префиксом одного из шаблонов
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_target = self._goto[fail].get(char, 0)
+                self._fail[child] = fail_target if fail_target != child else 0
+                if self._output[self._fail[child]]:
+                    self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text):
+        """
+        Ищет навыки в нормализованном тексте
+
+        Args:
+            text: Текст после normalize_skill_text
+
+        Returns:
+            dict: {skill_id: количество упоминаний}
+        """
+        found = {}
+        node = 0
+        text_length = len(text)
+
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+
+            for pattern_index in self._output[node]:
+                length, skill_ids, check_left, check_right = self._patterns[pattern_index]
+                start = position - length + 1
+                if check_left and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if check_right and position + 1 < text_length and _is_word_char(text[position + 1]):
+                    continue
+                for skill_id in skill_ids:
+                    found[skill_id] = found.get(skill_id, 0) + 1
+
+        return found
+
+
+def _load_patterns():
+    """Собирает шаблоны поиска из активных навыков справочника"""
+    patterns = {}
+    skills = db.session.execute(
+        sa.select(Skill.id, Skill.name, Skill.normalized_name, Skill.synonyms)
+        .where(Skill.is_active.is_not(False))
+    ).all()
+
+    for skill_id, name, normalized_name, synonyms in skills:
+        variants = [name, normalized_name]
+        if isinstance(synonyms, list):
+            variants.extend(synonyms)
+        for variant in variants:
+            pattern = normalize_skill_text(variant)
+            if pattern:
+                patterns.setdefault(pattern, set()).add(skill_id)
+
+    return patterns
+
+
+def _skills_signature():
+    """
+    Дешевая проверка изменений справочника навыков: количество, максимальный id,
+    время последнего изменения и суммарная длина названий и синонимов (меняется
+    при правке навыков в другом процессе, в том числе без смены длины названия)
+    """
+    length = sa.func.coalesce(sa.func.length(Skill.name), 0) \
+        + sa.func.coalesce(sa.func.length(Skill.normalized_name), 0) \
+        + sa.func.coalesce(sa.func.length(sa.cast(Skill.synonyms, sa.Text)), 0)
+    return tuple(db.session.execute(
+        sa.select(sa.func.count(Skill.id), sa.func.max(Skill.id), sa.func.max(Skill.updated_at), sa.func.sum(length))
+        .where(Skill.is_active.is_not(False))
+    ).one())
+
+
+def get_skill_automaton():
+    """
+    Возвращает автомат навыков процесса, перестраивая его при изменении справочника
+    """
+    global _automaton, _automaton_signature
+
+    signature = _skills_signature()
+    if _automaton is not None and signature == _automaton_signature:
+        return _automaton
+
+    with _automaton_lock:
+        if _automaton is None or signature != _automaton_signature:
+            _automaton = SkillAutomaton(_load_patterns())
+            _automaton_signature = signature
+            current_app.logger.info(
+                f"Построен автомат навыков: {signature[0]} навыков, {_automaton.patterns_count} шаблонов"
+            )
+    return _automaton
+
+
+def invalidate_skill_automaton(*args):
+    """Сбрасывает автомат навыков (вызывается и при изменении Skill через ORM)"""
+    global _automaton, _automaton_signature
+    with _automaton_lock:
+        _automaton = None
+        _automaton_signature = None
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    sa.event.listen(Skill, _event, invalidate_skill_automaton)
+
+
+def _structured_skills_text(structured_data):
+    """Текст явного списка навыков из структурированных данных резюме"""
+    if not isinstance(structured_data, dict):
+        return ''
+    skills = structured_data.get('skills') or []
+    if isinstance(skills, str):
+        return skills
+    return '\n'.join(str(skill) for skill in skills if skill)
+
+
+def extract_skills(resume_text=None, structured_data=None, automaton=None):
+    """
+    Извлекает навыки из текста резюме и структурированных данных
+
+    Args:
+        resume_text: Текст резюме
+        structured_data: Структурированные данные резюме (ключ 'skills')
+        automaton: Автомат навыков (по умолчанию автомат процесса)
+
+    Returns:
+        dict: {skill_id: {'mentions': int, 'source': str}}, где source -
+              источник, в котором навык найден впервые (явный список навыков
+              имеет приоритет над текстом резюме)
+    """
+    automaton = automaton or get_skill_automaton()
+    result = {}
+
+    for source, text in (
+        (SOURCE_STRUCTURED, _structured_skills_text(structured_data)),
+        (SOURCE_RESUME_TEXT, resume_text)
+    ):
+        for skill_id, mentions in automaton.find(normalize_skill_text(text)).items():
+            item = result.setdefault(skill_id, {'mentions': 0, 'source': source})
+            item['mentions'] += mentions
+
+    return result
+
+
+def _skill_level(mentions, source):
+    """Оценка уровня навыка (1-5) по числу упоминаний и наличию в списке навыков"""
+    level = 1 + min(mentions - 1, 3)
+    if source == SOURCE_STRUCTURED:
+        level += 1
+    return min(level, 5)
+
+
+def save_candidate_skills(candidate, commit=True):
+    """
+    Извлекает навыки кандидата и перезаписывает его автоматически найденные навыки
+
+    Навыки из других источников (добавленные вручную и т.п.) не затрагиваются.
+    Частота Skill.frequency увеличивается только для навыков, которых у
+    кандидата раньше не было. Оценки соответствия кандидата вакансиям
+    (CandidateVacancyScore) удаляются: они рассчитаны по прежним навыкам.
+
+    Args:
+        candidate: Объект Candidate
+        commit: Фиксировать ли транзакцию
+
+    Returns:
+        int: Количество сохраненных навыков
+    """
+    found = extract_skills(candidate.resume_text, candidate.structured_resume_data)
+
+    existing_ids = set(db.session.scalars(
+        sa.select(CandidateSkill.skill_id)
+        .where(CandidateSkill.candidate_id == candidate.id)
+        .where(CandidateSkill.extracted_from.in_(EXTRACTOR_SOURCES))
+    ))
+
+    db.session.execute(
+        sa.delete(CandidateSkill)
+        .where(CandidateSkill.candidate_id == candidate.id)
+        .where(CandidateSkill.extracted_from.in_(EXTRACTOR_SOURCES))
+        .execution_options(synchronize_session=False)
+    )
+
+    if found:
+        db.session.execute(sa.insert(CandidateSkill), [
+            {
+                'candidate_id': candidate.id,
+                'skill_id': skill_id,
+                'level': _skill_level(item['mentions'], item['source']),
+                'extracted_from': item['source']
+            }
+            for skill_id, item in found.items()
+        ])
+
+    # Устаревшие оценки; ensure_vacancy_scores рассчитает их заново
+    db.session.execute(
+        sa.delete(CandidateVacancyScore)
+        .where(CandidateVacancyScore.candidate_id == candidate.id)
+        .execution_options(synchronize_session=False)
+    )
+
+    new_ids = set(found) - existing_ids
+    if new_ids:
+        db.session.execute(
+            sa.update(Skill)
+            .where(Skill.id.in_(new_ids))
+            # Частота не меняет справочник: время изменения остается прежним
+            .values(frequency=sa.func.coalesce(Skill.frequency, 0) + 1, updated_at=Skill.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    if commit:
+        db.session.commit()
+
+    return len(found)
+
+
+def backfill_candidate_skills(batch_size=200):
+    """
+    Заполняет навыки для всех кандидатов с текстом резюме
+
+    Returns:
+        tuple: (количество обработанных кандидатов, количество сохраненных навыков)
+    """
+    from app.models import Candidate
+
+    # Строим автомат один раз до начала обработки
+    get_skill_automaton()
+
+    processed = 0
+    skills_saved = 0
+    last_id = 0
+
+    while True:
+        candidates = db.session.scalars(
+            sa.select(Candidate)
+            .where(Candidate.id > last_id)
+            .where(sa.or_(Candidate.resume_text.is_not(None), Candidate.structured_resume_data.is_not(None)))
+            .options(so.undefer_group('resume'))
+            .order_by(Candidate.id)
+            .limit(batch_size)
+        ).all()
+        if not candidates:
+            break
+
+        for candidate in candidates:
+            skills_saved += save_candidate_skills(candidate, commit=False)
+            processed += 1
+        last_id = candidates[-1].id
+
+        db.session.commit()
+        db.session.expunge_all()
+        current_app.logger.info(f"Навыки извлечены для {processed} кандидатов")
+
+    return processed, skills_saved
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Локальная оценка соответствия навыков кандидатов требованиям вакансии.
+
+Оценка - взвешенное покрытие навыков вакансии (VacancySkill) навыками
+кандидата (CandidateSkill). Все кандидаты вакансии оцениваются одним пакетом:
+навыки кандидатов собираются в разреженную матрицу «кандидат x навык вакансии»,
+а оценки получаются одним умножением на вектор весов. Результаты сохраняются в
+candidate_vacancy_scores и используются для сортировки списка кандидатов.
+
+Оценка устаревает при изменении навыков вакансии или кандидата. Вместе с
+оценкой хранится хэш навыков и весов вакансии (weights_hash): строки с другим
+хэшем пересчитываются при следующем показе списка (ensure_vacancy_scores).
+Оценки кандидата удаляются при перезаписи его навыков
+(skill_extractor.save_candidate_skills) и рассчитываются заново.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+import numpy as np
+import sqlalchemy as sa
+from scipy import sparse
+from flask import current_app
+from app import db
+from app.models import Candidate, CandidateSkill, VacancySkill, CandidateVacancyScore
+
+# Множитель веса обязательного навыка относительно желательного
+REQUIRED_WEIGHT = 2.0
+
+# Опыт (в месяцах), после которого навык считается полностью освоенным
+FULL_EXPERIENCE_MONTHS = 36
+
+# Доля оценки за сам факт наличия навыка; остальное - за уровень и опыт
+PRESENCE_SHARE = 0.5
+
+
+def vacancy_skill_weights(vacancy_id):
+    """
+    Веса навыков вакансии
+
+    Returns:
+        tuple: (список skill_id, вектор весов, булев вектор обязательности)
+    """
+    rows = db.session.execute(
+        sa.select(VacancySkill.skill_id, VacancySkill.importance, VacancySkill.is_required)
+        .where(VacancySkill.vacancy_id == vacancy_id)
+        .order_by(VacancySkill.skill_id)
+    ).all()
+
+    skill_ids = []
+    weights = []
+    required = []
+    for skill_id, importance, is_required in rows:
+        if skill_id in skill_ids:
+            continue
+        importance = min(max(importance or 1, 1), 10)
+        skill_ids.append(skill_id)
+        weights.append(importance * (REQUIRED_WEIGHT if is_required is not False else 1.0))
+        required.append(is_required is not False)
+
+    return skill_ids, np.asarray(weights, dtype=np.float64), np.asarray(required, dtype=bool)
+
+
+def weights_hash(weights):
+    """sha256 навыков и весов вакансии в формате vacancy_skill_weights"""
+    skill_ids, values, required = weights
+    return hashlib.sha256(json.dumps(
+        [list(skill_ids), [round(float(value), 6) for value in values], [bool(flag) for flag in required]]
+    ).encode('utf-8')).hexdigest()
+
+
+def _skill_strength(levels, experience_months):
+    """
+    Сила навыка в диапазоне (0, 1]: наличие навыка плюс уровень и опыт
+
+    Если опыт не указан, вместо него используется уровень.
+    """
+    level_part = np.clip(levels, 1, 5) / 5.0
+    experience_part = np.where(
+        np.isnan(experience_months),
+        level_part,
+        np.clip(experience_months / FULL_EXPERIENCE_MONTHS, 0, 1)
+    )
+    proficiency = 0.7 * level_part + 0.3 * experience_part
+    return PRESENCE_SHARE + (1 - PRESENCE_SHARE) * proficiency
+
+
+def compute_vacancy_scores(vacancy_id, candidate_ids=None, weights=None):
+    """
+    Рассчитывает оценки соответствия для кандидатов вакансии одним пакетом
+
+    Args:
+        vacancy_id: ID вакансии
+        candidate_ids: Список ID кандидатов (по умолчанию все отклики на вакансию)
+        weights: Навыки и веса в формате vacancy_skill_weights (по умолчанию -
+                 навыки вакансии из VacancySkill)
+
+    Returns:
+        dict: {candidate_id: {'score', 'required_coverage', 'matched_skills'}}
+    """
+    if candidate_ids is None:
+        candidate_ids = db.session.scalars(
+            sa.select(Candidate.id).where(Candidate.vacancy_id == vacancy_id)
+        ).all()
+    candidate_ids = list(dict.fromkeys(candidate_ids))
+    if not candidate_ids:
+        return {}
+
+    skill_ids, weights, required = weights or vacancy_skill_weights(vacancy_id)
+    if not skill_ids:
+        # У вакансии нет навыков - оценивать не по чему
+        return {
+            candidate_id: {'score': 0.0, 'required_coverage': 0.0, 'matched_skills': 0}
+            for candidate_id in candidate_ids
+        }
+
+    row_index = {candidate_id: i for i, candidate_id in enumerate(candidate_ids)}
+    column_index = {skill_id: j for j, skill_id in enumerate(skill_ids)}
+
+    rows = db.session.execute(
+        sa.select(
+            CandidateSkill.candidate_id,
+            CandidateSkill.skill_id,
+            sa.func.max(CandidateSkill.level),
+            sa.func.max(CandidateSkill.experience_months)
+        )
+        .where(CandidateSkill.candidate_id.in_(candidate_ids))
+        .where(CandidateSkill.skill_id.in_(skill_ids))
+        .group_by(CandidateSkill.candidate_id, CandidateSkill.skill_id)
+    ).all()
+
+    if rows:
+        data = np.array([
+            (row_index[candidate_id], column_index[skill_id], level or 1,
+             experience if experience is not None else np.nan)
+            for candidate_id, skill_id, level, experience in rows
+        ], dtype=np.float64)
+        strength = _skill_strength(data[:, 2], data[:, 3])
+        matrix = sparse.csr_matrix(
+            (strength, (data[:, 0].astype(np.int64), data[:, 1].astype(np.int64))),
+            shape=(len(candidate_ids), len(skill_ids))
+        )
+    else:
+        matrix = sparse.csr_matrix((len(candidate_ids), len(skill_ids)), dtype=np.float64)
+
+    presence = (matrix > 0).astype(np.float64)
+
+    # Взвешенное покрытие: сумма весов закрытых навыков с учетом силы навыка
+    scores = matrix @ weights / weights.sum() * 100
+    matched = np.asarray(presence.sum(axis=1)).ravel()
+    required_total = required.sum()
+    if required_total:
+        required_coverage = presence @ required.astype(np.float64) / required_total
+    else:
+        required_coverage = np.ones(len(candidate_ids))
+
+    return {
+        candidate_id: {
+            'score': round(float(scores[i]), 2),
+            'required_coverage': round(float(required_coverage[i]), 3),
+            'matched_skills': int(matched[i])
+        }
+        for candidate_id, i in row_index.items()
+    }
+
+
+def update_vacancy_scores(vacancy_id, candidate_ids=None, commit=True, weights=None):
+    """
+    Пересчитывает и сохраняет оценки кандидатов вакансии
+
+    Args:
+        vacancy_id: ID вакансии
+        candidate_ids: Список ID кандидатов (по умолчанию все отклики на вакансию)
+        commit: Фиксировать ли транзакцию
+        weights: Навыки и веса вакансии, если уже загружены (vacancy_skill_weights)
+
+    Returns:
+        int: Количество сохраненных оценок
+    """
+    weights = weights or vacancy_skill_weights(vacancy_id)
+    scores = compute_vacancy_scores(vacancy_id, candidate_ids, weights)
+    if not scores:
+        return 0
+
+    db.session.execute(
+        sa.delete(CandidateVacancyScore)
+        .where(CandidateVacancyScore.vacancy_id == vacancy_id)
+        .where(CandidateVacancyScore.candidate_id.in_(list(scores)))
+        .execution_options(synchronize_session=False)
+    )
+
+    computed_at = datetime.now(timezone.utc)
+    current_hash = weights_hash(weights)
+    db.session.execute(sa.insert(CandidateVacancyScore), [
+        {
+            'candidate_id': candidate_id,
+            'vacancy_id': vacancy_id,
+            'score': item['score'],
+            'required_coverage': item['required_coverage'],
+            'matched_skills': item['matched_skills'],
+            'weights_hash': current_hash,
+            'computed_at': computed_at
+        }
+        for candidate_id, item in scores.items()
+    ])
+
+    if commit:
+        db.session.commit()
+
+    current_app.logger.info(f"Обновлены оценки навыков для вакансии {vacancy_id}: {len(scores)} кандидатов")
+    return len(scores)
+
+
+def ensure_vacancy_scores(vacancy_id):
+    """
+    Рассчитывает оценки для кандидатов вакансии, у которых их нет или они
+    рассчитаны по другим навыкам и весам вакансии
+
+    Returns:
+        int: Количество рассчитанных оценок
+    """
+    weights = vacancy_skill_weights(vacancy_id)
+    current_hash = weights_hash(weights)
+    stale_ids = db.session.scalars(
+        sa.select(Candidate.id)
+        .outerjoin(
+            CandidateVacancyScore,
+            sa.and_(
+                CandidateVacancyScore.candidate_id == Candidate.id,
+                CandidateVacancyScore.vacancy_id == vacancy_id
+            )
+        )
+        .where(Candidate.vacancy_id == vacancy_id)
+        .where(sa.or_(
+            CandidateVacancyScore.id.is_(None),
+            CandidateVacancyScore.weights_hash.is_(None),
+            CandidateVacancyScore.weights_hash != current_hash
+        ))
+    ).all()
+
+    if not stale_ids:
+        return 0
+    return update_vacancy_scores(vacancy_id, stale_ids, weights=weights)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Хранилище загруженных файлов с адресацией по содержимому.
+
+Файл сохраняется под ключом вида ab/cd/<sha256>.<ext>: первые символы хэша
+задают подкаталоги, поэтому в одном каталоге не скапливаются сотни тысяч
+файлов. Одинаковые файлы хранятся один раз.
+
+Бэкенды (STORAGE_BACKEND):
+    local - каталог UPLOAD_FOLDER
+    s3    - S3-совместимое хранилище (AWS S3, MinIO и т.п.)
+
+В БД (Candidate.resume_path) хранится ссылка на файл: абсолютный путь для
+локального хранилища (как и раньше) или s3://<bucket>/<key> для S3. Старые
+файлы, сохраненные плоско в UPLOAD_FOLDER, продолжают открываться.
+
+Раз один файл могут загрузить несколько пользователей и кандидатов, владельцы
+файла учитываются в таблице stored_file_refs (StoredFileRef): файл и его превью
+удаляются только вместе с последней ссылкой (delete_if_unreferenced).
+"""
+
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from flask import current_app, redirect
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Имя файла с адресацией по содержимому: <sha256>.<ext>
+_CONTENT_NAME_RE = re.compile(r'^([0-9a-f]{64})\.([a-z0-9]{1,10})$')
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+class StoredFile:
+    """Результат сохранения файла в хранилище"""
+
+    def __init__(self, key, reference, sha256, size, deduplicated):
+        self.key = key
+        self.reference = reference
+        self.sha256 = sha256
+        self.size = size
+        self.deduplicated = deduplicated
+
+    @property
+    def filename(self):
+        """Имя файла для URL (files.download_file, files.view_file)"""
+        return os.path.basename(self.key)
+
+
+def content_key(sha256, extension):
+    """Ключ файла по хэшу содержимого: ab/cd/<sha256>.<ext>"""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}.{extension}"
+
+
+def key_for_filename(filename):
+    """
+    Ключ файла по имени из URL
+
+    Для файлов с адресацией по содержимому восстанавливает подкаталоги,
+    для старых файлов возвращает имя как есть (плоское хранение).
+    """
+    match = _CONTENT_NAME_RE.match(filename)
+    if match:
+        return content_key(match.group(1), match.group(2))
+    return filename
+
+
+def _spool_with_hash(stream):
+    """Копирует поток во временный файл, считая SHA-256 и размер"""
+    digest = hashlib.sha256()
+    size = 0
+    spooled = tempfile.SpooledTemporaryFile(max_size=8 * _CHUNK_SIZE)
+    for chunk in iter(lambda: stream.read(_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled, digest.hexdigest(), size
+
+
+class LocalStorage:
+    """Хранилище в локальном каталоге"""
+
+    scheme = 'local'
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Недопустимый ключ файла: {key}")
+        return path
+
+    def save(self, stream, extension):
+        spooled, sha256, size = _spool_with_hash(stream)
+        key = content_key(sha256, extension)
+        path = self._path(key)
+
+        with spooled:
+            if os.path.exists(path):
+                return StoredFile(key, self.reference(key), sha256, size, deduplicated=True)
+
+            self._write(path, spooled)
+
+        return StoredFile(key, self.reference(key), sha256, size, deduplicated=False)
+
+    @staticmethod
+    def _write(path, stream):
+        """Пишет во временный файл рядом и переименовывает атомарно"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                shutil.copyfileobj(stream, file, _CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put(self, key, data):
+        """Сохраняет производный файл (например, превью) под заданным ключом"""
+        self._write(self._path(key), io.BytesIO(data))
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def reference(self, key):
+        return self._path(key)
+
+    def key_from_reference(self, reference):
+        path = os.path.abspath(reference)
+        if os.path.commonpath([path, self.root]) != self.root:
+            return None
+        return os.path.relpath(path, self.root).replace(os.sep, '/')
+
+    @contextmanager
+    def local_file(self, key):
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        yield path
+
+    def send(self, key, as_attachment=False, download_name=None):
+        from app.utils.file_serving import send_stored_file
+        return send_stored_file(self.root, key, as_attachment=as_attachment, download_name=download_name)
+
+
+class S3Storage:
+    """S3-совместимое хранилище (boto3)"""
+
+    scheme = 's3'
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None,
+                 access_key=None, secret_key=None, presigned_ttl=300):
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix and prefix.strip('/') else ''
+        self.presigned_ttl = presigned_ttl
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None
+        )
+
+    def _object_key(self, key):
+        return f"{self.prefix}{key}"
+
+    def save(self, stream, extension):
+        spooled, sha256, size = _spool_with_hash(stream)
+        key = content_key(sha256, extension)
+
+        with spooled:
+            if self.exists(key):
+                return StoredFile(key, self.reference(key), sha256, size, deduplicated=True)
+
+            content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+            self.client.upload_fileobj(
+                spooled,
+                self.bucket,
+                self._object_key(key),
+                ExtraArgs={'ContentType': content_type, 'Metadata': {'sha256': sha256}}
+            )
+
+        return StoredFile(key, self.reference(key), sha256, size, deduplicated=False)
+
+    def put(self, key, data):
+        """Сохраняет производный файл (например, превью) под заданным ключом"""
+        content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+        self.client.put_object(Bucket=self.bucket, Key=self._object_key(key), Body=data, ContentType=content_type)
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def reference(self, key):
+        return f"s3://{self.bucket}/{self._object_key(key)}"
+
+    def key_from_reference(self, reference):
+        head = f"s3://{self.bucket}/{self.prefix}"
+        if not reference.startswith(head):
+            return None
+        return reference[len(head):]
+
+    @contextmanager
+    def local_file(self, key):
+        """Скачивает объект во временный файл на время обработки"""
+        from botocore.exceptions import ClientError
+
+        extension = os.path.splitext(key)[1]
+        fd, tmp_path = tempfile.mkstemp(suffix=extension)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                try:
+                    self.client.download_fileobj(self.bucket, self._object_key(key), file)
+                except ClientError as e:
+                    raise FileNotFoundError(self.reference(key)) from e
+            yield tmp_path
+        finally:
+            os.remove(tmp_path)
+
+    def send(self, key, as_attachment=False, download_name=None):
+        """Перенаправляет на подписанную ссылку: байты, ETag и Range отдает S3"""
+        disposition = 'attachment' if as_attachment else 'inline'
+        params = {'Bucket': self.bucket, 'Key': self._object_key(key)}
+        if download_name:
+            from urllib.parse import quote
+            params['ResponseContentDisposition'] = f"{disposition}; filename*=UTF-8''{quote(download_name)}"
+        else:
+            params['ResponseContentDisposition'] = disposition
+        url = self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=self.presigned_ttl)
+        return redirect(url)
+
+
+def _local_storage():
+    return _cached_storage(('local', current_app.config['UPLOAD_FOLDER']),
+                          lambda: LocalStorage(current_app.config['UPLOAD_FOLDER']))
+
+
+def _cached_storage(key, factory):
+    with _storages_lock:
+        storage = _storages.get(key)
+        if storage is None:
+            storage = factory()
+            _storages[key] = storage
+    return storage
+
+
+def get_storage():
+    """Хранилище для новых файлов согласно STORAGE_BACKEND"""
+    config = current_app.config
+    if config.get('STORAGE_BACKEND', 'local') != 's3':
+        return _local_storage()
+
+    return _cached_storage(
+        ('s3', config.get('S3_BUCKET'), config.get('S3_ENDPOINT_URL'), config.get('S3_PREFIX')),
+        lambda: S3Storage(
+            bucket=config['S3_BUCKET'],
+            prefix=config.get('S3_PREFIX', ''),
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region=config.get('S3_REGION'),
+            access_key=config.get('S3_ACCESS_KEY'),
+            secret_key=config.get('S3_SECRET_KEY'),
+            presigned_ttl=config.get('S3_PRESIGNED_TTL', 300)
+        )
+    )
+
+
+def save_file(stream, extension):
+    """Сохраняет файл в текущее хранилище, возвращает StoredFile"""
+    return get_storage().save(stream, extension.lower())
+
+
+def resolve_reference(reference):
+    """
+    Хранилище и ключ по ссылке из БД (путь или s3://...)
+
+    Returns:
+        tuple: (storage, key) или (None, None), если ссылка не распознана
+    """
+    if not reference:
+        return None, None
+
+    if reference.startswith('s3://'):
+        storage = get_storage()
+        if storage.scheme == 's3':
+            key = storage.key_from_reference(reference)
+            if key is not None:
+                return storage, key
+        return None, None
+
+    storage = _local_storage()
+    key = storage.key_from_reference(reference)
+    return (storage, key) if key is not None else (None, None)
+
+
+def resolve_filename(filename):
+    """
+    Хранилище и ключ по имени файла из URL
+
+    Сначала ищет в текущем хранилище, затем в локальном каталоге (старые файлы).
+    """
+    key = key_for_filename(filename)
+    primary = get_storage()
+    if primary.exists(key):
+        return primary, key
+
+    local = _local_storage()
+    if local is not primary and local.exists(key):
+        return local, key
+    return None, None
+
+
+def reference_exists(reference):
+    storage, key = resolve_reference(reference)
+    return storage is not None and storage.exists(key)
+
+
+@contextmanager
+def local_copy(reference):
+    """
+    Локальный путь к файлу по ссылке из БД на время обработки
+
+    Для S3 файл скачивается во временный файл и удаляется после выхода.
+    """
+    storage, key = resolve_reference(reference)
+    if storage is None:
+        raise FileNotFoundError(reference)
+    with storage.local_file(key) as path:
+        yield path
+
+
+
+def add_reference(reference, user_id=None, candidate=None):
+    """
+    Регистрирует владельца файла (без commit)
+
+    Args:
+        reference: Ссылка на файл (StoredFile.reference)
+        user_id: Пользователь, загрузивший файл через /files/upload
+        candidate: Кандидат, резюме которого хранится в файле
+    """
+    from app import db
+    from app.models import StoredFileRef
+
+    db.session.add(StoredFileRef(reference=reference, user_id=user_id, candidate=candidate))
+
+
+def count_references(reference):
+    """Количество владельцев файла"""
+    import sqlalchemy as sa
+    from app import db
+    from app.models import StoredFileRef
+
+    return db.session.scalar(
+        sa.select(sa.func.count(StoredFileRef.id)).where(StoredFileRef.reference == reference)
+    )
+
+
+def delete_if_unreferenced(storage, key):
+    """
+    Удаляет файл и его превью, если на файл не осталось ссылок
+
+    Returns:
+        bool: True, если файл удален
+    """
+    if count_references(storage.reference(key)):
+        return False
+
+    from app.utils.previews import delete_previews
+    delete_previews(storage, key)
+    storage.delete(key)
+    return True
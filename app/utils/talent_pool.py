@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Подбор кандидатов из базы для новой или измененной вакансии.
+
+Прежние соискатели остаются привязаны к вакансии, на которую откликались.
+При создании и изменении вакансии фоновая задача (AnalysisJob с
+kind=rematch, app/utils/analysis_jobs.py) ищет среди них подходящих для
+новой вакансии в два этапа.
+
+1. Предварительный отбор без обращения к API, по двум индексам:
+   - векторный: ближайшие к тексту вакансии резюме в HNSW-индексе
+     семантического поиска (candidate_search), REMATCH_VECTOR_CANDIDATES штук;
+     индекс запрашивается без фильтра с запасом REMATCH_VECTOR_OVERFETCH,
+     а доступность найденных кандидатов проверяется запросом к базе;
+   - навыки: обратный индекс candidate_skills(skill_id, candidate_id) отдает
+     кандидатов, у которых есть навыки вакансии (VacancySkill, а если их нет -
+     навыки, найденные в тексте вакансии), REMATCH_SKILL_CANDIDATES штук
+     с наибольшим суммарным весом совпавших навыков.
+   Объединенный список оценивается локально: взвешенное покрытие навыков
+   (skill_matching) и близость векторов. Стоимость зависит от размера
+   выборок, а не от размера базы.
+2. Только REMATCH_TOP_K лучших по предварительной оценке (не ниже
+   REMATCH_MIN_SCORE) оцениваются моделью. Результаты сохраняются в
+   suggested_candidates (SuggestedCandidate). Оценка модели переиспользуется,
+   если ни вакансия, ни кандидат не изменились с момента оценки.
+
+Подбор идет среди кандидатов вакансий того же HR-менеджера (для вакансий
+администратора - по всей базе), кроме откликнувшихся на эту вакансию.
+Кандидаты, отклоненные HR-менеджером (dismissed), повторно не предлагаются.
+"""
+
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import numpy as np
+import sqlalchemy as sa
+from flask import current_app
+from app import db
+from app.models import Candidate, CandidateSkill, SuggestedCandidate, Vacancy
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _aware(value):
+    # SQLite возвращает даты без часового пояса
+    return value if value is None or value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def vacancy_text(vacancy):
+    """Текст вакансии для векторного поиска и поиска навыков"""
+    return '\n'.join(part for part in (
+        vacancy.title, vacancy.description_tasks, vacancy.ideal_profile
+    ) if part)
+
+
+def vacancy_hash(vacancy):
+    """sha256 данных вакансии, от которых зависит оценка модели"""
+    return hashlib.sha256(json.dumps([
+        vacancy.title, vacancy.description_tasks, vacancy.description_conditions,
+        vacancy.ideal_profile, vacancy.id_c_employment_type
+    ], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _skill_weights(vacancy):
+    """
+    Навыки вакансии в формате skill_matching.vacancy_skill_weights
+
+    Без VacancySkill навыки ищутся в тексте вакансии; все они считаются
+    обязательными с одинаковым весом.
+    """
+    from app.utils.skill_matching import REQUIRED_WEIGHT, vacancy_skill_weights
+
+    weights = vacancy_skill_weights(vacancy.id)
+    if weights[0]:
+        return weights
+
+    from app.utils.skill_extractor import extract_skills
+    skill_ids = list(extract_skills(vacancy_text(vacancy)))
+    return (
+        skill_ids,
+        np.full(len(skill_ids), REQUIRED_WEIGHT, dtype=np.float64),
+        np.ones(len(skill_ids), dtype=bool)
+    )
+
+
+def _pool_filter(vacancy):
+    """Условия отбора кандидатов из базы для вакансии"""
+    conditions = [sa.or_(Candidate.vacancy_id.is_(None), Candidate.vacancy_id != vacancy.id)]
+    creator = vacancy.creator
+    if creator is not None and creator.role == 'hr':
+        conditions.append(Candidate.vacancy_id.in_(
+            sa.select(Vacancy.id).where(Vacancy.created_by == creator.id)
+        ))
+    return conditions
+
+
+def _vector_candidates(vacancy, pool_filter, limit, overfetch):
+    """
+    Ближайшие к вакансии резюме по HNSW-индексу
+
+    Индекс запрашивается без списка допустимых id (его пришлось бы собирать
+    по всей базе) на limit * overfetch результатов; кандидаты вне выборки
+    отсеиваются запросом к базе по найденным id.
+
+    Returns:
+        tuple: ({candidate_id: близость}, вектор вакансии или None)
+    """
+    from app.utils.candidate_search import embed_text, embeddings_enabled, get_index
+
+    if not embeddings_enabled():
+        return {}, None
+    try:
+        vector = embed_text(vacancy_text(vacancy))
+        if vector is None:
+            return {}, None
+        hits = get_index().search(vector, limit * max(1, overfetch))
+        if not hits:
+            return {}, vector
+        allowed = set(db.session.scalars(
+            sa.select(Candidate.id).where(Candidate.id.in_([candidate_id for candidate_id, _ in hits]), *pool_filter)
+        ))
+        return dict([hit for hit in hits if hit[0] in allowed][:limit]), vector
+    except Exception as e:
+        current_app.logger.warning(f"Подбор из базы для вакансии {vacancy.id} без векторного поиска: {str(e)}")
+        return {}, None
+
+
+def _skill_candidates(skill_ids, weights, pool_filter, limit):
+    """
+    Кандидаты с наибольшим суммарным весом навыков вакансии
+
+    Запрос читает только строки индекса ix_candidate_skills_skill_candidate
+    для навыков вакансии.
+    """
+    if not skill_ids:
+        return []
+    weight = sa.case(
+        {skill_id: float(value) for skill_id, value in zip(skill_ids, weights)},
+        value=CandidateSkill.skill_id,
+        else_=0.0
+    )
+    return db.session.scalars(
+        sa.select(CandidateSkill.candidate_id)
+        .join(Candidate, Candidate.id == CandidateSkill.candidate_id)
+        .where(CandidateSkill.skill_id.in_(skill_ids), *pool_filter)
+        .group_by(CandidateSkill.candidate_id)
+        .order_by(sa.func.sum(weight).desc(), CandidateSkill.candidate_id)
+        .limit(limit)
+    ).all()
+
+
+def prefilter(vacancy, config=None):
+    """
+    Предварительная оценка кандидатов из базы для вакансии (без обращения к API)
+
+    Returns:
+        list: [{'candidate_id', 'similarity', 'skill_score', 'prefilter_score'}]
+              по убыванию prefilter_score
+    """
+    from app.utils.candidate_search import stored_vectors
+    from app.utils.skill_matching import compute_vacancy_scores
+
+    config = config or current_app.config
+    pool_filter = _pool_filter(vacancy)
+
+    similarity, vector = _vector_candidates(
+        vacancy, pool_filter,
+        config.get('REMATCH_VECTOR_CANDIDATES', 300), config.get('REMATCH_VECTOR_OVERFETCH', 3)
+    )
+    skill_ids, weights, required = _skill_weights(vacancy)
+    skill_hits = _skill_candidates(skill_ids, weights, pool_filter, config.get('REMATCH_SKILL_CANDIDATES', 300))
+
+    candidate_ids = list(dict.fromkeys([*similarity, *skill_hits]))
+    if not candidate_ids:
+        return []
+
+    # Близость для найденных только по навыкам - по сохраненным векторам
+    if vector is not None:
+        missing = [candidate_id for candidate_id in candidate_ids if candidate_id not in similarity]
+        for candidate_id, stored in stored_vectors(missing).items():
+            if len(stored) == len(vector):
+                similarity[candidate_id] = float(stored @ vector)
+
+    skill_scores = compute_vacancy_scores(vacancy.id, candidate_ids, (skill_ids, weights, required)) if skill_ids else {}
+
+    # Вес векторной оценки; без одного из источников - только другой
+    vector_weight = config.get('REMATCH_VECTOR_WEIGHT', 0.5)
+    if vector is None:
+        vector_weight = 0.0
+    elif not skill_ids:
+        vector_weight = 1.0
+
+    result = []
+    for candidate_id in candidate_ids:
+        candidate_similarity = similarity.get(candidate_id)
+        skill_score = skill_scores.get(candidate_id, {}).get('score') if skill_ids else None
+        score = (
+            vector_weight * max(candidate_similarity or 0.0, 0.0) * 100
+            + (1 - vector_weight) * (skill_score or 0.0)
+        )
+        result.append({
+            'candidate_id': candidate_id,
+            'similarity': round(candidate_similarity, 4) if candidate_similarity is not None else None,
+            'skill_score': skill_score,
+            'prefilter_score': round(score, 2)
+        })
+    result.sort(key=lambda item: item['prefilter_score'], reverse=True)
+    return result
+
+
+def _to_percent(value):
+    try:
+        return min(max(float(value), 0.0), 100.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _analyze(app, candidate_id, vacancy_id):
+    """Оценка модели для одного кандидата (в потоке пула)"""
+    from app.utils.ai_service import request_vacancy_match
+    from app.utils.candidate_lists import full_options
+
+    with app.app_context():
+        try:
+            # Промпт использует резюме, анкету и прежний анализ - все отложенные группы
+            candidate = db.session.get(Candidate, candidate_id, options=full_options())
+            vacancy = db.session.get(Vacancy, vacancy_id)
+            return candidate_id, request_vacancy_match(candidate, vacancy), None
+        except Exception as e:
+            app.logger.error(f"Ошибка оценки кандидата {candidate_id} для вакансии {vacancy_id}: {str(e)}")
+            return candidate_id, None, str(e)[:2000]
+        finally:
+            db.session.remove()
+
+
+def rematch_vacancy(vacancy_id):
+    """
+    Подбирает кандидатов из базы для вакансии и сохраняет предложения
+
+    Returns:
+        dict: {'prefiltered', 'analyzed', 'reused', 'failed'} - количество кандидатов
+    """
+    config = current_app.config
+    vacancy = db.session.get(Vacancy, vacancy_id)
+    if vacancy is None:
+        return {'prefiltered': 0, 'analyzed': 0, 'reused': 0, 'failed': 0}
+
+    current_hash = vacancy_hash(vacancy)
+    existing = {
+        suggestion.candidate_id: suggestion
+        for suggestion in SuggestedCandidate.query.filter_by(vacancy_id=vacancy_id)
+    }
+    dismissed = {candidate_id for candidate_id, item in existing.items() if item.status == SuggestedCandidate.STATUS_DISMISSED}
+
+    scored = [item for item in prefilter(vacancy, config) if item['candidate_id'] not in dismissed]
+    min_score = config.get('REMATCH_MIN_SCORE', 20.0)
+    top = [item for item in scored if item['prefilter_score'] >= min_score][:config.get('REMATCH_TOP_K', 10)]
+
+    # Оценка модели переиспользуется, если вакансия и кандидат не менялись после нее
+    updated = dict(db.session.execute(
+        sa.select(Candidate.id, Candidate.updated_at).where(Candidate.id.in_([item['candidate_id'] for item in top]))
+    ).all())
+    reused, pending = [], []
+    for item in top:
+        suggestion = existing.get(item['candidate_id'])
+        candidate_updated = _aware(updated.get(item['candidate_id']))
+        if (
+            suggestion is not None
+            and suggestion.status == SuggestedCandidate.STATUS_ANALYZED
+            and suggestion.vacancy_hash == current_hash
+            and suggestion.analyzed_at is not None
+            and (candidate_updated is None or candidate_updated <= _aware(suggestion.analyzed_at))
+        ):
+            reused.append(item)
+        else:
+            pending.append(item)
+
+    results = {}
+    if pending:
+        app = current_app._get_current_object()
+        with ThreadPoolExecutor(max_workers=config.get('REMATCH_LLM_WORKERS', 4), thread_name_prefix='talent-pool') as executor:
+            for candidate_id, analysis, error in executor.map(
+                lambda item: _analyze(app, item['candidate_id'], vacancy_id), pending
+            ):
+                results[candidate_id] = (analysis, error)
+
+    # Предложения вне нового списка (кроме отклоненных) удаляются
+    keep = {item['candidate_id'] for item in top} | dismissed
+    for candidate_id, suggestion in existing.items():
+        if candidate_id not in keep:
+            db.session.delete(suggestion)
+
+    failed = 0
+    for item in top:
+        suggestion = existing.get(item['candidate_id'])
+        if suggestion is None:
+            suggestion = SuggestedCandidate(vacancy_id=vacancy_id, candidate_id=item['candidate_id'])
+            db.session.add(suggestion)
+        suggestion.similarity = item['similarity']
+        suggestion.skill_score = item['skill_score']
+        suggestion.prefilter_score = item['prefilter_score']
+        if item['candidate_id'] not in results:
+            continue
+
+        analysis, error = results[item['candidate_id']]
+        suggestion.vacancy_hash = current_hash
+        suggestion.analyzed_at = _now()
+        if analysis is None:
+            failed += 1
+            suggestion.status = SuggestedCandidate.STATUS_FAILED
+            suggestion.error = error
+            continue
+        suggestion.status = SuggestedCandidate.STATUS_ANALYZED
+        suggestion.error = None
+        suggestion.ai_match_percent = _to_percent(analysis.get('match_percent'))
+        suggestion.ai_pros = analysis.get('pros')
+        suggestion.ai_cons = analysis.get('cons')
+        suggestion.ai_recommendation = analysis.get('recommendation')
+        suggestion.ai_analysis_data = analysis
+
+    db.session.commit()
+    stats = {
+        'prefiltered': len(scored),
+        'analyzed': len(pending) - failed,
+        'reused': len(reused),
+        'failed': failed
+    }
+    current_app.logger.info(f"Подбор из базы для вакансии {vacancy_id}: {stats}")
+    return stats
+
+
+def schedule_rematch(vacancy, user_id=None):
+    """
+    Ставит подбор из базы для вакансии в очередь фоновых задач
+
+    Если подбор для вакансии уже идет, он будет повторен по завершении
+    (один раз, сколько бы изменений ни было).
+
+    Returns:
+        AnalysisJob: Задача подбора (None, если подбор отключен)
+    """
+    if not current_app.config.get('REMATCH_ENABLED', True):
+        return None
+
+    from app.utils.analysis_jobs import enqueue_rematch
+    return enqueue_rematch(vacancy.id, user_id)
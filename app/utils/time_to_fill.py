@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Модель прогноза времени закрытия вакансий.
+
+Модель обучается на закрытых вакансиях. Признаки: сложность, тип занятости,
+локация, бюджет, целевой срок, навыки и число откликов. Обученный пайплайн
+сохраняется в файл (joblib) вместе с остатками кросс-валидации (прогнозы для
+вакансий, не входивших в обучающую часть). Остатки нужны, чтобы оценивать
+вероятность закрытия к целевому сроку: остатки на самой обучающей выборке
+занижают разброс, и вероятности получаются слишком уверенными.
+
+Пока закрытых вакансий меньше TIME_TO_FILL_MIN_SAMPLES и модели нет,
+прогноз считается по базовой формуле от сложности и числа откликов.
+
+Переобучение выполняется по расписанию (см. app/utils/scheduler.py). Модель
+переобучается, только если с прошлого обучения появились новые закрытые
+вакансии. Прогнозы для открытых вакансий считаются одним пакетом и кэшируются.
+"""
+
+import os
+import threading
+from datetime import datetime, timezone
+import numpy as np
+import sqlalchemy as sa
+from flask import current_app
+from app import db, cache
+from app.models import Vacancy, Candidate, VacancySkill
+
+MODEL_FILENAME = 'time_to_fill.joblib'
+PREDICTIONS_CACHE_KEY = 'time_to_fill_predictions'
+
+# Целевой срок по умолчанию для расчета вероятности закрытия (дней)
+DEFAULT_TARGET_DAYS = 30
+
+# Порядковое кодирование сложности вакансии
+DIFFICULTY_LEVELS = {'easy': 0, 'medium': 1, 'hard': 2}
+
+# Множители срока по сложности для базовой формулы (без модели)
+BASELINE_DIFFICULTY_FACTORS = {'easy': 0.8, 'medium': 1.0, 'hard': 1.5}
+
+# Блоков кросс-валидации для остатков модели
+CV_FOLDS = 5
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+
+def _model_path():
+    return os.path.join(current_app.config['ML_MODELS_FOLDER'], MODEL_FILENAME)
+
+
+def _vacancy_rows(status):
+    """
+    Данные вакансий с агрегатами по откликам и навыкам одним запросом
+
+    Args:
+        status: Статус вакансий ('closed' для обучения, 'active' для прогноза)
+    """
+    candidate_counts = (
+        sa.select(Candidate.vacancy_id, sa.func.count(Candidate.id).label('candidate_count'))
+        .group_by(Candidate.vacancy_id)
+        .subquery()
+    )
+    skill_counts = (
+        sa.select(
+            VacancySkill.vacancy_id,
+            sa.func.count(VacancySkill.id).label('skill_count'),
+            sa.func.count(VacancySkill.id).filter(VacancySkill.is_required.is_(True)).label('required_count')
+        )
+        .group_by(VacancySkill.vacancy_id)
+        .subquery()
+    )
+
+    return db.session.execute(
+        sa.select(
+            Vacancy.id,
+            Vacancy.title,
+            Vacancy.created_at,
+            Vacancy.closed_at,
+            Vacancy.difficulty_level,
+            Vacancy.location,
+            Vacancy.id_c_employment_type,
+            Vacancy.target_time_to_fill,
+            Vacancy.recruitment_budget,
+            Vacancy.is_ai_generated,
+            sa.func.coalesce(candidate_counts.c.candidate_count, 0).label('candidate_count'),
+            sa.func.coalesce(skill_counts.c.skill_count, 0).label('skill_count'),
+            sa.func.coalesce(skill_counts.c.required_count, 0).label('required_count')
+        )
+        .outerjoin(candidate_counts, candidate_counts.c.vacancy_id == Vacancy.id)
+        .outerjoin(skill_counts, skill_counts.c.vacancy_id == Vacancy.id)
+        .where(Vacancy.status == status)
+    ).all()
+
+
+def _features(row):
+    """Признаки вакансии для DictVectorizer"""
+    created_at = row.created_at or datetime.now(timezone.utc)
+    month_angle = 2 * np.pi * (created_at.month - 1) / 12
+    features = {
+        'difficulty': DIFFICULTY_LEVELS.get(row.difficulty_level, 1),
+        'employment_type': str(row.id_c_employment_type),
+        'location': (row.location or '').strip().lower() or 'unknown',
+        'log_candidates': float(np.log1p(row.candidate_count)),
+        'skill_count': row.skill_count,
+        'required_count': row.required_count,
+        'is_ai_generated': int(bool(row.is_ai_generated)),
+        'month_sin': float(np.sin(month_angle)),
+        'month_cos': float(np.cos(month_angle)),
+        'has_target': int(row.target_time_to_fill is not None),
+        'target_days': float(row.target_time_to_fill or 0),
+        'has_budget': int(row.recruitment_budget is not None),
+        'log_budget': float(np.log1p(row.recruitment_budget or 0))
+    }
+    return features
+
+
+def _days_between(start, end):
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    return (end - start).total_seconds() / 86400
+
+
+def _training_signature():
+    """Количество закрытых вакансий и дата последнего закрытия"""
+    count, last_closed = db.session.execute(
+        sa.select(sa.func.count(Vacancy.id), sa.func.max(Vacancy.closed_at))
+        .where(Vacancy.status == 'closed')
+        .where(Vacancy.closed_at.is_not(None))
+    ).one()
+    return count, last_closed.isoformat() if last_closed else None
+
+
+def _build_estimator(n_samples):
+    """
+    Градиентный бустинг при достаточном объеме истории, иначе гребневая регрессия
+    """
+    from sklearn.feature_extraction import DictVectorizer
+    from sklearn.pipeline import make_pipeline
+
+    if n_samples >= current_app.config.get('TIME_TO_FILL_BOOSTING_MIN_SAMPLES', 200):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        regressor = HistGradientBoostingRegressor(
+            max_iter=200,
+            learning_rate=0.05,
+            min_samples_leaf=10,
+            random_state=42
+        )
+    else:
+        from sklearn.linear_model import Ridge
+        regressor = Ridge(alpha=1.0)
+
+    return make_pipeline(DictVectorizer(sparse=False), regressor)
+
+
+def train_model(force=False):
+    """
+    Обучает модель на закрытых вакансиях и сохраняет артефакт
+
+    Args:
+        force: Переобучить, даже если новых закрытых вакансий нет
+
+    Returns:
+        dict: Метаданные модели или None, если данных недостаточно
+    """
+    import joblib
+
+    signature = _training_signature()
+    artifact = load_model()
+    if not force and artifact and tuple(artifact['signature']) == tuple(signature):
+        current_app.logger.info("Модель времени закрытия актуальна, переобучение не требуется")
+        return artifact['meta']
+
+    rows = [row for row in _vacancy_rows('closed') if row.closed_at and row.created_at]
+    min_samples = current_app.config.get('TIME_TO_FILL_MIN_SAMPLES', 20)
+    if len(rows) < min_samples:
+        current_app.logger.warning(
+            f"Недостаточно закрытых вакансий для обучения модели: {len(rows)} (нужно {min_samples})"
+        )
+        return None
+
+    features = [_features(row) for row in rows]
+    days = np.array([max(_days_between(row.created_at, row.closed_at), 0) for row in rows])
+    target = np.log1p(days)
+
+    from sklearn.model_selection import KFold, cross_val_predict
+
+    estimator = _build_estimator(len(rows))
+    # Остатки в лог-пространстве по прогнозам вне обучающей части: по ним
+    # оцениваем разброс прогноза и ошибку модели
+    folds = KFold(n_splits=min(CV_FOLDS, len(rows)), shuffle=True, random_state=42)
+    cv_predicted = cross_val_predict(estimator, features, target, cv=folds)
+    residuals = target - cv_predicted
+    predicted_days = np.expm1(cv_predicted)
+
+    estimator.fit(features, target)
+
+    meta = {
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+        'n_samples': len(rows),
+        'estimator': type(estimator[-1]).__name__,
+        'mae_days': round(float(np.mean(np.abs(predicted_days - days))), 2),  # по кросс-валидации
+        'cv_folds': folds.get_n_splits()
+    }
+    artifact = {
+        'estimator': estimator,
+        'residuals': residuals,
+        'signature': signature,
+        'meta': meta
+    }
+
+    path = _model_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+
+    current_app.logger.info(
+        f"Модель времени закрытия обучена: {meta['estimator']}, {meta['n_samples']} вакансий, MAE {meta['mae_days']} дней"
+    )
+    return meta
+
+
+def load_model():
+    """Загружает артефакт модели (повторно - только если файл изменился)"""
+    global _model, _model_mtime
+
+    path = _model_path()
+    if not os.path.exists(path):
+        return None
+
+    mtime = os.path.getmtime(path)
+    if _model is not None and mtime == _model_mtime:
+        return _model
+
+    with _model_lock:
+        if _model is None or mtime != _model_mtime:
+            import joblib
+            _model = joblib.load(path)
+            _model_mtime = mtime
+    return _model
+
+
+def _predictions_signature():
+    """Признак изменения открытых вакансий и откликов на них"""
+    vacancy_count, last_update = db.session.execute(
+        sa.select(sa.func.count(Vacancy.id), sa.func.max(Vacancy.updated_at))
+        .where(Vacancy.status == 'active')
+    ).one()
+    candidate_count = db.session.scalar(
+        sa.select(sa.func.count(Candidate.id))
+        .join(Vacancy, Vacancy.id == Candidate.vacancy_id)
+        .where(Vacancy.status == 'active')
+    )
+    return f"{vacancy_count}:{last_update.isoformat() if last_update else ''}:{candidate_count}"
+
+
+def baseline_prediction(row):
+    """
+    Прогноз по базовой формуле, пока модель не обучена
+
+    Returns:
+        tuple: (дней до закрытия, вероятность закрытия в процентах)
+    """
+    factor = BASELINE_DIFFICULTY_FACTORS.get(row.difficulty_level, 1.0)
+    if row.candidate_count > 0:
+        days = int(30 * factor * (10 / (row.candidate_count + 5)))
+    else:
+        days = int(45 * factor)
+
+    if row.candidate_count > 10:
+        probability = min(90, 30 + row.candidate_count * 3)
+    else:
+        probability = max(10, row.candidate_count * 5)
+    return days, probability
+
+
+def predict_open_vacancies():
+    """
+    Прогноз времени закрытия для всех открытых вакансий одним пакетом
+
+    Без обученной модели используется базовая формула (baseline_prediction).
+
+    Returns:
+        dict: {'model': метаданные модели или None, 'baseline': True, если прогноз
+               по базовой формуле, 'predictions': список прогнозов}
+    """
+    artifact = load_model()
+    # Ключ зависит от версии модели, поэтому после переобучения прогнозы считаются заново
+    model_version = artifact['meta']['trained_at'] if artifact else 'none'
+    cache_key = f"{PREDICTIONS_CACHE_KEY}:{model_version}:{_predictions_signature()}"
+
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    rows = _vacancy_rows('active')
+    now = datetime.now(timezone.utc)
+    predictions = []
+
+    if rows and artifact:
+        predicted_log = artifact['estimator'].predict([_features(row) for row in rows])
+        residuals = np.asarray(artifact['residuals'])
+        targets = np.array([row.target_time_to_fill or DEFAULT_TARGET_DAYS for row in rows], dtype=np.float64)
+        # Вероятность закрыть вакансию к целевому сроку: доля остатков обучения,
+        # при которых прогноз укладывается в срок
+        probabilities = (
+            (predicted_log[:, None] + residuals[None, :]) <= np.log1p(targets)[:, None]
+        ).mean(axis=1) * 100
+        predicted_days = np.expm1(predicted_log)
+    else:
+        baseline = [baseline_prediction(row) for row in rows]
+        predicted_days = [days for days, _ in baseline]
+        probabilities = [probability for _, probability in baseline]
+
+    for row, days, probability in zip(rows, predicted_days, probabilities):
+        predictions.append({
+            'id': row.id,
+            'title': row.title,
+            'predicted_days': int(round(days)),
+            'probability': int(round(probability)),
+            'candidate_count': row.candidate_count,
+            'created_at': row.created_at,
+            'days_open': int(_days_between(row.created_at, now)) if row.created_at else None
+        })
+
+    result = {
+        'model': artifact['meta'] if artifact else None,
+        'baseline': artifact is None,
+        'predictions': predictions
+    }
+    cache.set(cache_key, result, timeout=current_app.config.get('TIME_TO_FILL_CACHE_TIMEOUT', 600))
+    return result
+
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Кэш аутентифицированных пользователей в пределах процесса.
+
+Flask-Login вызывает user_loader на каждый запрос, а проверки ролей и
+получение этапов отбора добавляют еще несколько запросов к БД. Здесь хранится
+короткоживущий снимок пользователя (идентичность, роль, статус и этапы
+отбора), из которого обслуживается обычная навигация по панели управления.
+
+Кэш у каждого процесса свой, и invalidate_user сбрасывает снимок только в
+текущем процессе. Поэтому поля, от которых зависит доступ (AUTH_FIELDS),
+перечитываются из БД одним легким запросом, если с последней проверки прошло
+больше USER_AUTH_CACHE_TTL секунд: блокировка, отключение или смена роли в
+другом процессе вступают в силу не позже чем через этот срок.
+"""
+
+import threading
+import time
+from collections import namedtuple
+import sqlalchemy as sa
+from cachetools import TTLCache
+from flask import current_app
+from flask_login import UserMixin
+from app import db
+
+# Снимок этапа отбора: только поля, которые используются в шаблонах и API
+StageSnapshot = namedtuple(
+    'StageSnapshot',
+    ['id', 'name', 'description', 'color', 'order', 'is_active', 'is_standard']
+)
+
+# Поля пользователя, которые хранятся в снимке и не требуют запроса к БД
+SNAPSHOT_FIELDS = (
+    'id', 'role', 'full_name', 'company', 'position',
+    'id_c_user_status', 'is_active', 'avatar_path'
+)
+
+# Поля снимка, от которых зависит доступ: перечитываются через USER_AUTH_CACHE_TTL
+AUTH_FIELDS = ('role', 'is_active', 'id_c_user_status')
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    """Возвращает (и при необходимости создает) кэш процесса"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTLCache(
+                    maxsize=current_app.config.get('USER_CACHE_MAXSIZE', 1024),
+                    ttl=current_app.config.get('USER_CACHE_TTL', 60)
+                )
+    return _cache
+
+
+def _stage_snapshot(stage):
+    return StageSnapshot(
+        id=stage.id,
+        name=stage.name,
+        description=stage.description,
+        color=stage.color,
+        order=stage.order,
+        is_active=stage.is_active,
+        is_standard=stage.is_standard
+    )
+
+
+class CachedUser(UserMixin):
+    """
+    Прокси пользователя для current_user.
+
+    Поля из SNAPSHOT_FIELDS и этапы отбора берутся из кэша. Обращение к любому
+    другому атрибуту (email, set_password, relationships) загружает ORM-модель
+    User и делегирует ей, поэтому изменения профиля сохраняются как обычно.
+    """
+
+    def __init__(self, snapshot):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_model', None)
+
+    def _get_model(self):
+        model = object.__getattribute__(self, '_model')
+        if model is None:
+            from app.models.user import User
+            model = db.session.get(User, self._snapshot['id'])
+            object.__setattr__(self, '_model', model)
+        return model
+
+    def __getattr__(self, name):
+        snapshot = object.__getattribute__(self, '_snapshot')
+        if name in snapshot:
+            return snapshot[name]
+        return getattr(self._get_model(), name)
+
+    def __setattr__(self, name, value):
+        # Любое изменение пользователя идет в ORM-модель, снимок сбрасывается
+        setattr(self._get_model(), name, value)
+        invalidate_user(self._snapshot['id'])
+
+    def __repr__(self):
+        return f"<CachedUser {self._snapshot['id']}>"
+
+    def get_id(self):
+        return str(self._snapshot['id'])
+
+    @property
+    def is_active(self):
+        return bool(self._snapshot['is_active'])
+
+    @property
+    def is_hr(self):
+        return self._snapshot['role'] == 'hr'
+
+    @property
+    def is_candidate(self):
+        return self._snapshot['role'] == 'candidate'
+
+    @property
+    def is_admin(self):
+        return self._snapshot['role'] == 'admin'
+
+    def get_selection_stages(self):
+        """Этапы отбора пользователя из снимка (см. User.get_selection_stages)"""
+        return list(self._snapshot['selection_stages'])
+
+
+def _build_snapshot(user):
+    snapshot = {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+    snapshot['selection_stages'] = tuple(
+        _stage_snapshot(stage) for stage in user.get_selection_stages()
+    )
+    snapshot['auth_checked_at'] = time.monotonic()
+    return snapshot
+
+
+def _refresh_auth_fields(user_id, snapshot):
+    """
+    Перечитывает AUTH_FIELDS из БД в снимок
+
+    Снимок обновляется на месте, чтобы не продлевать срок жизни остальных
+    полей в TTLCache.
+
+    Returns:
+        bool: False, если пользователь удален
+    """
+    from app.models.user import User
+
+    row = db.session.execute(
+        sa.select(*(getattr(User, field) for field in AUTH_FIELDS)).where(User.id == user_id)
+    ).first()
+    if row is None:
+        invalidate_user(user_id)
+        return False
+    with _cache_lock:
+        snapshot.update(row._asdict(), auth_checked_at=time.monotonic())
+    return True
+
+
+def load_cached_user(user_id):
+    """
+    user_loader для Flask-Login: возвращает CachedUser из кэша или
+    загружает пользователя из БД и кладет его снимок в кэш.
+
+    Поля доступа снимка старше USER_AUTH_CACHE_TTL перечитываются из БД.
+    """
+    from app.models.user import User
+
+    user_id = int(user_id)
+    cache = _get_cache()
+
+    with _cache_lock:
+        snapshot = cache.get(user_id)
+
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = _build_snapshot(user)
+        with _cache_lock:
+            cache[user_id] = snapshot
+    elif time.monotonic() - snapshot['auth_checked_at'] > current_app.config.get('USER_AUTH_CACHE_TTL', 5):
+        if not _refresh_auth_fields(user_id, snapshot):
+            return None
+
+    return CachedUser(snapshot)
+
+
+def invalidate_user(user_id):
+    """Удаляет снимок пользователя из кэша (после изменения профиля, статуса, этапов)"""
+    if _cache is None or user_id is None:
+        return
+    with _cache_lock:
+        _cache.pop(int(user_id), None)
+
+
+def invalidate_all_users():
+    """Очищает кэш целиком (например, после изменения стандартных этапов отбора)"""
+    if _cache is None:
+        return
+    with _cache_lock:
+        _cache.clear()
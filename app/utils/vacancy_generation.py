@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Потоковая генерация вакансий с помощью AI.
+
+Запрос к модели выполняется в фоновом потоке, а не в потоке HTTP-запроса.
+Поток запроса только читает события задачи и отдает их клиенту как
+server-sent events: поля вакансии заполняются по мере генерации.
+
+Задачи хранятся в памяти процесса. Поэтому события отдаются в том же
+HTTP-ответе, который запустил задачу, а отмена срабатывает и при закрытии
+соединения клиентом, и по отдельному запросу cancel.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+FINAL_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+# Сколько секунд завершенная задача остается доступной по id
+JOB_TTL = 600
+KEEPALIVE_INTERVAL = 15
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+# Начало строкового значения поля: "field": "
+_field_patterns = {}
+
+
+def partial_fields(text, fields):
+    """
+    Значения строковых полей из незавершенного JSON
+
+    Возвращает уже сгенерированную часть каждого поля, даже если закрывающая
+    кавычка еще не пришла.
+
+    Returns:
+        dict: {поле: текст}
+    """
+    values = {}
+    for field in fields:
+        pattern = _field_patterns.get(field)
+        if pattern is None:
+            pattern = _field_patterns[field] = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        match = pattern.search(text)
+        if not match:
+            continue
+
+        raw = []
+        position = match.end()
+        while position < len(text):
+            char = text[position]
+            if char == '\\':
+                if position + 1 >= len(text):
+                    break
+                if text[position + 1] == 'u':
+                    if position + 6 > len(text):
+                        break
+                    raw.append(text[position:position + 6])
+                    position += 6
+                    continue
+                raw.append(text[position:position + 2])
+                position += 2
+                continue
+            if char == '"':
+                break
+            raw.append(char)
+            position += 1
+
+        try:
+            values[field] = json.loads('"' + ''.join(raw) + '"')
+        except ValueError:
+            continue
+    return values
+
+
+class GenerationJob:
+    """Задача генерации вакансии: список событий и признак отмены"""
+
+    def __init__(self, user_id):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.status = STATUS_RUNNING
+        self.events = []
+        self.cancel_event = threading.Event()
+        self.created_at = time.monotonic()
+        self.finished_at = None
+        self._condition = threading.Condition()
+
+    def emit(self, event, data):
+        with self._condition:
+            self.events.append((event, data))
+            self._condition.notify_all()
+
+    def finish(self, status, event, data):
+        with self._condition:
+            self.status = status
+            self.finished_at = time.monotonic()
+            self.events.append((event, data))
+            self._condition.notify_all()
+
+    def wait(self, position, timeout):
+        """Ждет событий после position; возвращает новые события"""
+        with self._condition:
+            if len(self.events) <= position and self.status not in FINAL_STATUSES:
+                self._condition.wait(timeout)
+            return self.events[position:]
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+def _cleanup():
+    now = time.monotonic()
+    with _jobs_lock:
+        for job_id in [
+            job_id for job_id, job in _jobs.items()
+            if job.finished_at is not None and now - job.finished_at > JOB_TTL
+        ]:
+            del _jobs[job_id]
+
+
+def get_job(job_id, user_id):
+    """Задача текущего процесса, принадлежащая пользователю, или None"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None or job.user_id != user_id:
+        return None
+    return job
+
+
+def _run(app, job, params):
+    from app.utils.ai_service import stream_vacancy_with_ai, VACANCY_TEXT_FIELDS
+
+    sent = {}
+
+    def on_delta(delta, text):
+        # Отправляем только изменившиеся поля
+        changed = {
+            field: value for field, value in partial_fields(text, VACANCY_TEXT_FIELDS).items()
+            if sent.get(field) != value
+        }
+        if changed:
+            sent.update(changed)
+            job.emit('fields', changed)
+
+    with app.app_context():
+        started = time.monotonic()
+        try:
+            data = stream_vacancy_with_ai(on_delta=on_delta, cancel_event=job.cancel_event, **params)
+            if data is None:
+                job.finish(STATUS_CANCELLED, 'cancelled', {})
+                return
+            data['ai_generation_metadata']['duration_seconds'] = round(time.monotonic() - started, 2)
+            job.finish(STATUS_DONE, 'done', data)
+        except Exception as e:
+            app.logger.error(f"Ошибка потоковой генерации вакансии: {str(e)}", exc_info=True)
+            job.finish(STATUS_FAILED, 'error', {'message': str(e)})
+
+
+def start_generation(app, user_id, **params):
+    """
+    Запускает генерацию вакансии в фоновом потоке
+
+    Args:
+        app: Экземпляр приложения
+        user_id: Пользователь, запустивший генерацию
+        params: title, employment_type, description_tasks, description_conditions, use_cache
+
+    Returns:
+        GenerationJob: Запущенная задача
+    """
+    _cleanup()
+    job = GenerationJob(user_id)
+    with _jobs_lock:
+        _jobs[job.id] = job
+
+    thread = threading.Thread(target=_run, args=(app, job, params), name=f'vacancy-generation-{job.id[:8]}')
+    thread.daemon = True
+    thread.start()
+    return job
+
+
+def _format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, ensure_ascii=False, default=str))
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream_events(job):
+    """
+    Генератор server-sent events задачи
+
+    Если клиент закрыл соединение, генератор закрывается сервером (GeneratorExit)
+    и задача отменяется.
+    """
+    position = 0
+    finished = False
+    try:
+        yield _format_event('job', {
+            'job_id': job.id,
+            'started_at': datetime.now(timezone.utc).isoformat()
+        })
+        while not finished:
+            events = job.wait(position, KEEPALIVE_INTERVAL)
+            if not events:
+                # Комментарий не дает прокси закрыть простаивающее соединение
+                yield ': keepalive\n\n'
+                continue
+            for event, data in events:
+                yield _format_event(event, data, position)
+                position += 1
+                finished = event in ('done', 'error', 'cancelled')
+    finally:
+        if not finished:
+            job.cancel()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Память и объем данных страницы списка кандидатов.
+
+Сравниваются три способа получить кандидатов вакансии:
+- полная сущность Candidate со всеми полями (как до отложенных групп);
+- сущность Candidate с отложенными группами resume/answers/ai_details;
+- строки app.utils.candidate_lists.list_query.
+Для каждого выводятся время запроса, пик памяти Python (tracemalloc) и
+объем значений, полученных из базы.
+
+По умолчанию используется конфигурация testing (SQLite в памяти) и
+синтетические кандидаты с резюме и JSON AI-анализа типичного размера.
+С --db замер выполняется на базе из конфигурации FLASK_ENV для
+существующей вакансии.
+
+Использование:
+    python benchmarks/candidate_list.py
+    python benchmarks/candidate_list.py --candidates 5000
+    python benchmarks/candidate_list.py --db --vacancy-id 12
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app import create_app, db  # noqa: E402
+from app.models import Candidate, Vacancy, C_Selection_Stage  # noqa: E402
+from app.utils.candidate_lists import list_query, full_options  # noqa: E402
+
+RESUME_TEXT = (
+    "2019-2024 ООО \"Ромашка\", Backend-разработчик. Разработка REST API на Flask, "
+    "PostgreSQL, Redis, Celery; оптимизация запросов SQLAlchemy, код-ревью.\n"
+) * 120
+
+STRUCTURED_DATA = {
+    'experience': [
+        {'company': f'Компания {i}', 'position': 'Backend-разработчик', 'year_start': str(2014 + i),
+         'year_end': str(2015 + i), 'description': 'Разработка REST API, PostgreSQL, Celery, Docker. ' * 10}
+        for i in range(6)
+    ],
+    'skills': ['Python', 'Flask', 'PostgreSQL', 'Redis', 'Docker', 'Celery'] * 5,
+    'nlp': {'entities': {'organizations': [f'Организация {i}' for i in range(150)]}}
+}
+
+ANALYSIS_DATA = {
+    'skills_breakdown': {f'навык {i}': 'подробный комментарий модели к навыку ' * 3 for i in range(20)},
+    'interview_questions': ['Вопрос для интервью с пояснением, на что обратить внимание?' * 2] * 10,
+    'stop_factors': [],
+}
+
+
+def seed(count):
+    """Создает вакансию, этап и count кандидатов"""
+    db.create_all()
+    # Справочники не заполняются: внешние ключи SQLite не проверяет
+    stage = C_Selection_Stage(name='Новый', color='#0d6efd', id_c_selection_status=1)
+    vacancy = Vacancy(
+        title='Backend-разработчик', id_c_employment_type=1,
+        description_tasks='Разработка API', description_conditions='Офис', ideal_profile='Python'
+    )
+    db.session.add_all([stage, vacancy])
+    db.session.flush()
+
+    for number in range(count):
+        db.session.add(Candidate(
+            vacancy_id=vacancy.id,
+            user_id=1,
+            stage_id=stage.id,
+            full_name=f'Кандидат {number}',
+            tracking_code=f'bench-{number}',
+            base_answers={'experience_years': 5, 'about': 'Расскажу о себе подробнее. ' * 20},
+            vacancy_answers={str(i): 'Развернутый ответ на вопрос вакансии. ' * 10 for i in range(5)},
+            soft_answers={str(i): 'Ответ на вопрос о soft skills. ' * 10 for i in range(5)},
+            resume_text=RESUME_TEXT,
+            structured_resume_data=STRUCTURED_DATA,
+            cover_letter='Здравствуйте! Прошу рассмотреть мою кандидатуру. ' * 30,
+            ai_match_percent=number % 100,
+            ai_pros='Сильная сторона кандидата\n' * 15,
+            ai_cons='Слабая сторона кандидата\n' * 15,
+            ai_recommendation='Рекомендуется пригласить на техническое интервью. ' * 5,
+            ai_analysis_data=ANALYSIS_DATA,
+        ))
+    db.session.commit()
+    return vacancy.id
+
+
+def value_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, (dict, list)):
+        return len(repr(value))
+    return len(str(value))
+
+
+def measure(label, load, size_of):
+    db.session.expunge_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = load()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    transferred = sum(size_of(row) for row in rows)
+    print(
+        f"{label:<28} строк: {len(rows):6}  время: {elapsed * 1000:8.1f} мс  "
+        f"пик памяти: {peak / 2 ** 20:8.2f} МБ  данные: {transferred / 2 ** 20:8.2f} МБ"
+    )
+    return peak
+
+
+def entity_size(candidate):
+    # Значения, загруженные из базы (отложенные поля не попадают в __dict__)
+    return sum(value_size(value) for key, value in candidate.__dict__.items() if not key.startswith('_sa_'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=2000, help='синтетических кандидатов')
+    parser.add_argument('--db', action='store_true', help='база из конфигурации FLASK_ENV')
+    parser.add_argument('--vacancy-id', type=int, default=None, help='вакансия для замера с --db')
+    args = parser.parse_args()
+
+    app = create_app(os.getenv('FLASK_ENV', 'default') if args.db else 'testing')
+    with app.app_context():
+        if args.db:
+            vacancy_id = args.vacancy_id
+            if vacancy_id is None:
+                print("Укажите --vacancy-id для замера на базе")
+                return
+        else:
+            vacancy_id = seed(args.candidates)
+
+        full = measure(
+            'полная сущность',
+            lambda: Candidate.query.options(*full_options()).filter_by(vacancy_id=vacancy_id).all(),
+            entity_size
+        )
+        measure(
+            'сущность, отложенные группы',
+            lambda: Candidate.query.filter_by(vacancy_id=vacancy_id).all(),
+            entity_size
+        )
+        slim = measure(
+            'list_query',
+            lambda: list_query().filter(Candidate.vacancy_id == vacancy_id).order_by(Candidate.created_at.desc()).all(),
+            lambda row: sum(value_size(value) for value in row)
+        )
+        print(f"Пик памяти list_query меньше в {full / max(slim, 1):.0f} раз")
+
+
+if __name__ == '__main__':
+    main()
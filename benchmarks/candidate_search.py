@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Скорость и точность индекса семантического поиска кандидатов.
+
+Индекс app.utils.candidate_search.VectorIndex заполняется случайными
+нормированными векторами размерности модели (384 у
+paraphrase-multilingual-MiniLM-L12-v2), часть векторов добавляется по
+одному, как при обработке новых резюме. Для HNSW и точного перебора numpy
+выводятся время построения, время добавления одного вектора, задержка
+запроса (p50/p99), в том числе с ограничением по доступным кандидатам, и
+recall@k относительно точного поиска. Модель для замера не нужна.
+
+Использование:
+    python benchmarks/candidate_search.py
+    python benchmarks/candidate_search.py --size 200000 --queries 500 --ef 128
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.utils.candidate_search import VectorIndex  # noqa: E402
+
+
+def random_vectors(count, dimensions, rng):
+    # Кластеры похожих резюме ближе к реальным данным, чем равномерный шум
+    centers = rng.standard_normal((max(1, count // 200), dimensions)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+
+def measure(label, index, vectors, queries, k, allowed, exact_results):
+    incremental = min(1000, len(vectors) // 10)
+    started = time.perf_counter()
+    index.add(np.arange(len(vectors) - incremental), vectors[:-incremental])
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for position in range(len(vectors) - incremental, len(vectors)):
+        index.add([position], vectors[position:position + 1])
+    insert_ms = (time.perf_counter() - started) / incremental * 1000
+
+    timings, filtered_timings, recall = [], [], []
+    for number, query in enumerate(queries):
+        started = time.perf_counter()
+        found = index.search(query, k)
+        timings.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        index.search(query, k, allowed)
+        filtered_timings.append(time.perf_counter() - started)
+        if exact_results is not None:
+            recall.append(len({i for i, _ in found} & exact_results[number]) / k)
+
+    print(
+        f"{label:<6} построение: {build:7.1f} с  добавление: {insert_ms:6.2f} мс  "
+        f"запрос p50/p99: {percentile(timings, 50):6.2f}/{percentile(timings, 99):6.2f} мс  "
+        f"с фильтром p50: {percentile(filtered_timings, 50):6.2f} мс"
+        + (f"  recall@{k}: {np.mean(recall):.3f}" if recall else '')
+    )
+    return [{i for i, _ in index.search(query, k)} for query in queries]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=50000, help='кандидатов в индексе')
+    parser.add_argument('--dimensions', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--m', type=int, default=16, help='EMBEDDING_HNSW_M')
+    parser.add_argument('--ef-construction', type=int, default=200, help='EMBEDDING_HNSW_EF_CONSTRUCTION')
+    parser.add_argument('--ef', type=int, default=64, help='EMBEDDING_HNSW_EF_SEARCH')
+    parser.add_argument('--allowed', type=float, default=0.05, help='доля кандидатов, доступных пользователю')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = random_vectors(args.size, args.dimensions, rng)
+    # Запросы - рядом с существующими резюме
+    queries = vectors[rng.integers(0, args.size, args.queries)] + 0.05 * rng.standard_normal((args.queries, args.dimensions)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    allowed = set(rng.choice(args.size, max(1, int(args.size * args.allowed)), replace=False).tolist())
+
+    exact = VectorIndex('benchmark', args.dimensions, use_hnsw=False)
+    exact_results = measure('numpy', exact, vectors, queries, args.k, allowed, None)
+
+    hnsw = VectorIndex('benchmark', args.dimensions, args.m, args.ef_construction, args.ef)
+    if not hnsw.approximate:
+        print("hnswlib не установлен: замер HNSW пропущен")
+        return
+    measure('hnsw', hnsw, vectors, queries, args.k, allowed, exact_results)
+
+
+if __name__ == '__main__':
+    main()
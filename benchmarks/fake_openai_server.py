@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Локальный сервер, имитирующий /v1/chat/completions API OpenAI с лимитами.
+
+Сервер ограничивает запросы в секунду (token bucket) и одновременные
+запросы. Сверх лимита он отвечает 429 с заголовками Retry-After и
+retry-after-ms, как API OpenAI. Дополнительно можно задать задержку ответа
+и долю случайных ошибок 500. Ответ - JSON в формате chat.completion с
+usage, содержимое - "{}" (для response_format=json_object) или короткий текст.
+
+Приложение можно направить на сервер как на локальный провайдер:
+    LLM_PROVIDER=local LLM_LOCAL_BASE_URL=http://127.0.0.1:8765/v1
+
+Использование:
+    python benchmarks/fake_openai_server.py --port 8765 --rps 5 --latency 0.5
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLimits:
+    """Лимиты и счетчики сервера"""
+
+    def __init__(self, rps=10, burst=None, max_concurrency=0, latency=0.2, error_rate=0.0):
+        self.rps = rps
+        self.capacity = burst or rps
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.latency = latency
+        self.error_rate = error_rate
+        self.stats = {'ok': 0, 'rate_limited': 0, 'errors': 0, 'max_active': 0}
+        self._lock = threading.Lock()
+
+    def admit(self):
+        """None, если запрос принят, иначе пауза до следующей попытки в секундах"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rps)
+            self.updated = now
+            if self.max_concurrency and self.active >= self.max_concurrency:
+                self.stats['rate_limited'] += 1
+                return max(self.latency, 0.05)
+            if self.tokens < 1:
+                self.stats['rate_limited'] += 1
+                return (1 - self.tokens) / self.rps
+            self.tokens -= 1
+            self.active += 1
+            self.stats['max_active'] = max(self.stats['max_active'], self.active)
+            return None
+
+    def release(self, ok):
+        with self._lock:
+            self.active -= 1
+            self.stats['ok' if ok else 'errors'] += 1
+
+
+def make_handler(limits):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, headers=None):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._send(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+                return
+
+            wait = limits.admit()
+            if wait is not None:
+                self._send(429, {'error': {'message': 'Rate limit reached', 'type': 'requests', 'code': 'rate_limit_exceeded'}}, {
+                    'Retry-After': str(max(1, math.ceil(wait))),
+                    'retry-after-ms': str(int(wait * 1000) + 1)
+                })
+                return
+
+            ok = random.random() >= limits.error_rate
+            try:
+                time.sleep(limits.latency)
+                if not ok:
+                    self._send(500, {'error': {'message': 'Internal server error', 'type': 'server_error'}})
+                    return
+                json_mode = (request.get('response_format') or {}).get('type') == 'json_object'
+                prompt_chars = sum(len(json.dumps(m.get('content'), ensure_ascii=False)) for m in request.get('messages', []))
+                self._send(200, {
+                    'id': f'chatcmpl-{uuid.uuid4().hex}',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'fake'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': '{}' if json_mode else 'OK'},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': {
+                        'prompt_tokens': prompt_chars // 3,
+                        'completion_tokens': 1,
+                        'total_tokens': prompt_chars // 3 + 1
+                    }
+                })
+            finally:
+                limits.release(ok)
+
+    return Handler
+
+
+def start_server(port=0, **limits_options):
+    """
+    Запускает сервер в фоновом потоке
+
+    Returns:
+        tuple: (server, limits); адрес API - http://127.0.0.1:{server.server_port}/v1
+    """
+    limits = FakeLimits(**limits_options)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(limits))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='fake-openai-server', daemon=True)
+    thread.start()
+    return server, limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rps', type=float, default=10, help='запросов в секунду')
+    parser.add_argument('--burst', type=float, help='запас лимита (по умолчанию rps)')
+    parser.add_argument('--concurrency', type=int, default=0, help='одновременных запросов, 0 - без ограничения')
+    parser.add_argument('--latency', type=float, default=0.2, help='задержка ответа, секунд')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля ответов 500')
+    args = parser.parse_args()
+
+    server, limits = start_server(
+        args.port, rps=args.rps, burst=args.burst, max_concurrency=args.concurrency,
+        latency=args.latency, error_rate=args.error_rate
+    )
+    print(f"Сервер: http://127.0.0.1:{server.server_port}/v1 (Ctrl+C - остановить)")
+    try:
+        while True:
+            time.sleep(10)
+            print(limits.stats)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
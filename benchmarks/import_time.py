@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Замер времени холодного старта веб- и фоновых процессов.
+
+Каждый сценарий запускается в отдельном интерпретаторе с `python -X importtime`,
+поэтому кэш модулей не влияет на результат. Для каждого сценария выводится
+общее время запуска, суммарное время импортов и самые тяжелые модули.
+
+Использование:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 5 --top 15 web worker
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Сценарии запуска: код, который выполняется в новом процессе
+SCENARIOS = {
+    # Веб-процесс: то, что делает hrai.py при старте
+    'web': "from app import create_app; create_app()",
+    # Фоновый обработчик резюме
+    'worker': "from app import get_worker_app; get_worker_app()",
+    # Импорт AI-сервиса без обращения к OpenAI
+    'ai_service': "from app import create_app; create_app(); import app.utils.ai_service",
+    # Тяжелые зависимости по отдельности (для сравнения)
+    'openai': "import openai",
+    'fitz': "import fitz",
+    'docx': "import docx",
+    'pandas': "import pandas",
+}
+
+
+def run_scenario(code):
+    """
+    Запускает код в новом интерпретаторе с -X importtime
+
+    Returns:
+        tuple: (время процесса в секундах, список (cumulative_us, self_us, module))
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError('\n'.join(errors[-5:]))
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        imports.append((int(cumulative_us), int(self_us), module.rstrip()))
+    return elapsed, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замер времени импорта для веб- и фоновых процессов')
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS), help='Сценарии для замера')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество запусков каждого сценария')
+    parser.add_argument('--top', type=int, default=10, help='Количество самых тяжелых модулей в отчете')
+    args = parser.parse_args()
+
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"Неизвестный сценарий: {name}. Доступны: {', '.join(SCENARIOS)}")
+
+        timings = []
+        imports = []
+        try:
+            for _ in range(args.repeat):
+                elapsed, imports = run_scenario(SCENARIOS[name])
+                timings.append(elapsed)
+        except RuntimeError as e:
+            print(f"\n=== {name}: ошибка запуска ===\n{e}")
+            continue
+
+        total_self = sum(self_us for _, self_us, _ in imports) / 1000
+        print(f"\n=== {name} ===")
+        print(f"Время процесса: медиана {statistics.median(timings) * 1000:.0f} мс, "
+              f"мин {min(timings) * 1000:.0f} мс ({args.repeat} запусков)")
+        print(f"Импорты: {len(imports)} модулей, {total_self:.0f} мс")
+
+        # Верхний уровень пакетов (без отступа) показывает, кто тянет зависимости
+        top_level = [item for item in imports if not item[2].startswith('  ')]
+        print("Самые тяжелые импорты верхнего уровня:")
+        for cumulative_us, _, module in sorted(top_level, reverse=True)[:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} мс  {module.strip()}")
+
+
+if __name__ == '__main__':
+    main()
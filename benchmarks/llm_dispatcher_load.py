@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Нагрузочная проверка диспетчера запросов к LLM на локальном сервере.
+
+Поднимает benchmarks/fake_openai_server.py с ограничением частоты и
+отправляет пачку запросов из множества потоков (как фоновые задачи анализа
+при всплеске откликов) двумя способами: напрямую клиентом openai без
+повторов и через app.utils.llm_dispatcher. Для каждого способа выводятся
+успешные и неудачные запросы, ответы 429 сервера и общее время.
+
+Использование:
+    python benchmarks/llm_dispatcher_load.py
+    python benchmarks/llm_dispatcher_load.py --requests 300 --threads 64 --rps 20 --error-rate 0.05
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.llm_dispatcher import Dispatcher, estimate_tokens  # noqa: E402
+from fake_openai_server import start_server  # noqa: E402
+
+MESSAGES = [
+    {"role": "system", "content": "Ты - HR-аналитик, специализирующийся на оценке соответствия кандидатов требованиям вакансий."},
+    {"role": "user", "content": "Оцени кандидата: Python-разработчик, 5 лет опыта, Flask, PostgreSQL. " * 20}
+]
+
+
+def run(label, requests, threads, send):
+    started = time.monotonic()
+    ok = failed = 0
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(send) for _ in range(requests)]:
+            try:
+                future.result()
+                ok += 1
+            except Exception:
+                failed += 1
+    elapsed = time.monotonic() - started
+    print(f"{label:<14} успешно: {ok:>4}  ошибок: {failed:>4}  время: {elapsed:6.1f} с")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=32, help='потоков, отправляющих запросы')
+    parser.add_argument('--rps', type=float, default=20, help='лимит сервера, запросов в секунду')
+    parser.add_argument('--latency', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, default=8, help='LLM_MAX_CONCURRENCY диспетчера')
+    args = parser.parse_args()
+
+    from openai import OpenAI
+
+    for label, use_dispatcher in (('напрямую', False), ('диспетчер', True)):
+        server, limits = start_server(rps=args.rps, latency=args.latency, error_rate=args.error_rate)
+        client = OpenAI(api_key='sk-fake', base_url=f'http://127.0.0.1:{server.server_port}/v1', max_retries=0)
+        # Лимит диспетчера совпадает с лимитом сервера, запас - одна секунда
+        dispatcher = Dispatcher(
+            max_concurrency=args.concurrency, rpm=args.rps * 60, tpm=0, max_retries=5,
+            backoff_base=0.5, backoff_max=10, queue_timeout=300, burst_seconds=1
+        )
+        tokens = estimate_tokens(MESSAGES, 10)
+
+        def send():
+            request = lambda: client.chat.completions.create(model='gpt-4o', messages=MESSAGES, max_tokens=10)  # noqa: E731
+            return dispatcher.call(request, tokens=tokens) if use_dispatcher else request()
+
+        run(label, args.requests, args.threads, send)
+        print(f"{'':<14} сервер: {limits.stats}")
+        if use_dispatcher:
+            print(f"{'':<14} диспетчер: {dict(dispatcher.stats, wait_seconds=round(dispatcher.stats['wait_seconds'], 1))}")
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
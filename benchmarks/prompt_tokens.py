@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Токены запроса оценки кандидата: до и после.
+
+"До" - прежняя сборка запроса: фиксированные срезы resume_text[:10000] и
+cover_letter[:3000], JSON структурированных данных с отступами, отступы
+f-строки в каждой строке. "После" - app.utils.prompt_builder с бюджетом
+токенов. Для каждого кандидата выводятся токены обоих вариантов и
+сокращенные разделы. Запросы к API не выполняются.
+
+Токены считаются tiktoken (кодировка модели, по умолчанию gpt-4o). Если файл
+кодировки недоступен, можно указать другую (--encoding cl100k_base) - тогда
+сравнение будет приближенным.
+
+Использование:
+    python benchmarks/prompt_tokens.py                   # синтетические кандидаты
+    python benchmarks/prompt_tokens.py --budget 4000 --combined
+    python benchmarks/prompt_tokens.py --db --limit 50   # кандидаты из базы
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from types import SimpleNamespace
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.utils import prompt_builder  # noqa: E402
+
+RESUME_BLOCK = """Опыт работы
+{year}-{next_year}  ООО "Ромашка", Ашхабад. Backend-разработчик
+- Разработка REST API на Flask и FastAPI, PostgreSQL, Redis, Celery
+- Оптимизация запросов SQLAlchemy, внедрение миграций Alembic
+- Настройка CI/CD (GitLab CI, Docker), код-ревью, наставничество
+Developed internal billing service in Python, reduced report generation time by 40%.
+"""
+
+RESUME_TAIL = """Образование
+2012-2017 Туркменский государственный университет, прикладная математика
+Навыки: Python, Flask, Django, PostgreSQL, Docker, Linux, Git, REST API, Kafka
+Языки: русский (родной), английский (B2), туркменский (B1)
+Телефон: +993 65 123456, email: ivanov@example.com
+"""
+
+STRUCTURED_DATA = {
+    'personal_info': {'name': 'Иванов Иван Иванович', 'email': 'ivanov@example.com', 'phone': '+993 65 123456',
+                      'location': 'Ашхабад', 'linkedin': None, 'github': ''},
+    'education': [{'institution': 'ТГУ', 'degree': 'Бакалавр', 'field': 'Прикладная математика',
+                   'start_date': '2012', 'end_date': '2017', 'description': ''}],
+    'experience': [
+        {'company': f'Компания {i}', 'position': 'Backend-разработчик', 'start_date': str(2017 + i),
+         'end_date': str(2018 + i), 'description': 'Разработка REST API, PostgreSQL, Celery, Docker', 'achievements': []}
+        for i in range(6)
+    ],
+    'skills': ['Python', 'Flask', 'Django', 'PostgreSQL', 'Redis', 'Docker', 'Linux', 'Git', 'Kafka', 'Celery'],
+    'languages': [{'language': 'Русский', 'level': 'Родной'}, {'language': 'Английский', 'level': 'B2'}],
+    'certifications': [],
+    'summary': 'Backend-разработчик с опытом 7 лет',
+    'nlp': {'language': 'ru', 'entities': [{'text': 'Ромашка', 'label': 'ORG'}] * 20, 'processed_at': '2024-05-01'},
+    'keywords': {'matches': {str(i): 2 for i in range(30)}, 'industries': [1, 4], 'processed_at': '2024-05-01'}
+}
+
+
+def make_vacancy():
+    questions = [{'id': i, 'text': f'Опишите ваш опыт работы с технологией №{i} в production-проектах'} for i in range(1, 6)]
+    soft_questions = [{'id': i, 'text': f'Расскажите о ситуации №{i}, когда вам пришлось решать конфликт в команде'}
+                      for i in range(1, 4)]
+    return SimpleNamespace(
+        title='Python-разработчик (backend)',
+        c_employment_type=SimpleNamespace(name='Полная занятость'),
+        description_tasks='Разработка и поддержка backend-сервисов, проектирование API, код-ревью. ' * 6,
+        description_conditions='Официальное трудоустройство, гибкий график, ДМС, обучение за счет компании. ' * 4,
+        ideal_profile='Опыт коммерческой разработки на Python от 3 лет, PostgreSQL, Docker, английский B1+. ' * 4,
+        company_values='Открытость, ответственность, развитие. ' * 3,
+        questions_json=questions,
+        soft_questions_json=soft_questions
+    )
+
+
+def make_candidate(name, vacancy, resume_blocks, cover_letter_repeat, structured):
+    resume = ''.join(RESUME_BLOCK.format(year=2000 + i, next_year=2001 + i) for i in range(resume_blocks)) + RESUME_TAIL
+    return SimpleNamespace(
+        id=name,
+        full_name='Иванов Иван Иванович',
+        vacancy=vacancy,
+        base_answers={'location': 'Ашхабад', 'experience_years': '5-10', 'education': 'higher',
+                      'desired_salary': '15000', 'gender': 'male'},
+        vacancy_answers={str(q['id']): 'Использовал в нескольких проектах: ' + 'проектирование схемы, оптимизация. ' * 8
+                         for q in vacancy.questions_json},
+        soft_answers={str(q['id']): 'Обсудили проблему, нашли компромисс и договорились о правилах. ' * 4
+                      for q in vacancy.soft_questions_json},
+        resume_text=resume,
+        cover_letter=('Здравствуйте! Меня заинтересовала ваша вакансия. ' * cover_letter_repeat) or None,
+        structured_resume_data=STRUCTURED_DATA if structured else {}
+    )
+
+
+def sample_candidates():
+    vacancy = make_vacancy()
+    return [
+        make_candidate('короткое резюме', vacancy, 2, 0, False),
+        make_candidate('среднее + структура', vacancy, 10, 10, True),
+        make_candidate('длинное + письмо', vacancy, 40, 120, True),
+        make_candidate('длинное без структуры', vacancy, 40, 0, False),
+    ]
+
+
+def legacy_prompt(candidate):
+    """Прежняя сборка запроса (до prompt_builder)"""
+    vacancy = candidate.vacancy
+    location = candidate.base_answers.get('location', 'Не указано') if candidate.base_answers else 'Не указано'
+    experience_years = candidate.base_answers.get('experience_years', 'Не указано') if candidate.base_answers else 'Не указано'
+    education = candidate.base_answers.get('education', 'Не указано') if candidate.base_answers else 'Не указано'
+    education_text = prompt_builder.EDUCATION_TRANSLATIONS.get(education, education)
+    location_info = location
+    if location and location != 'Не указано':
+        location_info = f"{location} (указан город проживания кандидата)"
+
+    professional_answers = ""
+    if candidate.vacancy_answers and vacancy.questions_json:
+        question_texts = {str(q['id']): q['text'] for q in vacancy.questions_json}
+        for question_id, answer in candidate.vacancy_answers.items():
+            professional_answers += f"Вопрос: {question_texts.get(question_id, f'Вопрос {question_id}')}\nОтвет: {answer}\n\n"
+
+    soft_skills_answers = ""
+    if candidate.soft_answers and vacancy.soft_questions_json:
+        soft_question_texts = {str(q['id']): q['text'] for q in vacancy.soft_questions_json}
+        for question_id, answer in candidate.soft_answers.items():
+            soft_skills_answers += f"Вопрос: {soft_question_texts.get(question_id, f'Вопрос {question_id}')}\nОтвет: {answer}\n\n"
+
+    cover_letter = f"СОПРОВОДИТЕЛЬНОЕ ПИСЬМО:\n{candidate.cover_letter[:3000]}" if candidate.cover_letter else ""
+    structured = (json.dumps(candidate.structured_resume_data, ensure_ascii=False, indent=2)
+                  if candidate.structured_resume_data else "Нет структурированных данных")
+    return f"""
+        ВАКАНСИЯ:
+        Название: {vacancy.title}
+        Тип занятости: {vacancy.c_employment_type.name if vacancy.c_employment_type else 'Не указано'}
+        Описание задач: {vacancy.description_tasks or 'Не указано'}
+        Условия работы: {vacancy.description_conditions or 'Не указано'}
+        Требования к кандидату: {vacancy.ideal_profile or 'Не указано'}
+        Корпоративные ценности: {vacancy.company_values or 'Не указано'}
+
+        КАНДИДАТ:
+        ФИО: {candidate.full_name}
+        Город: {location_info}
+        Опыт работы: {experience_years}
+        Образование: {education_text}
+        Зарплатные ожидания: {candidate.base_answers.get('desired_salary', 'Не указано') if candidate.base_answers else 'Не указано'}
+        Пол: {candidate.base_answers.get('gender', 'Не указано') if candidate.base_answers else 'Не указано'}
+
+        Профессиональные вопросы и ответы (Очень важно учитывать эти ответы при оценке):
+        {professional_answers}
+
+        Вопросы о soft skills и ответы (Очень важно учитывать эти ответы при оценке):
+        {soft_skills_answers}
+
+        РЕЗЮМЕ КАНДИДАТА:
+        {candidate.resume_text[:10000] if candidate.resume_text else 'Не предоставлено'}
+
+        {cover_letter}
+
+        СТРУКТУРИРОВАННЫЕ ДАННЫЕ ИЗ РЕЗЮМЕ:
+        {structured}
+    """
+
+
+def db_candidates(limit):
+    from app import create_app
+    from app.models import Candidate
+    import sqlalchemy as sa
+
+    app = create_app()
+    app.app_context().push()
+    from app import db
+    return db.session.scalars(
+        sa.select(Candidate).where(Candidate.resume_text.isnot(None)).order_by(Candidate.id.desc()).limit(limit)
+    ).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=int, default=6000, help='бюджет запроса в токенах')
+    parser.add_argument('--model', default=prompt_builder.DEFAULT_MODEL)
+    parser.add_argument('--encoding', help='кодировка tiktoken вместо кодировки модели')
+    parser.add_argument('--combined', action='store_true', help='с инструкциями совмещенного анализа')
+    parser.add_argument('--db', action='store_true', help='кандидаты из базы вместо синтетических')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.encoding:
+        import tiktoken
+        prompt_builder._encodings[args.model] = tiktoken.get_encoding(args.encoding)
+    encoding = prompt_builder.get_encoding(args.model)
+    print(f"Кодировка: {encoding.name}, бюджет: {args.budget} токенов\n")
+
+    instructions = ''
+    if args.combined:
+        from app.utils.ai_service import COMBINED_ANALYSIS_INSTRUCTIONS
+        instructions = COMBINED_ANALYSIS_INSTRUCTIONS
+
+    candidates = db_candidates(args.limit) if args.db else sample_candidates()
+    before_all, after_all = [], []
+    print(f"{'Кандидат':<26}{'до':>8}{'после':>8}{'экономия':>10}  сокращено")
+    for candidate in candidates:
+        before = prompt_builder.count_tokens(legacy_prompt(candidate) + instructions, args.model)
+        built = prompt_builder.build_analysis_prompt(candidate, args.budget, args.model, instructions)
+        before_all.append(before)
+        after_all.append(built.tokens)
+        saving = 100 * (before - built.tokens) / before if before else 0
+        print(f"{str(candidate.id)[:25]:<26}{before:>8}{built.tokens:>8}{saving:>9.1f}%  {', '.join(built.truncated) or '-'}")
+
+    if before_all:
+        print(f"\nСреднее: до {statistics.mean(before_all):.0f}, после {statistics.mean(after_all):.0f} токенов, "
+              f"максимум: до {max(before_all)}, после {max(after_all)}")
+
+
+if __name__ == '__main__':
+    main()
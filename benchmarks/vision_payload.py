@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Размер и время подготовки изображений для vision-модели: до и после.
+
+"До" - прежнее поведение: изображение отправляется как есть, страницы PDF
+рендерятся в PNG с увеличением 2x. "После" - app.utils.image_preprocessing
+(EXIF, оттенки серого, выравнивание, уменьшение, JPEG/WebP). Для каждого
+файла выводятся байты, размер base64, оценка токенов и время подготовки.
+Запросы к API не выполняются.
+
+Использование:
+    python benchmarks/vision_payload.py                  # синтетические фото и PDF
+    python benchmarks/vision_payload.py resume.jpg cv.pdf --format WEBP
+"""
+
+import argparse
+import base64
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.utils.image_preprocessing import (  # noqa: E402
+    estimate_vision_tokens, prepare_image_file, render_pdf_page
+)
+
+SAMPLE_LINES = [
+    "Иванов Иван Иванович - Python-разработчик",
+    "Опыт работы: 2019-2024, ООО Ромашка, backend (Flask, PostgreSQL)",
+    "Навыки: Python, SQLAlchemy, Docker, Linux, Git, REST API",
+    "Образование: ТГУ, прикладная математика, 2018",
+    "Languages: Russian (native), English (B2), Turkmen (B1)",
+]
+
+
+def make_phone_photo(path, angle=2.5):
+    """Синтетическое фото резюме с телефона: 3024x4032, наклон, шум JPEG"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    image = Image.new('RGB', (3024, 4032), (236, 232, 224))
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=56)
+    except TypeError:
+        font = ImageFont.load_default()
+    y = 250
+    while y < 3800:
+        for line in SAMPLE_LINES:
+            draw.text((220, y), line, fill=(30, 30, 30), font=font)
+            y += 90
+        y += 60
+    image = image.rotate(angle, resample=Image.BICUBIC, expand=False, fillcolor=(200, 196, 190))
+    image.save(path, format='JPEG', quality=92)
+
+
+def make_pdf(path, pages=2):
+    """Синтетический текстовый PDF формата A4"""
+    import fitz
+
+    document = fitz.open()
+    for _ in range(pages):
+        page = document.new_page(width=595, height=842)
+        y = 60
+        while y < 800:
+            for line in SAMPLE_LINES:
+                page.insert_text((50, y), line, fontsize=10, fontname='helv')
+                y += 16
+            y += 10
+    document.save(path)
+    document.close()
+
+
+def measure(func, repeat):
+    """Результат функции и медианное время выполнения в мс"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(timings)
+
+
+def image_payloads(path, options, repeat):
+    from PIL import Image
+
+    def before():
+        with open(path, 'rb') as file:
+            data = file.read()
+        base64.b64encode(data)
+        with Image.open(io.BytesIO(data)) as image:
+            return [(data, image.width, image.height)]
+
+    def after():
+        prepared = prepare_image_file(path, **options)
+        prepared.data_url
+        return [(prepared.data, prepared.width, prepared.height)]
+
+    return measure(before, repeat), measure(after, repeat)
+
+
+def pdf_payloads(path, options, repeat):
+    import fitz
+
+    def before():
+        pages = []
+        with fitz.open(path) as document:
+            for page in document:
+                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+                data = pix.tobytes("png")
+                base64.b64encode(data)
+                pages.append((data, pix.width, pix.height))
+        return pages
+
+    def after():
+        pages = []
+        with fitz.open(path) as document:
+            for page in document:
+                prepared = render_pdf_page(page, **options)
+                prepared.data_url
+                pages.append((prepared.data, prepared.width, prepared.height))
+        return pages
+
+    return measure(before, repeat), measure(after, repeat)
+
+
+def summarize(pages):
+    size = sum(len(data) for data, _, _ in pages)
+    encoded = sum(4 * ((len(data) + 2) // 3) for data, _, _ in pages)
+    tokens = sum(estimate_vision_tokens(width, height) for _, width, height in pages)
+    return size, encoded, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Размер и время подготовки изображений для vision-модели')
+    parser.add_argument('files', nargs='*', help='Файлы резюме (JPEG, PNG, PDF)')
+    parser.add_argument('--format', default='JPEG', choices=['JPEG', 'WEBP'], help='Формат после сжатия')
+    parser.add_argument('--quality', type=int, default=80, help='Качество JPEG/WebP')
+    parser.add_argument('--no-deskew', action='store_true', help='Без выравнивания')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество запусков')
+    args = parser.parse_args()
+
+    options = {'image_format': args.format, 'quality': args.quality, 'deskew': not args.no_deskew}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = args.files
+        if not files:
+            files = [os.path.join(tmp_dir, 'phone_photo.jpg'), os.path.join(tmp_dir, 'resume.pdf')]
+            make_phone_photo(files[0])
+            make_pdf(files[1])
+
+        for path in files:
+            extension = os.path.splitext(path)[1].lower()
+            if extension == '.pdf':
+                (before, before_ms), (after, after_ms) = pdf_payloads(path, options, args.repeat)
+            elif extension in ('.jpg', '.jpeg', '.png'):
+                (before, before_ms), (after, after_ms) = image_payloads(path, options, args.repeat)
+            else:
+                print(f"\n{path}: неподдерживаемый формат")
+                continue
+
+            before_size, before_encoded, before_tokens = summarize(before)
+            after_size, after_encoded, after_tokens = summarize(after)
+            print(f"\n=== {os.path.basename(path)} (страниц: {len(before)}) ===")
+            print(f"{'':14}{'байт':>12}{'base64':>12}{'токены':>9}{'время, мс':>11}")
+            print(f"{'до':14}{before_size:>12}{before_encoded:>12}{before_tokens:>9}{before_ms:>11.0f}")
+            print(f"{'после':14}{after_size:>12}{after_encoded:>12}{after_tokens:>9}{after_ms:>11.0f}")
+            print(f"Сокращение объема: в {before_size / max(after_size, 1):.1f} раза")
+
+
+if __name__ == '__main__':
+    main()
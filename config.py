@@ -35,6 +35,30 @@ def get_env_variable(name, default=None, required=False):
         
     return value
 
+# Функция для формирования настроек пула соединений SQLAlchemy
+def build_engine_options(pool_size, max_overflow, pool_recycle=1800, pool_timeout=30):
+    """
+    Формирует SQLALCHEMY_ENGINE_OPTIONS с учетом переменных окружения
+    
+    Args:
+        pool_size: Размер пула по умолчанию (DB_POOL_SIZE)
+        max_overflow: Допустимое превышение размера пула (DB_MAX_OVERFLOW)
+        pool_recycle: Время жизни соединения в секундах (DB_POOL_RECYCLE)
+        pool_timeout: Время ожидания свободного соединения в секундах (DB_POOL_TIMEOUT)
+        
+    Returns:
+        Словарь настроек для create_engine
+    """
+    return {
+        'pool_size': int(get_env_variable('DB_POOL_SIZE', pool_size)),
+        'max_overflow': int(get_env_variable('DB_MAX_OVERFLOW', max_overflow)),
+        'pool_recycle': int(get_env_variable('DB_POOL_RECYCLE', pool_recycle)),
+        'pool_timeout': int(get_env_variable('DB_POOL_TIMEOUT', pool_timeout)),
+        'pool_pre_ping': True,
+        'echo': False,
+        'echo_pool': False
+    }
+
 class Config:
     # Основные настройки Flask
     SECRET_KEY = get_env_variable('SECRET_KEY', 'dev-secret-key-replace-in-production')
@@ -53,6 +77,9 @@ class Config:
     # Отключаем логирование SQLAlchemy
     SQLALCHEMY_ECHO = False
     
+    # Работа через PgBouncer в режиме transaction pooling
+    DB_PGBOUNCER_MODE = get_env_variable('DB_PGBOUNCER_MODE', 'False') == 'True'
+    
     # Настройки шифрования для PostgreSQL pgp_sym_encrypt
     ENCRYPTION_KEY = get_env_variable('ENCRYPTION_KEY', 'pgp-encryption-key-replace-in-production')
     ENCRYPTION_OPTIONS = get_env_variable('ENCRYPTION_OPTIONS', 'cipher-algo=aes256')
@@ -66,6 +93,121 @@ class Config:
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10 MB
     ALLOWED_EXTENSIONS = {'pdf', 'docx', 'jpg', 'jpeg', 'png'}
     
+    # Отдача файлов: direct, x-sendfile или x-accel-redirect (nginx)
+    FILE_SERVING_MODE = get_env_variable('FILE_SERVING_MODE', 'direct')
+    USE_X_SENDFILE = FILE_SERVING_MODE == 'x-sendfile'
+    # internal-location nginx, указывающий на UPLOAD_FOLDER
+    FILE_ACCEL_REDIRECT_PREFIX = get_env_variable('FILE_ACCEL_REDIRECT_PREFIX', '/protected-uploads/')
+    
+    # Хранилище загруженных файлов: local (UPLOAD_FOLDER) или s3 (AWS S3, MinIO)
+    STORAGE_BACKEND = get_env_variable('STORAGE_BACKEND', 'local')
+    S3_BUCKET = get_env_variable('S3_BUCKET')
+    S3_PREFIX = get_env_variable('S3_PREFIX', 'uploads')
+    S3_ENDPOINT_URL = get_env_variable('S3_ENDPOINT_URL')  # например, http://minio:9000
+    S3_REGION = get_env_variable('S3_REGION')
+    S3_ACCESS_KEY = get_env_variable('S3_ACCESS_KEY')
+    S3_SECRET_KEY = get_env_variable('S3_SECRET_KEY')
+    S3_PRESIGNED_TTL = int(get_env_variable('S3_PRESIGNED_TTL', 300))
+    
+    # Превью резюме: миниатюра первой страницы и превью первых страниц (JPEG)
+    PREVIEW_THUMB_WIDTH = int(get_env_variable('PREVIEW_THUMB_WIDTH', 240))
+    PREVIEW_PAGE_WIDTH = int(get_env_variable('PREVIEW_PAGE_WIDTH', 800))
+    PREVIEW_MAX_PAGES = int(get_env_variable('PREVIEW_MAX_PAGES', 5))
+    PREVIEW_JPEG_QUALITY = int(get_env_variable('PREVIEW_JPEG_QUALITY', 70))
+    PREVIEW_WORKERS = int(get_env_variable('PREVIEW_WORKERS', 2))  # потоков фонового построения превью старых резюме
+    
+    # Подготовка изображений для распознавания vision-моделью
+    VISION_MAX_LONG_SIDE = int(get_env_variable('VISION_MAX_LONG_SIDE', 2048))
+    VISION_MAX_SHORT_SIDE = int(get_env_variable('VISION_MAX_SHORT_SIDE', 768))
+    VISION_IMAGE_FORMAT = get_env_variable('VISION_IMAGE_FORMAT', 'JPEG')  # JPEG или WEBP
+    VISION_IMAGE_QUALITY = int(get_env_variable('VISION_IMAGE_QUALITY', 80))
+    VISION_DESKEW = get_env_variable('VISION_DESKEW', 'True') == 'True'
+    
+    # Локальный OCR (текстовый слой PDF, Tesseract) перед vision-моделью
+    OCR_LOCAL_ENABLED = get_env_variable('OCR_LOCAL_ENABLED', 'True') == 'True'
+    OCR_LANGUAGES = get_env_variable('OCR_LANGUAGES', 'rus+eng+tuk')
+    OCR_WORKERS = int(get_env_variable('OCR_WORKERS', 0))  # 0 - по числу ядер минус одно
+    OCR_MIN_CONFIDENCE = float(get_env_variable('OCR_MIN_CONFIDENCE', 75))  # ниже - страница уходит в модель
+    OCR_MIN_TEXT_LENGTH = int(get_env_variable('OCR_MIN_TEXT_LENGTH', 50))
+    OCR_TIMEOUT = int(get_env_variable('OCR_TIMEOUT', 120))
+    
+    # NLP-обработка резюме (spaCy)
+    NLP_MODELS = {'ru': 'ru_core_news_lg', 'en': 'en_core_web_lg'}
+    NLP_FALLBACK_LANGUAGE = 'en'  # модель для языков без своей модели (туркменский)
+    NLP_PRELOAD = get_env_variable('NLP_PRELOAD', 'False') == 'True'  # загрузка в create_app до fork
+    NLP_BATCH_SIZE = int(get_env_variable('NLP_BATCH_SIZE', 32))
+    NLP_PROCESSES = int(get_env_variable('NLP_PROCESSES', 1))  # n_process для пакетной обработки
+    NLP_MAX_TEXT_LENGTH = 100000
+    
+    # Разбор резюме и оценка кандидата одним запросом к модели (раздельные запросы - запасной путь)
+    AI_COMBINED_ANALYSIS = get_env_variable('AI_COMBINED_ANALYSIS', 'True') == 'True'
+    
+    # Бюджет запроса оценки кандидата в токенах (app/utils/prompt_builder.py)
+    AI_ANALYSIS_PROMPT_TOKENS = int(get_env_variable('AI_ANALYSIS_PROMPT_TOKENS', 6000))
+    
+    # Ограничения запросов к LLM (app/utils/llm_dispatcher.py) на весь аккаунт провайдера.
+    # Общего хранилища счетчиков нет: каждый процесс получает свою долю -
+    # LLM_MAX_CONCURRENCY, LLM_RPM и LLM_TPM делятся поровну на LLM_PROCESSES
+    # (воркеры gunicorn плюс процесс планировщика и фоновых задач)
+    LLM_PROCESSES = int(get_env_variable('LLM_PROCESSES', get_env_variable('WEB_CONCURRENCY', 1)))
+    LLM_MAX_CONCURRENCY = int(get_env_variable('LLM_MAX_CONCURRENCY', 8))  # одновременных запросов
+    LLM_RPM = int(get_env_variable('LLM_RPM', 500))  # запросов в минуту, 0 - без ограничения
+    LLM_TPM = int(get_env_variable('LLM_TPM', 30000))  # токенов в минуту, 0 - без ограничения
+    LLM_BURST_SECONDS = float(get_env_variable('LLM_BURST_SECONDS', 5))  # запас лимита на всплеск
+    LLM_MAX_RETRIES = int(get_env_variable('LLM_MAX_RETRIES', 5))
+    LLM_BACKOFF_BASE = float(get_env_variable('LLM_BACKOFF_BASE', 1.0))  # секунд, удваивается с каждым повтором
+    LLM_BACKOFF_MAX = float(get_env_variable('LLM_BACKOFF_MAX', 60.0))
+    LLM_QUEUE_TIMEOUT = int(get_env_variable('LLM_QUEUE_TIMEOUT', 300))  # ожидание очереди, секунд
+    
+    # Кэш ответов модели для запросов по вакансиям (app/utils/llm_cache.py)
+    LLM_CACHE_ENABLED = get_env_variable('LLM_CACHE_ENABLED', 'True') == 'True'
+    LLM_CACHE_TTL = int(get_env_variable('LLM_CACHE_TTL', 7 * 24 * 3600))  # секунд
+    LLM_CACHE_MAX_ENTRIES = int(get_env_variable('LLM_CACHE_MAX_ENTRIES', 5000))  # записей в базе
+    LLM_CACHE_MEMORY_ENTRIES = int(get_env_variable('LLM_CACHE_MEMORY_ENTRIES', 256))  # записей в памяти процесса
+    LLM_CACHE_MEMORY_TTL = int(get_env_variable('LLM_CACHE_MEMORY_TTL', 60))  # секунд в памяти процесса, до проверки базы
+    LLM_CACHE_SIMILARITY = float(get_env_variable('LLM_CACHE_SIMILARITY', 0.0))  # порог близости похожих запросов, 0 - выключено
+    LLM_CACHE_SIMILARITY_CANDIDATES = int(get_env_variable('LLM_CACHE_SIMILARITY_CANDIDATES', 200))
+    
+    # Семантический поиск кандидатов (app/utils/candidate_search.py)
+    EMBEDDINGS_ENABLED = get_env_variable('EMBEDDINGS_ENABLED', 'True') == 'True'
+    EMBEDDING_MODEL = get_env_variable('EMBEDDING_MODEL', 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+    EMBEDDING_DEVICE = get_env_variable('EMBEDDING_DEVICE', 'cpu')
+    EMBEDDING_PRELOAD = get_env_variable('EMBEDDING_PRELOAD', 'False') == 'True'  # загрузка в create_app до fork
+    EMBEDDING_BATCH_SIZE = int(get_env_variable('EMBEDDING_BATCH_SIZE', 32))
+    EMBEDDING_CHUNK_CHARS = 600  # фрагмент текста, укладывается в 128 токенов модели
+    EMBEDDING_MAX_CHUNKS = int(get_env_variable('EMBEDDING_MAX_CHUNKS', 8))
+    EMBEDDING_INDEX_PATH = get_env_variable('EMBEDDING_INDEX_PATH', '')  # файл индекса HNSW, пусто - строить из базы
+    EMBEDDING_USE_HNSW = get_env_variable('EMBEDDING_USE_HNSW', 'True') == 'True'
+    EMBEDDING_HNSW_M = int(get_env_variable('EMBEDDING_HNSW_M', 16))
+    EMBEDDING_HNSW_EF_CONSTRUCTION = int(get_env_variable('EMBEDDING_HNSW_EF_CONSTRUCTION', 200))
+    EMBEDDING_HNSW_EF_SEARCH = int(get_env_variable('EMBEDDING_HNSW_EF_SEARCH', 64))
+    EMBEDDING_SYNC_OVERLAP = 60  # секунд, запас догрузки векторов из базы
+    EMBEDDING_SEARCH_OVERFETCH = int(get_env_variable('EMBEDDING_SEARCH_OVERFETCH', 2))  # запас результатов на удаленных кандидатов
+    EMBEDDING_INDEX_SYNC_MINUTES = int(get_env_variable('EMBEDDING_INDEX_SYNC_MINUTES', 10))  # догрузка и сохранение индекса планировщиком
+    
+    # Подбор кандидатов из базы для новых и измененных вакансий (app/utils/talent_pool.py)
+    REMATCH_ENABLED = get_env_variable('REMATCH_ENABLED', 'True') == 'True'
+    REMATCH_VECTOR_CANDIDATES = int(get_env_variable('REMATCH_VECTOR_CANDIDATES', 300))  # из векторного индекса
+    REMATCH_VECTOR_OVERFETCH = int(get_env_variable('REMATCH_VECTOR_OVERFETCH', 3))  # запас на кандидатов вне выборки HR-менеджера
+    REMATCH_SKILL_CANDIDATES = int(get_env_variable('REMATCH_SKILL_CANDIDATES', 300))  # из индекса навыков
+    REMATCH_VECTOR_WEIGHT = float(get_env_variable('REMATCH_VECTOR_WEIGHT', 0.5))  # доля близости резюме в предварительной оценке
+    REMATCH_MIN_SCORE = float(get_env_variable('REMATCH_MIN_SCORE', 20))  # ниже - модель не вызывается
+    REMATCH_TOP_K = int(get_env_variable('REMATCH_TOP_K', 10))  # кандидатов на оценку моделью
+    REMATCH_LLM_WORKERS = int(get_env_variable('REMATCH_LLM_WORKERS', 4))
+    REMATCH_QUEUE_MINUTES = int(get_env_variable('REMATCH_QUEUE_MINUTES', 5))  # планировщик выполняет задачи, оставшиеся в очереди
+    
+    # Фоновые задачи AI-анализа (app/utils/analysis_jobs.py)
+    ANALYSIS_WORKERS = int(get_env_variable('ANALYSIS_WORKERS', 4))  # потоков на процесс
+    ANALYSIS_JOB_TIMEOUT = int(get_env_variable('ANALYSIS_JOB_TIMEOUT', 600))  # после - задача считается зависшей
+    ANALYSIS_POLL_INTERVAL = float(get_env_variable('ANALYSIS_POLL_INTERVAL', 1.0))  # шаг опроса базы в long-poll
+    ANALYSIS_LONG_POLL_MAX = int(get_env_variable('ANALYSIS_LONG_POLL_MAX', 30))
+    
+    # Ключевые слова справочника и отрасли (app/utils/keyword_matcher.py)
+    KEYWORDS_MIN_MATCHES = int(get_env_variable('KEYWORDS_MIN_MATCHES', 2))  # разных слов отрасли для тега
+    KEYWORDS_MAX_INDUSTRIES = int(get_env_variable('KEYWORDS_MAX_INDUSTRIES', 3))
+    KEYWORDS_FREQUENCY_BATCH = int(get_env_variable('KEYWORDS_FREQUENCY_BATCH', 200))  # приращений frequency на один UPDATE
+    KEYWORDS_FREQUENCY_FLUSH_SECONDS = int(get_env_variable('KEYWORDS_FREQUENCY_FLUSH_SECONDS', 60))
+    
     # Email настройки
     MAIL_SERVER = get_env_variable('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(get_env_variable('MAIL_PORT', 587))
@@ -81,6 +223,18 @@ class Config:
     if not OPENAI_API_KEY or "your-" in OPENAI_API_KEY or len(OPENAI_API_KEY) < 20:
         print("ПРЕДУПРЕЖДЕНИЕ: OpenAI API ключ отсутствует или некорректен. Функции AI будут недоступны.")
     
+    # Провайдер LLM: openai, local (OpenAI-совместимый сервер) или mock (app/utils/llm_providers.py)
+    LLM_PROVIDER = get_env_variable('LLM_PROVIDER', 'openai')
+    LLM_LOCAL_BASE_URL = get_env_variable('LLM_LOCAL_BASE_URL', 'http://localhost:8000/v1')
+    LLM_LOCAL_API_KEY = get_env_variable('LLM_LOCAL_API_KEY', 'local')
+    LLM_MOCK_LATENCY = float(get_env_variable('LLM_MOCK_LATENCY', 0.0))  # имитация задержки ответа, секунд
+    # Модель по типу задачи; префикс "provider:" переопределяет провайдер задачи
+    LLM_MODEL_DEFAULT = get_env_variable('LLM_MODEL_DEFAULT', 'gpt-4o')
+    LLM_MODEL_OCR = get_env_variable('LLM_MODEL_OCR', 'gpt-4o')
+    LLM_MODEL_STRUCTURING = get_env_variable('LLM_MODEL_STRUCTURING', 'gpt-4o')
+    LLM_MODEL_SCORING = get_env_variable('LLM_MODEL_SCORING', 'gpt-4o')
+    LLM_MODEL_VACANCY = get_env_variable('LLM_MODEL_VACANCY', 'gpt-4o')
+    
     # Настройки Redis для фоновых задач
     REDIS_URL = get_env_variable('REDIS_URL', 'redis://localhost:6379/0')
     
@@ -125,27 +279,53 @@ class Config:
     # Настройки сессии
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
     
+    # Кэш аутентифицированных пользователей (снимок роли и этапов отбора)
+    USER_CACHE_TTL = int(get_env_variable('USER_CACHE_TTL', 60))
+    # Кэш свой у каждого процесса: роль, is_active и статус перечитываются из БД
+    # не реже этого срока, чтобы блокировка пользователя действовала во всех процессах
+    USER_AUTH_CACHE_TTL = int(get_env_variable('USER_AUTH_CACHE_TTL', 5))
+    USER_CACHE_MAXSIZE = int(get_env_variable('USER_CACHE_MAXSIZE', 1024))
+    
     # Включенные функции
     ENABLED_FEATURES = ['ai_analysis']
+    
+    # Модели машинного обучения (артефакты и прогнозы)
+    ML_MODELS_FOLDER = get_env_variable('ML_MODELS_FOLDER', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'ml_models'))
+    TIME_TO_FILL_MIN_SAMPLES = int(get_env_variable('TIME_TO_FILL_MIN_SAMPLES', 20))
+    TIME_TO_FILL_BOOSTING_MIN_SAMPLES = int(get_env_variable('TIME_TO_FILL_BOOSTING_MIN_SAMPLES', 200))
+    TIME_TO_FILL_RETRAIN_HOURS = int(get_env_variable('TIME_TO_FILL_RETRAIN_HOURS', 24))
+    TIME_TO_FILL_CACHE_TIMEOUT = int(get_env_variable('TIME_TO_FILL_CACHE_TIMEOUT', 600))
+    SEASONAL_FORECAST_HORIZON = int(get_env_variable('SEASONAL_FORECAST_HORIZON', 3))
+    
+    # Планировщик периодических задач (включать только в одном процессе)
+    SCHEDULER_ENABLED = get_env_variable('SCHEDULER_ENABLED', 'False') == 'True'
+    SCHEDULER_API_ENABLED = False
 
-    # Настройки для отключения логирования SQLAlchemy
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'echo': False,
-        'echo_pool': False
-    }
+    # Настройки пула соединений (размеры переопределяются в профилях)
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(pool_size=5, max_overflow=10)
 
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(pool_size=5, max_overflow=5)
 
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     WTF_CSRF_ENABLED = False
+    # SQLite в памяти использует StaticPool, параметры пула неприменимы
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'echo': False
+    }
+    # Без пула процессов Tesseract в тестах
+    OCR_LOCAL_ENABLED = False
 
 class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
+    # Размер пула на процесс: workers * (pool_size + max_overflow) не должен
+    # превышать max_connections PostgreSQL (или default_pool_size PgBouncer)
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(pool_size=10, max_overflow=20, pool_recycle=900)
 
 config = {
     'development': DevelopmentConfig,
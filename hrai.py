@@ -1,4 +1,5 @@
 import os
+import click
 from app import create_app, db
 from app.models import User, Vacancy, Candidate, Notification, SystemLog
 
@@ -15,5 +16,102 @@ def make_shell_context():
         'SystemLog': SystemLog
     }
 
+@app.cli.command('extract-skills')
+def extract_skills_command():
+    """Извлекает навыки из резюме всех кандидатов в candidate_skills"""
+    from app.utils.skill_extractor import backfill_candidate_skills
+    processed, skills_saved = backfill_candidate_skills()
+    print(f"Обработано кандидатов: {processed}, сохранено навыков: {skills_saved}")
+
+@app.cli.command('score-candidates')
+def score_candidates_command():
+    """Пересчитывает оценки соответствия навыков для всех вакансий"""
+    from app.utils.skill_matching import update_vacancy_scores
+    total = 0
+    for vacancy_id in db.session.scalars(db.select(Vacancy.id)).all():
+        total += update_vacancy_scores(vacancy_id)
+    print(f"Пересчитано оценок: {total}")
+
+@app.cli.command('train-time-to-fill')
+def train_time_to_fill_command():
+    """Обучает модель прогноза времени закрытия вакансий"""
+    from app.utils.time_to_fill import train_model
+    meta = train_model(force=True)
+    print(f"Модель обучена: {meta}" if meta else "Недостаточно данных для обучения модели")
+
+@app.cli.command('refresh-seasonal-forecasts')
+def refresh_seasonal_forecasts_command():
+    """Пересчитывает месячные ряды откликов и прогнозы сезонности"""
+    from app.utils.seasonal_forecast import refresh_seasonal_series
+    updated = refresh_seasonal_series(force=True)
+    print("Ряды и прогнозы обновлены" if updated else "Нет данных для расчета")
+
+@app.cli.command('render-previews')
+@click.option('--force', is_flag=True, help='Перерисовать существующие превью')
+def render_previews_command(force):
+    """Строит миниатюры и превью страниц для резюме кандидатов и сохраняет число страниц"""
+    from app.utils.previews import render_previews
+    rendered = failed = 0
+    for resume_path in db.session.scalars(db.select(Candidate.resume_path).where(Candidate.resume_path.is_not(None)).distinct()).all():
+        try:
+            if render_previews(resume_path, force=force):
+                rendered += 1
+        except Exception as e:
+            failed += 1
+            print(f"Ошибка для {resume_path}: {e}")
+    print(f"Построены превью для файлов: {rendered}, ошибок: {failed}")
+
+@app.cli.command('nlp-resumes')
+@click.option('--all', 'process_all', is_flag=True, help='Обработать заново все резюме')
+@click.option('--processes', type=int, default=None, help='Число процессов nlp.pipe')
+def nlp_resumes_command(process_all, processes):
+    """Извлекает язык и сущности (организации, даты, места) из резюме кандидатов"""
+    from app.utils.resume_nlp import backfill_candidates
+    processed = backfill_candidates(only_missing=not process_all, n_process=processes)
+    print(f"Обработано резюме: {processed}")
+
+@app.cli.command('tag-keywords')
+def tag_keywords_command():
+    """Размечает резюме и вакансии ключевыми словами справочника и отраслями"""
+    from app.utils.keyword_matcher import backfill_keywords
+    candidates_count, vacancies_count = backfill_keywords()
+    print(f"Обработано кандидатов: {candidates_count}, вакансий: {vacancies_count}")
+
+@app.cli.command('structure-resumes')
+def structure_resumes_command():
+    """Пересчитывает таблицы опыта, образования и языков из разобранных резюме"""
+    from app.utils.resume_structure import backfill_resume_structure
+    processed = backfill_resume_structure()
+    print(f"Обработано кандидатов: {processed}")
+
+@app.cli.command('embed-resumes')
+@click.option('--all', 'process_all', is_flag=True, help='Построить заново векторы всех резюме')
+def embed_resumes_command(process_all):
+    """Строит векторы резюме для семантического поиска и сохраняет индекс"""
+    from app.utils.candidate_search import backfill_embeddings, save_index
+    processed = backfill_embeddings(only_missing=not process_all)
+    print(f"Построено векторов: {processed}")
+    if save_index():
+        print(f"Индекс сохранен: {app.config['EMBEDDING_INDEX_PATH']}")
+
+@app.cli.command('rematch-vacancies')
+@click.option('--vacancy-id', type=int, default=None, help='Только одна вакансия')
+def rematch_vacancies_command(vacancy_id):
+    """Подбирает кандидатов из базы для активных вакансий"""
+    from app.utils.talent_pool import rematch_vacancy
+    if vacancy_id:
+        vacancy_ids = [vacancy_id]
+    else:
+        vacancy_ids = [vacancy.id for vacancy in Vacancy.query.filter_by(is_active=True).order_by(Vacancy.id)]
+    for current_id in vacancy_ids:
+        print(f"Вакансия {current_id}: {rematch_vacancy(current_id)}")
+
+@app.cli.command('clear-llm-cache')
+@click.option('--kind', default=None, help='Только один вид запросов (vacancy_generation, vacancy_requirements)')
+def clear_llm_cache_command(kind):
+    """Очищает кэш ответов модели"""
+    from app.utils.llm_cache import clear
+    print(f"Удалено записей: {clear(kind)}")
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,29 +1,40 @@
-import spacy
+import os
+import sys
 
-def analyze_text(text, lang):
-    print(f"\n=== Анализ текста на {lang} ===")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.resume_nlp import detect_language, get_nlp, extract_entities
+
+app = create_app(os.getenv('FLASK_ENV', 'default'))
+
+def analyze_text(text):
+    language = detect_language(text)
+    print(f"\n=== Анализ текста ({language}) ===")
     print(f"Текст: {text}")
     
-    # Загружаем соответствующую модель
-    model = "ru_core_news_lg" if lang == "русском" else "en_core_web_lg"
-    nlp = spacy.load(model)
+    # Модель загружается один раз на процесс и переиспользуется
+    with app.app_context():
+        nlp, model_language = get_nlp(language)
     
     # Обрабатываем текст
     doc = nlp(text)
     
     # Выводим результаты
-    print("\nТокены и их части речи:")
-    for token in doc:
-        print(f"{token.text} - {token.pos_}")
+    print(f"\nМодель: {model_language}, компоненты: {', '.join(nlp.pipe_names)}")
     
     print("\nИменованные сущности:")
     for ent in doc.ents:
         print(f"{ent.text} - {ent.label_}")
+    
+    print("\nИзвлеченные данные:")
+    for key, values in extract_entities(doc).items():
+        print(f"{key}: {', '.join(values) or '-'}")
 
 # Тестовые тексты
-russian_text = "Привет! Я программист Python с опытом работы 5 лет."
-english_text = "Hello! I am a Python developer with 5 years of experience."
+russian_text = "Привет! Я программист Python с опытом работы 5 лет. С января 2019 по 2024 работал в Яндексе в Москве."
+english_text = "Hello! I am a Python developer with 5 years of experience. Worked at Google in London from 2018 to 2023."
 
 # Анализируем оба текста
-analyze_text(russian_text, "русском")
-analyze_text(english_text, "английском") 
\ No newline at end of file
+analyze_text(russian_text)
+analyze_text(english_text)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.models import User, Candidate  # noqa: E402
+from app.utils.user_cache import invalidate_all_users  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Приложение с конфигурацией testing и локальным хранилищем во временном каталоге"""
+    app = create_app('testing')
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), STORAGE_BACKEND='local')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.drop_all()
+    invalidate_all_users()
+
+
+@pytest.fixture
+def ctx(app):
+    """Контекст приложения для работы с БД и хранилищем вне запросов"""
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def make_user(app):
+    """Создает пользователя (email хранится как есть: pgcrypto в SQLite недоступен)"""
+    def factory(role='hr'):
+        with app.app_context():
+            user = User(_email=f'{role}{User.query.count()}@example.com', password_hash='-', role=role)
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return factory
+
+
+@pytest.fixture
+def make_candidate(app):
+    """Создает кандидата (справочники и вакансия не нужны: внешние ключи SQLite не проверяет)"""
+    def factory(**fields):
+        values = dict(vacancy_id=1, user_id=1, stage_id=1, full_name='Кандидат',
+                      base_answers={}, vacancy_answers={}, soft_answers={})
+        values.update(fields)
+        values.setdefault('tracking_code', f"test-{Candidate.query.count() + 1}")
+        candidate = Candidate(**values)
+        db.session.add(candidate)
+        return candidate
+    return factory
+
+
+@pytest.fixture
+def login(app):
+    """Клиент, авторизованный под пользователем user_id"""
+    def factory(user_id):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return client
+    return factory
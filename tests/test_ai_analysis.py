@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from app import db
+from app.models import AnalysisJob, Vacancy
+from app.utils import analysis_jobs
+from app.utils.analysis_jobs import create_job
+
+
+def make_jobs(app, make_candidate, user_id):
+    with app.app_context():
+        vacancy = Vacancy(title='Аналитик', id_c_employment_type=1, description_tasks='Отчеты',
+                          description_conditions='Удаленно', ideal_profile='SQL', created_by=user_id)
+        db.session.add(vacancy)
+        db.session.flush()
+        candidate = make_candidate(vacancy_id=vacancy.id)
+        rematch = AnalysisJob(kind=AnalysisJob.KIND_REMATCH, vacancy_id=vacancy.id, source='vacancy')
+        db.session.add(rematch)
+        db.session.commit()
+        return create_job(candidate.id).id, rematch.id
+
+
+def test_job_status_is_visible_to_vacancy_owner_and_admin(app, make_user, make_candidate, login):
+    owner, other, admin = make_user(), make_user(), make_user('admin')
+    jobs = make_jobs(app, make_candidate, owner)
+
+    for job_id in jobs:
+        assert login(owner).get(f'/ai_analysis/status/{job_id}').status_code == 200
+        assert login(admin).get(f'/ai_analysis/status/{job_id}').status_code == 200
+        assert login(other).get(f'/ai_analysis/status/{job_id}').status_code == 404
+        assert login(other).get(f'/ai_analysis/status/{job_id}/events').status_code == 404
+
+
+def test_start_analysis_from_candidate_page_is_queued(app, make_user, make_candidate, login, monkeypatch):
+    owner = make_user()
+    with app.app_context():
+        job_id, _ = make_jobs(app, make_candidate, owner)
+        candidate_id = db.session.get(AnalysisJob, job_id).candidate_id
+        analysis_jobs._update(job_id, status=AnalysisJob.STATUS_DONE)
+        db.session.get(AnalysisJob, job_id).candidate.resume_text = 'Аналитик данных, SQL'
+        db.session.commit()
+    submitted = []
+
+    class Executor:
+        def submit(self, func, *args):
+            submitted.append(args[1:])
+
+    monkeypatch.setattr(analysis_jobs, '_get_executor', lambda: Executor())
+
+    response = login(owner).post(f'/candidates/{candidate_id}/start_analysis', headers={'X-Requested-With': 'XMLHttpRequest'})
+
+    assert response.status_code == 202
+    queued = response.get_json()
+    assert queued['status_url'] == f"/ai_analysis/status/{queued['job_id']}"
+    assert submitted == [(queued['job_id'],)]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import fitz
+import pytest
+from PIL import Image
+from app.utils import ai_service
+from app.utils.local_ocr import PageText, METHOD_TEXT_LAYER, METHOD_TESSERACT
+
+OLD_DATA = {'experience': [{'company': 'Прежняя работа'}], 'skills': ['Java'], 'nlp': {'language': 'ru'}}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Ответы модели для совмещенного анализа (без обращения к провайдеру)"""
+    responses = []
+    monkeypatch.setattr(ai_service, 'get_llm_client', lambda task: object())
+    monkeypatch.setattr(ai_service, 'llm_provider', lambda task: 'local')
+    monkeypatch.setattr(ai_service, '_sync_resume_structure', lambda candidate: None)
+    monkeypatch.setattr(ai_service, '_analysis_prompt', lambda candidate, instructions='': instructions)
+
+    def request(client, prompt):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(ai_service, '_request_analysis', request)
+    return responses
+
+
+def test_new_resume_replaces_structured_data_after_combined_analysis(app, ctx, make_candidate, llm):
+    candidate = make_candidate(resume_text='Python-разработчик', structured_resume_data=dict(OLD_DATA))
+    llm.append({'structured_resume_data': {'skills': ['Python']}, 'analysis': {'match_percent': 80}})
+
+    ai_service.request_ai_analysis(candidate, raise_errors=True, restructure=True)
+
+    assert candidate.structured_resume_data == {'skills': ['Python'], 'nlp': {'language': 'ru'}}
+    assert candidate.ai_match_percent == 80
+
+
+def test_failed_combined_analysis_keeps_previous_structured_data(app, ctx, make_candidate, llm, monkeypatch):
+    candidate = make_candidate(resume_text='Python-разработчик', structured_resume_data=dict(OLD_DATA))
+    monkeypatch.setattr(ai_service, 'extract_structured_data_from_text', lambda text: None)
+    llm.extend([ValueError('обрыв ответа'), RuntimeError('провайдер недоступен')])
+
+    with pytest.raises(RuntimeError):
+        ai_service.request_ai_analysis(candidate, raise_errors=True, restructure=True)
+
+    assert candidate.structured_resume_data == OLD_DATA
+
+
+@pytest.fixture
+def no_vision_model(monkeypatch):
+    """Ключ OpenAI не настроен: клиента распознавания нет"""
+    monkeypatch.setattr(ai_service, 'get_llm_client', lambda task: None)
+
+
+def test_pdf_is_read_locally_without_api_key(app, ctx, tmp_path, no_vision_model, monkeypatch):
+    path = tmp_path / 'resume.pdf'
+    document = fitz.open()
+    document.new_page()
+    document.new_page()
+    document.save(path)
+    # Первая страница - текстовый слой, вторая - скан с низкой уверенностью OCR
+    pages = [PageText('Опыт работы: Python-разработчик ' * 3, 100.0, METHOD_TEXT_LAYER),
+             PageText('Образование: университет', 40.0, METHOD_TESSERACT)]
+    monkeypatch.setattr(ai_service, 'extract_pages', lambda file_path, options: pages)
+
+    result = ai_service.extract_resume_text(str(path), structure=False)
+
+    assert result['text'] == pages[0].text + '\n\n' + pages[1].text
+
+
+def test_scan_recognized_by_tesseract_is_kept_without_api_key(app, ctx, tmp_path, no_vision_model, monkeypatch):
+    path = tmp_path / 'resume.png'
+    Image.new('RGB', (40, 40), 'white').save(path)
+    page = PageText('Навыки: Python, Flask, PostgreSQL, Docker, Linux, Git', 92.0, METHOD_TESSERACT)
+    monkeypatch.setattr(ai_service, 'extract_pages', lambda file_path, options: [page])
+
+    assert ai_service.extract_resume_text(str(path), structure=True) == {'text': page.text, 'structured_data': {}}
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+from app import db
+from app.utils import candidate_search
+from app.utils.candidate_search import VectorIndex
+
+MODEL = 'test-model'
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture(params=[False, True], ids=['numpy', 'hnsw'])
+def index(request):
+    if request.param:
+        pytest.importorskip('hnswlib')
+    index = VectorIndex(MODEL, 2, use_hnsw=request.param)
+    index.add([1, 2, 3], np.vstack([unit(1, 0), unit(1, 0.1), unit(0, 1)]))
+    return index
+
+
+def test_removed_vectors_are_not_found(index):
+    index.remove([1])
+
+    assert [candidate_id for candidate_id, _ in index.search(unit(1, 0), 3)] == [2, 3]
+    assert [candidate_id for candidate_id, _ in index.search(unit(1, 0), 3, {1, 2})] == [2]
+    assert len(index) == 2
+
+
+@pytest.fixture
+def process_index(app, ctx, index, monkeypatch):
+    """Индекс процесса без модели sentence-transformers: запрос кодируется заранее заданным вектором"""
+    app.config['EMBEDDING_MODEL'] = MODEL
+    monkeypatch.setattr(candidate_search, '_index', index)
+    monkeypatch.setitem(candidate_search._models, MODEL, object())
+    monkeypatch.setattr(candidate_search, 'encode', lambda texts, config=None: unit(1, 0).reshape(1, -1))
+    monkeypatch.setattr(candidate_search, 'sync_index', lambda index: 0)
+    return index
+
+
+def test_search_skips_candidates_deleted_in_database(process_index):
+    # Кандидат 1 удален в другом процессе: вектора в базе нет, в индексе процесса он остался
+    for candidate_id in (2, 3):
+        candidate_search._store(candidate_id, MODEL, unit(1, 0), 'hash')
+    db.session.commit()
+
+    found = candidate_search.search_candidates('python', limit=1)
+
+    assert [candidate_id for candidate_id, _ in found['results']] == [2]
+    assert 1 not in process_index.versions
+
+
+def test_search_does_not_load_model_in_request(app, ctx, monkeypatch):
+    started = []
+    monkeypatch.setattr(candidate_search, '_index', None)
+    monkeypatch.setattr(candidate_search, 'warm_up', lambda app=None: started.append(True))
+    monkeypatch.setattr(candidate_search, 'get_index', lambda: pytest.fail('индекс строится в потоке запроса'))
+
+    found = candidate_search.search_candidates('python')
+
+    assert found['warming'] and found['results'] == [] and started
@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from sqlalchemy.engine import make_url
+from app.utils.db_pool import PoolManager
+
+
+def test_asyncpg_statement_cache_is_disabled_in_url(app):
+    app.config['DB_PGBOUNCER_MODE'] = True
+    url, options = PoolManager._prepare_options(make_url('postgresql+asyncpg://hr@db/hrai'), {}, app)
+
+    assert url.query['prepared_statement_cache_size'] == '0'
+    assert options['connect_args'] == {'statement_cache_size': 0}
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import pytest
+from app import db
+from app.models import Vacancy
+from app.utils.storage import save_file
+
+
+@pytest.fixture
+def resume(app, make_user, make_candidate):
+    """Резюме кандидата вакансии HR-менеджера owner"""
+    owner = make_user()
+    with app.app_context():
+        vacancy = Vacancy(title='Тестировщик', id_c_employment_type=1, description_tasks='Тесты',
+                          description_conditions='Офис', ideal_profile='QA', created_by=owner)
+        db.session.add(vacancy)
+        db.session.flush()
+        stored = save_file(io.BytesIO(b'%PDF-1.4 resume'), 'pdf')
+        make_candidate(vacancy_id=vacancy.id, resume_path=stored.reference)
+        db.session.commit()
+        return owner, stored.filename
+
+
+@pytest.mark.parametrize('route', ['/files/{}', '/files/view/{}', '/files/download_resume/{}'])
+def test_resume_is_served_only_to_vacancy_owner_and_admin(app, make_user, login, resume, route):
+    owner, filename = resume
+    url = route.format(filename)
+
+    assert app.test_client().get(url).status_code == 302
+    assert login(make_user()).get(url).status_code == 404
+    assert login(owner).get(url).status_code == 200
+    assert login(make_user('admin')).get(url).status_code == 200
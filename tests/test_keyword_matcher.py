@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+from app import db
+from app.models import Keyword
+from app.utils import keyword_matcher
+
+
+@pytest.fixture
+def keyword(app, ctx):
+    keyword = Keyword(category_id=1, word_ru='разработчик', word_en='developer', synonyms=['программист'])
+    db.session.add(keyword)
+    db.session.commit()
+    return keyword
+
+
+@pytest.fixture
+def timers(monkeypatch):
+    """Таймеры записи частот (без запуска потоков)"""
+    started = []
+
+    class Timer:
+        def __init__(self, interval, function):
+            self.interval, self.function, self.daemon = interval, function, False
+
+        def start(self):
+            started.append(self)
+
+    monkeypatch.setattr(keyword_matcher.threading, 'Timer', Timer)
+    monkeypatch.setattr(keyword_matcher, '_flush_timer', None)
+    monkeypatch.setattr(keyword_matcher, '_pending_since', None)
+    monkeypatch.setattr(keyword_matcher, '_pending', keyword_matcher.Counter())
+    return started
+
+
+def test_signature_changes_when_synonyms_change_elsewhere(keyword):
+    before = keyword_matcher._keywords_signature()
+    # Изменение в другом процессе: события ORM этого процесса не срабатывают
+    db.session.execute(db.update(Keyword).where(Keyword.id == keyword.id).values(synonyms=['программист', 'кодер']))
+    db.session.commit()
+
+    assert keyword_matcher._keywords_signature() != before
+
+
+def test_pending_frequencies_are_flushed_by_timer(app, keyword, timers):
+    app.config.update(KEYWORDS_FREQUENCY_BATCH=1000, KEYWORDS_FREQUENCY_FLUSH_SECONDS=30)
+
+    keyword_matcher.record_frequencies({keyword.id})
+    keyword_matcher.record_frequencies({keyword.id})
+
+    assert len(timers) == 1 and timers[0].interval == 30 and timers[0].daemon
+    db.session.expire_all()
+    assert not keyword.frequency
+
+    # Новых резюме нет: запись выполняет таймер
+    timers[0].function()
+
+    db.session.expire_all()
+    assert keyword.frequency == 2
+    assert not keyword_matcher._pending
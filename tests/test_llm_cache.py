@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+import pytest
+import sqlalchemy as sa
+from app import db
+from app.models import LLMResponseCache
+from app.utils import llm_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_memory():
+    llm_cache._memory.clear()
+    yield
+    llm_cache._memory.clear()
+
+
+def clear_in_other_process():
+    # clear-llm-cache в другом процессе удаляет строки, но не память этого процесса
+    with db.engine.begin() as connection:
+        connection.execute(sa.delete(LLMResponseCache.__table__))
+
+
+def test_memory_entry_expires_after_memory_ttl(app, ctx, monkeypatch):
+    app.config['LLM_CACHE_MEMORY_TTL'] = 60
+    key = llm_cache.CacheKey('vacancy_generation', 'gpt-4o', 1, {'title': 'Python'}, 'Разработка API')
+    llm_cache.put(key, '{"ok": true}')
+    clear_in_other_process()
+
+    assert llm_cache.get(key) == '{"ok": true}'
+
+    later = llm_cache._now() + timedelta(seconds=61)
+    monkeypatch.setattr(llm_cache, '_now', lambda: later)
+    assert llm_cache.get(key) is None
+
+
+def test_memory_never_outlives_database_entry(app, ctx):
+    app.config.update(LLM_CACHE_MEMORY_TTL=3600, LLM_CACHE_TTL=5)
+    key = llm_cache.CacheKey('vacancy_generation', 'gpt-4o', 1, {}, 'Бухгалтер')
+    llm_cache.put(key, 'ответ')
+
+    _, expires_at = llm_cache._memory[key.key]
+    assert expires_at <= llm_cache._now() + timedelta(seconds=5)
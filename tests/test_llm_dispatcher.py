@@ -0,0 +1,16 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from app.utils.llm_dispatcher import process_limits
+
+
+def test_account_limits_are_split_between_processes():
+    config = {'LLM_PROCESSES': 4, 'LLM_MAX_CONCURRENCY': 8, 'LLM_RPM': 500, 'LLM_TPM': 30000}
+    assert process_limits(config) == (2, 125, 7500)
+
+
+def test_process_share_never_drops_to_unlimited():
+    # 0 означает «без ограничения», поэтому доля процесса не меньше 1
+    config = {'LLM_PROCESSES': 16, 'LLM_MAX_CONCURRENCY': 8, 'LLM_RPM': 10, 'LLM_TPM': 0}
+    assert process_limits(config) == (1, 1, 0)
+    assert process_limits({'LLM_PROCESSES': 1, 'LLM_RPM': 500}) == (8, 500, 30000)
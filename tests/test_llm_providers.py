@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from app.utils.llm_providers import MOCK_STRUCTURED_DATA
+from app.utils.resume_structure import project_resume
+
+
+def test_mock_structured_data_follows_resume_schema():
+    projection = project_resume(MOCK_STRUCTURED_DATA)
+
+    assert [(item['start_year'], item['end_year']) for item in projection['experience']] == [(2019, 2024), (2017, 2019)]
+    assert projection['education'][0]['start_year'] == 2012
+    assert [item['level'] for item in projection['languages']] == ['native', 'B2', 'B1']
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+from datetime import datetime, timezone
+from PIL import Image
+from app import db
+from app.models import Candidate
+from app.utils import previews
+from app.utils.storage import get_storage, save_file
+from app.utils.previews import preview_key, page_name, THUMBNAIL
+
+
+def png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (400, 600), 'white').save(buffer, format='PNG')
+    buffer.seek(0)
+    return buffer
+
+
+def forbidden(message):
+    def call(*args, **kwargs):
+        raise AssertionError(message)
+    return call
+
+
+def test_render_stores_page_count_for_every_candidate_with_file(app, ctx, make_candidate):
+    stored = save_file(png(), 'png')
+    updated = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    candidates = [make_candidate(resume_path=stored.reference, updated_at=updated) for _ in range(2)]
+    db.session.commit()
+
+    assert previews.render_previews(stored.reference) == 1
+
+    db.session.expire_all()
+    assert [candidate.resume_preview_pages for candidate in candidates] == [1, 1]
+    # Число страниц не считается изменением кандидата
+    assert all(candidate.updated_at.replace(tzinfo=timezone.utc) == updated for candidate in candidates)
+
+
+def test_existing_previews_are_counted_without_rendering(app, ctx, make_candidate):
+    stored = save_file(io.BytesIO(b'%PDF-1.4 resume'), 'pdf')
+    storage = get_storage()
+    for name in (page_name(1), page_name(2), THUMBNAIL):
+        storage.put(preview_key(stored.key, name), b'jpeg')
+    candidate = make_candidate(resume_path=stored.reference)
+    db.session.commit()
+
+    assert previews.render_previews(stored.reference) == 0
+
+    db.session.expire_all()
+    assert candidate.resume_preview_pages == 2
+
+
+def test_pages_are_read_from_column_and_missing_previews_are_queued(app, ctx, make_candidate, monkeypatch):
+    queued = []
+    monkeypatch.setattr(previews, 'queue_previews', lambda reference: queued.append(reference))
+    monkeypatch.setattr(previews, 'resolve_reference', forbidden('запрос к хранилищу'))
+    rendered = make_candidate(resume_path='ab/cd/rendered.pdf', resume_preview_pages=3)
+    legacy = make_candidate(resume_path='ab/cd/legacy.pdf')
+
+    assert previews.preview_pages(rendered) == [1, 2, 3]
+    assert previews.preview_pages(legacy) == [] and not previews.thumbnail_ready(legacy)
+    assert queued == ['ab/cd/legacy.pdf', 'ab/cd/legacy.pdf']
+
+
+def test_preview_request_queues_rendering_instead_of_rendering(app, ctx, monkeypatch):
+    queued = []
+    monkeypatch.setattr(previews, 'queue_previews', lambda reference: queued.append(reference))
+    monkeypatch.setattr(previews, 'render_previews', forbidden('рендеринг в запросе'))
+    stored = save_file(png(), 'png')
+
+    assert previews.ensure_preview(get_storage(), stored.key, THUMBNAIL) is None
+    assert queued == [stored.reference]
@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from types import SimpleNamespace
+from app.utils.resume_nlp import extract_entities
+
+
+def dates(text):
+    # Для дат достаточно текста документа: сущности spaCy не нужны
+    return extract_entities(SimpleNamespace(ents=[], text=text))['dates']
+
+
+def test_dates_and_periods():
+    assert dates('Опыт: 03.2019 - н.в. в ООО «Ромашка», ранее сентябрь 2015 – 2018') == [
+        '03.2019 - н.в', 'сентябрь 2015 – 2018'
+    ]
+    assert dates('Jan 2020 - present') == ['Jan 2020 - present']
+
+
+def test_years_inside_numbers_are_not_dates():
+    assert dates('Телефон: 89162019456') == []
+    assert dates('ИНН 770120051234') == []
+    assert dates('+7 (916) 201-94-56, договор №120190') == []
+    assert dates('тел. 89162019456, в компании с 2019') == ['2019']
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime, timezone
+from app import db
+from app.models import ApplicationMonthlyStat
+from app.utils import seasonal_forecast
+
+
+def stat(industry_id, applications):
+    return {'industry_id': industry_id, 'month': date(2026, 1, 1), 'applications': applications,
+            'avg_quality': None, 'updated_at': datetime.now(timezone.utc)}
+
+
+def test_upsert_keeps_one_row_per_industry_and_month(app, ctx):
+    for applications in (3, 5):
+        seasonal_forecast._upsert(
+            ApplicationMonthlyStat, [stat(None, applications), stat(7, applications + 1)], ('applications',)
+        )
+    db.session.commit()
+
+    rows = db.session.execute(
+        db.select(ApplicationMonthlyStat.industry_id, ApplicationMonthlyStat.applications)
+        .order_by(ApplicationMonthlyStat.id)
+    ).all()
+    assert [tuple(row) for row in rows] == [(None, 5), (7, 6)]
+
+
+def test_page_data_is_read_only_once_series_exist(app, ctx, monkeypatch):
+    def refresh(*args, **kwargs):
+        raise AssertionError('страница не должна пересчитывать ряды')
+
+    seasonal_forecast._upsert(ApplicationMonthlyStat, [stat(None, 3)], ('applications',))
+    monkeypatch.setattr(seasonal_forecast, 'refresh_seasonal_series', refresh)
+    history, forecast = seasonal_forecast.get_seasonal_data()
+    assert [row.applications for row in history] == [3] and forecast == []
+
+
+def test_empty_series_are_built_on_first_access(app, ctx, make_candidate, monkeypatch):
+    make_candidate(created_at=datetime(2026, 1, 15, tzinfo=timezone.utc))
+    db.session.commit()
+    # date_trunc есть только в PostgreSQL
+    monkeypatch.setattr(seasonal_forecast, '_aggregate_months',
+                        lambda start, end: [(None, datetime(2026, 1, 1), 1, None)])
+
+    history, forecast = seasonal_forecast.get_seasonal_data(months=120)
+
+    assert history[0].month == date(2026, 1, 1) and history[0].applications == 1
+    assert forecast
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from app import db
+from app.models import Skill
+from app.utils import skill_extractor
+
+
+def add_skill(name, synonyms=()):
+    skill = Skill(name=name, normalized_name=name.lower(), category_id=1, synonyms=list(synonyms))
+    db.session.add(skill)
+    db.session.commit()
+    return skill
+
+
+def test_synonym_edit_in_another_process_rebuilds_automaton(app, ctx):
+    skill = add_skill('PostgreSQL')
+    assert skill.id not in skill_extractor.extract_skills('опыт с postgres')
+
+    # Событие ORM этого процесса не срабатывает: меняется только подпись справочника
+    db.session.execute(db.update(Skill).where(Skill.id == skill.id).values(synonyms=['postgres']))
+    db.session.commit()
+
+    assert skill.id in skill_extractor.extract_skills('опыт с postgres')
+
+
+def test_orm_changes_invalidate_automaton(app, ctx):
+    skill = add_skill('Kubernetes')
+    skill_extractor.get_skill_automaton()
+
+    skill.synonyms = ['k8s']
+    db.session.commit()
+
+    assert skill_extractor._automaton is None
+    assert skill.id in skill_extractor.extract_skills('k8s')
+
+
+def test_rename_to_same_length_in_another_process_rebuilds_automaton(app, ctx):
+    skill = add_skill('Redis')
+    assert skill.id in skill_extractor.extract_skills('кэш на redis')
+
+    db.session.execute(db.update(Skill).where(Skill.id == skill.id).values(name='Kafka', normalized_name='kafka'))
+    db.session.commit()
+
+    assert skill.id in skill_extractor.extract_skills('очереди на kafka')
+    assert skill.id not in skill_extractor.extract_skills('кэш на redis')
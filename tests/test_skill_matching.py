@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from app import db
+from app.models import CandidateSkill, CandidateVacancyScore, Skill, VacancySkill
+from app.utils.skill_extractor import save_candidate_skills
+from app.utils.skill_matching import ensure_vacancy_scores
+
+
+def scores(vacancy_id):
+    return dict(db.session.execute(
+        db.select(CandidateVacancyScore.candidate_id, CandidateVacancyScore.score)
+        .where(CandidateVacancyScore.vacancy_id == vacancy_id)
+    ).all())
+
+
+def test_scores_are_recomputed_after_vacancy_skills_change(app, ctx, make_candidate):
+    python, docker = Skill(name='Python', normalized_name='python', category_id=1), \
+        Skill(name='Docker', normalized_name='docker', category_id=1)
+    db.session.add_all([python, docker])
+    db.session.flush()
+    candidate = make_candidate(vacancy_id=7)
+    db.session.flush()
+    db.session.add_all([
+        CandidateSkill(candidate_id=candidate.id, skill_id=python.id, level=5, extracted_from='resume_text'),
+        VacancySkill(vacancy_id=7, skill_id=python.id, importance=5),
+        VacancySkill(vacancy_id=7, skill_id=docker.id, importance=5),
+    ])
+    db.session.commit()
+
+    assert ensure_vacancy_scores(7) == 1
+    before = scores(7)[candidate.id]
+    assert ensure_vacancy_scores(7) == 0
+
+    # Docker больше не нужен: кандидат закрывает все навыки вакансии
+    db.session.execute(db.delete(VacancySkill).where(VacancySkill.skill_id == docker.id))
+    db.session.commit()
+
+    assert ensure_vacancy_scores(7) == 1
+    assert scores(7)[candidate.id] > before
+
+
+def test_rewriting_candidate_skills_drops_their_scores(app, ctx, make_candidate):
+    skill = Skill(name='Kotlin', normalized_name='kotlin', category_id=1)
+    db.session.add(skill)
+    db.session.flush()
+    candidate = make_candidate(vacancy_id=3, resume_text='Опыт разработки на Java')
+    db.session.add(VacancySkill(vacancy_id=3, skill_id=skill.id, importance=3))
+    db.session.commit()
+    ensure_vacancy_scores(3)
+    assert scores(3)[candidate.id] == 0
+
+    candidate.resume_text = 'Опыт разработки на Kotlin'
+    save_candidate_skills(candidate)
+
+    assert candidate.id not in scores(3)
+    assert ensure_vacancy_scores(3) == 1
+    assert scores(3)[candidate.id] > 0
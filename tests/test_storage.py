@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+from app import db
+from app.models import StoredFileRef
+from app.utils.storage import get_storage, save_file, add_reference, count_references
+from app.utils.previews import preview_key, page_name, THUMBNAIL
+
+CONTENT = b'%PDF-1.4 resume'
+
+
+def upload(client, content=CONTENT, name='resume.pdf'):
+    response = client.post('/files/upload', data={'file': (io.BytesIO(content), name)},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    return response.get_json()['filename']
+
+
+def stored_content(app):
+    with app.app_context():
+        return save_file(io.BytesIO(CONTENT), 'pdf')
+
+
+def test_save_deduplicates_identical_content(app, ctx):
+    first = save_file(io.BytesIO(CONTENT), 'PDF')
+    second = save_file(io.BytesIO(CONTENT), 'pdf')
+    other = save_file(io.BytesIO(CONTENT + b'!'), 'pdf')
+
+    assert first.key == second.key
+    assert not first.deduplicated and second.deduplicated
+    assert other.key != first.key
+    assert first.key.startswith(f"{first.sha256[:2]}/{first.sha256[2:4]}/")
+    assert os.path.isfile(first.reference)
+
+
+def test_upload_registers_owner_per_upload(app, make_user, login):
+    alice, bob = make_user(), make_user()
+    filename = upload(login(alice))
+    assert upload(login(bob)) == filename
+
+    stored = stored_content(app)
+    with app.app_context():
+        owners = db.session.scalars(
+            db.select(StoredFileRef.user_id).where(StoredFileRef.reference == stored.reference)
+        ).all()
+    assert sorted(owners) == [alice, bob]
+
+
+def test_delete_keeps_shared_file_until_last_reference(app, make_user, login):
+    alice, bob = make_user(), make_user()
+    filename = upload(login(alice))
+    upload(login(bob))
+
+    key = stored_content(app).key
+    with app.app_context():
+        storage = get_storage()
+        for name in (THUMBNAIL, page_name(1)):
+            storage.put(preview_key(key, name), b'jpeg')
+
+    # Файл загружен двумя пользователями: удаление одним только снимает его ссылку
+    assert login(alice).post(f'/files/delete/{filename}').status_code == 200
+    with app.app_context():
+        assert storage.exists(key)
+        assert storage.exists(preview_key(key, THUMBNAIL))
+
+    # Последняя ссылка: удаляются файл и превью
+    assert login(bob).post(f'/files/delete/{filename}').status_code == 200
+    with app.app_context():
+        assert not storage.exists(key)
+        assert not storage.exists(preview_key(key, THUMBNAIL))
+        assert not storage.exists(preview_key(key, page_name(1)))
+
+
+def test_delete_keeps_file_used_by_candidate_resume(app, make_user, make_candidate, login):
+    alice = make_user()
+    filename = upload(login(alice))
+
+    # Такое же резюме прислал кандидат
+    stored = stored_content(app)
+    with app.app_context():
+        candidate = make_candidate(user_id=alice, resume_path=stored.reference)
+        add_reference(stored.reference, candidate=candidate)
+        db.session.commit()
+
+    assert login(alice).post(f'/files/delete/{filename}').status_code == 200
+    with app.app_context():
+        assert get_storage().exists(stored.key)
+        assert count_references(stored.reference) == 1
+
+
+def test_delete_requires_ownership(app, make_user, login):
+    alice, mallory, admin = make_user(), make_user(), make_user(role='admin')
+    filename = upload(login(alice))
+
+    assert login(mallory).post(f'/files/delete/{filename}').status_code == 403
+    # Администратор не удаляет файл, у которого есть владельцы
+    assert login(admin).post(f'/files/delete/{filename}').status_code == 409
+
+    stored = stored_content(app)
+    with app.app_context():
+        assert get_storage().exists(stored.key)
+        assert count_references(stored.reference) == 1
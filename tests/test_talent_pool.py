@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+from app import db
+from app.models import AnalysisJob, Vacancy
+from app.utils import analysis_jobs, candidate_search, talent_pool
+
+
+def make_vacancy(user_id):
+    vacancy = Vacancy(title='Backend-разработчик', id_c_employment_type=1, description_tasks='API',
+                      description_conditions='Офис', ideal_profile='Python', created_by=user_id)
+    db.session.add(vacancy)
+    db.session.flush()
+    return vacancy
+
+
+class FakeIndex:
+    def __init__(self, hits):
+        self.hits = hits
+        self.requests = []
+
+    def search(self, vector, k, candidate_ids=None):
+        assert candidate_ids is None, 'id выборки не передаются в индекс'
+        self.requests.append(k)
+        return self.hits[:k]
+
+
+def test_vector_hits_are_filtered_by_pool_in_sql(app, make_user, make_candidate, monkeypatch):
+    hr, other_hr = make_user(), make_user()
+    with app.app_context():
+        own, foreign, target = make_vacancy(hr), make_vacancy(other_hr), make_vacancy(hr)
+        candidates = [make_candidate(vacancy_id=vacancy.id) for vacancy in (own, own, foreign, target)]
+        db.session.commit()
+        # Кандидат другого HR-менеджера и откликнувшийся на эту вакансию не подходят
+        own_ids, foreign_id, applicant_id = [candidates[0].id, candidates[1].id], candidates[2].id, candidates[3].id
+
+        index = FakeIndex([(foreign_id, 0.99), (applicant_id, 0.95), (own_ids[0], 0.9), (own_ids[1], 0.8)])
+        monkeypatch.setattr(candidate_search, 'embeddings_enabled', lambda config=None: True)
+        monkeypatch.setattr(candidate_search, 'embed_text', lambda text, config=None: np.ones(2, dtype=np.float32))
+        monkeypatch.setattr(candidate_search, 'get_index', lambda: index)
+        monkeypatch.setattr(talent_pool, '_skill_weights', lambda vacancy: ([], np.zeros(0), np.zeros(0, dtype=bool)))
+        app.config.update(REMATCH_VECTOR_CANDIDATES=1, REMATCH_VECTOR_OVERFETCH=4)
+
+        result = talent_pool.prefilter(target)
+
+    assert index.requests == [4]
+    assert [item['candidate_id'] for item in result] == [own_ids[0]]
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Задачи, отправленные в пул потоков (без запуска)"""
+    calls = []
+
+    class Executor:
+        def submit(self, func, *args):
+            calls.append(args[1:])
+
+    monkeypatch.setattr(analysis_jobs, '_get_executor', lambda: Executor())
+    return calls
+
+
+def test_rematch_is_queued_once_while_waiting(app, ctx, make_user, submitted):
+    vacancy = make_vacancy(make_user())
+    db.session.commit()
+
+    first = talent_pool.schedule_rematch(vacancy)
+    second = talent_pool.schedule_rematch(vacancy)
+
+    assert first.id == second.id
+    assert first.kind == AnalysisJob.KIND_REMATCH and first.status == AnalysisJob.STATUS_QUEUED
+    assert submitted == [(vacancy.id,)]
+
+
+def test_rematch_queue_runs_jobs_one_at_a_time(app, ctx, make_user, submitted, monkeypatch):
+    vacancy = make_vacancy(make_user())
+    db.session.commit()
+    runs = []
+    monkeypatch.setattr(talent_pool, 'rematch_vacancy', lambda vacancy_id: runs.append(vacancy_id))
+
+    running = analysis_jobs.enqueue_rematch(vacancy.id)
+    assert analysis_jobs._claim_rematch(vacancy.id) == running.id
+    # Вакансию изменили во время подбора: новая задача ждет завершения текущей
+    queued = analysis_jobs.enqueue_rematch(vacancy.id)
+    assert queued.id != running.id
+    assert analysis_jobs.run_rematch_queue(vacancy.id) == 0
+
+    analysis_jobs._update(running.id, status=AnalysisJob.STATUS_DONE)
+    assert analysis_jobs.run_queued_rematches() == 1
+    assert runs == [vacancy.id]
+    assert analysis_jobs.get_job(queued.id).status == AnalysisJob.STATUS_DONE
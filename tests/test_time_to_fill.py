@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from app import db
+from app.models import Vacancy
+from app.utils import time_to_fill
+
+
+@pytest.fixture
+def models_folder(app, tmp_path, monkeypatch):
+    app.config['ML_MODELS_FOLDER'] = str(tmp_path / 'ml_models')
+    monkeypatch.setattr(time_to_fill, '_model', None)
+    monkeypatch.setattr(time_to_fill, '_model_mtime', None)
+
+
+def add_vacancy(number, status='active', days=None, difficulty='medium'):
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(days=number)
+    vacancy = Vacancy(
+        title=f'Вакансия {number}', id_c_employment_type=1 + number % 2, description_tasks='-',
+        description_conditions='-', ideal_profile='-', status=status, difficulty_level=difficulty,
+        created_at=created_at, closed_at=created_at + timedelta(days=days) if days is not None else None
+    )
+    db.session.add(vacancy)
+    return vacancy
+
+
+def test_open_vacancies_use_baseline_without_model(app, ctx, models_folder):
+    add_vacancy(1, difficulty='hard')
+    db.session.commit()
+
+    forecast = time_to_fill.predict_open_vacancies()
+
+    assert forecast['model'] is None and forecast['baseline']
+    assert [(item['predicted_days'], item['probability']) for item in forecast['predictions']] == [(67, 10)]
+
+
+def test_residuals_come_from_cross_validation(app, ctx, models_folder):
+    pytest.importorskip('sklearn')
+    rng = np.random.default_rng(0)
+    for number in range(40):
+        add_vacancy(number, status='closed', days=int(rng.integers(5, 90)))
+    db.session.commit()
+
+    meta = time_to_fill.train_model(force=True)
+    artifact = time_to_fill.load_model()
+    rows = time_to_fill._vacancy_rows('closed')
+    target = np.log1p([time_to_fill._days_between(row.created_at, row.closed_at) for row in rows])
+    in_sample = target - artifact['estimator'].predict([time_to_fill._features(row) for row in rows])
+
+    assert meta['cv_folds'] == time_to_fill.CV_FOLDS
+    # Остатки на обучающей выборке занижают разброс шумной цели
+    assert np.std(artifact['residuals']) > np.std(in_sample)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from app import db
+from app.models import User
+from app.utils.user_cache import load_cached_user
+
+
+def block_elsewhere(user_id):
+    """Изменение пользователя в другом процессе: снимок этого процесса не сбрасывается"""
+    db.session.execute(db.update(User).where(User.id == user_id).values(is_active=False, role='candidate'))
+    db.session.commit()
+
+
+def test_auth_fields_are_cached_within_auth_ttl(app, ctx, make_user):
+    app.config['USER_AUTH_CACHE_TTL'] = 3600
+    user_id = make_user()
+    assert load_cached_user(user_id).is_active
+
+    block_elsewhere(user_id)
+
+    assert load_cached_user(user_id).is_active
+
+
+def test_auth_fields_are_rechecked_after_auth_ttl(app, ctx, make_user):
+    app.config['USER_AUTH_CACHE_TTL'] = 0
+    user_id = make_user()
+    assert load_cached_user(user_id).is_hr
+
+    block_elsewhere(user_id)
+    user = load_cached_user(user_id)
+
+    assert not user.is_active and not user.is_hr
+
+
+def test_deleted_user_is_not_served_from_cache(app, ctx, make_user):
+    app.config['USER_AUTH_CACHE_TTL'] = 0
+    user_id = make_user()
+    load_cached_user(user_id)
+
+    db.session.execute(db.delete(User).where(User.id == user_id))
+    db.session.commit()
+
+    assert load_cached_user(user_id) is None